@@ -4,22 +4,23 @@ from flask_cors import CORS
 from config import Config, Testconfig
 from flasgger import Swagger
 from dotenv import load_dotenv
+from app.replica import RoutingSession
 import os
 
-# Initialize the database instance globally
-db = SQLAlchemy()
+# Initialize the database instance globally (the session class routes reads to the replica when one is configured)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 load_dotenv()  # Loads variables from .env into environment
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
 # run.py run this function to initialise and run Flask app
-def create_app(test_config=False):
+def create_app(test_config=False, replica_uri=None, async_driver=False):
 
     # Create the Flask app instance
     app = Flask(__name__)
 
 
-    CORS(app, origins=["https://wfhscheduler.netlify.app"]) # CORS configuration --> allowing frontend vue to make request to flask backend
+    CORS(app, origins=["https://wfhscheduler.netlify.app"], expose_headers=["X-Next-Cursor", "X-Change-Token", "ETag"]) # CORS configuration --> allowing frontend vue to make request to flask backend
 
     # Initialize Flasgger
     swagger = Swagger(app)
@@ -32,9 +33,62 @@ def create_app(test_config=False):
         # Load app configuration
         app.config.from_object(Config)
 
+    # Optional read replica for the GET requests of the schedule and staff blueprints
+    replica_uri = replica_uri or app.config.get('REPLICA_DATABASE_URI')
+
+    # ASGI mode (app/asgi.py): the same databases through their asyncio drivers
+    if async_driver:
+        from app.asgi import async_uri
+        app.config['SQLALCHEMY_DATABASE_URI'] = async_uri(app.config['SQLALCHEMY_DATABASE_URI'])
+        replica_uri = async_uri(replica_uri) if replica_uri else None
+
+    # app.json encodes with orjson when it is installed (JSON_PROVIDER), dates come out in ISO format
+    from app.json_provider import init_json_provider
+    init_json_provider(app)
+
+    # gzip / brotli bodies above COMPRESSION_MIN_SIZE, compressed bytes kept by ETag
+    from app.compression import init_compression
+    init_compression(app)
+
+    # Pool size, overflow, timeout, recycle and pre-ping from the DB_POOL_* settings
+    from app.pool import engine_options
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+
+    if replica_uri:
+        from app.replica import init_replica
+        init_replica(app, replica_uri, engine_options(dict(app.config, SQLALCHEMY_DATABASE_URI=replica_uri)))
+
     # Initialize extension with the app
     db.init_app(app)
-    CORS(app) # CORS configuration --> allowing frontend vue to make request to flask backend
+    # checkout counters and connect() wait times of the pool (GET /api/monitoring/db_pool)
+    from app.pool import instrument_engine
+    with app.app_context():
+        instrument_engine(db.engine)
+    # X-Next-Cursor / X-Change-Token / ETag: paging, sync and caching headers of the schedule endpoints, readable by the frontend
+    CORS(app, expose_headers=["X-Next-Cursor", "X-Change-Token", "ETag"]) # CORS configuration --> allowing frontend vue to make request to flask backend
+
+    # per manager WFH capacity counters shared by the application and schedule blueprints
+    from app.capacity import init_capacity_cache
+    init_capacity_cache(app)
+
+    # reporting hierarchy used by the HRO views
+    from app.hierarchy import init_org_hierarchy
+    init_org_hierarchy(app)
+
+    # pre-serialized WFH / In-Office entries of each employee in the schedule responses
+    from app.schedule.fragments import init_fragment_cache
+    init_fragment_cache(app)
+
+    # counters of the nightly HR dashboard snapshots (app/schedule/snapshots.py)
+    from app.schedule.snapshots import init_snapshots
+    init_snapshots(app)
+
+    # change feed of schedule writes (session hooks) for the since= sync of the schedule views
+    from app import changes
+
+    # login notifications are posted to Telegram by a background worker
+    from app.monitoring.dispatcher import init_telegram_dispatcher
+    init_telegram_dispatcher(app, app.config.get('TELEGRAM_BOT_TOKEN', TELEGRAM_BOT_TOKEN), app.config.get('TELEGRAM_CHAT_ID', TELEGRAM_CHAT_ID))
 
     # Import and register blueprints (modular routing)
     # when create a function e.g. schedule, create a folder and an empty init file to treat that folder as package
@@ -1,8 +1,16 @@
 import math
-from flask import jsonify, request
+from flask import current_app, jsonify, request
 from app.application import application_blueprint  # Import the blueprint
 from app import db
 from app.models import WFHApplication, WFHSchedule,Employee, WFHWithdrawal
+from app.application.queries import pending_requests, team_size
+from app.application.stale import reject_stale_requests, reject_stale_requests_in_chunks
+from app.application.batch import apply_batch
+from app.application.conflicts import HALF_DAYS, load_slot_indexes
+from app.application.recurring import (application_occurrences, insert_schedules, materialize_recurrences, plan_application,
+                                       slot_indexes)
+from app.capacity import get_capacity_cache
+from app.schedule.window import schedule_window
 from sqlalchemy import and_,or_
 from sqlalchemy.exc import SQLAlchemyError, OperationalError
 from datetime import datetime, timedelta
@@ -51,6 +59,24 @@ def apply_wfh(id):
             end_date:
               type: string
               format: date
+              description: Optional with a recurrence (open ended)
+            recurrence:
+              type: object
+              description: Optional pattern, default every week on the start date's weekday
+              properties:
+                interval:
+                  type: integer
+                  description: Weeks between occurrences
+                weekdays:
+                  type: array
+                  items:
+                    type: string
+                    enum: [MO, TU, WE, TH, FR, SA, SU]
+                exclude:
+                  type: array
+                  items:
+                    type: string
+                    format: date
     responses:
       201:
         description: WFH application submitted successfully
@@ -66,44 +92,26 @@ def apply_wfh(id):
         if not json_data: # checks for first possible error
             return jsonify({"error": "JSON data passed from client side is insufficient"}), 400
 
-        # checks if wfh application is day request or recurring
-        date_list = [] 
+        start_date = datetime.strptime(json_data['start_date'] , '%Y-%m-%dT%H:%M:%S.%fZ').date()
+        end_date = datetime.strptime(json_data['end_date'] , '%Y-%m-%dT%H:%M:%S.%fZ').date() if json_data.get('end_date') else None
 
-        json_data['start_date'] = datetime.strptime(json_data['start_date'] , '%Y-%m-%dT%H:%M:%S.%fZ')
-        json_data['start_date'] = json_data['start_date'].strftime('%Y-%m-%d')
+        # same day request is a single date, recurring is every week from the start date (start date is tue means
+        # every tue), end date doesnt have to include. An optional "recurrence" object changes the pattern:
+        # {"interval": 2, "weekdays": ["MO", "WE"], "exclude": ["2024-12-25"]}, without end_date it is open ended.
+        # Schedules are created up to the recurrence horizon, later dates by the daily job (app/application/recurring.py)
+        try:
+            plan = plan_application(start_date, end_date, json_data.get('recurrence'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        date_list = plan.dates
 
-        json_data['end_date'] = datetime.strptime(json_data['end_date'] , '%Y-%m-%dT%H:%M:%S.%fZ')
-        json_data['end_date'] = json_data['end_date'].strftime('%Y-%m-%d')
+        if json_data["time_slot"] not in HALF_DAYS:
+            return jsonify({'error': f"time_slot must be one of {', '.join(HALF_DAYS)}."}), 400
 
-
-
-        if json_data['start_date'] == json_data['end_date']: #same day request
-            date_list.append(json_data["start_date"])
-        else:
-            # base on start date, start date is tue means every tue, end date doesnt have to include
-            start_date = datetime.strptime(json_data['start_date'], '%Y-%m-%d')
-            end_date = datetime.strptime(json_data['end_date'], '%Y-%m-%d')
-            current_date = start_date
-            while current_date <= end_date:
-                date_list.append(current_date.strftime('%Y-%m-%d'))
-                current_date += timedelta(days=7)
-                
-        if json_data["time_slot"] == "AM" or json_data["time_slot"] == "PM":
-            conflict_wfh_count = db.session.query(WFHApplication).join(WFHSchedule).filter(
-                WFHApplication.staff_id == id,
-                WFHSchedule.wfh_date.in_(date_list),
-                or_(WFHApplication.time_slot == json_data["time_slot"],WFHApplication.time_slot == "FULL"),
-                or_(WFHSchedule.status == 'Approved', WFHSchedule.status == 'Pending_Approval', WFHSchedule.status == 'Pending_Withdrawal')
-                ).count()
-        else:
-            
-            conflict_wfh_count = db.session.query(WFHApplication).join(WFHSchedule).filter(
-                WFHApplication.staff_id == id,
-                WFHSchedule.wfh_date.in_(date_list),
-                or_(WFHSchedule.status == 'Approved', WFHSchedule.status == 'Pending_Approval', WFHSchedule.status == 'Pending_Withdrawal')
-                ).count()
-            
-        
+        # AM / PM clash with themselves and FULL, FULL with everything: the dates overlapping an active schedule or
+        # a not yet materialized recurring date of the staff (app/application/conflicts.py)
+        booked = slot_indexes([id], date_list[0], date_list[-1])[id]
+        conflict_wfh_count = len(booked.conflicting_dates(json_data["time_slot"], date_list))
 
         # Case where there is no current application in that slot that is Approved or pending
         if conflict_wfh_count == 0:
@@ -113,7 +121,9 @@ def apply_wfh(id):
                 staff_id=id,
                 time_slot=json_data['time_slot'],
                 staff_apply_reason=json_data['apply_reason'],
-                manager_reject_reason=None  # Set to None initially, can be updated later
+                manager_reject_reason=None,  # Set to None initially, can be updated later
+                recurrence=plan.recurrence,
+                materialized_until=plan.materialized_until
             )
         
             # Add the WFHApplication (parent)
@@ -126,20 +136,21 @@ def apply_wfh(id):
             else:
                 new_status = 'Pending_Approval'
 
-            for date_inst in date_list:
-                # Create a WFHSchedule instance (child table) using the foreign key (application_id)
-                    
-                new_schedule = WFHSchedule(
-                    application_id=new_application.application_id,  # Use the ID from the parent
-                    wfh_date=date_inst,
-                    status=new_status,  # Initial status, can be updated later (REMOVED staff_withdraw_reason here 13/10)
-                    manager_withdraw_reason=None
-                )
-
-                # Add the WFHSchedule (child)
-                db.session.add(new_schedule)
+            # WFHSchedule rows (child table) using the foreign key (application_id), one bulk INSERT for every date
+            # of a recurring request instead of one INSERT per ORM object
+            insert_schedules([{
+                'application_id': new_application.application_id,  # Use the ID from the parent
+                'wfh_date': date_inst,
+                'status': new_status,  # Initial status, can be updated later (REMOVED staff_withdraw_reason here 13/10)
+                'manager_withdraw_reason': None
+            } for date_inst in plan.schedules])
+
             # Commit the transaction to save both the parent and child objects
             db.session.commit()
+
+            # the bulk INSERT skips the capacity hooks, an approved application takes up slots
+            if new_status == 'Approved' and plan.schedules:
+                get_capacity_cache().invalidate()
             return jsonify({'success': 'Application Success!'}), 201
         
         elif conflict_wfh_count > 0 and len(date_list) == 1: 
@@ -162,6 +173,75 @@ def apply_wfh(id):
     except Exception as e:
         return jsonify({'error': 'An unexpected error occurred.'}), 500
 
+@application_blueprint.route('/apply_batch', methods=['POST'])
+def apply_wfh_batch():
+    '''
+    Function: Submits many WFH applications in one call (e.g. HR importing recurring arrangements)
+    1. Receive a JSON list of {"staff_id": 140002, "time_slot": "AM", "start_date": "2024-10-10", "end_date": "2024-12-26", "apply_reason": ""}
+       (or {"items": [...]}), dates as in apply_wfh or plain YYYY-MM-DD
+    2. Conflicts with existing applications and with earlier items of the batch are found with one query
+    3. Valid items are inserted in one transaction, invalid ones are reported without stopping the rest
+    Returns one result per item in order, 201 if any application was created, else 400
+    ---
+    tags:
+      - Apply
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              staff_id:
+                type: integer
+              time_slot:
+                type: string
+              apply_reason:
+                type: string
+              start_date:
+                type: string
+                format: date
+              end_date:
+                type: string
+                format: date
+    responses:
+      201:
+        description: At least one application submitted, per item results
+      400:
+        description: Bad request or every item rejected
+      500:
+        description: Internal server error
+    '''
+    try:
+        json_data = request.get_json(silent=True)
+        items = json_data.get('items') if isinstance(json_data, dict) else json_data
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "A non-empty list of applications is required."}), 400
+        limit = current_app.config.get('APPLY_BATCH_LIMIT', 1000)
+        if len(items) > limit:
+            return jsonify({"error": f"At most {limit} applications per batch."}), 400
+
+        results = apply_batch(items)
+        created = sum(1 for result in results if result['status'] == 201)
+        return jsonify({'created': created, 'rejected': len(results) - created, 'results': results}), 201 if created else 400
+
+    # nothing is committed unless every accepted item was inserted
+    except OperationalError as e:
+        db.session.rollback()
+        return jsonify({'error': 'Database connection issue.'}), 500
+
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({'error': 'Database query failed.'}), 500
+
+    # Catch unexpected errors (everything else)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception('apply_batch failed')
+        return jsonify({'error': 'An unexpected error occurred.'}), 500
+
 @application_blueprint.route('/withdraw/<int:id>', methods=['POST'])
 def withdrawal_wfh(id):
     """
@@ -279,27 +359,21 @@ def withdrawal_wfh(id):
 def display_wfh_request(id):
     # need group recurring together
     try:
-        wfh_arrs = db.session.query(WFHSchedule).join(WFHApplication, WFHSchedule.application_id == WFHApplication.application_id).join(Employee, Employee.staff_id == WFHApplication.staff_id).join(WFHWithdrawal, WFHSchedule.wfh_id == WFHWithdrawal.wfh_id, isouter=True).filter(
-            Employee.reporting_manager == id, 
-            WFHApplication.manager_reject_reason.is_(None), 
-            WFHSchedule.manager_withdraw_reason.is_(None),
-            or_(WFHSchedule.status == 'Pending_Approval', WFHSchedule.status == 'Pending_Withdrawal')
-            ).all()
-
+        # pending schedules with their application, employee and latest withdrawal reason (single query)
+        wfh_arrs = pending_requests(id)
 
         # Initialise return list
         schedule_list = []
         application_grp = {}
 
-        # add all staff to the same team
-        team = []
-        # team.append(manager)
-        for staff in Employee.query.filter_by(reporting_manager=id).all(): 
-            if (id != staff.staff_id): # this line would make sure CEO is not inside 
-                team.append(staff)
+        # size of the team, CEO is not counted inside his own team
+        team_strength = team_size(id)
+
+        # approved counts of the team for every date with a pending request, keyed by (wfh_date, time_slot)
+        slot_counts = get_capacity_cache().slot_counts(id, [arr.wfh_date for arr, _ in wfh_arrs])
 
         # Create a list of schedules with time_slot and wfh_date
-        for arr in wfh_arrs:
+        for arr, withdraw_reason in wfh_arrs:
 
             # Extract the year, month, and day
             date = arr.wfh_date
@@ -320,109 +394,46 @@ def display_wfh_request(id):
             # to calculate the wfh %
             wfh_am_length = 0
             wfh_pm_length = 0
-            wfh_full_length = 0
             if arr.application.time_slot == 'AM':
-                wfh_date_calculation_am = db.session.query(WFHSchedule).join(WFHApplication, WFHSchedule.application_id == WFHApplication.application_id).join(Employee, Employee.staff_id == WFHApplication.staff_id).filter(
-                    Employee.reporting_manager == id, 
-                    WFHSchedule.wfh_date == arr.wfh_date,
-                    WFHApplication.time_slot == 'AM',
-                    or_(WFHSchedule.status == 'Approved', WFHSchedule.status == 'Pending_Withdrawal')
-                    ).all()
-
-                wfh_am_length = len(wfh_date_calculation_am)
-
+                wfh_am_length = slot_counts.get((arr.wfh_date, 'AM'), 0)
             elif arr.application.time_slot == 'PM':
-                wfh_date_calculation_pm = db.session.query(WFHSchedule).join(WFHApplication, WFHSchedule.application_id == WFHApplication.application_id).join(Employee, Employee.staff_id == WFHApplication.staff_id).filter(
-                    Employee.reporting_manager == id, 
-                    WFHSchedule.wfh_date == arr.wfh_date,
-                    WFHApplication.time_slot == 'PM',
-                    or_(WFHSchedule.status == 'Approved', WFHSchedule.status == 'Pending_Withdrawal')
-                    ).all()
-                wfh_pm_length = len(wfh_date_calculation_pm)
+                wfh_pm_length = slot_counts.get((arr.wfh_date, 'PM'), 0)
             else:
-                wfh_date_calculation_am = db.session.query(WFHSchedule).join(WFHApplication, WFHSchedule.application_id == WFHApplication.application_id).join(Employee, Employee.staff_id == WFHApplication.staff_id).filter(
-                    Employee.reporting_manager == id, 
-                    WFHSchedule.wfh_date == arr.wfh_date,
-                    WFHApplication.time_slot == 'AM',
-                    or_(WFHSchedule.status == 'Approved', WFHSchedule.status == 'Pending_Withdrawal')
-                    ).all()
-                wfh_am_length = len(wfh_date_calculation_am)
-                wfh_date_calculation_pm = db.session.query(WFHSchedule).join(WFHApplication, WFHSchedule.application_id == WFHApplication.application_id).join(Employee, Employee.staff_id == WFHApplication.staff_id).filter(
-                    Employee.reporting_manager == id, 
-                    WFHSchedule.wfh_date == arr.wfh_date,
-                    WFHApplication.time_slot == 'PM',
-                    or_(WFHSchedule.status == 'Approved', WFHSchedule.status == 'Pending_Withdrawal')
-                    ).all()
-                wfh_pm_length = len(wfh_date_calculation_pm)
-            
-            wfh_date_calculation_full = db.session.query(WFHSchedule).join(WFHApplication, WFHSchedule.application_id == WFHApplication.application_id).join(Employee, Employee.staff_id == WFHApplication.staff_id).filter(
-                Employee.reporting_manager == id, 
-                WFHSchedule.wfh_date == arr.wfh_date,
-                WFHApplication.time_slot == 'FULL',
-                or_(WFHSchedule.status == 'Approved', WFHSchedule.status == 'Pending_Withdrawal')
-                ).all()
-            wfh_full_length = len(wfh_date_calculation_full)
-            
+                wfh_am_length = slot_counts.get((arr.wfh_date, 'AM'), 0)
+                wfh_pm_length = slot_counts.get((arr.wfh_date, 'PM'), 0)
+            wfh_full_length = slot_counts.get((arr.wfh_date, 'FULL'), 0)
+
             percentage = 0
 
             if arr.application.time_slot == 'FULL':
-                am_percentage = 0
-                pm_percentage = 0
                 # Avoid division by zero
-            
-                am_percentage = math.floor(((wfh_am_length + wfh_full_length) / len(team)) * 100) if len(team) > 0 else 0
-                pm_percentage = math.floor(((wfh_pm_length+wfh_full_length) / len(team)) * 100)if len(team) > 0 else 0
+                am_percentage = math.floor(((wfh_am_length + wfh_full_length) / team_strength) * 100) if team_strength > 0 else 0
+                pm_percentage = math.floor(((wfh_pm_length + wfh_full_length) / team_strength) * 100) if team_strength > 0 else 0
                 percentage = [am_percentage, pm_percentage]
 
             else:
-                percentage = math.floor(((wfh_am_length+wfh_full_length+wfh_pm_length) / len(team)) * 100)if len(team) > 0 else 0
+                percentage = math.floor(((wfh_am_length + wfh_full_length + wfh_pm_length) / team_strength) * 100) if team_strength > 0 else 0
 
             if arr.status == "Pending_Approval":
                 app_id = arr.application_id
-                if app_id in application_grp:
-                    application_grp[app_id].append({
-                        'wfh_id': arr.wfh_id,
-                        'staff_id': arr.application.staff_id,
-                        'label': arr.application.time_slot,
-                        'dateStart': datetime(year, month, day, start_time, 0).isoformat(), 
-                        'dateEnd': datetime(year, month, day, end_time, 0).isoformat(),
-                        'class': arr.status,
-                        'description': arr.application.staff_apply_reason,
-                        'staff_name': arr.application.employee.staff_fname + " " + arr.application.employee.staff_lname,
-                        'staff_dept': arr.application.employee.position,
-                        'percentage': percentage
-                    })
-                else:
-                    application_grp[app_id] = [{
-                        'wfh_id': arr.wfh_id,
-                        'staff_id': arr.application.staff_id,
-                        'label': arr.application.time_slot,
-                        'dateStart': datetime(year, month, day, start_time, 0).isoformat(), 
-                        'dateEnd': datetime(year, month, day, end_time, 0).isoformat(),
-                        'class': arr.status,
-                        'description': arr.application.staff_apply_reason,
-                        'staff_name': arr.application.employee.staff_fname + " " + arr.application.employee.staff_lname,
-                        'staff_dept': arr.application.employee.position,
-                        'percentage': percentage
-                    }]
-                
+                description = arr.application.staff_apply_reason
             else:
                 # need change the test 
                 app_id = str(arr.application_id)  + "-" +  str(arr.wfh_id)
-                withdrawals = db.session.query(WFHWithdrawal).filter(WFHWithdrawal.wfh_id == arr.wfh_id).all()
-                withdrawal = withdrawals[len(withdrawals)-1]
-                application_grp[app_id] = [{
-                    'wfh_id': arr.wfh_id,
-                    'staff_id': arr.application.staff_id,
-                    'label': arr.application.time_slot,
-                    'dateStart': datetime(year, month, day, start_time, 0).isoformat(),
-                    'dateEnd': datetime(year, month, day, end_time, 0).isoformat(),
-                    'class': arr.status,
-                    'description': withdrawal.staff_withdraw_reason,
-                    'staff_name': arr.application.employee.staff_fname + " " + arr.application.employee.staff_lname,
-                    'staff_dept': arr.application.employee.position,
-                    'percentage': percentage
-                }]
+                description = withdraw_reason
+
+            application_grp.setdefault(app_id, []).append({
+                'wfh_id': arr.wfh_id,
+                'staff_id': arr.application.staff_id,
+                'label': arr.application.time_slot,
+                'dateStart': datetime(year, month, day, start_time, 0).isoformat(), 
+                'dateEnd': datetime(year, month, day, end_time, 0).isoformat(),
+                'class': arr.status,
+                'description': description,
+                'staff_name': arr.application.employee.staff_fname + " " + arr.application.employee.staff_lname,
+                'staff_dept': arr.application.employee.position,
+                'percentage': percentage
+            })
 
         # Looping through both keys and values
         for key, value in application_grp.items():
@@ -590,16 +601,12 @@ def manager_withdrawal_wfh(id):
             return jsonify({"error": "JSON data passed from client side is insufficient"}), 400
 
         # convert to yy-mm-dd format and change type to date
-        json_data['date'] = datetime.strptime(json_data['date'] , '%Y-%m-%dT%H:%M:%S.%fZ')
-        json_data['date'] = json_data['date'].strftime('%Y-%m-%d')
-        
-        wfh_arrs = db.session.query(WFHSchedule).join(WFHApplication).filter(
-            WFHApplication.staff_id == id,
-            or_(WFHApplication.time_slot == json_data['time_slot'], WFHApplication.time_slot == "FULL"),
-            WFHSchedule.wfh_date == json_data['date'],
-            WFHSchedule.status == "Approved"
-            ).first()
-            
+        wfh_date = datetime.strptime(json_data['date'] , '%Y-%m-%dT%H:%M:%S.%fZ').date()
+
+        # the approved schedule covering the requested slot: the same slot or a FULL day
+        approved = load_slot_indexes([id], wfh_date, wfh_date, statuses=('Approved',), with_schedules=True)[id]
+        covering = approved.covering(wfh_date, json_data['time_slot']) if json_data['time_slot'] in HALF_DAYS else []
+        wfh_arrs = covering[0] if covering else None
         
         if wfh_arrs == None:
             return jsonify({'failed': 'No approved arrangement found!'}), 201
@@ -648,67 +655,27 @@ def manager_withdrawal_wfh(id):
 @application_blueprint.route('/autoReject', methods=['GET'])
 def auto_reject():
     '''
-    Function: Checks status "Pending_Approval" every 24 hours if it is more than 2 months old from wfh arrangement date and changes status to "Rejected"
+    Function: Runs every 24 hours, requests still pending more than 2 months (8 weeks) after the wfh arrangement date are closed by the system
+    1. "Pending_Approval" --> whole application "Rejected", reason "rejected by system"
+    2. "Pending_Withdrawal" --> back to "Approved", withdrawal rejected by system
+    Returns the number of rows changed by each step
+    Optional ?chunk_size=N (default AUTO_REJECT_CHUNK_SIZE, 0 = one transaction) commits every N rows
+    and resumes from the last committed chunk if a previous run was killed
     '''
     try:
-        # Ensure the function runs within Flask's application context
-            print("function started for scheduler")
-            # Fetch all "Pending_Approval" WFH records
-            wfh_records = db.session.query(WFHSchedule).filter(
-                or_(WFHSchedule.status == "Pending_Approval", WFHSchedule.status == "Pending_Withdrawal")
-            ).all()
-            print("wfh records returned")
-
-            # Define the time range of 2 months
-            two_months = timedelta(weeks=8)
-
-            # Loop through each record
-            for record in wfh_records:
-                # Extract the year, month, and day
-                date = record.wfh_date
-                year = date.year
-                month = date.month
-                day = date.day
-
-                # Example current date (you can replace this with datetime.now() to get today's date)
-                current_date = datetime.now()
-
-                # Example Approved arrangement date (replace this with your actual date)
-                Approved_arrangement_date = datetime(year, month, day)  # example date in YYYY, MM, DD format
-
-                # Check if the Approved arrangement date is more than 2 months backward or 2 months forward
-                if current_date > (Approved_arrangement_date + two_months):
-                    print("Approved arrangement is more than 2 months forward. Changing status to Rejected.")
-                    if record.status == "Pending_Approval":
-                        print(record.application_id , "Pending_Approval")
-                        
-                        wfh_sch_app = db.session.query(WFHSchedule).filter(
-                            WFHSchedule.application_id == record.application_id
-                        ).all()
+        chunk_size = request.args.get('chunk_size', current_app.config.get('AUTO_REJECT_CHUNK_SIZE', 0), type=int)
+        if chunk_size < 0:
+            return jsonify({'error': 'chunk_size must be a positive integer.'}), 400
 
-                        for wfh_sch in wfh_sch_app:
-                            wfh_sch.status = "Rejected"
-                            print(wfh_sch.wfh_id)
-
-                        wfh_app_rec = db.session.query(WFHApplication).filter(
-                            (WFHApplication.application_id == record.application_id)
-                        ).first()
+        if chunk_size:
+            summary = reject_stale_requests_in_chunks(chunk_size)
+        else:
+            summary = reject_stale_requests()
+        return jsonify({'success': 'Auto Reject went through!', 'summary': summary}), 201
 
-                        wfh_app_rec.manager_reject_reason = "rejected by system"
-                    # elif record.status == "Pending_Withdrawal": # Pending_Withdrawal
-                    else:
-                        print(record.wfh_id, record.status)
-                        record.status = "Approved"
-                        wfh_app_rec = db.session.query(WFHWithdrawal).filter(
-                            WFHWithdrawal.wfh_id == record.wfh_id
-                        ).first()
-                        
-                        wfh_app_rec.manager_reject_withdrawal_reason = "rejected by system" if wfh_app_rec and wfh_app_rec.manager_reject_withdrawal_reason is None else None
-                
-                    db.session.commit()  # Commit all updates
-            return jsonify({'success': 'Auto Reject went through!'}), 201
-            
+    # nothing is committed unless every step succeeded
     except OperationalError as e:
+        db.session.rollback()
         return jsonify({'error': 'Database connection issue.'}), 500
 
     except SQLAlchemyError as e:
@@ -717,9 +684,76 @@ def auto_reject():
 
     # Catch unexpected errors (everything else)
     except Exception as e:
+        db.session.rollback()
         print(e)
         return jsonify({'error': 'An unexpected error occurred.'}), 500
 
 
 
 
+
+@application_blueprint.route('/materializeRecurrences', methods=['GET'])
+def materialize_recurrences_job():
+    '''
+    Function: Runs every 24 hours with auto reject, creates the schedules of recurring applications up to the
+    recurrence horizon (RECURRENCE_HORIZON_MONTHS ahead) so the schedule views see them
+    Occurrences clashing with a schedule booked in the meantime are skipped
+    Returns the number of applications extended and schedules created
+    '''
+    try:
+        summary = materialize_recurrences()
+        return jsonify({'success': 'Recurrences materialized!', 'summary': summary}), 201
+
+    # nothing is committed unless every application was extended
+    except OperationalError as e:
+        db.session.rollback()
+        return jsonify({'error': 'Database connection issue.'}), 500
+
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({'error': 'Database query failed.'}), 500
+
+    # Catch unexpected errors (everything else)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception('materialize_recurrences failed')
+        return jsonify({'error': 'An unexpected error occurred.'}), 500
+
+@application_blueprint.route('/recurrence/<int:id>', methods=['GET'])
+def application_recurrence(id):
+    '''
+    Function: Every date of application id between ?start= and ?end= (YYYY-MM-DD, default 2 months back and
+    3 months forward) with its status. Dates of a recurring application past its materialized schedules are
+    expanded from its rule ("projected": true, no wfh_id), for any window
+    '''
+    try:
+        application = db.session.get(WFHApplication, id)
+        if application is None:
+            return jsonify({'error': 'Application not found.'}), 404
+
+        # at most MAX_WINDOW_DAYS, an open-ended rule is only expanded over the window asked for
+        today = datetime.now().date()
+        try:
+            start, end = schedule_window(today - relativedelta(months=2), today + relativedelta(months=3))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({
+            'application_id': application.application_id,
+            'staff_id': application.staff_id,
+            'time_slot': application.time_slot,
+            'recurrence': application.recurrence,
+            'materialized_until': application.materialized_until.strftime('%Y-%m-%d') if application.materialized_until else None,
+            'occurrences': application_occurrences(application, start, end)
+        }), 200
+
+    except OperationalError as e:
+        return jsonify({'error': 'Database connection issue.'}), 500
+
+    except SQLAlchemyError as e:
+        return jsonify({'error': 'Database query failed.'}), 500
+
+    # Catch unexpected errors (everything else)
+    except Exception as e:
+        current_app.logger.exception('application_recurrence failed')
+        return jsonify({'error': 'An unexpected error occurred.'}), 500
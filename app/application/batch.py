@@ -0,0 +1,127 @@
+# Batch submission of WFH applications (POST /api/application/apply_batch)
+# Every item is checked against the stored schedules with one set-based query (plus the not yet materialized dates
+# of recurring applications), and against the items before it in the same batch. The accepted applications are
+# inserted in one flush and their schedules with one bulk INSERT, all in one transaction. Rejected items are
+# reported per item and do not stop the others.
+# The schedules need the generated application ids: MySQL cannot return the keys of a multi-row INSERT, so the
+# flush sends one INSERT per application there. Schedules, a dozen or more per recurring application, are bulk.
+
+from datetime import datetime
+
+from app import db
+from app.models import Employee, WFHApplication
+from app.application.recurring import insert_schedules, plan_application, slot_indexes
+from app.capacity import get_capacity_cache
+
+TIME_SLOTS = ('AM', 'PM', 'FULL')
+# the CEO's applications are approved on submission, as in apply_wfh
+CEO_STAFF_ID = 130002
+DATE_FORMATS = ('%Y-%m-%dT%H:%M:%S.%fZ', '%Y-%m-%d')
+
+
+class BatchItemError(ValueError):
+    pass
+
+
+def _parse_date(value):
+    # the frontend sends ISO timestamps, imports may send plain dates
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except (TypeError, ValueError):
+            continue
+    raise BatchItemError(f"Invalid date '{value}'.")
+
+
+def parse_item(item):
+    '''
+    Validated (staff_id, time_slot, apply_reason, Plan) of one batch item
+    {"staff_id": 140002, "time_slot": "AM", "start_date": "2024-10-10", "end_date": "2024-12-26", "apply_reason": ""}
+    with an optional "recurrence" as in apply_wfh (end_date may then be null, open ended).
+    Raises BatchItemError with the message for the item's result.
+    '''
+    if not isinstance(item, dict):
+        raise BatchItemError('Item must be an object.')
+    missing = [key for key in ('staff_id', 'time_slot', 'start_date') if key not in item]
+    if missing:
+        raise BatchItemError(f"Missing {', '.join(missing)}.")
+    if not isinstance(item['staff_id'], int) or isinstance(item['staff_id'], bool):
+        raise BatchItemError('staff_id must be an integer.')
+    if item['time_slot'] not in TIME_SLOTS:
+        raise BatchItemError(f"time_slot must be one of {', '.join(TIME_SLOTS)}.")
+    start_date = _parse_date(item['start_date'])
+    end_date = _parse_date(item['end_date']) if item.get('end_date') else None
+    try:
+        plan = plan_application(start_date, end_date, item.get('recurrence'))
+    except ValueError as e:
+        raise BatchItemError(str(e))
+    return item['staff_id'], item['time_slot'], item.get('apply_reason', ''), plan
+
+
+def apply_batch(items):
+    '''
+    Submits every valid, conflict free item. Returns one result per item, in order:
+    {"index", "staff_id", "status": 201, "application_id", "dates", "materialized_until"} or
+    {"index", "staff_id", "status": 400, "error"}, dates being the schedules created now
+    Commits once. The caller handles errors, nothing is committed on failure.
+    '''
+    results = [None] * len(items)
+    parsed = {}
+    for index, item in enumerate(items):
+        try:
+            parsed[index] = parse_item(item)
+        except BatchItemError as e:
+            results[index] = {'index': index, 'staff_id': item.get('staff_id') if isinstance(item, dict) else None,
+                              'status': 400, 'error': str(e)}
+
+    accepted = []  # (index, staff_id, time_slot, apply_reason, plan)
+    if parsed:
+        staff_ids = {staff_id for staff_id, _, _, _ in parsed.values()}
+        known_staff = {row[0] for row in db.session.query(Employee.staff_id).filter(Employee.staff_id.in_(staff_ids))}
+        all_dates = [wfh_date for _, _, _, plan in parsed.values() for wfh_date in plan.dates]
+        # schedules and not yet materialized recurring dates of every staff in the batch, one SlotIndex each
+        booked = slot_indexes(known_staff, min(all_dates), max(all_dates)) if known_staff else {}
+
+        for index, (staff_id, time_slot, apply_reason, plan) in parsed.items():
+            error = None
+            if staff_id not in known_staff:
+                error = 'No such staff.'
+            else:
+                clashing = booked[staff_id].conflicting_dates(time_slot, plan.dates)
+                if clashing:
+                    # same messages as apply_wfh
+                    error = 'Application already exists on some recurring days!' if len(clashing) < len(plan.dates) else 'Application already exists!'
+            if error:
+                results[index] = {'index': index, 'staff_id': staff_id, 'status': 400, 'error': error}
+                continue
+            # later items of the batch conflict with this one
+            for wfh_date in plan.dates:
+                booked[staff_id].add(wfh_date, time_slot)
+            accepted.append((index, staff_id, time_slot, apply_reason, plan))
+
+    if accepted:
+        applications = [WFHApplication(staff_id=staff_id, time_slot=time_slot, staff_apply_reason=apply_reason, manager_reject_reason=None,
+                                       recurrence=plan.recurrence, materialized_until=plan.materialized_until)
+                        for _, staff_id, time_slot, apply_reason, plan in accepted]
+        db.session.add_all(applications)
+        # one flush for the generated ids
+        db.session.flush()
+
+        schedules = []
+        approved = False
+        for (index, staff_id, _, _, plan), application in zip(accepted, applications):
+            status = 'Approved' if staff_id == CEO_STAFF_ID else 'Pending_Approval'
+            approved = approved or status == 'Approved'
+            schedules += [{'application_id': application.application_id, 'wfh_date': wfh_date, 'status': status,
+                           'manager_withdraw_reason': None} for wfh_date in plan.schedules]
+            results[index] = {'index': index, 'staff_id': staff_id, 'status': 201, 'application_id': application.application_id,
+                              'dates': [wfh_date.strftime('%Y-%m-%d') for wfh_date in plan.schedules],
+                              'materialized_until': plan.materialized_until.strftime('%Y-%m-%d') if plan.materialized_until else None}
+        insert_schedules(schedules)
+        db.session.commit()
+
+        # approved schedules count towards team capacity
+        if approved:
+            get_capacity_cache().invalidate()
+
+    return results
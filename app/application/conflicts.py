@@ -0,0 +1,92 @@
+# Slot conflict detection for the apply, batch apply and withdraw paths
+# Every day is two half-day intervals on one integer axis (day ordinal * 2): AM = [2d, 2d+1), PM = [2d+1, 2d+2),
+# FULL = [2d, 2d+2). A staff's active schedules of the requested span are loaded once into a SlotIndex, intervals
+# sorted by start. No booked interval is longer than the longest one stored (a FULL day), so the intervals that can
+# overlap a query start within max_length of it: a bisect finds them in O(log n), plus the k matches returned.
+# "AM and PM only clash with themselves, FULL clashes with everything" is interval overlap; "an approved arrangement
+# covering the requested slot" (manager withdraw) is interval containment.
+
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from app import db
+from app.models import WFHApplication, WFHSchedule
+from app.application.queries import ACTIVE_STATUSES
+
+HALF_DAYS = {'AM': (0, 1), 'PM': (1, 2), 'FULL': (0, 2)}
+
+
+def slot_interval(wfh_date, time_slot):
+    # [start, end) in half days, KeyError for a time slot other than AM/PM/FULL
+    first, last = HALF_DAYS[time_slot]
+    day = wfh_date.toordinal() * 2
+    return day + first, day + last
+
+
+class SlotIndex:
+    '''Booked half-day intervals of one staff, see the module comment.'''
+
+    def __init__(self):
+        self._intervals = []    # (start, end, sequence), sorted
+        self._items = []        # item of each sequence number
+        self._max_length = 0
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def add(self, wfh_date, time_slot, item=None):
+        start, end = slot_interval(wfh_date, time_slot)
+        insort(self._intervals, (start, end, len(self._items)))
+        self._items.append(item)
+        self._max_length = max(self._max_length, end - start)
+
+    def _candidates(self, start, end):
+        # stored intervals overlapping [start, end): they start before end and no earlier than start - max_length + 1
+        low = bisect_left(self._intervals, (start - self._max_length + 1,))
+        high = bisect_left(self._intervals, (end,))
+        return [interval for interval in self._intervals[low:high] if interval[1] > start]
+
+    def overlapping(self, wfh_date, time_slot):
+        # items of the booked slots sharing a half day with time_slot on wfh_date
+        return [self._items[sequence] for _, _, sequence in self._candidates(*slot_interval(wfh_date, time_slot))]
+
+    def covering(self, wfh_date, time_slot):
+        # items of the booked slots containing all of time_slot on wfh_date
+        start, end = slot_interval(wfh_date, time_slot)
+        return [self._items[sequence] for first, last, sequence in self._candidates(start, end) if first <= start and last >= end]
+
+    def conflicts(self, wfh_date, time_slot):
+        return bool(self._candidates(*slot_interval(wfh_date, time_slot)))
+
+    def conflicting_dates(self, time_slot, dates):
+        return [wfh_date for wfh_date in dates if self.conflicts(wfh_date, time_slot)]
+
+
+def load_slot_indexes(staff_ids, first_date, last_date, statuses=ACTIVE_STATUSES, with_schedules=False):
+    '''
+    {staff_id: SlotIndex} of the schedules in statuses between first_date and last_date, one query for every staff.
+    Items are the WFHSchedule rows with with_schedules, else None. Staff without schedules get an empty index.
+    '''
+    indexes = defaultdict(SlotIndex)
+    if with_schedules:
+        query = db.session.query(WFHSchedule, WFHApplication.staff_id, WFHApplication.time_slot)
+    else:
+        query = db.session.query(WFHApplication.staff_id, WFHSchedule.wfh_date, WFHApplication.time_slot)
+    rows = query.join(WFHSchedule, WFHSchedule.application_id == WFHApplication.application_id)\
+        .filter(
+            WFHApplication.staff_id.in_(list(staff_ids)),
+            WFHSchedule.wfh_date >= first_date,
+            WFHSchedule.wfh_date <= last_date,
+            WFHSchedule.status.in_(statuses)
+        ).all()
+    for row in rows:
+        if with_schedules:
+            schedule, staff_id, time_slot = row
+            wfh_date, item = schedule.wfh_date, schedule
+        else:
+            staff_id, wfh_date, time_slot = row
+            item = None
+        # rows with an unknown time slot cannot be placed on the axis, the SQL checks never matched them for AM/PM
+        if time_slot in HALF_DAYS:
+            indexes[staff_id].add(wfh_date, time_slot, item)
+    return indexes
@@ -0,0 +1,82 @@
+from app import db
+from app.models import WFHApplication, WFHSchedule, Employee, WFHWithdrawal
+from sqlalchemy import func, or_
+from sqlalchemy.orm import contains_eager
+
+# Statuses that count towards a team's WFH capacity for a given day
+CAPACITY_STATUSES = ('Approved', 'Pending_Withdrawal')
+# Statuses holding a slot, a new application on the same day and slot conflicts with them
+ACTIVE_STATUSES = ('Approved', 'Pending_Approval', 'Pending_Withdrawal')
+
+
+def pending_requests(manager_id):
+    '''
+    Returns (schedule, latest staff_withdraw_reason) pairs for every pending request of a manager's team.
+    Application and employee are loaded in the same statement so the caller never lazy loads per row.
+    '''
+    # latest withdrawal per schedule (highest withdrawal_id), joined back for its reason
+    latest_withdrawal = db.session.query(
+        WFHWithdrawal.wfh_id,
+        func.max(WFHWithdrawal.withdrawal_id).label('withdrawal_id')
+    ).group_by(WFHWithdrawal.wfh_id).subquery()
+
+    return db.session.query(WFHSchedule, WFHWithdrawal.staff_withdraw_reason)\
+        .join(WFHApplication, WFHSchedule.application_id == WFHApplication.application_id)\
+        .join(Employee, Employee.staff_id == WFHApplication.staff_id)\
+        .outerjoin(latest_withdrawal, latest_withdrawal.c.wfh_id == WFHSchedule.wfh_id)\
+        .outerjoin(WFHWithdrawal, WFHWithdrawal.withdrawal_id == latest_withdrawal.c.withdrawal_id)\
+        .options(contains_eager(WFHSchedule.application).contains_eager(WFHApplication.employee))\
+        .filter(
+            Employee.reporting_manager == manager_id,
+            WFHApplication.manager_reject_reason.is_(None),
+            WFHSchedule.manager_withdraw_reason.is_(None),
+            or_(WFHSchedule.status == 'Pending_Approval', WFHSchedule.status == 'Pending_Withdrawal')
+        ).order_by(WFHSchedule.application_id, WFHSchedule.wfh_id).all()
+
+
+def team_size(manager_id):
+    # staff reporting to the manager, excluding the manager (CEO reports to himself)
+    return db.session.query(func.count(Employee.staff_id)).filter(
+        Employee.reporting_manager == manager_id,
+        Employee.staff_id != manager_id
+    ).scalar()
+
+
+def team_slot_counts(manager_id, dates):
+    '''
+    Returns {(wfh_date, time_slot): count} of Approved/Pending_Withdrawal schedules in a manager's team,
+    computed with a single GROUP BY over the given dates.
+    '''
+    if not dates:
+        return {}
+
+    rows = db.session.query(
+        WFHSchedule.wfh_date,
+        WFHApplication.time_slot,
+        func.count(WFHSchedule.wfh_id)
+    ).join(WFHApplication, WFHSchedule.application_id == WFHApplication.application_id)\
+        .join(Employee, Employee.staff_id == WFHApplication.staff_id)\
+        .filter(
+            Employee.reporting_manager == manager_id,
+            WFHSchedule.wfh_date.in_(sorted(set(dates))),
+            WFHSchedule.status.in_(CAPACITY_STATUSES)
+        ).group_by(WFHSchedule.wfh_date, WFHApplication.time_slot).all()
+
+    return {(wfh_date, time_slot): count for wfh_date, time_slot, count in rows}
+
+
+def team_records(manager_id, start, end):
+    '''
+    Returns (staff_id, wfh_date, time_slot) of Approved/Pending_Withdrawal schedules in a manager's team
+    with wfh_date between start and end (inclusive).
+    '''
+    return db.session.query(Employee.staff_id, WFHSchedule.wfh_date, WFHApplication.time_slot)\
+        .join(WFHApplication, Employee.staff_id == WFHApplication.staff_id)\
+        .join(WFHSchedule, WFHApplication.application_id == WFHSchedule.application_id)\
+        .filter(
+            Employee.reporting_manager == manager_id,
+            WFHSchedule.status.in_(CAPACITY_STATUSES),
+            WFHSchedule.wfh_date >= start,
+            WFHSchedule.wfh_date <= end
+        ).all()
+
@@ -0,0 +1,253 @@
+# Recurring WFH applications: recurrence rules, lazy expansion and the bulk INSERT of their schedules
+# A recurring application keeps its pattern in wfh_application.recurrence as RRULE text (DTSTART / RRULE / EXDATE
+# lines): every N weeks on some weekdays, up to an end date or open ended, minus excluded dates. Its schedules only
+# exist up to wfh_application.materialized_until, a horizon RECURRENCE_HORIZON_MONTHS ahead that covers the schedule
+# views (+3 months); the daily job (materialize_recurrences) moves it forward. Later occurrences are expanded from
+# the rule for whatever window asks: the conflict checks (slot_indexes) and GET /api/application/recurrence/<id>
+# see them without rows. Long running arrangements hold a few months of schedules instead of years of them, and
+# every other reader (capacity, change feed, pending requests, day grid) keeps working on wfh_schedule rows.
+# materialized_until is NULL once every occurrence has its schedule, and for applications without a rule.
+# Schedules go out as one executemany (PyMySQL sends a single multi-row INSERT), see benchmarks/bench_recurring_insert.py.
+
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+from dateutil.relativedelta import relativedelta
+from dateutil.rrule import rrulestr
+from flask import current_app
+from sqlalchemy import insert, select
+
+from app import db
+from app.models import WFHApplication, WFHSchedule
+from app.application.conflicts import HALF_DAYS, load_slot_indexes
+from app.capacity import get_capacity_cache
+from app.changes import record_changes
+
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+MAX_INTERVAL = 52
+
+# recurrence: RRULE text or None, dates: the occurrences to check for conflicts, schedules: those materialized now
+Plan = namedtuple('Plan', ['recurrence', 'dates', 'schedules', 'materialized_until'])
+
+
+def build_rule(start_date, end_date=None, interval=1, weekdays=None, exclude=()):
+    # every interval weeks on weekdays (default: start_date's weekday) from start_date, up to end_date if given
+    parts = ['FREQ=WEEKLY', f'INTERVAL={interval}', 'BYDAY=' + ','.join(weekdays or [WEEKDAYS[start_date.weekday()]])]
+    if end_date:
+        parts.append(f'UNTIL={end_date:%Y%m%d}')
+    lines = [f'DTSTART:{start_date:%Y%m%d}', 'RRULE:' + ';'.join(parts)]
+    if exclude:
+        lines.append('EXDATE:' + ','.join(f'{excluded:%Y%m%d}' for excluded in sorted(set(exclude))))
+    return '\n'.join(lines)
+
+
+def parse_recurrence(options, start_date, end_date):
+    '''
+    RRULE text of a request's "recurrence" object {"interval": 2, "weekdays": ["MO", "WE"], "exclude": ["2024-12-25"]},
+    all keys optional (every week on start_date's weekday). end_date None is open ended. Raises ValueError.
+    '''
+    if not isinstance(options, dict):
+        raise ValueError('recurrence must be an object.')
+    interval = options.get('interval', 1)
+    if not isinstance(interval, int) or isinstance(interval, bool) or not 1 <= interval <= MAX_INTERVAL:
+        raise ValueError(f'recurrence interval must be a number of weeks between 1 and {MAX_INTERVAL}.')
+    weekdays = options.get('weekdays') or None
+    if weekdays is not None and (not isinstance(weekdays, list) or any(weekday not in WEEKDAYS for weekday in weekdays)):
+        raise ValueError(f"recurrence weekdays must be a list of {', '.join(WEEKDAYS)}.")
+    try:
+        exclude = [date.fromisoformat(excluded) for excluded in options.get('exclude', [])]
+    except (TypeError, ValueError):
+        raise ValueError('recurrence exclude must be a list of YYYY-MM-DD dates.')
+    return build_rule(start_date, end_date, interval, sorted(set(weekdays), key=WEEKDAYS.index) if weekdays else None, exclude)
+
+
+@lru_cache(maxsize=1024)
+def rule_set(text):
+    # parsed rule, shared by every expansion of the same text
+    return rrulestr(text, forceset=True)
+
+
+def _moment(day):
+    return datetime.combine(day, time.min)
+
+
+def occurrences(text, start, end):
+    # dates of the rule between start and end (inclusive), the rule is only iterated up to end
+    if end < start:
+        return []
+    return [moment.date() for moment in rule_set(text).between(_moment(start), _moment(end), inc=True)]
+
+
+def occurs_after(text, day):
+    return rule_set(text).after(_moment(day)) is not None
+
+
+def horizon(today=None):
+    # schedules of recurring applications exist up to this date
+    today = today or datetime.now().date()
+    return today + relativedelta(months=current_app.config.get('RECURRENCE_HORIZON_MONTHS', 4))
+
+
+def plan_application(start_date, end_date, options=None, today=None):
+    '''
+    The dates of a new application. A single day (start_date == end_date, no options) has no rule. Otherwise the rule
+    from options (every week on start_date's weekday by default) is checked for conflicts up to end_date (the horizon
+    when open ended) and materialized up to the horizon, and at least its first date: the manager approves schedules.
+    Raises ValueError.
+    '''
+    if options is None and end_date is not None and start_date == end_date:
+        return Plan(None, [start_date], [start_date], None)
+    if end_date is None and options is None:
+        raise ValueError('end_date is required without a recurrence.')
+    if end_date is not None and end_date < start_date:
+        raise ValueError('end_date is before start_date.')
+
+    rule = parse_recurrence(options or {}, start_date, end_date)
+    until = horizon(today)
+    first = rule_set(rule).after(_moment(start_date), inc=True)
+    if first is None:
+        raise ValueError('The recurrence has no dates.')
+    until = max(until, first.date())
+    dates = occurrences(rule, start_date, end_date or until)
+    schedules = [wfh_date for wfh_date in dates if wfh_date <= until]
+    return Plan(rule, dates, schedules, until if occurs_after(rule, until) else None)
+
+
+def add_occurrences(indexes, staff_ids, first_date, last_date):
+    '''
+    Adds the occurrences past materialized_until of these staff's recurring applications between first_date and
+    last_date to their SlotIndex, the part of the conflict check that has no rows yet.
+    '''
+    applications = db.session.execute(
+        select(WFHApplication.staff_id, WFHApplication.time_slot, WFHApplication.recurrence, WFHApplication.materialized_until)
+        .where(
+            WFHApplication.staff_id.in_(list(staff_ids)),
+            WFHApplication.recurrence.isnot(None),
+            WFHApplication.materialized_until.isnot(None),
+            WFHApplication.materialized_until < last_date,
+            WFHApplication.manager_reject_reason.is_(None)
+        )
+    ).all()
+    for staff_id, time_slot, rule, materialized_until in applications:
+        if time_slot not in HALF_DAYS:
+            continue
+        for wfh_date in occurrences(rule, max(first_date, materialized_until + timedelta(days=1)), last_date):
+            indexes[staff_id].add(wfh_date, time_slot)
+    return indexes
+
+
+def slot_indexes(staff_ids, first_date, last_date):
+    # {staff_id: SlotIndex} of everything booked between first_date and last_date: active schedules and the dates
+    # of recurring applications not materialized yet
+    return add_occurrences(load_slot_indexes(staff_ids, first_date, last_date), staff_ids, first_date, last_date)
+
+
+def base_statuses(application_ids):
+    '''
+    {application_id: status} of the occurrences not materialized yet: Pending_Approval while the application has
+    schedules waiting for the manager, Approved once the manager approved one. Applications with neither (every
+    schedule withdrawn, rejected or cancelled) are left out, they are not extended. Rejected applications never are.
+    '''
+    statuses = {}
+    for application_id, status in db.session.execute(
+        select(WFHSchedule.application_id, WFHSchedule.status).where(
+            WFHSchedule.application_id.in_(application_ids),
+            WFHSchedule.status.in_(('Pending_Approval', 'Approved'))
+        ).distinct()
+    ):
+        if statuses.get(application_id) != 'Pending_Approval':
+            statuses[application_id] = status
+    return statuses
+
+
+def insert_schedules(schedules):
+    '''
+    Bulk INSERT of the schedule rows {"application_id", "wfh_date", "status", "manager_withdraw_reason"} of new
+    applications (or new dates of recurring ones) in one statement.
+    The rows skip the session hooks, so they are recorded in the change feed here. The caller commits, and invalidates
+    the capacity cache when Approved rows were inserted.
+    '''
+    if not schedules:
+        return
+    db.session.execute(insert(WFHSchedule), schedules)
+    staff_dates = select(WFHApplication.staff_id, WFHSchedule.wfh_id, WFHSchedule.wfh_date)\
+        .join(WFHApplication, WFHSchedule.application_id == WFHApplication.application_id)
+    application_ids = sorted({schedule['application_id'] for schedule in schedules})
+    dates = [schedule['wfh_date'] for schedule in schedules]
+    record_changes(staff_dates.where(WFHSchedule.application_id.in_(application_ids),
+                                     WFHSchedule.wfh_date >= min(dates), WFHSchedule.wfh_date <= max(dates)))
+
+
+def materialize_recurrences(until=None):
+    '''
+    Creates the schedules of every open recurring application up to until (default: the horizon) and moves its
+    materialized_until forward, in one transaction. Occurrences clashing with a schedule the staff booked in the
+    meantime are skipped. Applications without an Approved or Pending_Approval schedule left are closed instead
+    (materialized_until NULL): nothing the manager approved or has to decide is extended.
+    Returns {'materialized_until', 'applications', 'schedules', 'skipped', 'closed'}.
+    '''
+    until = until or horizon()
+    summary = {'materialized_until': until.strftime('%Y-%m-%d'), 'applications': 0, 'schedules': 0, 'skipped': 0, 'closed': 0}
+    applications = WFHApplication.query.filter(
+        WFHApplication.recurrence.isnot(None),
+        WFHApplication.materialized_until.isnot(None),
+        WFHApplication.materialized_until < until,
+        WFHApplication.manager_reject_reason.is_(None)
+    ).order_by(WFHApplication.application_id).all()
+    if not applications:
+        return summary
+
+    planned = {application.application_id: occurrences(application.recurrence, application.materialized_until + timedelta(days=1), until)
+               for application in applications}
+    all_dates = [wfh_date for dates in planned.values() for wfh_date in dates]
+    booked = load_slot_indexes({application.staff_id for application in applications}, min(all_dates), max(all_dates)) if all_dates else {}
+    statuses = base_statuses([application.application_id for application in applications])
+
+    schedules = []
+    for application in applications:
+        if application.application_id not in statuses:
+            application.materialized_until = None
+            summary['closed'] += 1
+            continue
+        dates = planned[application.application_id]
+        index = booked[application.staff_id]
+        skipped = set(index.conflicting_dates(application.time_slot, dates))
+        for wfh_date in dates:
+            if wfh_date in skipped:
+                continue
+            index.add(wfh_date, application.time_slot)
+            schedules.append({'application_id': application.application_id, 'wfh_date': wfh_date,
+                              'status': statuses[application.application_id], 'manager_withdraw_reason': None})
+        application.materialized_until = until if occurs_after(application.recurrence, until) else None
+        summary['skipped'] += len(skipped)
+    summary['applications'] = len(applications) - summary['closed']
+    summary['schedules'] = len(schedules)
+
+    insert_schedules(schedules)
+    db.session.commit()
+    if any(schedule['status'] == 'Approved' for schedule in schedules):
+        get_capacity_cache().invalidate()
+    return summary
+
+
+def application_occurrences(application, start, end):
+    '''
+    Every date of an application between start and end with its status: the schedule row where one exists,
+    the status it will be materialized with past materialized_until ("projected": true).
+    '''
+    rows = WFHSchedule.query.filter(
+        WFHSchedule.application_id == application.application_id,
+        WFHSchedule.wfh_date >= start,
+        WFHSchedule.wfh_date <= end
+    ).order_by(WFHSchedule.wfh_date, WFHSchedule.wfh_id).all()
+    result = [{'date': row.wfh_date.strftime('%Y-%m-%d'), 'wfh_id': row.wfh_id, 'status': row.status, 'projected': False}
+              for row in rows]
+    if application.recurrence and application.materialized_until and application.materialized_until < end:
+        status = 'Rejected' if application.manager_reject_reason is not None else base_statuses([application.application_id]).get(application.application_id)
+        if status is None:
+            # nothing approved or pending any more, the daily job closes the application
+            return result
+        result += [{'date': wfh_date.strftime('%Y-%m-%d'), 'wfh_id': None, 'status': status, 'projected': True}
+                   for wfh_date in occurrences(application.recurrence, max(start, application.materialized_until + timedelta(days=1)), end)]
+    return result
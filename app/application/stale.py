@@ -0,0 +1,198 @@
+# Set-based auto reject of pending requests left unanswered for more than 8 weeks
+# Staleness is filtered in SQL and every transition is a bulk UPDATE. reject_stale_requests runs the whole
+# sweep in one transaction; reject_stale_requests_in_chunks walks the stale rows in primary key order and
+# commits per chunk with a checkpoint, for backlogs large enough to hold locks on wfh_schedule for long.
+
+import time
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import WFHApplication, WFHSchedule, WFHWithdrawal, SweepCheckpoint
+from app.capacity import get_capacity_cache
+from app.changes import record_changes
+from sqlalchemy import func, select
+
+STALE_AFTER = timedelta(weeks=8)
+SYSTEM_REJECT_REASON = "rejected by system"
+CHECKPOINT_NAME = "auto_reject"
+# chunked sweep phases in the order they run
+PHASES = ("applications", "withdrawals")
+
+
+def stale_cutoff(today=None):
+    # a request is stale once its wfh_date is 8 weeks or more in the past
+    today = today or datetime.now().date()
+    return today - STALE_AFTER
+
+
+def stale_applications(cutoff):
+    # application ids with at least one stale Pending_Approval schedule
+    return db.session.query(WFHSchedule.application_id).filter(
+        WFHSchedule.status == "Pending_Approval",
+        WFHSchedule.wfh_date <= cutoff
+    ).distinct()
+
+
+def stale_withdrawals(cutoff):
+    # wfh ids of stale Pending_Withdrawal schedules
+    return db.session.query(WFHSchedule.wfh_id).filter(
+        WFHSchedule.status == "Pending_Withdrawal",
+        WFHSchedule.wfh_date <= cutoff
+    ).distinct()
+
+
+def reject_applications(application_ids):
+    '''
+    The applications get "rejected by system" and every one of their schedules is Rejected,
+    like the manager rejecting the application. Returns (applications, schedules) changed.
+    application_ids: list of ids or a query selecting them
+    '''
+    if not isinstance(application_ids, list):
+        # wrapped in a derived table, MySQL refuses an UPDATE reading its own table in a plain subquery
+        derived = application_ids.subquery()
+        application_ids = db.session.query(derived.c.application_id)
+
+    # change feed entries are written while the schedules still match
+    record_changes(select(WFHApplication.staff_id, WFHSchedule.wfh_id, WFHSchedule.wfh_date)
+                   .join(WFHApplication, WFHSchedule.application_id == WFHApplication.application_id)
+                   .where(WFHSchedule.application_id.in_(application_ids)))
+
+    rejected_applications = db.session.query(WFHApplication).filter(
+        WFHApplication.application_id.in_(application_ids)
+    ).update({WFHApplication.manager_reject_reason: SYSTEM_REJECT_REASON}, synchronize_session=False)
+
+    rejected_schedules = db.session.query(WFHSchedule).filter(
+        WFHSchedule.application_id.in_(application_ids)
+    ).update({WFHSchedule.status: "Rejected"}, synchronize_session=False)
+    return rejected_applications, rejected_schedules
+
+
+def reject_withdrawals(wfh_ids):
+    '''
+    The schedules go back to Approved and their latest withdrawal gets "rejected by system"
+    as the manager's reason (unless already answered). Returns (withdrawals, schedules) changed.
+    wfh_ids: list of ids or a query selecting them
+    '''
+    if not isinstance(wfh_ids, list):
+        derived = wfh_ids.subquery()
+        wfh_ids = db.session.query(derived.c.wfh_id)
+
+    record_changes(select(WFHApplication.staff_id, WFHSchedule.wfh_id, WFHSchedule.wfh_date)
+                   .join(WFHApplication, WFHSchedule.application_id == WFHApplication.application_id)
+                   .where(WFHSchedule.wfh_id.in_(wfh_ids)))
+
+    latest_withdrawals = db.session.query(func.max(WFHWithdrawal.withdrawal_id).label('withdrawal_id')).filter(
+        WFHWithdrawal.wfh_id.in_(wfh_ids)
+    ).group_by(WFHWithdrawal.wfh_id).subquery()
+
+    rejected_withdrawals = db.session.query(WFHWithdrawal).filter(
+        WFHWithdrawal.withdrawal_id.in_(db.session.query(latest_withdrawals.c.withdrawal_id)),
+        WFHWithdrawal.manager_reject_withdrawal_reason.is_(None)
+    ).update({WFHWithdrawal.manager_reject_withdrawal_reason: SYSTEM_REJECT_REASON}, synchronize_session=False)
+
+    approved_schedules = db.session.query(WFHSchedule).filter(
+        WFHSchedule.wfh_id.in_(wfh_ids)
+    ).update({WFHSchedule.status: "Approved"}, synchronize_session=False)
+    return rejected_withdrawals, approved_schedules
+
+
+def reject_stale_requests(today=None):
+    '''
+    Pending_Approval older than 8 weeks: the whole application is Rejected with reason "rejected by system".
+    Pending_Withdrawal older than 8 weeks: the schedule goes back to Approved and its latest withdrawal
+    gets "rejected by system" as the manager's reason.
+    Returns the number of rows changed by each step. The caller handles errors, nothing is committed on failure.
+    '''
+    cutoff = stale_cutoff(today)
+
+    rejected_applications, rejected_schedules = reject_applications(stale_applications(cutoff))
+    # schedules of the rejected applications are no longer Pending_Withdrawal
+    rejected_withdrawals, approved_schedules = reject_withdrawals(stale_withdrawals(cutoff))
+
+    db.session.commit()
+
+    # bulk UPDATEs skip the session hooks, rejected applications may have held approved slots
+    if rejected_schedules:
+        get_capacity_cache().invalidate()
+
+    return {
+        'cutoff': cutoff.strftime('%Y-%m-%d'),
+        'rejected_applications': rejected_applications,
+        'rejected_schedules': rejected_schedules,
+        'approved_schedules': approved_schedules,
+        'rejected_withdrawals': rejected_withdrawals
+    }
+
+
+def reject_stale_requests_in_chunks(chunk_size, today=None):
+    '''
+    Same transitions as reject_stale_requests, chunk_size applications (then withdrawn schedules) at a time
+    in primary key order, one transaction per chunk. The checkpoint row is committed with each chunk,
+    a run that was killed resumes from it with its original cutoff. Returns the totals and per chunk timings.
+    '''
+    checkpoint = db.session.get(SweepCheckpoint, CHECKPOINT_NAME)
+    resumed = checkpoint is not None and checkpoint.phase != "done"
+    if not resumed:
+        if checkpoint is None:
+            checkpoint = SweepCheckpoint(name=CHECKPOINT_NAME)
+            db.session.add(checkpoint)
+        checkpoint.cutoff = stale_cutoff(today)
+        checkpoint.phase = PHASES[0]
+        checkpoint.last_id = 0
+        checkpoint.updated_at = datetime.now()
+        db.session.commit()
+
+    cutoff = checkpoint.cutoff
+    summary = {
+        'cutoff': cutoff.strftime('%Y-%m-%d'),
+        'resumed': resumed,
+        'chunk_size': chunk_size,
+        'rejected_applications': 0,
+        'rejected_schedules': 0,
+        'approved_schedules': 0,
+        'rejected_withdrawals': 0,
+        'chunks': []
+    }
+
+    while checkpoint.phase != "done":
+        start = time.perf_counter()
+        if checkpoint.phase == "applications":
+            ids = [row[0] for row in stale_applications(cutoff).filter(
+                WFHSchedule.application_id > checkpoint.last_id
+            ).order_by(WFHSchedule.application_id).limit(chunk_size)]
+            if ids:
+                rejected_applications, rejected_schedules = reject_applications(ids)
+                summary['rejected_applications'] += rejected_applications
+                summary['rejected_schedules'] += rejected_schedules
+        else:
+            ids = [row[0] for row in stale_withdrawals(cutoff).filter(
+                WFHSchedule.wfh_id > checkpoint.last_id
+            ).order_by(WFHSchedule.wfh_id).limit(chunk_size)]
+            if ids:
+                rejected_withdrawals, approved_schedules = reject_withdrawals(ids)
+                summary['rejected_withdrawals'] += rejected_withdrawals
+                summary['approved_schedules'] += approved_schedules
+
+        phase = checkpoint.phase
+        if len(ids) < chunk_size:
+            # nothing left in this phase, move on to the next one
+            next_phase = PHASES.index(phase) + 1
+            checkpoint.phase = PHASES[next_phase] if next_phase < len(PHASES) else "done"
+            checkpoint.last_id = 0
+        else:
+            checkpoint.last_id = ids[-1]
+        checkpoint.updated_at = datetime.now()
+        db.session.commit()
+
+        if ids:
+            if phase == "applications":
+                get_capacity_cache().invalidate()
+            summary['chunks'].append({
+                'phase': phase,
+                'first_id': ids[0],
+                'last_id': ids[-1],
+                'rows': len(ids),
+                'ms': round((time.perf_counter() - start) * 1000, 1)
+            })
+
+    return summary
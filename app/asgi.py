@@ -0,0 +1,153 @@
+# ASGI serving mode: uvicorn asgi:app (asgi.py next to run.py), see benchmarks/bench_asgi.py
+# The Flask app runs unchanged on the asyncio driver of its database (mysql+aiomysql, sqlite+aiosqlite). Every
+# request is a greenlet on the event loop, the way SQLAlchemy's own AsyncSession drives the ORM: a query suspends
+# the request until the driver answers and the loop serves other requests meanwhile, so one worker keeps many
+# dashboard loads in flight on one thread instead of one thread each. Telegram calls already leave the request
+# (app/monitoring/dispatcher.py); password hashing goes to a thread (run_blocking).
+# Everything the views share per process (capacity, hierarchy and login caches) is only locked between queries,
+# never across one, so requests interleaving on one thread cannot deadlock on those locks.
+# Needs an ASGI server (uvicorn) and the asyncio driver (aiomysql or aiosqlite), pinned in requirements-asgi.txt;
+# the daily job stays with run.py or the /api/application/autoReject cron.
+
+import asyncio
+import contextvars
+import sys
+from io import BytesIO
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.util import await_only, greenlet_spawn
+
+ASYNC_DRIVERS = {
+    'mysql': 'mysql+aiomysql',
+    'mysql+pymysql': 'mysql+aiomysql',
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite'
+}
+
+# True in the greenlet of a request run by ASGIApp.handle
+in_request = contextvars.ContextVar('asgi_in_request', default=False)
+
+
+def async_uri(uri):
+    # the same database on its asyncio driver, URIs already on one (or without one known) unchanged
+    url = make_url(uri)
+    driver = ASYNC_DRIVERS.get(url.drivername)
+    return url.set(drivername=driver).render_as_string(hide_password=False) if driver else uri
+
+
+def run_blocking(function, *args):
+    # function(*args) in the loop's default thread pool when called from an ASGI request, else directly
+    if in_request.get():
+        return await_only(asyncio.get_running_loop().run_in_executor(None, function, *args))
+    return function(*args)
+
+
+def wsgi_environ(scope, body):
+    # PEP 3333 environ of an ASGI http scope
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf8').decode('latin1'),
+        'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope['query_string'].decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = scope['client'][0], str(scope['client'][1])
+    for name, value in scope['headers']:
+        name = name.decode('latin1').upper().replace('-', '_')
+        if name == 'CONTENT_LENGTH':
+            continue
+        key = name if name == 'CONTENT_TYPE' else 'HTTP_' + name
+        value = value.decode('latin1')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+class ASGIApp:
+    '''ASGI callable around a Flask app, each request handled in a greenlet (see the module comment).'''
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            body = []
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                body.append(message.get('body', b''))
+                if not message.get('more_body', False):
+                    break
+            await greenlet_spawn(self.handle, wsgi_environ(scope, b''.join(body)), send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']}")
+
+    def handle(self, environ, send):
+        # runs in the greenlet: the Flask request, and the iteration of its (possibly streamed) body
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['start'] = {'type': 'http.response.start', 'status': int(status.split(' ', 1)[0]),
+                                 'headers': [(name.encode('latin1'), value.encode('latin1')) for name, value in headers]}
+
+        def send_start():
+            # the status line goes out with the first chunk, once
+            if 'start' in response:
+                await_only(send(response.pop('start')))
+
+        token = in_request.set(True)
+        try:
+            result = self.flask_app(environ, start_response)
+            try:
+                for chunk in result:
+                    if chunk:
+                        send_start()
+                        await_only(send({'type': 'http.response.body', 'body': chunk, 'more_body': True}))
+                send_start()
+                await_only(send({'type': 'http.response.body', 'body': b'', 'more_body': False}))
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+        finally:
+            in_request.reset(token)
+
+    def dispose(self):
+        # closes the pooled connections of the primary and the replica, in the greenlet their driver needs
+        from app import db
+        from app.replica import get_replica_engine
+
+        with self.flask_app.app_context():
+            db.engine.dispose()
+            replica = get_replica_engine()
+            if replica is not None:
+                replica.dispose()
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await greenlet_spawn(self.dispose)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(test_config=False, replica_uri=None):
+    from app import create_app
+
+    return ASGIApp(create_app(test_config=test_config, replica_uri=replica_uri, async_driver=True))
@@ -0,0 +1,353 @@
+# In-process cache of each reporting manager's approved WFH slots for the rolling -2/+3 month window
+# One dense list of days per manager, each day holding AM/PM/FULL counters of staff_id -> number of schedules.
+# Counters are kept up to date incrementally from the session: every flush records which schedules moved
+# into or out of Approved/Pending_Withdrawal and the deltas are applied to cached managers on commit.
+# The cache is per process and only sees the commits of its own process. Other gunicorn / Vercel workers and the
+# jobs of run.py keep their own copies, so a team remembers the version stamp (conditional.version_stamp) it was
+# built at: views sending an ETag pass the stamp they hashed and the team is rebuilt when it moved, their body
+# never lags behind the ETag it is stored under. Reads without a stamp rebuild CAPACITY_CACHE_SECONDS after.
+
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from dateutil.relativedelta import relativedelta
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, select
+
+from app import db
+from app.models import WFHApplication, WFHSchedule, Employee
+from app.replica import primary_reads
+
+TIME_SLOTS = ('AM', 'PM', 'FULL')
+
+
+def capacity_window(today=None):
+    # first and last date (inclusive) covered by the cache: 2 months back, 3 months forward
+    today = today or datetime.now().date()
+    return today - relativedelta(months=2), today + relativedelta(months=3)
+
+
+def _as_date(value):
+    # schedules may be created with 'YYYY-MM-DD' strings, normalise to date
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+class TeamCapacity:
+    '''Dense per-day slot counters of one manager's team, see TeamCapacityCache.'''
+
+    def __init__(self, start, end, stamp=None):
+        self.start = start
+        self.end = end
+        self.built_at = time.monotonic()
+        # version stamp of the team read before it was built, None when built without one
+        self.stamp = stamp
+        self.days = [None] * ((end - start).days + 1)
+        # (staff_id, date_str, time_slot) of schedules with a time slot outside AM/PM/FULL
+        self.invalid = []
+
+    def day(self, wfh_date):
+        # {"AM": Counter, "PM": Counter, "FULL": Counter} for the date, None if no schedules that day
+        if wfh_date < self.start or wfh_date > self.end:
+            return None
+        return self.days[(wfh_date - self.start).days]
+
+    def add(self, wfh_date, time_slot, staff_id, delta):
+        if wfh_date < self.start or wfh_date > self.end:
+            return
+        if time_slot not in TIME_SLOTS:
+            if delta > 0:
+                self.invalid.append((staff_id, str(wfh_date), time_slot))
+            elif (staff_id, str(wfh_date), time_slot) in self.invalid:
+                self.invalid.remove((staff_id, str(wfh_date), time_slot))
+            return
+
+        index = (wfh_date - self.start).days
+        if self.days[index] is None:
+            self.days[index] = {"AM": Counter(), "PM": Counter(), "FULL": Counter()}
+        slot = self.days[index][time_slot]
+        slot[staff_id] += delta
+        if slot[staff_id] <= 0:
+            del slot[staff_id]
+
+    def records(self, start=None, end=None):
+        # (staff_id, wfh_date, time_slot) for every cached AM/PM/FULL slot, optionally only from start to end
+        first = max((start - self.start).days, 0) if start else 0
+        last = min((end - self.start).days, len(self.days) - 1) if end else len(self.days) - 1
+        for index in range(first, last + 1):
+            day = self.days[index]
+            if day is None:
+                continue
+            wfh_date = self.start + timedelta(days=index)
+            for time_slot, staff_counts in day.items():
+                for staff_id in staff_counts:
+                    yield staff_id, wfh_date, time_slot
+
+    def count(self, wfh_date, time_slot):
+        day = self.day(wfh_date)
+        return sum(day[time_slot].values()) if day else 0
+
+
+class TeamCapacityCache:
+    '''
+    Per reporting_manager capacity counters, built with one query on first use and patched by session deltas.
+    Rebuilt when the rolling window moves to a new day, when a read passes a version stamp other than the one
+    the team was built at and, for reads without a stamp, max_age seconds after it was built (0: never).
+    '''
+
+    def __init__(self, max_age=0):
+        self.max_age = max_age
+        self._teams = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.expired = 0
+        self.stale = 0
+        # bumped on every change so a team built while a commit lands is not kept
+        self._generation = 0
+
+    def team(self, manager_id, stamp=None):
+        start, end = capacity_window()
+        with self._lock:
+            team = self._teams.get(manager_id)
+            if team is not None and team.start == start:
+                if stamp is not None:
+                    if team.stamp == stamp:
+                        self.hits += 1
+                        return team
+                    self.stale += 1
+                elif not self.max_age or time.monotonic() - team.built_at < self.max_age:
+                    self.hits += 1
+                    return team
+                else:
+                    self.expired += 1
+            self.misses += 1
+            generation = self._generation
+
+        from app.application.queries import team_records
+
+        team = TeamCapacity(start, end, stamp)
+        # built from the primary: the cache outlives the request and is only invalidated by primary commits
+        with primary_reads():
+            rows = team_records(manager_id, start, end)
+        for staff_id, wfh_date, time_slot in rows:
+            team.add(wfh_date, time_slot, staff_id, 1)
+
+        with self._lock:
+            if generation == self._generation:
+                self._teams[manager_id] = team
+        return team
+
+    def records(self, manager_id, start, end, stamp=None):
+        '''
+        ([(staff_id, wfh_date, time_slot)], invalid) of the team between start and end (inclusive),
+        invalid being the (staff_id, date_str, time_slot) with a time slot outside AM/PM/FULL.
+        Served from the cached team when the range is inside the window, otherwise queried for that range only.
+        stamp is the version stamp of the team the caller's ETag was hashed from.
+        '''
+        from app.application.queries import team_records
+
+        window_start, window_end = capacity_window()
+        if window_start <= start and end <= window_end:
+            team = self.team(manager_id, stamp)
+            invalid = [entry for entry in team.invalid if str(start) <= entry[1] <= str(end)]
+            return list(team.records(start, end)), invalid
+
+        with self._lock:
+            self.misses += 1
+        records = []
+        invalid = []
+        for staff_id, wfh_date, time_slot in team_records(manager_id, start, end):
+            if time_slot in TIME_SLOTS:
+                records.append((staff_id, wfh_date, time_slot))
+            else:
+                invalid.append((staff_id, str(wfh_date), time_slot))
+        return records, invalid
+
+    def slot_counts(self, manager_id, dates):
+        '''
+        {(wfh_date, time_slot): count} for the given dates, same shape as queries.team_slot_counts.
+        Dates outside the cached window are counted with a GROUP BY query.
+        '''
+        from app.application.queries import team_slot_counts
+
+        start, end = capacity_window()
+        inside = [wfh_date for wfh_date in dates if start <= wfh_date <= end]
+        outside = [wfh_date for wfh_date in dates if not start <= wfh_date <= end]
+
+        counts = {}
+        if inside:
+            team = self.team(manager_id)
+            for wfh_date in set(inside):
+                for time_slot in TIME_SLOTS:
+                    counts[(wfh_date, time_slot)] = team.count(wfh_date, time_slot)
+        if outside:
+            with self._lock:
+                self.misses += 1
+            counts.update(team_slot_counts(manager_id, outside))
+        return counts
+
+    def apply(self, deltas):
+        # deltas: (manager_id, wfh_date, time_slot, staff_id, +1/-1) of committed status transitions
+        with self._lock:
+            self._generation += 1
+            for manager_id, wfh_date, time_slot, staff_id, delta in deltas:
+                team = self._teams.get(manager_id)
+                if team is not None:
+                    team.add(wfh_date, time_slot, staff_id, delta)
+
+    def invalidate(self, manager_id=None):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            if manager_id is None:
+                self._teams.clear()
+            else:
+                self._teams.pop(manager_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'expired': self.expired,
+                'stale': self.stale,
+                'teams': len(self._teams)
+            }
+
+
+def get_capacity_cache():
+    return current_app.extensions['capacity_cache']
+
+
+def init_capacity_cache(app):
+    app.extensions['capacity_cache'] = TeamCapacityCache(app.config.get('CAPACITY_CACHE_SECONDS', 0))
+
+
+# ---- session hooks keeping the cache in sync ----
+
+_UNKNOWN = object()
+
+
+def _old_value(state, key):
+    # value before the flush, _UNKNOWN when the attribute was expired before it was set
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return _UNKNOWN
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_capacity_changes(session, flush_context):
+    if not has_app_context() or 'capacity_cache' not in current_app.extensions:
+        return
+
+    from app.application.queries import CAPACITY_STATUSES
+
+    pending = session.info.setdefault('capacity_deltas', [])
+
+    # reporting line or time slot changes move whole schedules between teams, start again
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Employee) and (obj in session.deleted or inspect(obj).attrs.reporting_manager.history.has_changes()):
+            session.info['capacity_reset'] = True
+        if isinstance(obj, WFHApplication) and (obj in session.deleted or inspect(obj).attrs.time_slot.history.has_changes()
+                                                or inspect(obj).attrs.staff_id.history.has_changes()):
+            session.info['capacity_reset'] = True
+
+    changes = []  # (wfh_id, old (date, status) or None, new status or None)
+    removed = []  # deleted schedules, resolved from their application_id
+    for obj in session.new:
+        if isinstance(obj, WFHSchedule) and obj.status in CAPACITY_STATUSES:
+            changes.append((obj.wfh_id, None, obj.status))
+    for obj in session.dirty:
+        if isinstance(obj, WFHSchedule):
+            state = inspect(obj)
+            if not (state.attrs.status.history.has_changes() or state.attrs.wfh_date.history.has_changes()):
+                continue
+            old_date, old_status = _old_value(state, 'wfh_date'), _old_value(state, 'status')
+            if old_date is _UNKNOWN or old_status is _UNKNOWN:
+                session.info['capacity_reset'] = True
+                continue
+            old = (_as_date(old_date), old_status)
+            if old[1] in CAPACITY_STATUSES or obj.status in CAPACITY_STATUSES:
+                changes.append((obj.wfh_id, old, obj.status))
+    for obj in session.deleted:
+        if isinstance(obj, WFHSchedule):
+            state = inspect(obj)
+            if state.dict.get('status') in CAPACITY_STATUSES:
+                if 'wfh_date' not in state.dict or 'application_id' not in state.dict:
+                    session.info['capacity_reset'] = True
+                else:
+                    removed.append((state.dict['application_id'], _as_date(state.dict['wfh_date'])))
+
+    if not changes and not removed:
+        return
+
+    # who owns the touched schedules, read inside the flushing transaction without autoflush
+    connection = session.connection()
+    owners = {}
+    wfh_ids = [wfh_id for wfh_id, _, _ in changes]
+    if wfh_ids:
+        rows = connection.execute(
+            select(WFHSchedule.wfh_id, WFHSchedule.wfh_date, WFHApplication.time_slot, Employee.staff_id, Employee.reporting_manager)
+            .join(WFHApplication, WFHSchedule.application_id == WFHApplication.application_id)
+            .join(Employee, Employee.staff_id == WFHApplication.staff_id)
+            .where(WFHSchedule.wfh_id.in_(wfh_ids))
+        )
+        owners = {row.wfh_id: row for row in rows}
+    for wfh_id, old, new_status in changes:
+        row = owners.get(wfh_id)
+        if row is None:
+            continue
+        if old is not None and old[1] in CAPACITY_STATUSES:
+            pending.append((row.reporting_manager, old[0], row.time_slot, row.staff_id, -1))
+        if new_status in CAPACITY_STATUSES:
+            pending.append((row.reporting_manager, _as_date(row.wfh_date), row.time_slot, row.staff_id, 1))
+
+    application_ids = {application_id for application_id, _ in removed}
+    if application_ids:
+        rows = connection.execute(
+            select(WFHApplication.application_id, WFHApplication.time_slot, Employee.staff_id, Employee.reporting_manager)
+            .join(Employee, Employee.staff_id == WFHApplication.staff_id)
+            .where(WFHApplication.application_id.in_(application_ids))
+        )
+        applications = {row.application_id: row for row in rows}
+        for application_id, wfh_date in removed:
+            row = applications.get(application_id)
+            if row is None:
+                session.info['capacity_reset'] = True
+                continue
+            pending.append((row.reporting_manager, wfh_date, row.time_slot, row.staff_id, -1))
+
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_capacity_changes(session):
+    deltas = session.info.pop('capacity_deltas', [])
+    reset = session.info.pop('capacity_reset', False)
+    if not has_app_context() or 'capacity_cache' not in current_app.extensions:
+        return
+    if reset:
+        get_capacity_cache().invalidate()
+    elif deltas:
+        get_capacity_cache().apply(deltas)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_capacity_changes(session):
+    session.info.pop('capacity_deltas', None)
+    session.info.pop('capacity_reset', None)
+
+
+@event.listens_for(db.metadata, 'after_drop')
+def _reset_capacity_cache(target, connection, **kw):
+    if has_app_context() and 'capacity_cache' in current_app.extensions:
+        get_capacity_cache().invalidate()
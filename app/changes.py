@@ -0,0 +1,208 @@
+# Change feed of WFH schedules for polling calendar clients
+# Every transaction writing a WFHSchedule or WFHApplication records one wfh_change row per schedule date it touched.
+# The rows are collected while the transaction runs and written right before its commit, under a version taken
+# then: one auto-increment change_version row per feed, so writers never wait on each other for a version.
+# Versions are handed out in insert order but become visible in commit order, a transaction may still commit a
+# version below one already visible. change_token() is therefore the highest version with nothing below it still
+# in flight: a missing version counts as in flight while the next one is younger than CHANGE_FEED_GRACE_SECONDS
+# (a version is committed milliseconds after it is taken, a missing one past that was rolled back). The times
+# come from the app servers' clocks, which have to agree to well within the grace.
+# Employee writes take versions of their own feed (EMPLOYEE_FEED), the version stamp of the employee lists and
+# team views.
+# prune_changes() drops the feed older than CHANGE_FEED_RETENTION_DAYS (daily job); ?since= tokens from before
+# the pruned range are expired (token_expired), their clients reload.
+
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, event, func, inspect, insert, select
+
+from app import db
+from app.models import ChangeVersion, Employee, WFHApplication, WFHChange, WFHSchedule
+
+FEED = 'wfh_schedule'
+EMPLOYEE_FEED = 'employee'
+SCHEDULE_COLUMNS = ('application_id', 'wfh_date', 'status', 'manager_withdraw_reason')
+EXPIRED_TOKEN_ERROR = "since token expired, reload without since."
+
+
+def _to_date(value):
+    # schedules may be created with 'YYYY-MM-DD' strings
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+def _pending(session, name=FEED):
+    # wfh_change rows (without version) the current transaction recorded for the feed, written on commit
+    return session.info.setdefault('change_feeds', {}).setdefault(name, [])
+
+
+def change_token():
+    # latest version with every version up to it committed (or rolled back), see the module comment
+    grace = timedelta(seconds=current_app.config.get('CHANGE_FEED_GRACE_SECONDS', 10))
+    recent = db.session.execute(
+        select(ChangeVersion.version).where(ChangeVersion.committed_at >= datetime.now() - grace).order_by(ChangeVersion.version)
+    ).scalars().all()
+    if not recent:
+        return db.session.execute(select(func.max(ChangeVersion.version))).scalar() or 0
+    token = db.session.execute(select(func.max(ChangeVersion.version)).where(ChangeVersion.version < recent[0])).scalar() or 0
+    for version in recent:
+        if version != token + 1:
+            break
+        token = version
+    return token
+
+
+def feed_floor():
+    # versions after this one are all still in the feed, older ones were pruned
+    oldest = db.session.execute(select(func.min(ChangeVersion.version))).scalar()
+    return oldest - 1 if oldest is not None else 0
+
+
+def token_expired(since):
+    # the changes after since were partly pruned, the client has to reload without ?since=
+    return since < feed_floor()
+
+
+def feed_version(name, token):
+    # latest version of the feed up to token (0 before its first change or once pruned)
+    return db.session.execute(
+        select(func.max(ChangeVersion.version)).where(ChangeVersion.feed == name, ChangeVersion.version <= token)
+    ).scalar() or 0
+
+
+def changed_dates(staff_ids, since, token):
+    # dates with a schedule of these staff (None: of anyone) changed after since (up to token), oldest first
+    if staff_ids is not None and not staff_ids:
+        return []
+    query = db.session.query(WFHChange.wfh_date).filter(
+        WFHChange.version > since,
+        WFHChange.version <= token
+    )
+    if staff_ids is not None:
+        query = query.filter(WFHChange.staff_id.in_(staff_ids))
+    rows = query.distinct().all()
+    return sorted(_to_date(row[0]) for row in rows)
+
+
+def record_changes(selection):
+    '''
+    Records the schedules of selection (a select of staff_id, wfh_id, wfh_date) as changed by the current transaction.
+    For bulk UPDATEs, which skip the session hooks: call it before the UPDATE while the rows still match.
+    For bulk INSERTs: call it after the INSERT, once the rows exist.
+    '''
+    changed_at = datetime.now()
+    _pending(db.session).extend({'staff_id': staff_id, 'wfh_id': wfh_id, 'wfh_date': _to_date(wfh_date), 'changed_at': changed_at}
+                                for staff_id, wfh_id, wfh_date in db.session.execute(selection))
+
+
+def prune_changes(now=None):
+    '''
+    Deletes the change feed older than CHANGE_FEED_RETENTION_DAYS, keeping the newest version of that age as the
+    floor of the feed. Returns {'floor', 'versions', 'changes'}: the new floor and the rows deleted.
+    '''
+    now = now or datetime.now()
+    cutoff = now - timedelta(days=current_app.config.get('CHANGE_FEED_RETENTION_DAYS', 30))
+    summary = {'floor': feed_floor(), 'versions': 0, 'changes': 0}
+    boundary = db.session.execute(select(func.max(ChangeVersion.version)).where(ChangeVersion.committed_at < cutoff)).scalar()
+    if boundary is None:
+        return summary
+    summary['changes'] = db.session.execute(delete(WFHChange).where(WFHChange.version < boundary)).rowcount
+    summary['versions'] = db.session.execute(delete(ChangeVersion).where(ChangeVersion.version < boundary)).rowcount
+    db.session.commit()
+    summary['floor'] = boundary - 1
+    return summary
+
+
+# ---- session hooks, every schedule / application write through the ORM is recorded ----
+
+def _old_value(state, key):
+    history = state.attrs[key].history
+    return history.deleted[0] if history.deleted else None
+
+
+@event.listens_for(db.session, 'after_flush')
+def _record_employee_changes(session, flush_context):
+    employees = [obj for obj in list(session.new) + list(session.deleted) if isinstance(obj, Employee)]
+    employees += [obj for obj in session.dirty if isinstance(obj, Employee) and session.is_modified(obj, include_collections=False)]
+    if employees:
+        # a version of the employee feed, without wfh_change rows
+        _pending(session, EMPLOYEE_FEED)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _record_flushed_changes(session, flush_context):
+    touched = []        # (application_id, wfh_id, wfh_date, staff_id or None)
+    applications = {}   # application_id -> previous staff_id if it changed, every schedule of it is touched
+    for obj in session.new:
+        if isinstance(obj, WFHSchedule):
+            touched.append((obj.application_id, obj.wfh_id, _to_date(obj.wfh_date), None))
+    for obj in session.dirty:
+        if isinstance(obj, WFHSchedule):
+            state = inspect(obj)
+            if not any(state.attrs[key].history.has_changes() for key in SCHEDULE_COLUMNS):
+                continue
+            touched.append((obj.application_id, obj.wfh_id, _to_date(obj.wfh_date), None))
+            old_date = _old_value(state, 'wfh_date')
+            if old_date is not None:
+                touched.append((obj.application_id, obj.wfh_id, _to_date(old_date), None))
+        elif isinstance(obj, WFHApplication) and session.is_modified(obj, include_collections=False):
+            applications[obj.application_id] = _old_value(inspect(obj), 'staff_id')
+    for obj in session.deleted:
+        if isinstance(obj, WFHSchedule):
+            state = inspect(obj)
+            if 'wfh_date' in state.dict:
+                # the application may be deleted in the same flush, take the owner from the loaded relationship
+                application = state.dict.get('application')
+                touched.append((state.dict.get('application_id'), state.dict.get('wfh_id'), _to_date(state.dict['wfh_date']),
+                                application.staff_id if application is not None else None))
+
+    if not touched and not applications:
+        return
+
+    connection = session.connection()
+    pending = _pending(session)
+    changed_at = datetime.now()
+    owners = {}
+    application_ids = {application_id for application_id, _, _, staff_id in touched if staff_id is None}
+    if application_ids:
+        owners = dict(connection.execute(
+            select(WFHApplication.application_id, WFHApplication.staff_id).where(WFHApplication.application_id.in_(application_ids))
+        ).all())
+
+    for application_id, wfh_id, wfh_date, staff_id in touched:
+        staff_id = staff_id or owners.get(application_id)
+        if staff_id is not None and wfh_date is not None:
+            pending.append({'staff_id': staff_id, 'wfh_id': wfh_id, 'wfh_date': wfh_date, 'changed_at': changed_at})
+    if applications:
+        schedules = connection.execute(
+            select(WFHSchedule.application_id, WFHApplication.staff_id, WFHSchedule.wfh_id, WFHSchedule.wfh_date)
+            .join(WFHApplication, WFHSchedule.application_id == WFHApplication.application_id)
+            .where(WFHSchedule.application_id.in_(list(applications)))
+        ).all()
+        for application_id, staff_id, wfh_id, wfh_date in schedules:
+            for owner in {staff_id, applications[application_id]} - {None}:
+                pending.append({'staff_id': owner, 'wfh_id': wfh_id, 'wfh_date': _to_date(wfh_date), 'changed_at': changed_at})
+
+
+@event.listens_for(db.session, 'before_commit')
+def _write_change_versions(session):
+    # the flush of the commit may still record changes, it runs now instead
+    session.flush()
+    feeds = session.info.pop('change_feeds', None)
+    if not feeds:
+        return
+    connection = session.connection()
+    committed_at = datetime.now()
+    for name, rows in feeds.items():
+        version = connection.execute(insert(ChangeVersion).values(feed=name, committed_at=committed_at)).inserted_primary_key[0]
+        if rows:
+            connection.execute(insert(WFHChange), [dict(row, version=version) for row in rows])
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('change_feeds', None)
@@ -0,0 +1,204 @@
+# gzip / brotli compression of the JSON responses
+# With COMPRESSION_ENABLED, bodies of at least COMPRESSION_MIN_SIZE bytes are compressed for clients sending a
+# matching Accept-Encoding: brotli when the brotli package is installed and accepted, gzip otherwise. Streamed
+# bodies (HRO_overall) are compressed chunk by chunk as they are sent, their size is not known up front and they
+# are always large. Each chunk is flushed (Z_SYNC_FLUSH) so the client gets it as soon as it is written instead of
+# once the compressor's buffer fills.
+# A compressed body gets its own strong ETag ("<etag>-gzip"); conditional.not_modified accepts either form.
+# Compressed bodies of responses with an ETag are kept (COMPRESSION_CACHE_BYTES in total, least recently used
+# first out), a repeat hit on the same version is sent without compressing again: the ETag names the exact
+# body, so (ETag, encoding) names the exact compressed bytes.
+
+import gzip
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from flask import current_app, has_app_context, request
+from sqlalchemy import event
+
+from app import db
+
+try:
+    import brotli
+except ImportError:  # optional, pip install brotli
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/plain', 'text/html', 'text/csv')
+
+
+def available_encodings():
+    # in order of preference
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def encoded_etags(etag):
+    # the ETag of the uncompressed body and those of its compressed variants
+    return [etag] + [f'{etag}-{encoding}' for encoding in ('br', 'gzip')]
+
+
+def compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    # mtime=0: the same body always compresses to the same bytes
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+class _BrotliStream:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self, mode=zlib.Z_FINISH):
+        # same modes as zlib's compressobj: Z_SYNC_FLUSH sends what was compressed so far, Z_FINISH ends the stream
+        if mode == zlib.Z_SYNC_FLUSH:
+            return self._compressor.flush()
+        return self._compressor.finish()
+
+
+def compressor(encoding, level):
+    # incremental compressor with compress(data) / flush(mode) for streamed bodies
+    if encoding == 'br':
+        return _BrotliStream(level)
+    return zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+class CompressionCache:
+    '''Compressed bodies by (ETag, encoding) with a total size budget, plus the counters of every compression.'''
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.streamed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def record(self, bytes_in, bytes_out, cpu_seconds, streamed=False):
+        with self._lock:
+            if streamed:
+                self.streamed += 1
+            else:
+                self.misses += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.cpu_seconds += cpu_seconds
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'streamed': self.streamed, 'entries': len(self._entries),
+                    'cached_bytes': self._size, 'bytes_in': self.bytes_in, 'bytes_out': self.bytes_out,
+                    'cpu_seconds': round(self.cpu_seconds, 6)}
+
+
+def get_compression_cache():
+    return current_app.extensions['compression']
+
+
+def init_compression(app):
+    app.extensions['compression'] = CompressionCache(app.config.get('COMPRESSION_CACHE_BYTES', 32 * 2 ** 20))
+    if app.config.get('COMPRESSION_ENABLED', True):
+        app.after_request(compress_response)
+
+
+@event.listens_for(db.metadata, 'after_drop')
+def _drop_compressed(target, connection, **kw):
+    # a recreated database may hand out the same version stamps again
+    if has_app_context() and 'compression' in current_app.extensions:
+        current_app.extensions['compression'].clear()
+
+
+def _streamed_chunks(chunks, body, encoding, level, cache):
+    # chunks: the encoded chunks of body, the streamed iterable that is closed once sending ends
+    stream = compressor(encoding, level)
+    bytes_in = bytes_out = 0
+    cpu_seconds = 0.0
+    try:
+        for chunk in chunks:
+            start = time.thread_time()
+            data = stream.compress(chunk) + stream.flush(zlib.Z_SYNC_FLUSH)
+            cpu_seconds += time.thread_time() - start
+            bytes_in += len(chunk)
+            if data:
+                bytes_out += len(data)
+                yield data
+        start = time.thread_time()
+        data = stream.flush()
+        cpu_seconds += time.thread_time() - start
+        bytes_out += len(data)
+        yield data
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+        cache.record(bytes_in, bytes_out, cpu_seconds, streamed=True)
+
+
+def compress_response(response):
+    '''after_request hook, see the module comment.'''
+    if response.status_code != 200 or response.mimetype not in COMPRESSIBLE_MIMETYPES \
+            or 'Content-Encoding' in response.headers or response.direct_passthrough:
+        return response
+    # the body depends on Accept-Encoding from here on, also for clients getting it uncompressed
+    response.vary.add('Accept-Encoding')
+
+    encoding = request.accept_encodings.best_match(available_encodings())
+    if encoding is None:
+        return response
+    level = current_app.config.get('COMPRESSION_BROTLI_QUALITY', 4) if encoding == 'br' else current_app.config.get('COMPRESSION_GZIP_LEVEL', 6)
+    cache = get_compression_cache()
+
+    if response.is_streamed:
+        response.response = _streamed_chunks(response.iter_encoded(), response.response, encoding, level, cache)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < current_app.config.get('COMPRESSION_MIN_SIZE', 1024):
+            return response
+        etag, weak = response.get_etag()
+        key = (etag, encoding) if etag and not weak else None
+        compressed = cache.get(key) if key else None
+        if compressed is None:
+            start = time.thread_time()
+            compressed = compress(data, encoding, level)
+            cache.record(len(data), len(compressed), time.thread_time() - start)
+            if key:
+                cache.put(key, compressed)
+        response.set_data(compressed)
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak)
+    return response
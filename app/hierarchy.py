@@ -0,0 +1,151 @@
+# In-memory reporting hierarchy built from one scan of the employee table
+# Answers "all transitive reports of X" (the order the recursive find_team produced) in one lookup.
+# Rebuilt when an Employee is written through this app, or when the employee table fingerprint changes
+# (an edit made by another worker, db_prep/upload.py reloading data). The fingerprint is read once per request
+# from indexed lookups only: counts and sums of the hierarchy columns, and the latest version and number of
+# versions of the employee change feed, which every Employee write through the ORM adds to (app/changes.py) and
+# db_prep/upload.py bumps after a load.
+
+import threading
+from collections import namedtuple
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import event, func, select
+
+from app import db
+from app.changes import EMPLOYEE_FEED
+from app.models import ChangeVersion, Employee
+from app.replica import primary_reads
+
+OrgMember = namedtuple('OrgMember', ['staff_id', 'staff_fname', 'staff_lname', 'dept', 'position', 'country', 'email', 'reporting_manager', 'role'])
+
+
+class OrgHierarchy:
+    def __init__(self, members, fingerprint):
+        self.fingerprint = fingerprint
+        self.members = {member.staff_id: member for member in members}
+        # direct reports of each manager in staff_id order, staff reporting to themselves are left out
+        self.children = {}
+        for member in sorted(members, key=lambda member: member.staff_id):
+            if member.reporting_manager is not None and member.reporting_manager != member.staff_id:
+                self.children.setdefault(member.reporting_manager, []).append(member)
+        self._reports = {}
+
+    def member(self, staff_id):
+        return self.members.get(staff_id)
+
+    def reports(self, manager_id):
+        '''
+        All transitive reports of manager_id, depth first in staff_id order.
+        Recursion stops at role 2 (staff) and at staff reporting to themselves, like find_team did.
+        '''
+        if manager_id in self._reports:
+            return self._reports[manager_id]
+
+        full_team = []
+        stack = [(manager_id, iter(self.children.get(manager_id, [])))]
+        visiting = {manager_id}
+        while stack:
+            _, children = stack[-1]
+            staff = next(children, None)
+            if staff is None:
+                visiting.discard(stack.pop()[0])
+                continue
+            full_team.append(staff)
+            # a reporting cycle would make find_team recurse forever, it is walked once here
+            if staff.role != 2 and staff.staff_id not in visiting:
+                visiting.add(staff.staff_id)
+                stack.append((staff.staff_id, iter(self.children.get(staff.staff_id, []))))
+
+        self._reports[manager_id] = full_team
+        return full_team
+
+
+def employee_fingerprint():
+    '''
+    Cheap aggregate over the employee table: counts and sums for the hierarchy, the employee feed version for
+    the names, dept, position, country and email. Read once per request, the after_commit hook below drops it
+    when the request writes an Employee.
+    '''
+    if has_app_context() and 'employee_fingerprint' in g:
+        return g.employee_fingerprint
+    row = db.session.query(
+        func.count(Employee.staff_id),
+        func.max(Employee.staff_id),
+        func.sum(func.coalesce(Employee.reporting_manager, 0)),
+        func.sum(func.coalesce(Employee.role, 0)),
+        func.sum(Employee.staff_id * func.coalesce(Employee.reporting_manager, 0) % 1000003),
+        select(func.max(ChangeVersion.version)).where(ChangeVersion.feed == EMPLOYEE_FEED).scalar_subquery(),
+        select(func.count()).select_from(ChangeVersion).where(ChangeVersion.feed == EMPLOYEE_FEED).scalar_subquery()
+    ).one()
+    fingerprint = tuple(int(value or 0) for value in row)
+    if has_app_context():
+        g.employee_fingerprint = fingerprint
+    return fingerprint
+
+
+class OrgHierarchyCache:
+    def __init__(self):
+        self._hierarchy = None
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def get(self):
+        fingerprint = employee_fingerprint()
+        with self._lock:
+            hierarchy = self._hierarchy
+        if hierarchy is not None and hierarchy.fingerprint == fingerprint:
+            return hierarchy
+
+        # built from the primary, a lagging replica would keep names changed since out of the cache
+        with primary_reads():
+            members = [OrgMember(*row) for row in db.session.query(
+                Employee.staff_id, Employee.staff_fname, Employee.staff_lname, Employee.dept, Employee.position,
+                Employee.country, Employee.email, Employee.reporting_manager, Employee.role
+            ).order_by(Employee.staff_id).all()]
+        hierarchy = OrgHierarchy(members, fingerprint)
+        with self._lock:
+            self._hierarchy = hierarchy
+            self.builds += 1
+        return hierarchy
+
+    def invalidate(self):
+        with self._lock:
+            self._hierarchy = None
+
+
+def get_org_hierarchy():
+    return current_app.extensions['org_hierarchy'].get()
+
+
+def init_org_hierarchy(app):
+    app.extensions['org_hierarchy'] = OrgHierarchyCache()
+
+
+# ---- session hooks, any employee write through this app rebuilds the hierarchy ----
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_employee_changes(session, flush_context):
+    if any(isinstance(obj, Employee) for obj in list(session.new) + list(session.dirty) + list(session.deleted)):
+        session.info['org_hierarchy_reset'] = True
+
+
+@event.listens_for(db.session, 'after_commit')
+def _reset_org_hierarchy(session):
+    if session.info.pop('org_hierarchy_reset', False) and has_app_context():
+        g.pop('employee_fingerprint', None)
+        if 'org_hierarchy' in current_app.extensions:
+            current_app.extensions['org_hierarchy'].invalidate()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_employee_changes(session):
+    session.info.pop('org_hierarchy_reset', None)
+
+
+@event.listens_for(db.metadata, 'after_drop')
+def _drop_org_hierarchy(target, connection, **kw):
+    if has_app_context():
+        g.pop('employee_fingerprint', None)
+        if 'org_hierarchy' in current_app.extensions:
+            current_app.extensions['org_hierarchy'].invalidate()
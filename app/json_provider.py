@@ -0,0 +1,143 @@
+# JSON provider of the app (app.json): orjson when it is installed, the stdlib encoder otherwise
+# jsonify, the streamed schedule arrays and the employee fragments all encode through app.json, so the encoder
+# behind it decides most of the CPU time of the large schedule views.
+# Both encoders write the same text as Flask's own provider: sorted keys, compact separators (indented by 2 in
+# debug mode), \u escapes for non-ASCII characters and dates in HTTP format ("Mon, 07 Oct 2024 00:00:00 GMT").
+# JSON_PROVIDER picks the encoder: auto (orjson if available), orjson or stdlib.
+# JSON_ENSURE_ASCII = False writes UTF-8 instead of the escapes and JSON_ISO_DATES = True writes date / datetime /
+# time values in ISO format ("2024-10-07"). Both change the bytes clients receive, they are off by default.
+
+import json
+import re
+from datetime import date, time
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional, pip install orjson
+    orjson = None
+
+JSON_PROVIDERS = ('auto', 'orjson', 'stdlib')
+# characters json.dumps escapes with ensure_ascii, only found inside strings
+_NON_ASCII = re.compile('[^\x00-\x7f]')
+
+
+def _escape(match):
+    # \uXXXX of one character, a surrogate pair above the BMP, as json.dumps writes them
+    code = ord(match.group())
+    if code < 0x10000:
+        return f'\\u{code:04x}'
+    code -= 0x10000
+    return f'\\u{0xd800 | (code >> 10):04x}\\u{0xdc00 | (code & 0x3ff):04x}'
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    '''DefaultJSONProvider with orjson doing the encoding when use_orjson is set, ISO dates when iso_dates is set.'''
+
+    use_orjson = False
+    iso_dates = False
+
+    def default(self, o):
+        # Flask's extra types, dates in ISO format with iso_dates; orjson encodes UUIDs and dataclasses itself,
+        # dates too with iso_dates, and only calls this for the rest (Decimal, Markup)
+        if self.iso_dates and isinstance(o, (date, time)):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+    def __init__(self, app):
+        super().__init__(app)
+        # the encoder and options of dumps(obj) without arguments, the call the fragment writer makes per value
+        # (built on first use, from sort_keys and ensure_ascii as they are then)
+        self._encoder = None
+        self._option = None
+
+    def _options(self, kwargs):
+        # orjson options for the json.dumps arguments, None when orjson cannot write what they ask for
+        indent = kwargs.pop('indent', None)
+        separators = kwargs.pop('separators', None)
+        sort_keys = kwargs.pop('sort_keys', self.sort_keys)
+        default = kwargs.pop('default', self.default)
+        if kwargs or default != self.default or indent not in (None, 2):
+            return None
+        if separators not in (None, (',', ':') if indent is None else (',', ': ')):
+            return None
+        option = orjson.OPT_NON_STR_KEYS
+        if not self.iso_dates:
+            # dates go to default, which writes them in HTTP format
+            option |= orjson.OPT_PASSTHROUGH_DATETIME
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _dumpb(self, obj, kwargs):
+        # UTF-8 bytes from orjson, None to leave obj to the stdlib encoder
+        option = self._options(dict(kwargs))
+        if option is None:
+            return None
+        try:
+            return self._ascii(orjson.dumps(obj, default=self.default, option=option))
+        except TypeError:
+            # integers beyond 64 bits and other values orjson refuses, the stdlib encoder may still write them
+            return None
+
+    def _ascii(self, data):
+        # orjson always writes UTF-8, escaped afterwards with ensure_ascii (most bodies are ASCII already)
+        if not self.ensure_ascii or data.isascii():
+            return data
+        return _NON_ASCII.sub(_escape, data.decode()).encode()
+
+    def dumps(self, obj, **kwargs):
+        if not kwargs:
+            return self._dumps(obj)
+        if self.use_orjson:
+            data = self._dumpb(obj, kwargs)
+            if data is not None:
+                return data.decode()
+        # compact unless indented, like orjson
+        if kwargs.get('indent') is None:
+            kwargs.setdefault('separators', (',', ':'))
+        return super().dumps(obj, **kwargs)
+
+    def _dumps(self, obj):
+        if self.use_orjson:
+            if self._option is None:
+                self._option = self._options({})
+            try:
+                return self._ascii(orjson.dumps(obj, default=self.default, option=self._option)).decode()
+            except TypeError:
+                pass
+        if self._encoder is None:
+            self._encoder = json.JSONEncoder(default=self.default, ensure_ascii=self.ensure_ascii, sort_keys=self.sort_keys,
+                                             separators=(',', ':'))
+        return self._encoder.encode(obj)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if not self.use_orjson:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        dump_args = {'indent': 2} if (self.compact is None and self._app.debug) or self.compact is False else {}
+        data = self._dumpb(obj, dump_args)
+        if data is None:
+            return super().response(obj)
+        # the bytes go to the response as they are, no str round trip
+        return self._app.response_class(data + b'\n', mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    choice = app.config.get('JSON_PROVIDER', 'auto')
+    if choice not in JSON_PROVIDERS:
+        raise ValueError(f"JSON_PROVIDER must be one of {', '.join(JSON_PROVIDERS)}.")
+    if choice == 'orjson' and orjson is None:
+        raise RuntimeError("JSON_PROVIDER is orjson but orjson is not installed.")
+    app.json = FastJSONProvider(app)
+    app.json.use_orjson = orjson is not None and choice != 'stdlib'
+    app.json.ensure_ascii = app.config.get('JSON_ENSURE_ASCII', True)
+    app.json.iso_dates = app.config.get('JSON_ISO_DATES', False)
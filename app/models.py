@@ -6,6 +6,10 @@ from app import db
 
 class Employee(db.Model):
     __tablename__ = 'employee'
+    # team lookups (team views, wfh requests, capacity cache) filter on reporting_manager
+    __table_args__ = (
+        db.Index('ix_employee_reporting_manager', 'reporting_manager'),
+    )
 
     staff_id = db.Column(db.Integer, primary_key=True)
     staff_fname = db.Column(db.String(255), nullable=False)
@@ -38,12 +42,22 @@ class Login(db.Model):
 
 class WFHApplication(db.Model):
     __tablename__ = 'wfh_application'
+    # staff schedules are reached through staff_id, conflict checks also filter on time_slot
+    __table_args__ = (
+        db.Index('ix_wfh_application_staff_slot', 'staff_id', 'time_slot'),
+        # the daily job extends the recurring applications whose schedules stop before the horizon
+        db.Index('ix_wfh_application_materialized_until', 'materialized_until'),
+    )
 
     application_id = db.Column(db.Integer, primary_key=True)
     staff_id = db.Column(db.Integer, db.ForeignKey('employee.staff_id'), nullable=False)
     time_slot = db.Column(db.String(255))  # AM, PM, FULL
     staff_apply_reason = db.Column(db.String(255))
     manager_reject_reason = db.Column(db.String(255))
+    # Recurring applications (app/application/recurring.py): RRULE text of the dates, schedules exist up to
+    # materialized_until and are created from the rule after it (NULL when every date has its schedule)
+    recurrence = db.Column(db.Text)
+    materialized_until = db.Column(db.Date)
 
     # # Relationship to employee
     # employee = db.relationship('Employee', backref='wfh_application')
@@ -53,6 +67,11 @@ class WFHApplication(db.Model):
 
 class WFHSchedule(db.Model):
     __tablename__ = 'wfh_schedule'
+    # auto reject and the HRO views filter on status and wfh_date, joins from an application filter on status
+    __table_args__ = (
+        db.Index('ix_wfh_schedule_status_date', 'status', 'wfh_date'),
+        db.Index('ix_wfh_schedule_application_status', 'application_id', 'status'),
+    )
 
     wfh_id = db.Column(db.Integer, primary_key=True)
     application_id = db.Column(db.Integer, db.ForeignKey('wfh_application.application_id'), nullable=False)
@@ -64,6 +83,10 @@ class WFHSchedule(db.Model):
 
 class WFHWithdrawal(db.Model):
     __tablename__ = 'wfh_withdrawal'
+    # latest withdrawal reason per schedule
+    __table_args__ = (
+        db.Index('ix_wfh_withdrawal_wfh_id', 'wfh_id'),
+    )
 
     withdrawal_id = db.Column(db.Integer, primary_key=True)
     wfh_id = db.Column(db.Integer, db.ForeignKey('wfh_schedule.wfh_id'), nullable=False)
@@ -71,3 +94,68 @@ class WFHWithdrawal(db.Model):
     manager_reject_withdrawal_reason = db.Column(db.String(255))
 
 
+
+class SweepCheckpoint(db.Model):
+    __tablename__ = 'sweep_checkpoint'
+    # progress of a chunked sweep (e.g. auto reject), committed with each chunk so a killed run resumes from it
+
+    name = db.Column(db.String(64), primary_key=True)
+    cutoff = db.Column(db.Date, nullable=False)
+    phase = db.Column(db.String(32), nullable=False)  # applications, withdrawals, done
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+class ChangeVersion(db.Model):
+    __tablename__ = 'change_version'
+    # change feed versions, one auto-increment row per feed and writing transaction, inserted right before its commit
+    __table_args__ = (
+        db.Index('ix_change_version_feed', 'feed', 'version'),
+        db.Index('ix_change_version_committed_at', 'committed_at'),
+    )
+
+    version = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    feed = db.Column(db.String(64), nullable=False)  # wfh_schedule, employee
+    committed_at = db.Column(db.DateTime, nullable=False)
+
+class WFHChange(db.Model):
+    __tablename__ = 'wfh_change'
+    # change feed: one row per schedule date touched by a WFHSchedule / WFHApplication write
+    __table_args__ = (
+        db.Index('ix_wfh_change_staff_version', 'staff_id', 'version'),
+        # organisation wide changes since a schedule snapshot (app/schedule/snapshots.py)
+        db.Index('ix_wfh_change_version', 'version'),
+    )
+
+    change_id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+    staff_id = db.Column(db.Integer, nullable=False)
+    wfh_id = db.Column(db.Integer)
+    wfh_date = db.Column(db.Date, nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False)
+
+class SnapshotRun(db.Model):
+    __tablename__ = 'schedule_snapshot_run'
+    # one precomputed set of HR dashboard counts (app/schedule/snapshots.py), the latest one is read
+
+    snapshot_id = db.Column(db.Integer, primary_key=True)
+    taken_at = db.Column(db.DateTime, nullable=False)
+    first_date = db.Column(db.Date, nullable=False)
+    last_date = db.Column(db.Date, nullable=False)
+    # change feed version and employee table state the counts were taken at
+    change_version = db.Column(db.Integer, nullable=False)
+    employee_version = db.Column(db.Integer, nullable=False)
+    employee_fingerprint = db.Column(db.String(255), nullable=False)
+    row_count = db.Column(db.Integer, nullable=False)
+    build_seconds = db.Column(db.Float, nullable=False)
+
+class ScheduleSnapshot(db.Model):
+    __tablename__ = 'schedule_snapshot'
+    # AM/PM WFH staff counts per day of one department (scope 'dept') or one manager's direct reports (scope 'manager')
+
+    snapshot_id = db.Column(db.Integer, db.ForeignKey('schedule_snapshot_run.snapshot_id', ondelete='CASCADE'), primary_key=True)
+    scope = db.Column(db.String(16), primary_key=True)
+    group_key = db.Column(db.String(255), primary_key=True)
+    wfh_date = db.Column(db.Date, primary_key=True)
+    am = db.Column(db.Integer, nullable=False)
+    pm = db.Column(db.Integer, nullable=False)
+    records = db.Column(db.Integer, nullable=False)  # schedules of the day, including unexpected time slots
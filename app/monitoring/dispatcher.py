@@ -0,0 +1,147 @@
+# Background Telegram dispatcher for the login notifications
+# The endpoints only enqueue: a worker thread posts to the Bot API through one pooled requests.Session,
+# so a slow or unreachable Telegram no longer holds up the login flow. Messages arriving within
+# TELEGRAM_BATCH_SECONDS of each other are sent as one message. The queue is bounded, when it is full
+# the new message is dropped and counted instead of blocking the request.
+
+import atexit
+import queue
+import threading
+import time
+
+import requests
+from flask import current_app
+
+# Bot API limit for the text of one message
+MAX_MESSAGE_LENGTH = 4096
+
+
+class TelegramDispatcher:
+    def __init__(self, token, chat_id, api_url='https://api.telegram.org', max_queue=100, batch_seconds=1.0, timeout=5.0):
+        self.url = f"{api_url.rstrip('/')}/bot{token}/sendMessage"
+        self.chat_id = chat_id
+        self.batch_seconds = batch_seconds
+        self.timeout = timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+        self._worker = None
+        # message that did not fit in the previous batch, it starts the next one
+        self._carry = None
+        self.enqueued = 0
+        self.dropped = 0
+        self.sent_messages = 0
+        self.sent_batches = 0
+        self.failed_batches = 0
+        self.last_error = None
+
+    def enqueue(self, text):
+        # True when queued, False when the queue is full and the message was dropped
+        self._start()
+        try:
+            self._queue.put_nowait(text[:MAX_MESSAGE_LENGTH])
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def flush(self, timeout=None):
+        # waits until every queued message was posted (or failed), True if done within timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=2.0):
+        self.flush(timeout)
+        self._session.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queued': self._queue.qsize(),
+                'max_queue': self._queue.maxsize,
+                'enqueued': self.enqueued,
+                'dropped': self.dropped,
+                'sent_messages': self.sent_messages,
+                'sent_batches': self.sent_batches,
+                'failed_batches': self.failed_batches,
+                'last_error': self.last_error
+            }
+
+    def _start(self):
+        # the worker starts with the first message, apps that never notify run no thread.
+        # A worker that died is replaced so the queue keeps draining
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='telegram-dispatcher', daemon=True)
+                self._worker.start()
+
+    def _next_batch(self):
+        # blocks for the first message, then collects the burst that follows it
+        batch = [self._carry if self._carry is not None else self._queue.get()]
+        self._carry = None
+        length = len(batch[0])
+        deadline = time.monotonic() + self.batch_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                text = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if length + 1 + len(text) > MAX_MESSAGE_LENGTH:
+                self._carry = text
+                break
+            batch.append(text)
+            length += 1 + len(text)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                response = self._session.post(self.url, data={'chat_id': self.chat_id, 'text': "\n".join(batch)}, timeout=self.timeout)
+                response.raise_for_status()
+                with self._lock:
+                    self.sent_batches += 1
+                    self.sent_messages += len(batch)
+            except requests.exceptions.RequestException as e:
+                # the message of the exception holds the URL, and with it the bot token
+                status = getattr(e.response, 'status_code', None)
+                with self._lock:
+                    self.failed_batches += 1
+                    self.last_error = f"{type(e).__name__} {status}" if status else type(e).__name__
+            except Exception as e:
+                # anything else is counted the same way, the worker keeps running
+                with self._lock:
+                    self.failed_batches += 1
+                    self.last_error = type(e).__name__
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+def get_telegram_dispatcher():
+    return current_app.extensions['telegram_dispatcher']
+
+
+def init_telegram_dispatcher(app, token, chat_id):
+    dispatcher = TelegramDispatcher(
+        token, chat_id,
+        api_url=app.config['TELEGRAM_API_URL'],
+        max_queue=app.config['TELEGRAM_QUEUE_SIZE'],
+        batch_seconds=app.config['TELEGRAM_BATCH_SECONDS'],
+        timeout=app.config['TELEGRAM_TIMEOUT']
+    )
+    app.extensions['telegram_dispatcher'] = dispatcher
+    # messages still queued get a short chance to go out on shutdown
+    atexit.register(dispatcher.close)
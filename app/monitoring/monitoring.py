@@ -7,8 +7,13 @@ from sqlalchemy import and_,or_
 from sqlalchemy.exc import SQLAlchemyError, OperationalError
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
-import requests
-from app import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
+from app.monitoring.dispatcher import get_telegram_dispatcher
+from app.capacity import get_capacity_cache
+from app.schedule.fragments import get_fragment_cache
+from app.compression import get_compression_cache
+from app.schedule.snapshots import snapshot_status
+from app.pool import pool_stats
+from flask import current_app
 import pytz
 import hashlib
 
@@ -24,19 +29,10 @@ def send_notification(username):
         singapore_tz = pytz.timezone('Asia/Singapore')
         now_sg = datetime.now(singapore_tz).strftime('%d/%m/%Y, %I:%M:%S %p')
         message = f"✅ {username} just logged in to the WFH platform at {now_sg} from IP: {hashed_ip}"
-        
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-        payload = {
-            'chat_id': TELEGRAM_CHAT_ID,
-            'text': message
-        }
-        response = requests.post(url, data=payload)
-        response.raise_for_status()
-
-        return jsonify({'message': 'Telegram notification sent'}), 200
-
-    except requests.exceptions.RequestException as e:
-        return jsonify({'error': f"Telegram API error: {str(e)}"}), 500
+
+        # posted to Telegram by the background dispatcher, the login flow does not wait for it
+        return queue_notification(message)
+
     except Exception as e:
         return jsonify({'error': f"Unexpected error: {str(e)}"}), 500
 
@@ -57,17 +53,105 @@ def send_notificationerror(username):
         now_sg = datetime.now(singapore_tz).strftime('%d/%m/%Y, %I:%M:%S %p')
 
         message = f"❌ {username} just failed to log in to the WFH platform at {now_sg} from IP: {hashed_ip}"
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-        payload = {
-            'chat_id': TELEGRAM_CHAT_ID,
-            'text': message
-        }
-        response = requests.post(url, data=payload)
-        response.raise_for_status()
-
-        return jsonify({'message': 'Telegram notification sent'}), 200
-
-    except requests.exceptions.RequestException as e:
-        return jsonify({'error': f"Telegram API error: {str(e)}"}), 500
+        return queue_notification(message)
+
     except Exception as e:
         return jsonify({'error': f"Unexpected error: {str(e)}"}), 500
+
+
+def queue_notification(message):
+    # same status codes as when the endpoints posted to Telegram themselves: 200 once queued,
+    # 500 when the queue is full and the message was dropped
+    if get_telegram_dispatcher().enqueue(message):
+        return jsonify({'message': 'Telegram notification queued'}), 200
+    return jsonify({'error': 'Notification queue is full, message dropped.'}), 500
+
+
+@monitoring_blueprint.route('/telegram', methods=['GET'])
+def telegram_dispatcher_stats():
+    """
+    Queue and delivery counters of the Telegram notification dispatcher
+    ---
+    tags:
+      - Monitoring
+    responses:
+      200:
+        description: Queued, enqueued, dropped, sent messages / batches, failed batches and the last error
+    """
+    return jsonify(get_telegram_dispatcher().stats()), 200
+
+
+@monitoring_blueprint.route('/capacity_cache', methods=['GET'])
+def capacity_cache_stats():
+    """
+    Hit/miss counters of the team capacity cache
+    ---
+    tags:
+      - Monitoring
+    responses:
+      200:
+        description: Cache hits, misses, invalidations, teams rebuilt after CAPACITY_CACHE_SECONDS, teams rebuilt at a newer version stamp and number of cached teams
+    """
+    return jsonify(get_capacity_cache().stats()), 200
+
+
+@monitoring_blueprint.route('/fragment_cache', methods=['GET'])
+def fragment_cache_stats():
+    """
+    Hit/miss counters of the pre-serialized employee entries of the schedule responses
+    ---
+    tags:
+      - Monitoring
+    responses:
+      200:
+        description: Entries reused, encoded, invalidations and number of cached entries
+    """
+    return jsonify(get_fragment_cache().stats()), 200
+
+
+@monitoring_blueprint.route('/compression', methods=['GET'])
+def compression_stats():
+    """
+    Response compression counters and the cache of compressed bodies
+    ---
+    tags:
+      - Monitoring
+    responses:
+      200:
+        description: Cached bodies reused, bodies compressed, streamed bodies, bytes before / after compression and CPU seconds spent
+    """
+    return jsonify(get_compression_cache().stats()), 200
+
+
+@monitoring_blueprint.route('/snapshot', methods=['GET'])
+def snapshot_stats():
+    """
+    Staleness of the HR dashboard snapshot
+    ---
+    tags:
+      - Monitoring
+    responses:
+      200:
+        description: Latest snapshot (age, window, rows, build time, schedule changes and changed dates since, whether employees changed), reads served from it, dates recounted and fallbacks by reason
+      500:
+        description: Internal server error.
+    """
+    try:
+        return jsonify(snapshot_status()), 200
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({'error': 'Database query failed.'}), 500
+
+
+@monitoring_blueprint.route('/db_pool', methods=['GET'])
+def db_pool_stats():
+    """
+    Connection pool state and checkout counters
+    ---
+    tags:
+      - Monitoring
+    responses:
+      200:
+        description: Pool class and limits, connections checked out / in, overflow, checkouts, new connections, timeouts and checkout wait times
+    """
+    return jsonify(pool_stats(db.engine, current_app.config)), 200
@@ -0,0 +1,128 @@
+# Connection pool settings and checkout metrics
+# The DB_POOL_* settings of Config become SQLALCHEMY_ENGINE_OPTIONS in create_app (an explicit
+# SQLALCHEMY_ENGINE_OPTIONS wins). Connections are pinged on checkout and recycled before MySQL's
+# wait_timeout closes them, so an idle night no longer ends in "MySQL server has gone away".
+# The pool is SQLAlchemy's own QueuePool; instrument_engine counts checkouts, checkins and new connections
+# through the pool events and times engine.connect(), the wait for a free connection.
+
+import threading
+import time
+import weakref
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import QueuePool
+
+# PoolMetrics of the instrumented engines
+_metrics = weakref.WeakKeyDictionary()
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.connect_calls = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def waited(self, seconds, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.connect_calls += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self):
+        with self._lock:
+            attempts = self.connect_calls + self.timeouts
+            return {
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'connects': self.connects,
+                'timeouts': self.timeouts,
+                'checkout_wait_ms': {
+                    'total': round(self.wait_seconds * 1000, 3),
+                    'avg': round(self.wait_seconds * 1000 / attempts, 3) if attempts else 0.0,
+                    'max': round(self.max_wait_seconds * 1000, 3)
+                }
+            }
+
+
+def instrument_engine(engine):
+    '''
+    Counts the pool events of engine and times its connect() calls (checkout, including the wait for a free
+    connection and opening a new one). Pool events stay registered when dispose() replaces the pool.
+    '''
+    if engine in _metrics:
+        return _metrics[engine]
+    metrics = _metrics[engine] = PoolMetrics()
+    event.listen(engine, 'checkout', lambda *args: metrics.count('checkouts'))
+    event.listen(engine, 'checkin', lambda *args: metrics.count('checkins'))
+    event.listen(engine, 'connect', lambda *args: metrics.count('connects'))
+
+    connect = engine.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            connection = connect()
+        except TimeoutError:
+            metrics.waited(time.perf_counter() - start, timed_out=True)
+            raise
+        metrics.waited(time.perf_counter() - start)
+        return connection
+
+    # Session and Engine.begin() check out through engine.connect() as well
+    engine.connect = timed_connect
+    return metrics
+
+
+def engine_options(config):
+    '''
+    SQLALCHEMY_ENGINE_OPTIONS for the DB_POOL_* settings of config.
+    In-memory SQLite keeps its single shared connection, the pool settings do not apply to it.
+    The pool class is SQLAlchemy's default: QueuePool, AsyncAdaptedQueuePool for an asyncio driver (ASGI mode).
+    '''
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING']
+    }
+
+
+def pool_stats(engine, config):
+    # live pool state next to the configured limits and the checkout counters
+    pool = engine.pool
+    options = config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    stats = {
+        'pool': type(pool).__name__,
+        'pre_ping': options.get('pool_pre_ping', False),
+        'recycle': options.get('pool_recycle', -1)
+    }
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'max_overflow': options.get('max_overflow'),
+            'timeout': pool.timeout(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0)
+        })
+    if engine in _metrics:
+        stats.update(_metrics[engine].stats())
+    return stats
@@ -0,0 +1,73 @@
+# Read replica routing for the read-only blueprints
+# With a replica URI (create_app(replica_uri=...) or REPLICA_DATABASE_URI) GET requests of the schedule and
+# staff blueprints query the replica engine; everything else, and every flush, stays on the primary.
+# The replica is not a Flask-SQLAlchemy bind: binds register their metadata on the shared db object.
+# Read your writes: a successful write request sets a cookie that keeps that client's reads on the primary
+# for REPLICA_READ_YOUR_WRITES_SECONDS, long enough for the replica to catch up.
+# Imported by app/__init__.py before db exists, so nothing here imports from app.
+
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+
+REPLICA_ENGINE = 'read_replica'
+REPLICA_BLUEPRINTS = ('schedule', 'staff')
+READ_METHODS = ('GET', 'HEAD')
+PRIMARY_COOKIE = 'read_primary_until'
+
+
+def reads_from_replica():
+    return has_app_context() and g.get('read_replica', False)
+
+
+@contextmanager
+def primary_reads():
+    # reads inside the block go to the primary, for results cached beyond the request
+    if not has_app_context():
+        yield
+        return
+    previous = g.get('read_replica', False)
+    g.read_replica = False
+    try:
+        yield
+    finally:
+        g.read_replica = previous
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and reads_from_replica():
+            return current_app.extensions[REPLICA_ENGINE]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _wrote_recently():
+    try:
+        return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def _route_reads():
+    g.read_replica = (request.method in READ_METHODS and request.blueprint in REPLICA_BLUEPRINTS
+                      and not _wrote_recently())
+
+
+def _remember_write(response):
+    if request.method not in READ_METHODS and response.status_code < 400:
+        seconds = current_app.config['REPLICA_READ_YOUR_WRITES_SECONDS']
+        response.set_cookie(PRIMARY_COOKIE, str(time.time() + seconds), max_age=seconds, httponly=True)
+    return response
+
+
+def get_replica_engine():
+    return current_app.extensions.get(REPLICA_ENGINE)
+
+
+def init_replica(app, replica_uri, options):
+    app.extensions[REPLICA_ENGINE] = create_engine(replica_uri, **options)
+    app.before_request(_route_reads)
+    app.after_request(_remember_write)
@@ -0,0 +1,59 @@
+# ?format=compact of the team and HRO schedule views
+# The default body repeats a full employee entry for every employee listed on every day. The compact body lists
+# the employees of the page once, and per day and half-day the counts with the positions (in that table) of the
+# employees working from home:
+#   {"employees": [{"id": 140002, "name": ...}, ...],
+#    "days": [{"date": "2024-10-07", "am": {"wfh": 2, "office": 48, "staff": [0, 5]}, "pm": {...}}, ...]}
+# Counts cover the whole team like the default format, the positions only the employees on the page.
+# Everyone not listed in "staff" is in the office.
+# ?format=counts of the HR views leaves the employees out: {"date", "am": {"wfh", "office"}, "pm": {...}} per day.
+
+import numpy as np
+
+from app.schedule.fragments import ATTRIBUTES
+from app.schedule.grid import AM, PM
+
+
+def employee_table(team, page, fields):
+    # the entries of the default format without their status, once per employee on the page
+    table = []
+    for i in page:
+        staff = team[i]
+        entry = {}
+        for field in fields:
+            if field == 'name':
+                entry['name'] = staff.staff_fname + " " + staff.staff_lname
+            elif field != 'status':
+                entry[field] = getattr(staff, ATTRIBUTES[field])
+        table.append(entry)
+    return table
+
+
+def compact_days(grid, page, counts=None):
+    '''
+    Days of the grid in the compact format, page being the range of team indexes in the employee table.
+    counts: (AM, PM) WFH counts per day when they do not come from the grid (app/schedule/snapshots.py).
+    '''
+    total = len(grid.team)
+    am_counts, pm_counts = counts if counts is not None else (grid.wfh_counts(AM), grid.wfh_counts(PM))
+    # WFH positions of the page from one nonzero scan of its page x days x half-days block; the scan goes
+    # row by row, so the positions of each day come out in table order
+    rows, days, halves = np.nonzero(grid.wfh[page.start:page.stop])
+    staff = [([], []) for _ in range(grid.num_days)]
+    for row, day, half in zip(rows.tolist(), days.tolist(), halves.tolist()):
+        staff[day][half].append(row)
+
+    return [{
+        "date": date_str,
+        "am": {"wfh": am_counts[day], "office": total - am_counts[day], "staff": staff[day][AM]},
+        "pm": {"wfh": pm_counts[day], "office": total - pm_counts[day], "staff": staff[day][PM]}
+    } for day, date_str in enumerate(grid.dates())]
+
+
+def count_days(dates, am_counts, pm_counts, total):
+    # ?format=counts: the WFH and office counts of every date, without employees
+    return [{
+        "date": date_str,
+        "am": {"wfh": am_counts[day], "office": total - am_counts[day]},
+        "pm": {"wfh": pm_counts[day], "office": total - pm_counts[day]}
+    } for day, date_str in enumerate(dates)]
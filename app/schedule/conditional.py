@@ -0,0 +1,84 @@
+# Strong ETags for the schedule and employee list views, from a version stamp read before any heavy query
+# The stamp of a team is one SELECT over indexed lookups: the latest version and number of versions of the employee
+# feed and of the team's schedule changes (a version may commit below one already seen, it still adds to the
+# count), the oldest version kept (pruning lowers the counts) and the count / sum of its staff ids (catches
+# members loaded outside the app).
+# A matching If-None-Match is answered with 304 from the stamp alone.
+
+import hashlib
+from datetime import datetime
+
+from flask import request, Response
+from sqlalchemy import func, select
+
+from app import db
+from app.changes import EMPLOYEE_FEED
+from app.compression import encoded_etags
+from app.models import ChangeVersion, Employee, WFHChange
+
+
+def own_members(staff_id):
+    return select(Employee.staff_id).where(Employee.staff_id == staff_id)
+
+
+def team_members(manager_id):
+    # staff reporting to the manager
+    return select(Employee.staff_id).where(Employee.reporting_manager == manager_id)
+
+
+def peer_members(staff_id):
+    # the staff's team under the same manager, without the staff
+    manager_id = select(Employee.reporting_manager).where(Employee.staff_id == staff_id).scalar_subquery()
+    return select(Employee.staff_id).where(Employee.reporting_manager == manager_id, Employee.staff_id != staff_id)
+
+
+def version_stamp(members, schedules=True):
+    '''
+    (oldest version, employee version and versions, member count, member id sum, schedule version and changes) of the
+    staff selected by members, read in a single statement. schedules=False leaves the schedule part out (employee lists).
+    '''
+    members = members.subquery()
+    columns = [
+        select(func.min(ChangeVersion.version)).scalar_subquery(),
+        select(func.max(ChangeVersion.version)).where(ChangeVersion.feed == EMPLOYEE_FEED).scalar_subquery(),
+        select(func.count()).select_from(ChangeVersion).where(ChangeVersion.feed == EMPLOYEE_FEED).scalar_subquery(),
+        select(func.count(members.c.staff_id)).scalar_subquery(),
+        select(func.sum(members.c.staff_id)).scalar_subquery(),
+    ]
+    if schedules:
+        team_changes = WFHChange.staff_id.in_(select(members.c.staff_id))
+        columns.append(select(func.max(WFHChange.version)).where(team_changes).scalar_subquery())
+        columns.append(select(func.count()).select_from(WFHChange).where(team_changes).scalar_subquery())
+    return tuple(db.session.execute(select(*columns)).one())
+
+
+def etag_for(members, schedules=True, dated=False, stamp=None):
+    '''
+    Strong ETag of the current request: path and query string, the version stamp of members and,
+    for views whose default window follows the current date, today's date. None for ?since= requests,
+    their body holds the global change token. stamp: version stamp of members already read by the view.
+    '''
+    if 'since' in request.args:
+        return None
+    key = [request.full_path, stamp if stamp is not None else version_stamp(members, schedules)]
+    if dated:
+        key.append(datetime.now().date().isoformat())
+    return hashlib.sha1(repr(key).encode()).hexdigest()
+
+
+def not_modified(etag):
+    # 304 for a client already holding this version (as is or compressed), None to build the full response
+    if etag is None:
+        return None
+    held = next((candidate for candidate in encoded_etags(etag) if request.if_none_match.contains(candidate)), None)
+    if held is None:
+        return None
+    response = Response(status=304)
+    response.set_etag(held)
+    return response
+
+
+def with_etag(response, etag):
+    if etag is not None:
+        response.set_etag(etag)
+    return response
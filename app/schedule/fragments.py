@@ -0,0 +1,200 @@
+# Pre-serialized employee entries of the schedule responses
+# A team view lists every employee on every day of its window, ~150 days x 2 slots, always one of two entries
+# per employee: its WFH and its In-Office variant. Both are encoded once into JSON text (a Fragment) and kept per
+# employee; the response writer splices the text in instead of encoding the same dict on every day.
+# An entry is reused while the employee's values are the ones it was encoded from, and dropped when the
+# Employee row is written through this app (session hooks), so a rename never shows an old name.
+# The bytes are those jsonify writes (compact, sorted keys). In debug mode jsonify indents; the fragments are
+# expanded back into dicts there.
+
+import threading
+
+from flask import current_app, has_app_context, jsonify
+from sqlalchemy import event
+
+from app import db
+from app.models import Employee
+
+# fields of the entry in each view (team_schedule and the HRO views, team_schedule_manager, HRO_wfh_slot_stafflist)
+BASIC_FIELDS = ('id', 'name', 'dept', 'position', 'email', 'status')
+MANAGER_FIELDS = BASIC_FIELDS + ('role', 'reporting_manager')
+FULL_FIELDS = MANAGER_FIELDS + ('country',)
+
+# employee attributes behind the fields other than name and status
+ATTRIBUTES = {'id': 'staff_id', 'dept': 'dept', 'position': 'position', 'email': 'email', 'role': 'role',
+              'reporting_manager': 'reporting_manager', 'country': 'country'}
+
+
+class Fragment:
+    '''JSON text of one value, written as is by write_json.'''
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+
+def indented(provider):
+    # jsonify indents by 2 in debug mode unless the provider says otherwise
+    return (provider.compact is None and current_app.debug) or provider.compact is False
+
+
+def _write(value, provider, parts, lists, keys):
+    # appends the pieces of value's text to parts, fragments go in as they are (no copy)
+    if isinstance(value, Fragment):
+        parts.append(value.text)
+    elif type(value) is int:
+        # counts and ids, the same digits from every encoder
+        parts.append(str(value))
+    elif isinstance(value, dict):
+        separator = '{'
+        for key, item in (sorted(value.items()) if provider.sort_keys else value.items()):
+            # the same few keys on every day, each encoded once per response
+            if key not in keys:
+                keys[key] = provider.dumps(str(key)) + ':'
+            parts.append(separator + keys[key])
+            _write(item, provider, parts, lists, keys)
+            separator = ','
+        parts.append('}' if value else '{}')
+    elif isinstance(value, (list, tuple)):
+        if id(value) in lists:
+            # a list written before (e.g. the all In-Office list of every day without WFH): its pieces again
+            start, end = lists[id(value)]
+            parts.extend(parts[start:end])
+            return
+        start = len(parts)
+        separator = '['
+        for item in value:
+            parts.append(separator)
+            _write(item, provider, parts, lists, keys)
+            separator = ','
+        parts.append(']' if value else '[]')
+        lists[id(value)] = (start, len(parts))
+    else:
+        parts.append(provider.dumps(value))
+
+
+def write_json(value, provider):
+    '''
+    Compact JSON text of value with its Fragments spliced in, the bytes jsonify would write for the plain dicts.
+    The text is joined once from its pieces, a list shared by many days is only walked once.
+    '''
+    parts = []
+    # list pieces are found again by id(), value keeps every list alive until the text is joined
+    _write(value, provider, parts, {}, {})
+    return ''.join(parts)
+
+
+def expand(value, provider):
+    # the plain structure, fragments decoded back into dicts
+    if isinstance(value, Fragment):
+        return provider.loads(value.text)
+    if isinstance(value, dict):
+        return {key: expand(item, provider) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [expand(item, provider) for item in value]
+    return value
+
+
+def fragment_json(value):
+    '''jsonify for a structure holding Fragments.'''
+    provider = current_app.json
+    if indented(provider):
+        return jsonify(expand(value, provider))
+    return current_app.response_class(write_json(value, provider) + '\n', mimetype=provider.mimetype)
+
+
+class EmployeeFragmentCache:
+    '''(WFH, In-Office) Fragments of each employee and field set, see the module comment.'''
+
+    def __init__(self):
+        self._entries = {}      # (fields, staff_id) -> (values, wfh, office)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _values(staff, fields):
+        return (staff.staff_fname, staff.staff_lname) + tuple(getattr(staff, ATTRIBUTES[field]) for field in fields if field in ATTRIBUTES)
+
+    @staticmethod
+    def _encode(staff, fields, status):
+        entry = {}
+        for field in fields:
+            if field == 'name':
+                entry['name'] = staff.staff_fname + " " + staff.staff_lname
+            elif field == 'status':
+                entry['status'] = status
+            else:
+                entry[field] = getattr(staff, ATTRIBUTES[field])
+        return Fragment(current_app.json.dumps(entry, separators=(',', ':')))
+
+    def employees(self, staff_list, fields):
+        '''[(wfh, office)] Fragments of each staff (Employee rows, or any rows with the same attributes).'''
+        keys = [(fields, staff.staff_id) for staff in staff_list]
+        values = [self._values(staff, fields) for staff in staff_list]
+        with self._lock:
+            cached = [self._entries.get(key) for key in keys]
+
+        result = []
+        built = {}
+        for staff, key, value, entry in zip(staff_list, keys, values, cached):
+            if entry is None or entry[0] != value:
+                entry = (value, self._encode(staff, fields, "WFH"), self._encode(staff, fields, "In-Office"))
+                built[key] = entry
+            result.append(entry[1:])
+
+        with self._lock:
+            self.hits += len(keys) - len(built)
+            self.misses += len(built)
+            self._entries.update(built)
+        return result
+
+    def invalidate(self, staff_ids=None):
+        with self._lock:
+            self.invalidations += 1
+            if staff_ids is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[1] in staff_ids]:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'invalidations': self.invalidations, 'entries': len(self._entries)}
+
+
+def get_fragment_cache():
+    return current_app.extensions['employee_fragments']
+
+
+def init_fragment_cache(app):
+    app.extensions['employee_fragments'] = EmployeeFragmentCache()
+
+
+# ---- session hooks, an employee write drops that employee's fragments ----
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_fragment_changes(session, flush_context):
+    changed = session.info.setdefault('employee_fragments_reset', set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Employee):
+            changed.add(obj.staff_id)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _reset_fragments(session):
+    changed = session.info.pop('employee_fragments_reset', None)
+    if changed and has_app_context() and 'employee_fragments' in current_app.extensions:
+        current_app.extensions['employee_fragments'].invalidate(changed)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_fragment_changes(session):
+    session.info.pop('employee_fragments_reset', None)
+
+
+@event.listens_for(db.metadata, 'after_drop')
+def _drop_fragments(target, connection, **kw):
+    if has_app_context() and 'employee_fragments' in current_app.extensions:
+        current_app.extensions['employee_fragments'].invalidate()
@@ -0,0 +1,79 @@
+# Day grid shared by the team and HRO schedule views
+# A boolean matrix of staff x day x half-day (AM, PM) built once from the WFH records of the window,
+# wfh/office counts and per-day employee lists are then read off it with vectorised reductions.
+
+import numpy as np
+
+AM = 0
+PM = 1
+VALID_TIME_SLOTS = ("AM", "PM", "FULL")
+
+
+class DayGrid:
+    def __init__(self, team, start_date, end_date):
+        # team: Employee rows in display order, start_date/end_date: inclusive date range
+        self.team = team
+        self.start_date = start_date
+        self.num_days = (end_date - start_date).days + 1
+        self.wfh = np.zeros((len(team), self.num_days, 2), dtype=bool)
+        # days with at least one WFH record for the team (including unexpected time slots)
+        self.has_records = np.zeros(self.num_days, dtype=bool)
+
+    def add_records(self, records):
+        # records: (staff_id, wfh_date, time_slot) of Approved/Pending_Withdrawal schedules
+        staff_ids = []
+        dates = []
+        slots = []
+        for staff_id, wfh_date, time_slot in records:
+            if time_slot not in VALID_TIME_SLOTS:
+                # Handle unexpected time slot with a log message
+                print(f"Unexpected time slot '{time_slot}' for staff_id: {staff_id} on {wfh_date}")
+            staff_ids.append(staff_id)
+            dates.append(wfh_date)
+            slots.append(time_slot)
+        if not staff_ids:
+            return self
+
+        days = (np.array(dates, dtype='datetime64[D]') - np.datetime64(self.start_date, 'D')).astype(np.int64)
+        in_window = (days >= 0) & (days < self.num_days)
+        self.has_records[days[in_window]] = True
+
+        # map staff ids onto grid rows, a staff listed twice in the team gets both rows
+        team_ids = np.array([staff.staff_id for staff in self.team], dtype=np.int64)
+        if len(team_ids) == 0:
+            return self
+        unique_ids, team_rows = np.unique(team_ids, return_inverse=True)
+        record_ids = np.array(staff_ids, dtype=np.int64)
+        position = np.minimum(np.searchsorted(unique_ids, record_ids), len(unique_ids) - 1)
+        known = in_window & (unique_ids[position] == record_ids)
+
+        slots = np.array(slots, dtype=object)
+        am = known & ((slots == "AM") | (slots == "FULL"))
+        pm = known & ((slots == "PM") | (slots == "FULL"))
+        unique_grid = np.zeros((len(unique_ids), self.num_days, 2), dtype=bool)
+        unique_grid[position[am], days[am], AM] = True
+        unique_grid[position[pm], days[pm], PM] = True
+        self.wfh |= unique_grid[team_rows]
+        return self
+
+    def dates(self):
+        # 'YYYY-MM-DD' for every day of the grid
+        return window_dates(self.start_date, self.num_days)
+
+    def wfh_counts(self, half):
+        # number of staff working from home per day for the half-day
+        return self.wfh[:, :, half].sum(axis=0).tolist()
+
+    def wfh_rows(self, day, half):
+        # team indexes working from home on the day, in team order
+        return np.flatnonzero(self.wfh[:, day, half]).tolist()
+
+    def statuses(self, day, half):
+        # True/False per team member, in team order
+        return self.wfh[:, day, half].tolist()
+
+
+def window_dates(start_date, num_days):
+    # 'YYYY-MM-DD' of num_days days from start_date
+    start = np.datetime64(start_date, 'D')
+    return np.datetime_as_string(start + np.arange(num_days)).tolist()
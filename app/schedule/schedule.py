@@ -3,11 +3,43 @@ from flask import jsonify, request
 from app.schedule import schedule_blueprint  # Import the blueprint
 from app import db
 from app.models import WFHApplication, WFHSchedule, Employee
+from app.capacity import get_capacity_cache
+from app.schedule.grid import DayGrid, AM, PM, VALID_TIME_SLOTS, window_dates
+from app.schedule.streaming import stream_json_array, stream_rows
+from app.schedule.fragments import BASIC_FIELDS, FULL_FIELDS, MANAGER_FIELDS, fragment_json, get_fragment_cache
+from app.schedule.window import schedule_window, employee_page, with_next_cursor, since_token, with_change_token, response_format, HR_RESPONSE_FORMATS
+from app.schedule.compact import compact_days, count_days, employee_table
+from app.schedule.snapshots import DEPT, MANAGER, DayCounts, live_counts, snapshot_counts, take_snapshot
+from app.changes import EXPIRED_TOKEN_ERROR, change_token, changed_dates, prune_changes, token_expired
+from app.schedule.conditional import etag_for, version_stamp, not_modified, with_etag, own_members, team_members, peer_members
+from app.hierarchy import get_org_hierarchy
 from sqlalchemy import and_,or_
 from sqlalchemy.exc import SQLAlchemyError, OperationalError
 from datetime import datetime, timedelta
+from itertools import groupby
 from dateutil.relativedelta import relativedelta
 import math
+
+
+def changed_days(team, since, token, start_date, end_date):
+    # dates within the window on which a schedule of the team changed after since
+    return [date for date in changed_dates([staff.staff_id for staff in team], since, token) if start_date <= date <= end_date]
+
+
+def schedule_response(days, token, next_cursor, changed=None, etag=None, employees=None):
+    # full list of days with the token in a header, or for a since request only the changed days with the new token
+    # days may hold employee fragments (app/schedule/fragments.py); with employees (?format=compact) the days
+    # come in an object with the employee table their positions refer to
+    if changed is None:
+        body = days if employees is None else {'employees': employees, 'days': days}
+        return with_etag(with_next_cursor(with_change_token(fragment_json(body), token), next_cursor), etag), 200
+    changed = {str(date) for date in changed}
+    body = {'token': str(token), 'days': [day for day in days if day['date'] in changed]}
+    if employees is not None:
+        body['employees'] = employees
+    return with_next_cursor(fragment_json(body), next_cursor), 200
+
+
 @schedule_blueprint.route('/own/<int:id>', methods=['GET'])
 def own_schedule(id):
     # '''
@@ -28,9 +60,14 @@ def own_schedule(id):
         type: integer
         required: true
         description: The staff ID to fetch the WFH schedule for.
+      - in: query
+        name: since
+        type: string
+        required: false
+        description: X-Change-Token of a previous response, only the dates changed since then are returned.
     responses:
       200:
-        description: A list of schedules for the staff.
+        description: A list of schedules for the staff (X-Change-Token header), or with since an object with the new token, the changed dates and their schedules.
         schema:
           type: array
           items:
@@ -46,17 +83,47 @@ def own_schedule(id):
                 type: string
               description:
                 type: string
+      304:
+        description: Not modified since the ETag in If-None-Match.
+      400:
+        description: Invalid since token.
+      410:
+        description: The since token is older than the change feed kept (CHANGE_FEED_RETENTION_DAYS), reload without since.
       500:
         description: Server error.
     """
     try:
+        since = since_token()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        # Unchanged schedules are answered from the version stamp alone
+        etag = etag_for(own_members(id))
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+
+        # Token read before the schedules, a change committed in between is sent again on the next poll
+        token = change_token()
+        if since is not None and token_expired(since):
+            return jsonify({'error': EXPIRED_TOKEN_ERROR}), 410
+
         # Query the WFH schedules for the staff
-        wfh_arrs = db.session.query(WFHSchedule).join(WFHApplication).filter(
+        wfh_query = db.session.query(WFHSchedule).join(WFHApplication).filter(
             WFHApplication.staff_id == id, 
             or_(WFHApplication.manager_reject_reason.is_(None), WFHApplication.manager_reject_reason == ''), 
             or_(WFHSchedule.manager_withdraw_reason.is_(None), WFHSchedule.manager_withdraw_reason == ''),
             or_(WFHSchedule.status == 'Approved', WFHSchedule.status == 'Pending_Approval', WFHSchedule.status == 'Pending_Withdrawal')
-        ).all()
+        )
+
+        # With since, only the dates changed since that token: the client replaces its entries on those dates
+        if since is not None:
+            dates = changed_dates([id], since, token)
+            if not dates:
+                return jsonify({'token': str(token), 'dates': [], 'schedules': []}), 200
+            wfh_query = wfh_query.filter(WFHSchedule.wfh_date.in_(dates))
+        wfh_arrs = wfh_query.all()
         
 
 
@@ -91,7 +158,9 @@ def own_schedule(id):
                     )
             
 
-        return jsonify(schedule_list), 200
+        if since is not None:
+            return jsonify({'token': str(token), 'dates': [str(date) for date in dates], 'schedules': schedule_list}), 200
+        return with_etag(with_change_token(jsonify(schedule_list), token), etag), 200
     
     except OperationalError as e:
         print('Database connection issue.')
@@ -113,6 +182,14 @@ def own_schedule(id):
 @schedule_blueprint.route('/team_schedule_manager/<int:staff_id>', methods=['GET'])
 def team_schedule_manager(staff_id):
     response = []
+
+    # Unchanged team schedules are answered from the team's version stamp before any other query,
+    # the same stamp keeps the capacity cache from serving a team built before it
+    stamp = version_stamp(team_members(staff_id))
+    etag = etag_for(team_members(staff_id), dated=True, stamp=stamp)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
     
     # Retrieve the manager based on the provided staff_id
     manager = Employee.query.filter_by(staff_id=staff_id).first()
@@ -122,126 +199,80 @@ def team_schedule_manager(staff_id):
     for staff in Employee.query.filter_by(reporting_manager=manager.staff_id).all(): 
         team.append(staff)
 
-    # Fetch all "Approved" and "Pending_Withdrawal" WFH records for the team
-    wfh_records = (
-        db.session.query(
-            Employee.staff_id,
-            Employee.staff_fname,
-            Employee.staff_lname,
-            WFHApplication.application_id,
-            WFHSchedule.wfh_date,
-            WFHApplication.time_slot
-        )
-        .join(WFHApplication, Employee.staff_id == WFHApplication.staff_id)
-        .join(WFHSchedule, WFHApplication.application_id == WFHSchedule.application_id)
-        .filter(
-            Employee.staff_id.in_([staff.staff_id for staff in team]),
-            or_(
-                WFHSchedule.status == "Approved",
-                WFHSchedule.status == "Pending_Withdrawal"
-            )
-        )
-        .all()
-    )
-
-    # Dictionary to store WFH records categorized by date and time slots (AM, PM, FULL)
-    wfh_dict = {}
-
-    # Valid time slots
-    valid_time_slots = ["AM", "PM", "FULL"]
-
-    # Process the fetched WFH records
-    for record in wfh_records:
-        date_str = str(record.wfh_date)
-        
-        # Initialize the dictionary for the date if it doesn't exist
-        if date_str not in wfh_dict:
-            wfh_dict[date_str] = {"AM": [], "PM": [], "FULL": []}
-        
-        # Check if the time slot is valid, then append the staff_id accordingly
-        if record.time_slot in valid_time_slots:
-            wfh_dict[date_str][record.time_slot].append(record.staff_id)
-        else:
-            # Handle unexpected time slot with a log message
-            print(f"Unexpected time slot '{record.time_slot}' for staff_id: {record.staff_id} on {date_str}")
-
-    # Define the current date and the date range (2 months back, 3 months forward)
+    # Define the current date and the default date range (2 months back, 3 months forward)
     today = datetime.now()
     start_date = today - relativedelta(months=2)  # 2 months back
     end_date = today + relativedelta(months=3) - timedelta(days=1)   # 3 months forward
 
+    # Optional ?start=&end= range, ?limit=&cursor= page of the employee lists, ?since= change token and ?format=
+    try:
+        start_date, end_date = schedule_window(start_date.date(), end_date.date())
+        page, next_cursor = employee_page(team)
+        since = since_token()
+        compact = response_format() == 'compact'
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    employees = employee_table(team, page, MANAGER_FIELDS) if compact else None
+
+    # With since, only the days on which a schedule of the team changed are rebuilt
+    token = change_token()
+    if since is not None and token_expired(since):
+        return jsonify({'error': EXPIRED_TOKEN_ERROR}), 410
+    changed = None
+    if since is not None:
+        changed = changed_days(team, since, token, start_date, end_date)
+        if not changed:
+            return schedule_response([], token, next_cursor, changed, employees=employees)
+        start_date, end_date = changed[0], changed[-1]
+
+    # "Approved" and "Pending_Withdrawal" WFH slots of the team per day, served from the capacity cache
+    team_records, invalid_records = get_capacity_cache().records(manager.staff_id, start_date, end_date, stamp)
+
+    # Handle unexpected time slot with a log message
+    for invalid_staff_id, invalid_date_str, invalid_time_slot in invalid_records:
+        print(f"Unexpected time slot '{invalid_time_slot}' for staff_id: {invalid_staff_id} on {invalid_date_str}")
+
     # Get the total number of staff members in the team
     total_staff_strength = len(team)
 
-    # Iterate over each day within the defined date range
-    current_date = start_date
-    while current_date <= end_date:
-        date_str = current_date.strftime('%Y-%m-%d')
-        
-        # Initialize lists to store staff IDs for different statuses (WFH, In-Office)
-        office_am = []
-        office_pm = []
-        wfh_am = []
-        wfh_pm = []
-        employees_am = []
-        employees_pm = []
-        employees_default = []
-        
-        # If there are WFH records for the current date, process them
-        if date_str in wfh_dict:
-            for staff in team:
-                full_name = staff.staff_fname + " " + staff.staff_lname
-                
-                # Handle full-day WFH case
-                if staff.staff_id in wfh_dict[date_str]["FULL"]:
-                    wfh_am.append(staff.staff_id)
-                    employees_am.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH", "role": staff.role, "reporting_manager": staff.reporting_manager})
-                    wfh_pm.append(staff.staff_id)
-                    employees_pm.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH", "role": staff.role, "reporting_manager": staff.reporting_manager})
-                else:
-                    # Handle AM WFH slot
-                    if staff.staff_id in wfh_dict[date_str]["AM"]:
-                        wfh_am.append(staff.staff_id)
-                        employees_am.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH", "role": staff.role, "reporting_manager": staff.reporting_manager})
-                    else:
-                        # Mark as "In-Office" if not WFH in AM
-                        office_am.append(staff.staff_id)
-                        employees_am.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "In-Office", "role": staff.role, "reporting_manager": staff.reporting_manager})
+    # staff x day x AM/PM WFH grid of the team for the date range
+    grid = DayGrid(team, start_date, end_date).add_records(team_records)
+    wfh_am_counts = grid.wfh_counts(AM)
+    wfh_pm_counts = grid.wfh_counts(PM)
+    if compact:
+        return schedule_response(compact_days(grid, page), token, next_cursor, changed, etag, employees)
 
-                    # Handle PM WFH slot
-                    if staff.staff_id in wfh_dict[date_str]["PM"]:
-                        wfh_pm.append(staff.staff_id)
-                        employees_pm.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH", "role": staff.role, "reporting_manager": staff.reporting_manager})
-                    else:
-                        # Mark as "In-Office" if not WFH in PM
-                        office_pm.append(staff.staff_id)
-                        employees_pm.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "In-Office", "role": staff.role, "reporting_manager": staff.reporting_manager})
+    # WFH and In-Office entry of each staff on the page, pre-serialized once per employee and shared by every day
+    fragments = get_fragment_cache().employees([team[i] for i in page], MANAGER_FIELDS)
+    employees_wfh = {i: wfh for i, (wfh, _) in zip(page, fragments)}
+    employees_office = {i: office for i, (_, office) in zip(page, fragments)}
+    all_office = [employees_office[i] for i in page]
+
+    # Iterate over each day within the defined date range
+    for day, date_str in enumerate(grid.dates()):
+        # If there are WFH records for the current date, mark each staff as WFH or In-Office per slot
+        if grid.has_records[day]:
+            am_statuses = grid.statuses(day, AM)
+            pm_statuses = grid.statuses(day, PM)
+            employees_am = [employees_wfh[i] if am_statuses[i] else employees_office[i] for i in page]
+            employees_pm = [employees_wfh[i] if pm_statuses[i] else employees_office[i] for i in page]
 
             # Append the day's summary to the response
             response.append({
                 "date": date_str, 
-                "am": {"wfh": len(wfh_am), "office": len(office_am), "employees": employees_am}, 
-                "pm": {"wfh": len(wfh_pm), "office": len(office_pm), "employees": employees_pm}
+                "am": {"wfh": wfh_am_counts[day], "office": total_staff_strength - wfh_am_counts[day], "employees": employees_am}, 
+                "pm": {"wfh": wfh_pm_counts[day], "office": total_staff_strength - wfh_pm_counts[day], "employees": employees_pm}
             })
         else:
-            # Default case if no WFH records exist for the date
-            while len(employees_default) != total_staff_strength:
-                for staff in team:
-                    full_name = staff.staff_fname + " " + staff.staff_lname
-                    employees_default.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "In-Office", "role": staff.role, "reporting_manager": staff.reporting_manager})
-
             # Append the default "In-Office" status to the response
             response.append({
                 "date": date_str, 
-                "am": {"wfh": 0, "office": total_staff_strength, "employees": employees_default}, 
-                "pm": {"wfh": 0, "office": total_staff_strength, "employees": employees_default}
+                "am": {"wfh": 0, "office": total_staff_strength, "employees": all_office}, 
+                "pm": {"wfh": 0, "office": total_staff_strength, "employees": all_office}
             })
-
-        # Move to the next day in the range
-        current_date += timedelta(days=1)
     
     # Return the JSON response with the WFH and In-Office status per day
-    return jsonify(response), 200
+    return schedule_response(response, token, next_cursor, changed, etag)
 
 # Route to get the list of employees under a manager
 @schedule_blueprint.route('/manageremployeelist/<int:staff_id>', methods=['GET'])
@@ -249,6 +280,12 @@ def employeelist_manager(staff_id):
     # Initialize response list
     response = []
 
+    # Unchanged team members are answered from the team's version stamp
+    etag = etag_for(team_members(staff_id), schedules=False)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
     # Retrieve the manager details using staff_id
     manager = Employee.query.filter_by(staff_id=staff_id).first()
     
@@ -284,7 +321,7 @@ def employeelist_manager(staff_id):
     })
 
     # Return the response in JSON format with status code 200 (OK)
-    return jsonify(response), 200
+    return with_etag(jsonify(response), etag), 200
 
 
 # Route to get the work-from-home (WFH) schedule for a manager's team
@@ -293,6 +330,12 @@ def team_schedule(staff_id):
     # Initialize response list
     response = []
 
+    # Unchanged team schedules are answered from the team's version stamp before any other query
+    etag = etag_for(peer_members(staff_id), dated=True)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
     # Retrieve the staff member and their manager using the staff_id
     staff_member = Employee.query.filter_by(staff_id=staff_id).first()
     manager = Employee.query.filter_by(staff_id=staff_member.reporting_manager).first()
@@ -304,13 +347,38 @@ def team_schedule(staff_id):
         if staff.staff_id != staff_member.staff_id: 
             team.append(staff)
     
-    # Query all approved or pending withdrawal WFH records for the team
+    # Get the current date
+    today = datetime.now()
+
+    # Set the default date range to 2 months back and 3 months forward
+    start_date = today - relativedelta(months=2)
+    end_date = today + relativedelta(months=3)
+
+    # Optional ?start=&end= range, ?limit=&cursor= page of the employee lists, ?since= change token and ?format=
+    try:
+        start_date, end_date = schedule_window(start_date.date(), end_date.date())
+        page, next_cursor = employee_page(team)
+        since = since_token()
+        compact = response_format() == 'compact'
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    employees = employee_table(team, page, BASIC_FIELDS) if compact else None
+
+    # With since, only the days on which a schedule of the team changed are rebuilt
+    token = change_token()
+    if since is not None and token_expired(since):
+        return jsonify({'error': EXPIRED_TOKEN_ERROR}), 410
+    changed = None
+    if since is not None:
+        changed = changed_days(team, since, token, start_date, end_date)
+        if not changed:
+            return schedule_response([], token, next_cursor, changed, employees=employees)
+        start_date, end_date = changed[0], changed[-1]
+
+    # Query the approved or pending withdrawal WFH records of the team within the date range
     wfh_records = (
         db.session.query(
             Employee.staff_id,
-            Employee.staff_fname,
-            Employee.staff_lname,
-            WFHApplication.application_id,
             WFHSchedule.wfh_date,
             WFHApplication.time_slot
         )
@@ -321,106 +389,52 @@ def team_schedule(staff_id):
             or_(
                 WFHSchedule.status == "Approved",
                 WFHSchedule.status == "Pending_Withdrawal"
-            )
+            ),
+            WFHSchedule.wfh_date >= start_date,
+            WFHSchedule.wfh_date <= end_date
         )
         .all()
     )
+    total_staff_strength = len(team)
 
-    # Initialize a dictionary to store WFH records by date and time slot
-    wfh_dict = {}
+    # staff x day x AM/PM WFH grid of the team for the date range
+    grid = DayGrid(team, start_date, end_date).add_records(wfh_records)
+    wfh_am_counts = grid.wfh_counts(AM)
+    wfh_pm_counts = grid.wfh_counts(PM)
+    if compact:
+        return schedule_response(compact_days(grid, page), token, next_cursor, changed, etag, employees)
 
-    # Define valid time slots
-    valid_time_slots = ["AM", "PM", "FULL"]
-
-    # Process each WFH record and categorize them by date and time slot
-    for record in wfh_records:
-        date_str = str(record.wfh_date)
-        
-        # Initialize date entry in wfh_dict if it doesn't exist
-        if date_str not in wfh_dict:
-            wfh_dict[date_str] = {"AM": [], "PM": [], "FULL": []}
-        
-        # Add staff to the appropriate time slot
-        if record.time_slot in valid_time_slots:
-            wfh_dict[date_str][record.time_slot].append(record.staff_id)
-        else:
-            # Log unexpected time slots
-            print(f"Unexpected time slot '{record.time_slot}' for staff_id: {record.staff_id} on {date_str}")
-            
-    # Get the current date
-    today = datetime.now()
-
-    # Set the date range to 2 months back and 3 months forward
-    start_date = today - relativedelta(months=2)
-    end_date = today + relativedelta(months=3)
-    total_staff_strength = len(team)
+    # WFH and In-Office entry of each staff on the page, pre-serialized once per employee and shared by every day
+    fragments = get_fragment_cache().employees([team[i] for i in page], BASIC_FIELDS)
+    employees_wfh = {i: wfh for i, (wfh, _) in zip(page, fragments)}
+    employees_office = {i: office for i, (_, office) in zip(page, fragments)}
+    all_office = [employees_office[i] for i in page]
 
     # Iterate over each day in the date range
-    current_date = start_date
-    while current_date <= end_date:
-        date_str = current_date.strftime('%Y-%m-%d')
-        
-        # Lists to keep track of WFH and office presence in AM and PM slots
-        office_am = []
-        office_pm = []
-        wfh_am = []
-        wfh_pm = []
-        employees_am = []
-        employees_pm = []
-
-        # If the current date has WFH records, process them
-        if date_str in wfh_dict:
-            for staff in team:
-                full_name = staff.staff_fname + " " + staff.staff_lname
-                
-                # If staff has full-day WFH, mark both AM and PM as WFH
-                if staff.staff_id in wfh_dict[date_str]["FULL"]:
-                    wfh_am.append(staff.staff_id)
-                    employees_am.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH"})
-                    wfh_pm.append(staff.staff_id)
-                    employees_pm.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH"})
-                else:
-                    # If staff is WFH in AM, otherwise mark as in-office
-                    if staff.staff_id in wfh_dict[date_str]["AM"]:
-                        wfh_am.append(staff.staff_id)
-                        employees_am.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH"})
-                    else:
-                        office_am.append(staff.staff_id)
-                        employees_am.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "In-Office"})
-
-                    # If staff is WFH in PM, otherwise mark as in-office
-                    if staff.staff_id in wfh_dict[date_str]["PM"]:
-                        wfh_pm.append(staff.staff_id)
-                        employees_pm.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH"})
-                    else:
-                        office_pm.append(staff.staff_id)
-                        employees_pm.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "In-Office"})
+    for day, date_str in enumerate(grid.dates()):
+        # If the current date has WFH records, mark each staff as WFH or In-Office per slot
+        if grid.has_records[day]:
+            am_statuses = grid.statuses(day, AM)
+            pm_statuses = grid.statuses(day, PM)
+            employees_am = [employees_wfh[i] if am_statuses[i] else employees_office[i] for i in page]
+            employees_pm = [employees_wfh[i] if pm_statuses[i] else employees_office[i] for i in page]
 
             # Append the day's AM/PM breakdown to the response
             response.append({
                 "date": date_str, 
-                "am": {"wfh": len(wfh_am), "office": len(office_am), "employees": employees_am}, 
-                "pm": {"wfh": len(wfh_pm), "office": len(office_pm), "employees": employees_pm}
+                "am": {"wfh": wfh_am_counts[day], "office": total_staff_strength - wfh_am_counts[day], "employees": employees_am}, 
+                "pm": {"wfh": wfh_pm_counts[day], "office": total_staff_strength - wfh_pm_counts[day], "employees": employees_pm}
             })
         else:
-            # If no WFH records exist for the date, assume all are in-office
-            employees = []
-            for staff in team:
-                full_name = staff.staff_fname + " " + staff.staff_lname
-                employees.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "In-Office"})
-            
             # Append default in-office status for both AM and PM
             response.append({
                 "date": date_str, 
-                "am": {"wfh": 0, "office": total_staff_strength, "employees": employees}, 
-                "pm": {"wfh": 0, "office": total_staff_strength, "employees": employees}
+                "am": {"wfh": 0, "office": total_staff_strength, "employees": all_office}, 
+                "pm": {"wfh": 0, "office": total_staff_strength, "employees": all_office}
             })
-        
-        # Move to the next day
-        current_date += timedelta(days=1)
 
     # Return the response in JSON format with status code 200 (OK)
-    return jsonify(response), 200
+    return schedule_response(response, token, next_cursor, changed, etag)
 
 
 
@@ -431,6 +445,11 @@ def employeelist(staff_id):
     
     response = []
 
+    # unchanged team members are answered from the team's version stamp
+    etag = etag_for(peer_members(staff_id), schedules=False)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
     
     # retrieve staff member and manager
     staff_member = Employee.query.filter_by(staff_id=staff_id).first()
@@ -454,7 +473,7 @@ def employeelist(staff_id):
         "EmployeeList": employees
     })
 
-    return jsonify(response), 200
+    return with_etag(jsonify(response), etag), 200
 
 
 @schedule_blueprint.route('/HRO_overall', methods=['GET'])
@@ -464,111 +483,155 @@ def overall_schedule_everyone():
     ---
     tags:
       - HR View Overall Schedule
+    parameters:
+      - name: start
+        in: query
+        required: false
+        description: First date (YYYY-MM-DD), defaults to 2 months back.
+        type: string
+      - name: end
+        in: query
+        required: false
+        description: Last date (YYYY-MM-DD), defaults to 3 months forward.
+        type: string
+      - name: limit
+        in: query
+        required: false
+        description: Number of employees per page in the employee lists (counts always cover everyone).
+        type: integer
+      - name: cursor
+        in: query
+        required: false
+        description: X-Next-Cursor header of the previous page.
+        type: string
+      - name: format
+        in: query
+        required: false
+        description: full (default), compact (the employees once plus the positions of WFH staff per day) or counts (the day counts only).
+        type: string
     responses:
       200:
         description: Successful response with the WFH status of entire organisation.
+      400:
+        description: Invalid date range, paging or format parameters.
       500:
         description: Internal server error.
     """
     try:
-        response = []
-        # Retrieve all employees in the organization
-        team = db.session.query(Employee).all()
-
-        # Fetch all WFH records where the status is either 'Approved' or 'Pending_Withdrawal'
-        wfh_records = db.session.query(Employee.staff_id, Employee.staff_fname, Employee.staff_lname, WFHApplication.application_id, WFHSchedule.wfh_date, WFHApplication.time_slot)\
-            .join(WFHApplication, Employee.staff_id == WFHApplication.staff_id)\
-            .join(WFHSchedule, WFHApplication.application_id == WFHSchedule.application_id)\
-            .filter(or_(WFHSchedule.status == 'Approved', WFHSchedule.status == 'Pending_Withdrawal')).all()
-
-        # Dictionary to store WFH records by date and time slots
-        wfh_dict = {}
-
-        # Valid time slots for WFH (AM, PM, FULL)
-        valid_time_slots = ["AM", "PM", "FULL"]
-
-        # Loop through all WFH records and populate the dictionary based on the date and time slot
-        for record in wfh_records:
-            date_str = str(record.wfh_date)
-            
-            # Initialize the dictionary for each date if not already present
-            if date_str not in wfh_dict:
-                wfh_dict[date_str] = {"AM": [], "PM": [], "FULL": []}
-            
-            # Ensure the time slot is valid before adding it to the dictionary
-            if record.time_slot in valid_time_slots:
-                wfh_dict[date_str][record.time_slot].append(record.staff_id)
-            else:
-                # Handle unexpected time slot values (for debugging purposes)
-                print(f"Unexpected time slot '{record.time_slot}' for staff_id: {record.staff_id} on {date_str}")
+        # Retrieve all employees in the organization (only the columns shown, plain rows instead of ORM objects)
+        team = db.session.query(Employee.staff_id, Employee.staff_fname, Employee.staff_lname, Employee.dept, Employee.position, Employee.email).order_by(Employee.staff_id).all()
 
         # Get today's date
         today = datetime.now()
 
-        # Define the date range to display (2 months back to 3 months forward)
+        # Define the default date range to display (2 months back to 3 months forward)
         start_date = today - relativedelta(months=2)  # 2 months back
         end_date = today + relativedelta(months=3) - timedelta(days=1)   # 3 months forward
+
+        # Optional ?start=&end= range, ?limit=&cursor= page of the employee lists and ?format=
+        try:
+            start_date, end_date = schedule_window(start_date.date(), end_date.date())
+            page, next_cursor = employee_page(team)
+            body_format = response_format(HR_RESPONSE_FORMATS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Counts of the organisation from the nightly snapshot when only the counts or one page of employees is returned
+        counts = None
+        if body_format == 'counts' or len(page) < len(team):
+            counts = snapshot_counts(DEPT, None, None, start_date, end_date)
         total_staff_strength = len(team)  # Total number of employees
+        num_days = (end_date - start_date).days + 1
 
-        # Iterate over the specified date range, day by day
-        current_date = start_date
-        while current_date <= end_date:
-            date_str = current_date.strftime('%Y-%m-%d')
-            office_am = []  # List to hold staff who are in-office in the morning
-            office_pm = []  # List to hold staff who are in-office in the afternoon
-            wfh_am = []     # List to hold staff working from home in the morning
-            wfh_pm = []     # List to hold staff working from home in the afternoon
-            employees_am = []  # List to store details of employees in the morning
-            employees_pm = []  # List to store details of employees in the afternoon
-
-            # If there are WFH records for the current date
-            if date_str in wfh_dict:
-                # Loop through all employees to determine their WFH or in-office status for the current date
-                for staff in team:
-                    full_name = staff.staff_fname + " " + staff.staff_lname
-
-                    # If the employee is working from home the entire day
-                    if staff.staff_id in wfh_dict[date_str]["FULL"]:
-                        wfh_am.append(staff.staff_id)
-                        employees_am.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH"})
-                        wfh_pm.append(staff.staff_id)
-                        employees_pm.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH"})
+        # Fetch the WFH records of the date range where the status is either 'Approved' or 'Pending_Withdrawal'
+        records_query = db.session.query(Employee.staff_id, WFHSchedule.wfh_date, WFHApplication.time_slot)\
+            .join(WFHApplication, Employee.staff_id == WFHApplication.staff_id)\
+            .join(WFHSchedule, WFHApplication.application_id == WFHSchedule.application_id)\
+            .filter(or_(WFHSchedule.status == 'Approved', WFHSchedule.status == 'Pending_Withdrawal'),
+                    WFHSchedule.wfh_date >= start_date, WFHSchedule.wfh_date <= end_date)
+
+        # Compact: the employees of the page once, per day the positions of those working from home
+        if body_format == 'compact':
+            if counts is not None:
+                # counted already, only the employees listed need their records
+                records_query = records_query.filter(Employee.staff_id.in_([team[i].staff_id for i in page]))
+            # employee x day x AM/PM WFH grid of the organisation for the date range
+            grid = DayGrid(team, start_date, end_date).add_records(records_query.all())
+            if counts is None:
+                counts = DayCounts(grid.wfh_counts(AM), grid.wfh_counts(PM), grid.has_records.tolist())
+            return with_next_cursor(jsonify({'employees': employee_table(team, page, BASIC_FIELDS), 'days': compact_days(grid, page, (counts.am, counts.pm))}), next_cursor), 200
+
+        # Without the snapshot the day counts come from one aggregate query, not from the records
+        if counts is None:
+            counts = live_counts(start_date, end_date)
+        wfh_am_counts = counts.am
+        wfh_pm_counts = counts.pm
+        dates = window_dates(start_date, num_days)
+
+        # Counts: the WFH and office counts of each day only
+        if body_format == 'counts':
+            return jsonify(count_days(dates, wfh_am_counts, wfh_pm_counts, total_staff_strength)), 200
+
+        # Records of the employees on the page by date and staff, read from a server-side cursor while the days are
+        # written: neither the records nor a grid of them are held in memory
+        rows = {team[i].staff_id: i for i in page}
+        if len(page) < len(team):
+            records_query = records_query.filter(Employee.staff_id.in_(list(rows)))
+        # records with an unexpected time slot are reported before the body is sent, like DayGrid does
+        for staff_id, wfh_date, time_slot in records_query.filter(WFHApplication.time_slot.notin_(VALID_TIME_SLOTS)).all():
+            print(f"Unexpected time slot '{time_slot}' for staff_id: {staff_id} on {wfh_date}")
+        records = stream_rows(records_query.order_by(WFHSchedule.wfh_date, Employee.staff_id))
+        fragment_cache = get_fragment_cache()
+        # WFH entries of the employees listed so far, built the first time an employee works from home
+        entries = {}
+
+        def wfh_entries(indexes):
+            # WFH entry of each team index, in the order given
+            missing = [i for i in indexes if i not in entries]
+            if missing:
+                fragments = fragment_cache.employees([team[i] for i in missing], BASIC_FIELDS)
+                entries.update((i, wfh) for i, (wfh, _) in zip(missing, fragments))
+            return [entries[i] for i in indexes]
+
+        def days():
+            try:
+                records_by_date = groupby(records, key=lambda record: record.wfh_date)
+                current = next(records_by_date, None)
+                # Iterate over the specified date range, day by day, one day object at a time
+                for day, date_str in enumerate(dates):
+                    # team indexes working from home in the morning / afternoon, in staff order
+                    am_rows, pm_rows = {}, {}
+                    if current is not None and current[0] == start_date + timedelta(days=day):
+                        for staff_id, _, time_slot in current[1]:
+                            if staff_id not in rows:
+                                continue
+                            if time_slot in ('AM', 'FULL'):
+                                am_rows[rows[staff_id]] = None
+                            if time_slot in ('PM', 'FULL'):
+                                pm_rows[rows[staff_id]] = None
+                        current = next(records_by_date, None)
+
+                    # If there are WFH records for the current date
+                    if counts.has_records[day]:
+                        # Morning and afternoon WFH and in-office counts of the date
+                        yield {
+                            "date": date_str, 
+                            "am": {"wfh": wfh_am_counts[day], "office": total_staff_strength - wfh_am_counts[day], "employees": wfh_entries(am_rows)}, 
+                            "pm": {"wfh": wfh_pm_counts[day], "office": total_staff_strength - wfh_pm_counts[day], "employees": wfh_entries(pm_rows)}
+                        }
                     else:
-                        # Check if the employee is working from home in the morning (AM)
-                        if staff.staff_id in wfh_dict[date_str]["AM"]:
-                            wfh_am.append(staff.staff_id)
-                            employees_am.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH"})
-                        else:
-                            # If not working from home, mark them as in-office in the morning
-                            office_am.append(staff.staff_id)
-                        
-                        # Check if the employee is working from home in the afternoon (PM)
-                        if staff.staff_id in wfh_dict[date_str]["PM"]:
-                            wfh_pm.append(staff.staff_id)
-                            employees_pm.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH"})
-                        else:
-                            # If not working from home, mark them as in-office in the afternoon
-                            office_pm.append(staff.staff_id)
-
-                # Add the date's information to the response with morning and afternoon WFH and in-office counts
-                response.append({
-                    "date": date_str, 
-                    "am": {"wfh": len(wfh_am), "office": len(office_am), "employees": employees_am}, 
-                    "pm": {"wfh": len(wfh_pm), "office": len(office_pm), "employees": employees_pm}
-                })
-            else:
-                # If no WFH records exist for the current date, assume all employees are in-office
-                response.append({
-                    "date": date_str, 
-                    "am": {"wfh": 0, "office": total_staff_strength, "employees": []}, 
-                    "pm": {"wfh": 0, "office": total_staff_strength, "employees": []}
-                })
-
-            # Move to the next day in the date range
-            current_date += timedelta(days=1)
-
-        # Return the response with the consolidated WFH and in-office information
-        return jsonify(response), 200
+                        # If no WFH records exist for the current date, assume all employees are in-office
+                        yield {
+                            "date": date_str, 
+                            "am": {"wfh": 0, "office": total_staff_strength, "employees": []}, 
+                            "pm": {"wfh": 0, "office": total_staff_strength, "employees": []}
+                        }
+            finally:
+                records.close()
+
+        # Stream the consolidated WFH and in-office information, the whole company payload is never held in memory
+        # (same JSON array as jsonify, queries above already ran so errors still return 500)
+        return with_next_cursor(stream_json_array(days()), next_cursor)
     
     except OperationalError as e:
         # Handle database connection errors
@@ -598,114 +661,103 @@ def HRO_wfh_count(staff_id):
         description: ID of the staff member whose team is being queried.
         type: integer
         default: 140001
+      - name: start
+        in: query
+        required: false
+        description: First date (YYYY-MM-DD), defaults to 2 months back.
+        type: string
+      - name: end
+        in: query
+        required: false
+        description: Last date (YYYY-MM-DD), defaults to 3 months forward.
+        type: string
+      - name: limit
+        in: query
+        required: false
+        description: Number of employees per page in the employee lists (counts always cover the whole team).
+        type: integer
+      - name: cursor
+        in: query
+        required: false
+        description: X-Next-Cursor header of the previous page.
+        type: string
+      - name: format
+        in: query
+        required: false
+        description: full (default), compact (the employees once plus the positions of WFH staff per day) or counts (the day counts only).
+        type: string
     responses:
       200:
         description: Successful response with the WFH status of team members.
+      400:
+        description: Invalid date range, paging or format parameters.
       500:
         description: Internal server error.
     """
-    
-    def find_team(manager_id):
-        # Get all staff who report to the given manager
-        team = Employee.query.filter_by(reporting_manager=manager_id).all()
-        full_team = []  # Store all team members
-
-        for staff in team:
-            # Add the current staff member to the team list
-            if staff.staff_id != manager_id and staff.staff_id != staff.reporting_manager:  # Avoid adding the manager themselves
-                full_team.append(staff)
-            
-            # Recursively check if this staff is a manager and find their subordinates
-            if staff.role != 2 and staff.staff_id != staff.reporting_manager:
-                subordinates = find_team(staff.staff_id)
-                full_team.extend(subordinates)  # Add all subordinates to the full team
-
-        return full_team
     try: 
         response = []
 
-        # Retrieve the initial staff member
-        staff_member = Employee.query.filter_by(staff_id=staff_id).first()
+        # Retrieve the initial staff member from the reporting hierarchy
+        hierarchy = get_org_hierarchy()
+        staff_member = hierarchy.member(staff_id)
 
-        # Find all team members under the staff member
-        full_team = find_team(staff_member.staff_id)
-
-        # Fetch all WFH records
-        wfh_records = db.session.query(Employee.staff_id, Employee.staff_fname, Employee.staff_lname, WFHApplication.application_id, WFHSchedule.wfh_date, WFHApplication.time_slot).join(WFHApplication, Employee.staff_id == WFHApplication.staff_id).join(WFHSchedule, WFHApplication.application_id == WFHSchedule.application_id).filter(Employee.staff_id.in_([staff.staff_id for staff in full_team]), or_(WFHSchedule.status == 'Approved', WFHSchedule.status == 'Pending_Withdrawal')).all()
-
-        # Dictionary to store WFH records by date and time slots
-        wfh_dict = {}
-
-        # Valid time slots
-        valid_time_slots = ["AM", "PM", "FULL"]
-        
-
-        for record in wfh_records:
-            date_str = str(record.wfh_date)
-            
-            # Initialize the dictionary for the date if it doesn't exist
-            if date_str not in wfh_dict:
-                wfh_dict[date_str] = {"AM": [], "PM": [], "FULL": []}
-            
-            # Check if the time slot is valid
-            if record.time_slot in valid_time_slots:
-                wfh_dict[date_str][record.time_slot].append(record.staff_id)
-            else:
-                # Handle unexpected time slot
-                print(f"Unexpected time slot '{record.time_slot}' for staff_id: {record.staff_id} on {date_str}")
+        # Find all team members under the staff member (recursion stops at role 2 and self-reporting staff)
+        full_team = hierarchy.reports(staff_member.staff_id)
 
         # Get the current date
         today = datetime.now()
 
-        # Calculate the date range: 2 months back, 3 months forward
+        # Calculate the default date range: 2 months back, 3 months forward
         start_date = today - relativedelta(months=2)  # 2 months back
         end_date = today + relativedelta(months=3) - timedelta(days=1)   # 3 months forward
+
+        # Optional ?start=&end= range, ?limit=&cursor= page of the employee lists and ?format=
+        try:
+            start_date, end_date = schedule_window(start_date.date(), end_date.date())
+            page, next_cursor = employee_page(full_team)
+            body_format = response_format(HR_RESPONSE_FORMATS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Counts of the team from the nightly snapshot when only the counts or one page of staff is returned:
+        # the team is every direct report of the managers its members report to
+        counts = None
+        if body_format == 'counts' or len(page) < len(full_team):
+            managers = sorted({str(staff.reporting_manager) for staff in full_team})
+            counts = snapshot_counts(MANAGER, managers, [staff.staff_id for staff in full_team], start_date, end_date)
+
+        # Fetch the WFH records of the date range (only those of the staff listed when counted already)
+        listed = [full_team[i] for i in page] if counts is not None else full_team
+        wfh_records = [] if counts is not None and body_format == 'counts' else db.session.query(Employee.staff_id, WFHSchedule.wfh_date, WFHApplication.time_slot).join(WFHApplication, Employee.staff_id == WFHApplication.staff_id).join(WFHSchedule, WFHApplication.application_id == WFHSchedule.application_id).filter(Employee.staff_id.in_([staff.staff_id for staff in listed]), or_(WFHSchedule.status == 'Approved', WFHSchedule.status == 'Pending_Withdrawal'), WFHSchedule.wfh_date >= start_date, WFHSchedule.wfh_date <= end_date).all()
         total_staff_strength = len(full_team)
 
-        # Iterate over the date range day by day
-        current_date = start_date
-        while current_date <= end_date:
-            date_str = current_date.strftime('%Y-%m-%d')
-            office_am = []
-            office_pm = []
-            wfh_am = []
-            wfh_pm = []
-            employees_am = []
-            employees_pm = []
+        # staff x day x AM/PM WFH grid of the team for the date range
+        grid = DayGrid(full_team, start_date, end_date).add_records(wfh_records)
+        if counts is None:
+            counts = DayCounts(grid.wfh_counts(AM), grid.wfh_counts(PM), grid.has_records.tolist())
+        wfh_am_counts = counts.am
+        wfh_pm_counts = counts.pm
 
-            if date_str in wfh_dict:
-                # Process the team for this specific date
-                for staff in full_team:
-                    full_name = staff.staff_fname + " " + staff.staff_lname
+        # Counts: the WFH and office counts of each day only
+        if body_format == 'counts':
+            return jsonify(count_days(grid.dates(), wfh_am_counts, wfh_pm_counts, total_staff_strength)), 200
 
-                    # If staff has a full-day WFH record
-                    if date_str in wfh_dict and staff.staff_id in wfh_dict[date_str]["FULL"]:
-                        wfh_am.append(staff.staff_id)
-                        employees_am.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.    position, "email": staff.email, "status": "WFH"})
-                        wfh_pm.append(staff.staff_id)
-                        employees_pm.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.    position, "email": staff.email, "status": "WFH"})
-                    else:
-                        # Check AM slot
-                        if date_str in wfh_dict and staff.staff_id in wfh_dict[date_str]["AM"]:
-                            wfh_am.append(staff.staff_id)
-                            employees_am.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position":   staff.position, "email": staff.email, "status": "WFH"})
-                        else:
-                            office_am.append(staff.staff_id)
-                        #     employees_am.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position":     staff.position, "email": staff.email, "status": "In-Office"})
-
-                        # Check PM slot
-                        if date_str in wfh_dict and staff.staff_id in wfh_dict[date_str]["PM"]:
-                            wfh_pm.append(staff.staff_id)
-                            employees_pm.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position":   staff.position, "email": staff.email, "status": "WFH"})
-                        else:
-                            office_pm.append(staff.staff_id)
-                        #     employees_pm.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position":     staff.position, "email": staff.email, "status": "In-Office"})
+        # Compact: the employees of the page once, per day the positions of those working from home
+        if body_format == 'compact':
+            return with_next_cursor(jsonify({'employees': employee_table(full_team, page, BASIC_FIELDS), 'days': compact_days(grid, page, (wfh_am_counts, wfh_pm_counts))}), next_cursor), 200
+
+        # WFH entry of each staff on the page, only staff working from home are listed
+        fragments = get_fragment_cache().employees([full_team[i] for i in page], BASIC_FIELDS)
+        employees_wfh = {i: wfh for i, (wfh, _) in zip(page, fragments)}
 
+        # Iterate over the date range day by day
+        for day, date_str in enumerate(grid.dates()):
+            if counts.has_records[day]:
                 # Append the date's information to the response
                 response.append({
                     "date": date_str, 
-                    "am": {"wfh": len(wfh_am), "office": len(office_am), "employees": employees_am}, 
-                    "pm": {"wfh": len(wfh_pm), "office": len(office_pm), "employees": employees_pm}
+                    "am": {"wfh": wfh_am_counts[day], "office": total_staff_strength - wfh_am_counts[day], "employees": [employees_wfh[i] for i in grid.wfh_rows(day, AM) if i in employees_wfh]}, 
+                    "pm": {"wfh": wfh_pm_counts[day], "office": total_staff_strength - wfh_pm_counts[day], "employees": [employees_wfh[i] for i in grid.wfh_rows(day, PM) if i in employees_wfh]}
                 })
             else:
                 # If the date doesn't exist in wfh_dict, append a default entry
@@ -715,9 +767,7 @@ def HRO_wfh_count(staff_id):
                     "pm": {"wfh": 0, "office": total_staff_strength}
                 })
 
-            # Move to the next day
-            current_date += timedelta(days=1)
-        return jsonify(response), 200
+        return with_next_cursor(fragment_json(response), next_cursor), 200
     
     except OperationalError as e:
         return jsonify({'error': 'Database connection issue.'}), 500
@@ -771,35 +821,22 @@ def HRO_wfh_slot_stafflist(staff_id, date, slot):
     if slot != "AM" and slot != "PM":
         return jsonify({"error": "The slot value can only be 'AM' or 'PM'."}), 400
     
-    def find_team(manager_id):
-        # Get all staff who report to the given manager
-        team = Employee.query.filter_by(reporting_manager=manager_id).all()
-        full_team = []  # Store all team members
-
-        for staff in team:
-            # Add the current staff member to the team list
-            if staff.staff_id != manager_id and staff.staff_id != staff.reporting_manager:  # Avoid adding the manager themselves
-                full_team.append(staff)
-            
-            # Recursively check if this staff is a manager and find their subordinates
-            if staff.role != 2 and staff.staff_id != staff.reporting_manager:
-                subordinates = find_team(staff.staff_id)
-                full_team.extend(subordinates)  # Add all subordinates to the full team
-
-        return full_team
-    
     try: 
         response = []
 
-        # Retrieve the initial staff member
-        staff_member = Employee.query.filter_by(staff_id=staff_id).first()
+        # Retrieve the initial staff member from the reporting hierarchy
+        hierarchy = get_org_hierarchy()
+        staff_member = hierarchy.member(staff_id)
 
-        # Find all team members under the staff member
-        full_team = find_team(staff_member.staff_id)
+        # Find all team members under the staff member (recursion stops at role 2 and self-reporting staff)
+        full_team = hierarchy.reports(staff_member.staff_id)
 
         # Fetch all WFH records for the specified date
         wfh_records = db.session.query(Employee.staff_id, Employee.staff_fname, Employee.staff_lname, WFHApplication.application_id, WFHSchedule.wfh_date, WFHApplication.time_slot).join(WFHApplication, Employee.staff_id == WFHApplication.staff_id).join(WFHSchedule, WFHApplication.application_id == WFHSchedule.application_id).filter(Employee.staff_id.in_([staff.staff_id for staff in full_team]), WFHSchedule.wfh_date == date, or_(WFHApplication.time_slot == slot, WFHApplication.time_slot == 'FULL'), or_(WFHSchedule.status == 'Approved', WFHSchedule.status == 'Pending_Withdrawal')).all()
 
+        # WFH and In-Office entry of each staff, pre-serialized once per employee
+        fragments = get_fragment_cache().employees(full_team, FULL_FIELDS)
+
         # Dictionary to store WFH records by date and time slots
         wfh_dict = {}
         
@@ -833,31 +870,30 @@ def HRO_wfh_slot_stafflist(staff_id, date, slot):
             employees_pm = []
 
             # Process the team for this specific date
-            for staff in full_team:
-                full_name = staff.staff_fname + " " + staff.staff_lname
+            for staff, (employee_wfh, employee_office) in zip(full_team, fragments):
 
                 # If staff has a full-day WFH record
                 if date in wfh_dict and staff.staff_id in wfh_dict[date]["FULL"]:
                     wfh_am.append(staff.staff_id)
-                    employees_am.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH", "role": staff.role, "reporting_manager": staff.reporting_manager,"country": staff.country})
+                    employees_am.append(employee_wfh)
                     wfh_pm.append(staff.staff_id)
-                    employees_pm.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH", "role": staff.role, "reporting_manager": staff.reporting_manager,"country": staff.country})
+                    employees_pm.append(employee_wfh)
                 else:
                     # Check AM slot
                     if date in wfh_dict and staff.staff_id in wfh_dict[date]["AM"]:
                         wfh_am.append(staff.staff_id)
-                        employees_am.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH", "role": staff.role, "reporting_manager": staff.reporting_manager,"country": staff.country})
+                        employees_am.append(employee_wfh)
                     else:
                         office_am.append(staff.staff_id)
-                        employees_am.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "In-Office", "role": staff.role,   "reporting_manager": staff.reporting_manager,"country": staff.country})
+                        employees_am.append(employee_office)
 
                     # Check PM slot
                     if date in wfh_dict and staff.staff_id in wfh_dict[date]["PM"]:
                         wfh_pm.append(staff.staff_id)
-                        employees_pm.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH", "role": staff.role, "reporting_manager": staff.reporting_manager,"country": staff.country})
+                        employees_pm.append(employee_wfh)
                     else:
                         office_pm.append(staff.staff_id)
-                        employees_pm.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "In-Office", "role": staff.role, "reporting_manager": staff.reporting_manager,"country": staff.country})
+                        employees_pm.append(employee_office)
 
             # Append the date's information to the response
             if slot == "AM":
@@ -870,15 +906,13 @@ def HRO_wfh_slot_stafflist(staff_id, date, slot):
                     "date": date, 
                     "PM": {"wfh": len(wfh_pm), "office": len(office_pm), "employees": employees_pm}
                 })
-            return jsonify(response), 200
+            return fragment_json(response), 200
         else:
             office = []
             employees = []
-            for staff in full_team:
-                full_name = staff.staff_fname + " " + staff.staff_lname
-
+            for staff, (_, employee_office) in zip(full_team, fragments):
                 office.append(staff.staff_id)
-                employees.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "In-Office", "role": staff.role, "reporting_manager": staff.reporting_manager,"country": staff.country})
+                employees.append(employee_office)
             
             if slot == "AM":
                 response.append({
@@ -890,7 +924,7 @@ def HRO_wfh_slot_stafflist(staff_id, date, slot):
                     "date": date, 
                     "PM": {"wfh": 0, "office": len(office), "employees": employees}
                 })
-            return jsonify(response), 200
+            return fragment_json(response), 200
     
     except OperationalError as e:
         return jsonify({'error': 'Database connection issue.'}), 500
@@ -903,3 +937,66 @@ def HRO_wfh_slot_stafflist(staff_id, date, slot):
     except Exception as e:
         return jsonify({'error': 'An unexpected error occurred.'}), 500
 
+
+
+@schedule_blueprint.route('/snapshot/refresh', methods=['GET', 'POST'])
+def refresh_snapshot():
+    """
+    Takes a new snapshot of the HR dashboard counts now (the daily job and the Vercel cron take one every night).
+    ---
+    tags:
+      - HR View Overall Schedule
+    responses:
+      201:
+        description: Snapshot taken, with its id, window, number of rows and build time.
+      500:
+        description: Internal server error, the previous snapshot stays in use.
+    """
+    try:
+        summary = take_snapshot()
+        return jsonify({'success': 'Snapshot taken.', 'summary': summary}), 201
+
+    # nothing is committed unless the whole snapshot was written
+    except OperationalError as e:
+        db.session.rollback()
+        return jsonify({'error': 'Database connection issue.'}), 500
+
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({'error': 'Database query failed.'}), 500
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'An unexpected error occurred.'}), 500
+
+
+
+@schedule_blueprint.route('/changes/prune', methods=['GET', 'POST'])
+def prune_change_feed():
+    """
+    Deletes the change feed older than CHANGE_FEED_RETENTION_DAYS (the daily job and the Vercel cron run it every night).
+    ?since= tokens from before the remaining feed are answered with 410.
+    ---
+    tags:
+      - Schedules
+    responses:
+      201:
+        description: Feed pruned, with the new floor (oldest valid token) and the number of rows deleted.
+      500:
+        description: Internal server error, nothing was deleted.
+    """
+    try:
+        summary = prune_changes()
+        return jsonify({'success': 'Change feed pruned.', 'summary': summary}), 201
+
+    except OperationalError as e:
+        db.session.rollback()
+        return jsonify({'error': 'Database connection issue.'}), 500
+
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({'error': 'Database query failed.'}), 500
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'An unexpected error occurred.'}), 500
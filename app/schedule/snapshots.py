@@ -0,0 +1,247 @@
+# Nightly snapshots of the HR dashboard counts (HRO_overall, HRO_wfh_count)
+# take_snapshot aggregates, per day, the AM/PM WFH staff of every department and of every manager's direct
+# reports into schedule_snapshot, together with the change feed version and employee table state it saw. It
+# runs from the daily job of run.py, the Vercel cron and GET/POST /api/schedule/snapshot/refresh.
+# snapshot_counts answers the day counts of a window from the latest snapshot: the dates the change feed
+# reports changed since then are counted again from the schedules, every other day is a sum of snapshot rows.
+# The snapshot is not used (the views count from the schedules as before) when there is none, when it does not
+# cover the window, when employees were added, moved or removed since, which changes the groups, or when the
+# change feed since the snapshot was partly pruned.
+
+import threading
+import time
+from collections import Counter, namedtuple
+from datetime import date, datetime, timedelta
+
+from dateutil.relativedelta import relativedelta
+from flask import current_app
+from sqlalchemy import case, delete, distinct, func, insert
+
+from app import db
+from app.changes import EMPLOYEE_FEED, FEED, change_token, changed_dates, feed_floor, feed_version
+from app.hierarchy import employee_fingerprint, get_org_hierarchy
+from app.models import ChangeVersion, Employee, ScheduleSnapshot, SnapshotRun, WFHApplication, WFHChange, WFHSchedule
+from app.replica import primary_reads
+
+DEPT = 'dept'
+MANAGER = 'manager'
+SNAPSHOT_STATUSES = ('Approved', 'Pending_Withdrawal')
+
+# per day of a window: WFH staff in the morning, in the afternoon, and whether any schedule exists that day
+DayCounts = namedtuple('DayCounts', ['am', 'pm', 'has_records'])
+
+
+def _to_date(value):
+    # SQLite returns dates of aggregate queries as strings
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+def snapshot_window(today=None):
+    # the default window of the HR views (2 months back, 3 months forward) with a margin on both sides, so
+    # the snapshot still covers it until the next one is taken
+    today = today or datetime.now().date()
+    margin = timedelta(days=current_app.config.get('SNAPSHOT_MARGIN_DAYS', 7))
+    return today - relativedelta(months=2) - margin, today + relativedelta(months=3) + margin
+
+
+def employee_version(token=None):
+    return feed_version(EMPLOYEE_FEED, change_token() if token is None else token)
+
+
+def day_counts(group, first, last, dates=None, staff_ids=None, filters=()):
+    '''
+    (group value, date, AM staff, PM staff, schedules) of the active schedules between first and last, one row per
+    group and day (group None: one row per day). A staff with several schedules in a half-day is counted once.
+    '''
+    am = case((WFHApplication.time_slot.in_(('AM', 'FULL')), Employee.staff_id))
+    pm = case((WFHApplication.time_slot.in_(('PM', 'FULL')), Employee.staff_id))
+    columns = [WFHSchedule.wfh_date, func.count(distinct(am)), func.count(distinct(pm)), func.count()]
+    group_by = [WFHSchedule.wfh_date]
+    if group is not None:
+        columns.insert(0, group)
+        group_by.insert(0, group)
+    query = db.session.query(*columns)\
+        .select_from(Employee)\
+        .join(WFHApplication, Employee.staff_id == WFHApplication.staff_id)\
+        .join(WFHSchedule, WFHApplication.application_id == WFHSchedule.application_id)\
+        .filter(WFHSchedule.status.in_(SNAPSHOT_STATUSES), WFHSchedule.wfh_date >= first, WFHSchedule.wfh_date <= last, *filters)
+    if dates is not None:
+        query = query.filter(WFHSchedule.wfh_date.in_(dates))
+    if staff_ids is not None:
+        query = query.filter(Employee.staff_id.in_(staff_ids))
+    rows = query.group_by(*group_by).all()
+    return [(None,) + tuple(row) for row in rows] if group is None else rows
+
+
+def take_snapshot(today=None):
+    '''
+    Builds a new snapshot of the window around today and drops the previous ones, in one transaction.
+    Returns {'snapshot_id', 'first_date', 'last_date', 'rows', 'seconds'}.
+    '''
+    started = time.perf_counter()
+    first, last = snapshot_window(today)
+    # reads of a GET refresh would otherwise go to the replica, the snapshot is written on the primary
+    with primary_reads():
+        # the feed version first: whatever commits after it is counted again by snapshot_counts
+        change_version = change_token()
+        employees = employee_version(change_version)
+        fingerprint = repr(employee_fingerprint())
+
+        rows = []
+        # every employee in one department row (no department: key ''), manager rows hold direct reports like
+        # OrgHierarchy.children, without staff reporting to themselves
+        groups = ((DEPT, Employee.dept, ()), (MANAGER, Employee.reporting_manager, (Employee.reporting_manager != Employee.staff_id,)))
+        for scope, group, filters in groups:
+            for key, wfh_date, am, pm, records in day_counts(group, first, last, filters=filters):
+                rows.append({'scope': scope, 'group_key': '' if key is None else str(key), 'wfh_date': _to_date(wfh_date),
+                             'am': am, 'pm': pm, 'records': records})
+
+        run = SnapshotRun(taken_at=datetime.now(), first_date=first, last_date=last, change_version=change_version,
+                          employee_version=employees, employee_fingerprint=fingerprint, row_count=len(rows), build_seconds=0.0)
+        db.session.add(run)
+        db.session.flush()
+        if rows:
+            db.session.execute(insert(ScheduleSnapshot), [dict(row, snapshot_id=run.snapshot_id) for row in rows])
+        db.session.execute(delete(ScheduleSnapshot).where(ScheduleSnapshot.snapshot_id != run.snapshot_id))
+        db.session.execute(delete(SnapshotRun).where(SnapshotRun.snapshot_id != run.snapshot_id))
+        run.build_seconds = time.perf_counter() - started
+        db.session.commit()
+
+    get_snapshot_stats().refreshed(run.build_seconds)
+    return {'snapshot_id': run.snapshot_id, 'first_date': first.strftime('%Y-%m-%d'), 'last_date': last.strftime('%Y-%m-%d'), 'rows': len(rows),
+            'seconds': round(run.build_seconds, 3)}
+
+
+def latest_snapshot():
+    return SnapshotRun.query.order_by(SnapshotRun.snapshot_id.desc()).first()
+
+
+def snapshot_counts(scope, keys, staff_ids, start, end):
+    '''
+    DayCounts of start..end from the latest snapshot: the sum of the scope's rows of keys (None: every row), with
+    the dates changed since recounted over staff_ids (None: everyone). None when the snapshot cannot be used.
+    keys and staff_ids must describe the same staff, e.g. the managers of a team and its members.
+    '''
+    stats = get_snapshot_stats()
+    if not current_app.config.get('SNAPSHOT_ENABLED', True):
+        return None
+    run = latest_snapshot()
+    if run is None:
+        stats.fallback('missing')
+        return None
+    if start < run.first_date or end > run.last_date:
+        stats.fallback('window')
+        return None
+    token = change_token()
+    if run.change_version < feed_floor():
+        # the changes since the snapshot were partly pruned
+        stats.fallback('expired')
+        return None
+    if run.employee_version != employee_version(token) or run.employee_fingerprint != repr(get_org_hierarchy().fingerprint):
+        stats.fallback('employees')
+        return None
+
+    am, pm, records = _empty_days(start, end)
+    query = db.session.query(ScheduleSnapshot.wfh_date, func.sum(ScheduleSnapshot.am), func.sum(ScheduleSnapshot.pm), func.sum(ScheduleSnapshot.records))\
+        .filter(ScheduleSnapshot.snapshot_id == run.snapshot_id, ScheduleSnapshot.scope == scope,
+                ScheduleSnapshot.wfh_date >= start, ScheduleSnapshot.wfh_date <= end)
+    if keys is not None:
+        query = query.filter(ScheduleSnapshot.group_key.in_(keys))
+    for wfh_date, day_am, day_pm, day_records in query.group_by(ScheduleSnapshot.wfh_date).all():
+        day = (_to_date(wfh_date) - start).days
+        am[day], pm[day], records[day] = int(day_am), int(day_pm), int(day_records)
+
+    # dates changed since the snapshot: counted again from the schedules
+    changed = [wfh_date for wfh_date in changed_dates(staff_ids, run.change_version, token) if start <= wfh_date <= end]
+    for wfh_date in changed:
+        day = (wfh_date - start).days
+        am[day], pm[day], records[day] = 0, 0, 0
+    if changed:
+        for _, wfh_date, day_am, day_pm, day_records in day_counts(None, start, end, changed, staff_ids):
+            day = (_to_date(wfh_date) - start).days
+            am[day], pm[day], records[day] = day_am, day_pm, day_records
+    stats.read(len(changed))
+    return DayCounts(am, pm, [count > 0 for count in records])
+
+
+def live_counts(start, end, staff_ids=None):
+    # DayCounts of start..end counted from the schedules in one aggregate query, over staff_ids (None: everyone)
+    am, pm, records = _empty_days(start, end)
+    for _, wfh_date, day_am, day_pm, day_records in day_counts(None, start, end, staff_ids=staff_ids):
+        day = (_to_date(wfh_date) - start).days
+        am[day], pm[day], records[day] = day_am, day_pm, day_records
+    return DayCounts(am, pm, [count > 0 for count in records])
+
+
+def _empty_days(start, end):
+    num_days = (end - start).days + 1
+    return [0] * num_days, [0] * num_days, [0] * num_days
+
+
+def snapshot_status():
+    # staleness of the latest snapshot: its age and what changed since it was taken
+    run = latest_snapshot()
+    status = {'snapshot': None}
+    if run is not None:
+        token = change_token()
+        status['snapshot'] = {
+            'snapshot_id': run.snapshot_id,
+            'taken_at': run.taken_at.strftime('%Y-%m-%dT%H:%M:%S'),
+            'age_seconds': round((datetime.now() - run.taken_at).total_seconds()),
+            'first_date': run.first_date.strftime('%Y-%m-%d'),
+            'last_date': run.last_date.strftime('%Y-%m-%d'),
+            'rows': run.row_count,
+            'build_seconds': round(run.build_seconds, 3),
+            'schedule_versions_since': db.session.query(func.count(ChangeVersion.version)).filter(
+                ChangeVersion.feed == FEED, ChangeVersion.version > run.change_version, ChangeVersion.version <= token).scalar(),
+            'schedule_changes_since': db.session.query(func.count(WFHChange.change_id)).filter(
+                WFHChange.version > run.change_version, WFHChange.version <= token).scalar(),
+            'changed_dates_since': len(changed_dates(None, run.change_version, token)),
+            'expired': run.change_version < feed_floor(),
+            'employees_changed': run.employee_version != employee_version(token) or run.employee_fingerprint != repr(employee_fingerprint())
+        }
+    status.update(get_snapshot_stats().stats())
+    return status
+
+
+class SnapshotStats:
+    '''Reads served from the snapshot, dates recounted on top of it and reads that could not use it.'''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.overlaid_dates = 0
+        self.fallbacks = Counter()
+        self.refreshes = 0
+        self.last_refresh_seconds = None
+
+    def read(self, overlaid_dates):
+        with self._lock:
+            self.reads += 1
+            self.overlaid_dates += overlaid_dates
+
+    def fallback(self, reason):
+        with self._lock:
+            self.fallbacks[reason] += 1
+
+    def refreshed(self, seconds):
+        with self._lock:
+            self.refreshes += 1
+            self.last_refresh_seconds = round(seconds, 3)
+
+    def stats(self):
+        with self._lock:
+            return {'reads': self.reads, 'overlaid_dates': self.overlaid_dates, 'fallbacks': dict(self.fallbacks),
+                    'refreshes': self.refreshes, 'last_refresh_seconds': self.last_refresh_seconds}
+
+
+def get_snapshot_stats():
+    return current_app.extensions['schedule_snapshots']
+
+
+def init_snapshots(app):
+    app.extensions['schedule_snapshots'] = SnapshotStats()
@@ -0,0 +1,53 @@
+# Streamed JSON arrays for the large schedule views
+# The array is written one element at a time, the bytes are the same as jsonify(list_of_elements)
+# (compact, or indented by 2 in debug mode) so clients cannot tell the difference.
+# Elements may hold employee Fragments (app/schedule/fragments.py), spliced in like fragment_json does.
+# stream_rows reads the rows the elements are built from through a server-side cursor, a batch at a time.
+
+from flask import current_app, stream_with_context
+
+from app import db
+from app.schedule.fragments import expand, indented, write_json
+
+# rows fetched from the cursor at a time by stream_rows
+STREAM_BATCH_ROWS = 1000
+
+
+def json_array_chunks(items):
+    # yields '[', each element (with its separator) and ']\n', as the app's JSON provider would write them
+    provider = current_app.json
+    indent = indented(provider)
+    if indent:
+        # jsonify indents by 2: elements sit one level deep, their own lines get 2 more spaces
+        opening, separator, closing = "[\n  ", ",\n  ", "\n]\n"
+    else:
+        opening, separator, closing = "[", ",", "]\n"
+
+    first = True
+    for item in items:
+        if indent:
+            text = provider.dumps(expand(item, provider), indent=2).replace("\n", "\n  ")
+        else:
+            text = write_json(item, provider)
+        yield (opening if first else separator) + text
+        first = False
+    yield "[]\n" if first else closing
+
+
+def stream_json_array(items):
+    '''
+    Streaming response of items (any iterable, typically a generator) as a JSON array.
+    Everything that can fail (queries) should run before this is returned, once the first
+    chunk is sent the status code can no longer change.
+    '''
+    provider = current_app.json
+    return current_app.response_class(stream_with_context(json_array_chunks(items)), mimetype=provider.mimetype)
+
+
+def stream_rows(query, batch_rows=STREAM_BATCH_ROWS):
+    '''
+    Runs query (a Query) now and returns its Result, the rows are fetched batch_rows at a time (yield_per,
+    a server-side cursor on MySQL) as they are read. No other query may run on the session until the
+    Result is read to its end or closed.
+    '''
+    return db.session.execute(query.statement.execution_options(yield_per=batch_rows))
@@ -0,0 +1,101 @@
+# Optional ?start=&end= date range, ?limit=&cursor= employee paging, ?since= change token and ?format= body
+# shared by the schedule window endpoints
+# Without parameters every endpoint keeps its default window and full employee lists.
+# Invalid parameters raise ValueError with a message meant for the 400 response.
+
+from datetime import datetime
+
+from flask import request
+
+# largest range a single request may ask for (the default windows are about 150 days)
+MAX_WINDOW_DAYS = 366
+RESPONSE_FORMATS = ('full', 'compact')
+# the HR views also answer the day counts alone (?format=counts), mostly from the nightly snapshot
+HR_RESPONSE_FORMATS = RESPONSE_FORMATS + ('counts',)
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+CHANGE_TOKEN_HEADER = 'X-Change-Token'
+
+
+def _parse_date(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"{name} must be a date in YYYY-MM-DD format.")
+
+
+def schedule_window(default_start, default_end):
+    '''
+    (start, end) dates (inclusive) of the days to return: ?start=YYYY-MM-DD&end=YYYY-MM-DD,
+    the endpoint's default for the one(s) not given.
+    '''
+    start = _parse_date('start') or default_start
+    end = _parse_date('end') or default_end
+    if start > end:
+        raise ValueError("start must not be after end.")
+    if (end - start).days + 1 > MAX_WINDOW_DAYS:
+        raise ValueError(f"The date range can cover at most {MAX_WINDOW_DAYS} days.")
+    return start, end
+
+
+def employee_page(team):
+    '''
+    Indexes of team (in its display order) on the requested page and the cursor of the next page.
+    ?limit=N returns N employees, ?cursor= is the X-Next-Cursor header of the previous page
+    (the staff_id of its last employee). Without limit the whole team is one page.
+    '''
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+    if limit is None and cursor is None:
+        return range(len(team)), None
+
+    try:
+        limit = int(limit) if limit is not None else len(team)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        raise ValueError("limit must be a positive integer.")
+
+    first = 0
+    if cursor is not None:
+        positions = {staff.staff_id: position for position, staff in enumerate(team)}
+        if not cursor.isdigit() or int(cursor) not in positions:
+            raise ValueError("cursor does not match an employee of this team.")
+        first = positions[int(cursor)] + 1
+
+    page = range(first, min(first + limit, len(team)))
+    next_cursor = str(team[page[-1]].staff_id) if len(page) and page[-1] + 1 < len(team) else None
+    return page, next_cursor
+
+
+def with_next_cursor(response, next_cursor):
+    # the JSON body stays a list of days, the next page is announced in a header
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
+
+def since_token():
+    # ?since= is the X-Change-Token header (or token field) of a previous response, None for a full response
+    value = request.args.get('since')
+    if value is None:
+        return None
+    if not value.isdigit():
+        raise ValueError("since must be a token returned by a previous response.")
+    return int(value)
+
+
+def with_change_token(response, token):
+    # full responses announce the token to pass as ?since= on the next poll
+    response.headers[CHANGE_TOKEN_HEADER] = str(token)
+    return response
+
+
+def response_format(formats=RESPONSE_FORMATS):
+    # ?format=compact: employee table plus per-day WFH positions (app/schedule/compact.py), full by default
+    value = request.args.get('format', 'full')
+    if value not in formats:
+        raise ValueError(f"format must be one of {', '.join(formats)}.")
+    return value
@@ -0,0 +1,78 @@
+# Salted password hashes of the logins
+# login.password holds a werkzeug hash (PASSWORD_HASH_METHOD, e.g. scrypt:16384:8:1$salt$hash). Rows still
+# holding a plaintext password (before db_prep/hash_passwords.py ran) are compared in constant time and
+# rehashed on their first successful login, as are hashes made with an older PASSWORD_HASH_METHOD.
+# In ASGI mode hashing runs in a thread (app/asgi.py run_blocking), a scrypt round would hold up the event loop.
+
+import hmac
+from collections import namedtuple
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app import db
+from app.asgi import run_blocking
+from app.models import Employee, Login
+
+Credential = namedtuple('Credential', ['staff_id', 'role'])
+
+HASH_PREFIXES = ('pbkdf2:', 'scrypt:')
+_method_prefixes = {}
+_dummy_hashes = {}
+
+
+def hash_password(password, method=None):
+    return run_blocking(generate_password_hash, password, method or current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def is_password_hash(value):
+    return value.startswith(HASH_PREFIXES) and value.count('$') == 2
+
+
+def _method_prefix(method):
+    # 'scrypt' hashes as 'scrypt:32768:8:1$...', compare against what the method actually produces
+    if method not in _method_prefixes:
+        _method_prefixes[method] = generate_password_hash('', method=method).split('$', 1)[0]
+    return _method_prefixes[method]
+
+
+def needs_rehash(stored):
+    return not is_password_hash(stored) or stored.split('$', 1)[0] != _method_prefix(current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def verify_password(stored, password):
+    if is_password_hash(stored):
+        return run_blocking(check_password_hash, stored, password)
+    # plaintext row not migrated yet
+    return hmac.compare_digest(stored.encode(), password.encode())
+
+
+def reject_unknown_user(password):
+    # an unknown username costs one hash verification too, its timing does not reveal which usernames exist
+    method = current_app.config['PASSWORD_HASH_METHOD']
+    if method not in _dummy_hashes:
+        _dummy_hashes[method] = generate_password_hash('not a password', method=method)
+    run_blocking(check_password_hash, _dummy_hashes[method], password)
+    return False
+
+
+def authenticate(username, password):
+    '''
+    Credential of username when password matches, else None, from one login/employee join.
+    Plaintext and outdated hashes are upgraded (and committed) on a successful login.
+    '''
+    row = db.session.query(Login, Employee.role).join(Employee, Login.staff_id == Employee.staff_id).filter(
+        Login.username == username
+    ).first()
+    if row is None:
+        return reject_unknown_user(password) or None
+
+    login, role = row
+    if not verify_password(login.password, password):
+        return None
+    if needs_rehash(login.password):
+        login.password = hash_password(password)
+        db.session.commit()
+
+    return Credential(login.staff_id, role)
+
@@ -2,6 +2,7 @@ from flask import jsonify, request
 from app.staff import staff_blueprint  # Import the blueprint
 from app import db
 from app.models import Employee, WFHApplication, WFHSchedule, Login
+from app.staff.credentials import authenticate
 from sqlalchemy import and_, or_
 from sqlalchemy.exc import SQLAlchemyError, OperationalError
 from datetime import datetime
@@ -15,16 +16,13 @@ def staff_login():
         if not json_data: # checks for first possible error
             return jsonify({"error": "JSON data passed from client side is insufficient"}), 400
         
-        staff_rec = db.session.query(Login, Employee).join(Employee, Login.staff_id == Employee.staff_id).filter(
-            Login.username == json_data["username"],
-            Login.password == json_data["password"]
-        ).first()
+        # salted hash check, repeated logins are served from the login cache without the login/employee join
+        credential = authenticate(json_data["username"], json_data["password"])
 
-        if staff_rec:
-            login_data, employee_data = staff_rec
+        if credential:
             return_data = {
-                "staff_id": login_data.staff_id,  # Assuming staff_id is in Employee
-                "role": employee_data.role,          # Assuming role is in Employee
+                "staff_id": credential.staff_id,
+                "role": credential.role,
             }
             #situation where there is conflict for day request
             return jsonify({'data': return_data}), 200
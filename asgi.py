@@ -0,0 +1,5 @@
+# ASGI entry point, the async counterpart of run.py: uvicorn asgi:app --port 10000
+# Needs uvicorn and the asyncio database driver (aiomysql, aiosqlite): pip install -r requirements-asgi.txt
+from app.asgi import create_asgi_app
+
+app = create_asgi_app()
@@ -0,0 +1,154 @@
+# Requests per second of the dashboard endpoints, sync (WSGI, a thread per request) against async (ASGI) serving
+# python -m benchmarks.bench_asgi [--connections 50] [--requests 2000] [--team-size 50] [--mode sync --mode async]
+# Each mode runs as its own server process on the same database and is loaded over HTTP by concurrent clients.
+# sync is the threaded werkzeug server of run.py, async is uvicorn with app/asgi.py (needs requirements-asgi.txt: uvicorn
+# and the asyncio driver, aiosqlite for the default temporary SQLite file, aiomysql for BENCH_DATABASE_URI=mysql+pymysql://...).
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from config import Testconfig
+from app import db
+from benchmarks.common import create_bench_app, populate_team, populate_schedules
+
+MANAGER_ID = 150000
+URLS = ('/api/schedule/team_schedule_manager/{manager}', '/api/schedule/own/{staff}', '/api/schedule/employeelist/{staff}')
+
+
+def serve(mode, port):
+    # server process: the app on the database of BENCH_DATABASE_URI
+    Testconfig.SQLALCHEMY_DATABASE_URI = os.environ['BENCH_DATABASE_URI']
+    if mode == 'sync':
+        from werkzeug.serving import make_server
+        from app import create_app
+
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        make_server('127.0.0.1', port, create_app(test_config=True), threaded=True).serve_forever()
+    else:
+        import uvicorn
+        from app.asgi import create_asgi_app
+
+        uvicorn.run(create_asgi_app(test_config=True), host='127.0.0.1', port=port, log_level='warning')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port, process, seconds=30):
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server exited with {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('server did not start')
+
+
+async def get(port, path):
+    # one request per connection, (status, seconds)
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n'.encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return int(response.split(b' ', 2)[1]), time.perf_counter() - start
+
+
+async def load(port, paths, connections, requests):
+    latencies = []
+    errors = []
+    queue = asyncio.Queue()
+    for number in range(requests):
+        queue.put_nowait(paths[number % len(paths)])
+
+    async def client():
+        while not queue.empty():
+            path = queue.get_nowait()
+            try:
+                status, seconds = await get(port, path)
+            except OSError as e:
+                errors.append((path, e))
+                continue
+            latencies.append(seconds)
+            if status >= 500:
+                errors.append((path, status))
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(connections)])
+    return time.perf_counter() - start, latencies, errors
+
+
+def run(mode, paths, connections, requests):
+    port = free_port()
+    process = subprocess.Popen([sys.executable, '-m', 'benchmarks.bench_asgi', '--serve', mode, '--port', str(port)])
+    try:
+        wait_for(port, process)
+        # warm up the caches and the pool before measuring
+        asyncio.run(load(port, paths, connections, len(paths)))
+        return asyncio.run(load(port, paths, connections, requests))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--connections', type=int, default=50, help='concurrent clients')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--team-size', type=int, default=50)
+    parser.add_argument('--mode', action='append', choices=('sync', 'async'), help='modes to compare, repeatable')
+    parser.add_argument('--serve', choices=('sync', 'async'), help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        return serve(args.serve, args.port)
+
+    path = None
+    if 'BENCH_DATABASE_URI' not in os.environ:
+        handle, path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        os.environ['BENCH_DATABASE_URI'] = f'sqlite:///{path}'
+
+    try:
+        app = create_bench_app()
+        with app.app_context():
+            staff_ids = populate_team(MANAGER_ID, args.team_size)
+            populate_schedules(staff_ids, 10, ['Approved', 'Pending_Approval', 'Pending_Withdrawal'])
+            db.session.remove()
+            db.engine.dispose()
+        paths = [url.format(manager=MANAGER_ID, staff=staff_id) for staff_id in staff_ids for url in URLS]
+
+        print(f"{args.connections} connections, {args.requests} requests, team of {args.team_size}")
+        for mode in args.mode or ['sync', 'async']:
+            if mode == 'async' and not importlib.util.find_spec('uvicorn'):
+                print(f"  {mode:5}  skipped, needs uvicorn and the asyncio database driver")
+                continue
+            seconds, latencies, errors = run(mode, paths, args.connections, args.requests)
+            latencies.sort()
+            print(f"  {mode:5}  {len(latencies) / seconds:7.0f} req/s  p50 {statistics.median(latencies) * 1000:7.1f} ms  "
+                  f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:7.1f} ms  {len(errors)} errors")
+            for url, error in errors[:5]:
+                print(f"    error {url}: {error}")
+    finally:
+        if path:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
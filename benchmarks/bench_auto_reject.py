@@ -0,0 +1,118 @@
+# Legacy per-row auto_reject vs the set-based reject_stale_requests (one transaction and chunked)
+# python -m benchmarks.bench_auto_reject [--legacy-rows N] [--chunk-size N]
+# Pending schedules are split 3:1 between Pending_Approval (4 per application) and Pending_Withdrawal,
+# 80% of them older than 8 weeks. The legacy loop commits per row; above --legacy-rows it is
+# timed on N rows and scaled to the full backlog (marked with *).
+import argparse
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, or_
+
+from app import db
+from app.application.stale import reject_stale_requests, reject_stale_requests_in_chunks
+from app.models import WFHApplication, WFHSchedule, WFHWithdrawal
+from benchmarks.common import create_bench_app, count_queries, populate_team, timer
+
+STAFF = 500
+SCHEDULES_PER_APPLICATION = 4
+
+
+def populate_pending(num_schedules):
+    # bulk inserts, the ORM unit of work would dominate the set up time at 100k rows
+    staff_ids = populate_team(150000, STAFF)
+    today = datetime.now().date()
+    num_applications = num_schedules // SCHEDULES_PER_APPLICATION
+    db.session.execute(insert(WFHApplication), [
+        {"application_id": application_id, "staff_id": staff_ids[application_id % STAFF], "time_slot": "AM", "staff_apply_reason": "bench"}
+        for application_id in range(1, num_applications + 1)
+    ])
+    schedules = []
+    withdrawals = []
+    for wfh_id in range(1, num_applications * SCHEDULES_PER_APPLICATION + 1):
+        application_id = (wfh_id - 1) // SCHEDULES_PER_APPLICATION + 1
+        # 4 in 5 applications are stale
+        days_ago = 70 + wfh_id % 200 if application_id % 5 else 10
+        status = "Pending_Withdrawal" if application_id % 4 == 0 else "Pending_Approval"
+        schedules.append({"wfh_id": wfh_id, "application_id": application_id, "wfh_date": today - timedelta(days=days_ago), "status": status})
+        if status == "Pending_Withdrawal":
+            withdrawals.append({"wfh_id": wfh_id, "staff_withdraw_reason": "bench withdrawal"})
+    db.session.execute(insert(WFHSchedule), schedules)
+    db.session.execute(insert(WFHWithdrawal), withdrawals)
+    db.session.commit()
+
+
+def legacy_auto_reject():
+    # the loop auto_reject ran before the set-based version (prints removed)
+    # it crashed once an application had two stale schedules: the sibling already set to Rejected fell into
+    # the withdrawal branch with no withdrawal row. The skip below is the only change, so it can be timed.
+    wfh_records = db.session.query(WFHSchedule).filter(
+        or_(WFHSchedule.status == "Pending_Approval", WFHSchedule.status == "Pending_Withdrawal")
+    ).all()
+    two_months = timedelta(weeks=8)
+    for record in wfh_records:
+        date = record.wfh_date
+        current_date = datetime.now()
+        if current_date > (datetime(date.year, date.month, date.day) + two_months):
+            if record.status == "Rejected":
+                continue
+            if record.status == "Pending_Approval":
+                for wfh_sch in db.session.query(WFHSchedule).filter(WFHSchedule.application_id == record.application_id).all():
+                    wfh_sch.status = "Rejected"
+                wfh_app_rec = db.session.query(WFHApplication).filter(WFHApplication.application_id == record.application_id).first()
+                wfh_app_rec.manager_reject_reason = "rejected by system"
+            else:
+                record.status = "Approved"
+                wfh_app_rec = db.session.query(WFHWithdrawal).filter(WFHWithdrawal.wfh_id == record.wfh_id).first()
+                wfh_app_rec.manager_reject_withdrawal_reason = "rejected by system" if wfh_app_rec and wfh_app_rec.manager_reject_withdrawal_reason is None else None
+            db.session.commit()
+
+
+def final_state():
+    return (db.session.query(WFHSchedule.wfh_id, WFHSchedule.status).order_by(WFHSchedule.wfh_id).all(),
+            db.session.query(WFHApplication.application_id, WFHApplication.manager_reject_reason).order_by(WFHApplication.application_id).all())
+
+
+def run(app, num_schedules, method):
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+        populate_pending(num_schedules)
+        with count_queries() as queries, timer() as elapsed:
+            method()
+        state = final_state()
+        db.session.remove()
+    return elapsed['seconds'], queries['count'], state
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--legacy-rows', type=int, default=2000, help='largest backlog the legacy loop is run on')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='chunk size of the chunked sweep')
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    print(f"{'pending':>9} {'legacy ms':>12} {'legacy queries':>15} {'bulk ms':>9} {'bulk queries':>13} {'speedup':>9} {'chunked ms':>11} {'chunks':>7} {'max chunk ms':>13}")
+    for num_schedules in (1000, 10000, 100000):
+        legacy_rows = min(num_schedules, args.legacy_rows)
+        legacy_seconds, legacy_queries, legacy_state = run(app, legacy_rows, legacy_auto_reject)
+        legacy_ms = legacy_seconds * 1000 * num_schedules / legacy_rows
+        legacy_queries = legacy_queries * num_schedules // legacy_rows
+
+        bulk_seconds, bulk_queries, bulk_state = run(app, num_schedules, reject_stale_requests)
+        bulk_ms = bulk_seconds * 1000
+        if legacy_rows == num_schedules:
+            assert bulk_state == legacy_state
+
+        chunked = {}
+        chunked_seconds, _, chunked_state = run(app, num_schedules, lambda: chunked.update(reject_stale_requests_in_chunks(args.chunk_size)))
+        assert chunked_state == bulk_state
+        max_chunk_ms = max((chunk['ms'] for chunk in chunked['chunks']), default=0)
+
+        mark = '*' if legacy_rows < num_schedules else ' '
+        print(f"{num_schedules:>9} {legacy_ms:>11.0f}{mark} {legacy_queries:>14}{mark} {bulk_ms:>9.0f} {bulk_queries:>13} {legacy_ms / bulk_ms:>8.1f}x"
+              f" {chunked_seconds * 1000:>11.0f} {len(chunked['chunks']):>7} {max_chunk_ms:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# team_schedule_manager and HRO_overall bodies, default format against ?format=compact
+# python -m benchmarks.bench_compact [--team-size 550] [--days 150] [--rounds 5]
+# Writes both bodies from the synthetic WFH grid of bench_fragments (size and median time of building and encoding
+# one response), then times both formats of the endpoints on a SQLite organisation of the same size.
+import argparse
+import statistics
+
+from flask import jsonify
+
+from app import db
+from app.schedule.compact import compact_days, employee_table
+from app.schedule.fragments import MANAGER_FIELDS, fragment_json, get_fragment_cache
+from benchmarks.bench_fragments import MANAGER_ID, days, make_team
+from benchmarks.common import create_bench_app, populate_team, populate_schedules, timer
+
+
+def measure(build, rounds):
+    samples = []
+    for _ in range(rounds):
+        with timer() as elapsed:
+            body = build().get_data()
+        samples.append(elapsed['seconds'])
+    return statistics.median(samples) * 1000, len(body)
+
+
+def measure_endpoint(client, url, rounds):
+    samples = []
+    for _ in range(rounds + 1):
+        with timer() as elapsed:
+            body = client.get(url).get_data()
+        samples.append(elapsed['seconds'])
+    # the first request encodes the employee fragments of the default format
+    return statistics.median(samples[1:]) * 1000, len(body)
+
+
+def report(label, results):
+    (full_ms, full_size), (compact_ms, compact_size) = results
+    print(f"  {label:24} full {full_ms:8.1f} ms {full_size / 2 ** 10:9.0f} KiB   compact {compact_ms:7.1f} ms {compact_size / 2 ** 10:7.0f} KiB"
+          f"   {full_size / compact_size:5.1f}x smaller")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--team-size', type=int, default=550)
+    parser.add_argument('--days', type=int, default=150)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    team, grid = make_team(args.team_size, args.days)
+    page = range(len(team))
+    print(f"body of {args.team_size} employees x {args.days} days")
+    with app.test_request_context():
+        cache = get_fragment_cache()
+        report('team_schedule_manager', (
+            measure(lambda: fragment_json(days(team, grid, cache.employees(team, MANAGER_FIELDS))), args.rounds),
+            measure(lambda: jsonify({'employees': employee_table(team, page, MANAGER_FIELDS), 'days': compact_days(grid, page)}), args.rounds)
+        ))
+
+    with app.app_context():
+        staff_ids = populate_team(MANAGER_ID, args.team_size)
+        populate_schedules(staff_ids, 10, ['Approved', 'Pending_Approval', 'Pending_Withdrawal'])
+        db.session.remove()
+    client = app.test_client()
+    print("endpoints")
+    for label, url in (('team_schedule_manager', f'/api/schedule/team_schedule_manager/{MANAGER_ID}'), ('HRO_overall', '/api/schedule/HRO_overall')):
+        report(label, (measure_endpoint(client, url, args.rounds), measure_endpoint(client, url + '?format=compact', args.rounds)))
+
+
+if __name__ == '__main__':
+    main()
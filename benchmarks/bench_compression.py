@@ -0,0 +1,83 @@
+# Bytes on the wire and CPU per request of the large schedule views, uncompressed against gzip / brotli
+# python -m benchmarks.bench_compression [--team-size 550] [--employees 5000] [--rounds 5]
+# team_schedule_manager (one body with an ETag) and HRO_overall (streamed) on SQLite. "cached" repeats the
+# compressed request on an unchanged team: the view still runs, the compressed bytes come from the cache.
+# CPU is the thread time of the whole request in the test client, compression alone from the cache counters.
+import argparse
+import statistics
+import time
+
+from app import db
+from app.compression import available_encodings, get_compression_cache
+from benchmarks.bench_hro_overall_stream import populate
+from benchmarks.common import create_bench_app, populate_team, populate_schedules
+
+MANAGER_ID = 150000
+
+
+def request(app, client, url, encoding):
+    # (bytes received, request CPU seconds, compression CPU seconds)
+    with app.app_context():
+        before = get_compression_cache().stats()['cpu_seconds']
+    start = time.thread_time()
+    response = client.get(url, headers={'Accept-Encoding': encoding} if encoding else {})
+    size = len(response.get_data())
+    cpu = time.thread_time() - start
+    with app.app_context():
+        compression = get_compression_cache().stats()['cpu_seconds'] - before
+    return size, cpu, compression
+
+
+def measure(app, client, url, encoding, rounds, cached):
+    if not cached:
+        # a new body each time: drop what the previous round kept
+        samples = []
+        for _ in range(rounds):
+            with app.app_context():
+                get_compression_cache().clear()
+            samples.append(request(app, client, url, encoding))
+    else:
+        request(app, client, url, encoding)
+        samples = [request(app, client, url, encoding) for _ in range(rounds)]
+    size = samples[-1][0]
+    return size, statistics.median(cpu for _, cpu, _ in samples) * 1000, statistics.median(c for _, _, c in samples) * 1000
+
+
+def report(label, app, url, rounds, cacheable=True):
+    client = app.test_client()
+    client.get(url)
+    print(label)
+    modes = [('identity', None, False)]
+    for encoding in available_encodings()[::-1]:
+        modes += [(encoding, encoding, False)] + ([(f'{encoding} cached', encoding, True)] if cacheable else [])
+    for name, encoding, cached in modes:
+        size, cpu_ms, compression_ms = measure(app, client, url, encoding, rounds, cached)
+        print(f"  {name:12} {size / 2 ** 10:10.0f} KiB on the wire   request CPU {cpu_ms:8.1f} ms   compression {compression_ms:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--team-size', type=int, default=550)
+    parser.add_argument('--employees', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    if 'br' not in available_encodings():
+        print("brotli is not installed, pip install brotli to compare it")
+
+    app = create_bench_app()
+    with app.app_context():
+        staff_ids = populate_team(MANAGER_ID, args.team_size)
+        populate_schedules(staff_ids, 10, ['Approved', 'Pending_Approval', 'Pending_Withdrawal'])
+        db.session.remove()
+    report(f"team_schedule_manager, team of {args.team_size}", app, f'/api/schedule/team_schedule_manager/{MANAGER_ID}', args.rounds)
+
+    app = create_bench_app()
+    with app.app_context():
+        populate(args.employees)
+        db.session.remove()
+    # streamed, no ETag: every request compresses
+    report(f"HRO_overall, {args.employees} employees", app, '/api/schedule/HRO_overall', args.rounds, cacheable=False)
+
+
+if __name__ == '__main__':
+    main()
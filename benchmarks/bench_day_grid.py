@@ -0,0 +1,112 @@
+# Legacy per-day membership loop vs DayGrid for the HRO_wfh_count / HRO_overall response body
+# python -m benchmarks.bench_day_grid [--legacy-days N]
+# The legacy loop is O(days x staff x records per day); past --legacy-days it is timed on the first
+# N days and scaled to the full window (marked with *).
+import argparse
+import random
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from app.schedule.grid import DayGrid, AM, PM
+from benchmarks.common import timer
+
+NUM_DAYS = 150
+WFH_SHARE = 0.3  # share of staff with a recurring arrangement
+
+
+def make_data(num_staff, seed=7):
+    rng = random.Random(seed)
+    team = [SimpleNamespace(staff_id=100000 + i, staff_fname='Staff', staff_lname=str(i), dept='Sales', position='Account Manager',
+                            email=f'staff.{i}@allinone.com.sg') for i in range(num_staff)]
+    start = date.today()
+    records = []
+    for staff in team:
+        if rng.random() > WFH_SHARE:
+            continue
+        slot = rng.choice(['AM', 'PM', 'FULL'])
+        weekday = rng.randrange(5)
+        for week in range(NUM_DAYS // 7):
+            records.append((staff.staff_id, start + timedelta(days=week * 7 + weekday), slot))
+    return team, records, start
+
+
+def legacy(team, records, start, num_days):
+    # the loop HRO_wfh_count used before DayGrid
+    wfh_dict = {}
+    for staff_id, wfh_date, time_slot in records:
+        date_str = str(wfh_date)
+        if date_str not in wfh_dict:
+            wfh_dict[date_str] = {"AM": [], "PM": [], "FULL": []}
+        wfh_dict[date_str][time_slot].append(staff_id)
+
+    response = []
+    for offset in range(num_days):
+        date_str = (start + timedelta(days=offset)).strftime('%Y-%m-%d')
+        office_am, office_pm, wfh_am, wfh_pm, employees_am, employees_pm = [], [], [], [], [], []
+        if date_str in wfh_dict:
+            for staff in team:
+                full_name = staff.staff_fname + " " + staff.staff_lname
+                if staff.staff_id in wfh_dict[date_str]["FULL"]:
+                    wfh_am.append(staff.staff_id)
+                    employees_am.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH"})
+                    wfh_pm.append(staff.staff_id)
+                    employees_pm.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH"})
+                else:
+                    if staff.staff_id in wfh_dict[date_str]["AM"]:
+                        wfh_am.append(staff.staff_id)
+                        employees_am.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH"})
+                    else:
+                        office_am.append(staff.staff_id)
+                    if staff.staff_id in wfh_dict[date_str]["PM"]:
+                        wfh_pm.append(staff.staff_id)
+                        employees_pm.append({"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH"})
+                    else:
+                        office_pm.append(staff.staff_id)
+            response.append({"date": date_str, "am": {"wfh": len(wfh_am), "office": len(office_am), "employees": employees_am},
+                             "pm": {"wfh": len(wfh_pm), "office": len(office_pm), "employees": employees_pm}})
+        else:
+            response.append({"date": date_str, "am": {"wfh": 0, "office": len(team)}, "pm": {"wfh": 0, "office": len(team)}})
+    return response
+
+
+def grid_based(team, records, start, num_days):
+    grid = DayGrid(team, start, start + timedelta(days=num_days - 1)).add_records(records)
+    wfh_am_counts = grid.wfh_counts(AM)
+    wfh_pm_counts = grid.wfh_counts(PM)
+    employees_wfh = [{"id": staff.staff_id, "name": staff.staff_fname + " " + staff.staff_lname, "dept": staff.dept, "position": staff.position, "email": staff.email, "status": "WFH"} for staff in team]
+    response = []
+    for day, date_str in enumerate(grid.dates()):
+        if grid.has_records[day]:
+            response.append({"date": date_str,
+                             "am": {"wfh": wfh_am_counts[day], "office": len(team) - wfh_am_counts[day], "employees": [employees_wfh[i] for i in grid.wfh_rows(day, AM)]},
+                             "pm": {"wfh": wfh_pm_counts[day], "office": len(team) - wfh_pm_counts[day], "employees": [employees_wfh[i] for i in grid.wfh_rows(day, PM)]}})
+        else:
+            response.append({"date": date_str, "am": {"wfh": 0, "office": len(team)}, "pm": {"wfh": 0, "office": len(team)}})
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--legacy-days', type=int, default=10, help='days timed for the legacy loop above 5,000 staff')
+    args = parser.parse_args()
+
+    print(f"{'employees':>10} {'records':>9} {'legacy ms':>12} {'grid ms':>10} {'speedup':>9}")
+    for num_staff in (500, 5000, 50000):
+        team, records, start = make_data(num_staff)
+
+        legacy_days = NUM_DAYS if num_staff <= 5000 else min(args.legacy_days, NUM_DAYS)
+        with timer() as legacy_time:
+            legacy_response = legacy(team, records, start, legacy_days)
+        legacy_ms = legacy_time['seconds'] * 1000 * NUM_DAYS / legacy_days
+
+        with timer() as grid_time:
+            grid_response = grid_based(team, records, start, NUM_DAYS)
+        grid_ms = grid_time['seconds'] * 1000
+
+        assert grid_response[:legacy_days] == legacy_response
+        mark = '*' if legacy_days < NUM_DAYS else ' '
+        print(f"{num_staff:>10} {len(records):>9} {legacy_ms:>11.1f}{mark} {grid_ms:>10.1f} {legacy_ms / grid_ms:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+# team_schedule_manager response body: employee dicts encoded on every day vs pre-serialized employee fragments
+# python -m benchmarks.bench_fragments [--team-size 550] [--days 150] [--rounds 5]
+# Builds the days of a manager's team from a synthetic WFH grid and writes the JSON body both ways: time and
+# tracemalloc peak of building and encoding one response. Then times the endpoint itself on a SQLite team of the
+# same size, the first request encoding the fragments and the following ones reusing them.
+import argparse
+import random
+import statistics
+import tracemalloc
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from flask import jsonify
+
+from app import db
+from app.schedule.fragments import MANAGER_FIELDS, fragment_json, get_fragment_cache
+from app.schedule.grid import DayGrid, AM, PM
+from benchmarks.common import create_bench_app, populate_team, populate_schedules, timer
+
+MANAGER_ID = 150000
+WFH_SHARE = 0.3  # share of staff with a recurring arrangement
+
+
+def make_team(team_size, days, seed=7):
+    rng = random.Random(seed)
+    team = [SimpleNamespace(staff_id=200000 + i, staff_fname='Staff', staff_lname=str(i), dept='Sales', position='Account Manager',
+                            email=f'staff.{i}@allinone.com.sg', role=2, reporting_manager=MANAGER_ID) for i in range(team_size)]
+    start = date.today()
+    records = []
+    for staff in team:
+        if rng.random() > WFH_SHARE:
+            continue
+        slot = rng.choice(['AM', 'PM', 'FULL'])
+        weekday = rng.randrange(5)
+        for week in range(days // 7):
+            records.append((staff.staff_id, start + timedelta(days=week * 7 + weekday), slot))
+    return team, DayGrid(team, start, start + timedelta(days=days - 1)).add_records(records)
+
+
+def dict_entries(team):
+    # the entries the view built before the fragments, once per response
+    entries = []
+    for staff in team:
+        full_name = staff.staff_fname + " " + staff.staff_lname
+        entry = {"id": staff.staff_id, "name": full_name, "dept": staff.dept, "position": staff.position, "email": staff.email,
+                 "role": staff.role, "reporting_manager": staff.reporting_manager}
+        entries.append((dict(entry, status="WFH"), dict(entry, status="In-Office")))
+    return entries
+
+
+def days(team, grid, entries):
+    total = len(team)
+    all_office = [office for _, office in entries]
+    am_counts, pm_counts = grid.wfh_counts(AM), grid.wfh_counts(PM)
+    result = []
+    for day, date_str in enumerate(grid.dates()):
+        if grid.has_records[day]:
+            am, pm = grid.statuses(day, AM), grid.statuses(day, PM)
+            result.append({"date": date_str,
+                           "am": {"wfh": am_counts[day], "office": total - am_counts[day], "employees": [entries[i][0] if am[i] else entries[i][1] for i in range(total)]},
+                           "pm": {"wfh": pm_counts[day], "office": total - pm_counts[day], "employees": [entries[i][0] if pm[i] else entries[i][1] for i in range(total)]}})
+        else:
+            result.append({"date": date_str, "am": {"wfh": 0, "office": total, "employees": all_office},
+                           "pm": {"wfh": 0, "office": total, "employees": all_office}})
+    return result
+
+
+def measure(build, rounds):
+    samples = []
+    for _ in range(rounds):
+        with timer() as elapsed:
+            body = build().get_data()
+        samples.append(elapsed['seconds'])
+    tracemalloc.start()
+    build()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(samples) * 1000, peak / 2 ** 20, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--team-size', type=int, default=550)
+    parser.add_argument('--days', type=int, default=150)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    team, grid = make_team(args.team_size, args.days)
+    with app.test_request_context():
+        cache = get_fragment_cache()
+        cache.employees(team, MANAGER_FIELDS)
+        results = {
+            'dicts + jsonify': measure(lambda: jsonify(days(team, grid, dict_entries(team))), args.rounds),
+            'fragments': measure(lambda: fragment_json(days(team, grid, cache.employees(team, MANAGER_FIELDS))), args.rounds)
+        }
+    print(f"body of {args.team_size} employees x {args.days} days")
+    for label, (median_ms, peak_mb, size) in results.items():
+        print(f"  {label:16} median {median_ms:8.1f} ms  peak {peak_mb:7.1f} MiB  {size / 2 ** 20:.1f} MiB body")
+
+    with app.app_context():
+        staff_ids = populate_team(MANAGER_ID, args.team_size)
+        populate_schedules(staff_ids, 10, ['Approved', 'Pending_Approval', 'Pending_Withdrawal'])
+        db.session.remove()
+    client = app.test_client()
+    samples = []
+    for _ in range(args.rounds + 1):
+        with timer() as elapsed:
+            client.get(f'/api/schedule/team_schedule_manager/{MANAGER_ID}')
+        samples.append(elapsed['seconds'])
+    print(f"endpoint: first request {samples[0] * 1000:.1f} ms (fragments encoded), then median {statistics.median(samples[1:]) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# HRO_overall: streamed JSON array vs the jsonify(list) response it replaced
+# python -m benchmarks.bench_hro_overall_stream
+# Peak Python memory (tracemalloc) and time to first byte / last byte, counted from the request.
+# Both modes read the same queries, the records come from a server-side cursor while the days are written; with
+# jsonify every day is built before the first byte.
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from flask import jsonify
+from sqlalchemy import insert
+
+from app import db
+from app.models import WFHApplication, WFHSchedule
+from benchmarks.common import create_bench_app, populate_team
+
+WFH_SHARE = 0.3  # share of staff with a weekly arrangement over the whole window
+
+
+def populate(num_staff, seed=7):
+    rng = random.Random(seed)
+    staff_ids = populate_team(150000, num_staff)
+    applications = []
+    schedules = []
+    start = date.today() - timedelta(days=60)
+    for staff_id in staff_ids:
+        if rng.random() > WFH_SHARE:
+            continue
+        application_id = len(applications) + 1
+        applications.append({"application_id": application_id, "staff_id": staff_id, "time_slot": rng.choice(['AM', 'PM', 'FULL']), "staff_apply_reason": "bench"})
+        weekday = rng.randrange(5)
+        for week in range(150 // 7):
+            schedules.append({"application_id": application_id, "wfh_date": start + timedelta(days=week * 7 + weekday), "status": "Approved"})
+    db.session.execute(insert(WFHApplication), applications)
+    db.session.execute(insert(WFHSchedule), schedules)
+    db.session.commit()
+
+
+def measure(client):
+    # (time to first byte, time to last byte, peak traced memory, body size)
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get('/api/schedule/HRO_overall', buffered=False)
+    chunks = iter(response.response)
+    size = len(next(chunks))
+    first_byte = time.perf_counter() - start
+    for chunk in chunks:
+        size += len(chunk)
+    response.close()
+    last_byte = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first_byte, last_byte, peak, size
+
+
+def main():
+    print(f"{'employees':>10} {'mode':>9} {'ttfb ms':>9} {'total ms':>9} {'peak MB':>8} {'body MB':>8}")
+    for num_staff in (1000, 5000, 20000):
+        app = create_bench_app()
+        with app.app_context():
+            populate(num_staff)
+        client = app.test_client()
+        for mode in ('jsonify', 'stream'):
+            if mode == 'jsonify':
+                with patch('app.schedule.schedule.stream_json_array', lambda items: jsonify(list(items))):
+                    ttfb, total, peak, size = measure(client)
+            else:
+                ttfb, total, peak, size = measure(client)
+            print(f"{num_staff:>10} {mode:>9} {ttfb * 1000:>9.0f} {total * 1000:>9.0f} {peak / 2**20:>8.1f} {size / 2**20:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# JSON encoding of a recorded HRO_overall payload: Flask's default provider, app.json on the stdlib encoder and
+# app.json on orjson
+# python -m benchmarks.bench_json [--employees 5000] [--rounds 5] [--record payload.json | --payload payload.json]
+# Without --payload the payload is recorded from HRO_overall on a synthetic organisation (the data of
+# bench_hro_overall_stream), --record keeps it for later runs. Each provider writes it as jsonify does, then as
+# the streamed array of the endpoint (one day at a time, employee entries as pre-encoded fragments), then with the
+# dates as date objects.
+import argparse
+import statistics
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+
+from app.json_provider import FastJSONProvider, orjson
+from app.schedule.fragments import Fragment
+from app.schedule.streaming import json_array_chunks
+from benchmarks.bench_hro_overall_stream import populate
+from benchmarks.common import create_bench_app, timer
+
+
+def record(employees):
+    app = create_bench_app()
+    with app.app_context():
+        populate(employees)
+    return app.test_client().get('/api/schedule/HRO_overall').get_data()
+
+
+def measure(encode, rounds):
+    samples = []
+    for _ in range(rounds):
+        with timer() as elapsed:
+            size = encode()
+        samples.append(elapsed['seconds'])
+    return statistics.median(samples) * 1000, size
+
+
+def with_fragments(payload, provider):
+    # the days as the endpoint streams them, every employee entry spliced in as encoded text
+    return [dict(day, **{slot: dict(day[slot], employees=[Fragment(provider.dumps(employee, separators=(',', ':')))
+                                                            for employee in day[slot].get('employees', [])])
+                         for slot in ('am', 'pm')}) for day in payload]
+
+
+def providers(app):
+    result = {'flask default': DefaultJSONProvider(app), 'stdlib': FastJSONProvider(app)}
+    if orjson is not None:
+        result['orjson'] = FastJSONProvider(app)
+        result['orjson'].use_orjson = True
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--employees', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--payload', help='recorded HRO_overall body to encode')
+    parser.add_argument('--record', help='file to keep the recorded body in')
+    args = parser.parse_args()
+
+    if args.payload:
+        with open(args.payload, 'rb') as f:
+            body = f.read()
+    else:
+        body = record(args.employees)
+        if args.record:
+            with open(args.record, 'wb') as f:
+                f.write(body)
+
+    app = create_bench_app()
+    payload = app.json.loads(body)
+    # the same days with date objects instead of the strings handlers used to build
+    dated = [dict(day, date=date.fromisoformat(day['date'])) for day in payload]
+    print(f"HRO_overall body of {len(body) / 2 ** 20:.1f} MiB, {len(payload)} days")
+    if orjson is None:
+        print("  orjson is not installed, pip install orjson to compare it")
+
+    with app.test_request_context():
+        for label, provider in providers(app).items():
+            app.json = provider
+            whole_ms, size = measure(lambda: len(provider.response(payload).get_data()), args.rounds)
+            days = with_fragments(payload, provider)
+            stream_ms, _ = measure(lambda: sum(len(chunk) for chunk in json_array_chunks(days)), args.rounds)
+            if label == 'flask default':
+                # Flask writes dates as HTTP dates, the handlers had to format them first
+                dated_ms = None
+            else:
+                dated_ms, _ = measure(lambda: len(provider.response(dated).get_data()), args.rounds)
+            print(f"  {label:14} jsonify {whole_ms:8.1f} ms   streamed {stream_ms:8.1f} ms   "
+                  f"date objects {'-' if dated_ms is None else f'{dated_ms:.1f}':>8} ms   {size / 2 ** 20:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
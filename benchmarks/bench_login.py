@@ -0,0 +1,72 @@
+# Cost of the salted password hashes
+# python -m benchmarks.bench_login [--rounds 20] [--methods scrypt:16384:8:1 pbkdf2:sha256:600000]
+# Part one times check_password_hash per method (PASSWORD_HASH_METHOD trades login latency against the cost
+# of guessing an offline copy). Part two times POST /api/staff/login with the configured method, the hash
+# check against the one login/employee join each login sends.
+import argparse
+import statistics
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from config import Config, Testconfig
+from app import db
+from app.models import Login
+from benchmarks.common import count_queries, create_bench_app, populate_team, timer
+
+MANAGER_ID = 150000
+METHODS = ('pbkdf2:sha256:100000', 'pbkdf2:sha256:600000', 'scrypt:16384:8:1', 'scrypt:32768:8:1')
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples) * 1000, samples[max(int(len(samples) * 0.99) - 1, 0)] * 1000
+
+
+def bench_methods(methods, rounds):
+    print("check_password_hash per method")
+    for method in methods:
+        stored = generate_password_hash('bench password', method=method)
+        samples = []
+        for _ in range(rounds):
+            with timer() as elapsed:
+                check_password_hash(stored, 'bench password')
+            samples.append(elapsed['seconds'])
+        p50, p99 = percentiles(samples)
+        print(f"  {method:24} p50 {p50:7.1f} ms  p99 {p99:7.1f} ms")
+
+
+def bench_endpoint(method, rounds):
+    Testconfig.PASSWORD_HASH_METHOD = method
+    app = create_bench_app()
+    client = app.test_client()
+    with app.app_context():
+        staff_ids = populate_team(MANAGER_ID, rounds)
+        db.session.add_all([Login(username=f'staff{staff_id}', password=generate_password_hash('bench', method=method), staff_id=staff_id)
+                            for staff_id in staff_ids])
+        db.session.commit()
+        db.session.remove()
+
+        samples, queries = [], []
+        for staff_id in staff_ids:
+            with count_queries() as counter, timer() as elapsed:
+                response = client.post('/api/staff/login', json={'username': f'staff{staff_id}', 'password': 'bench'})
+            assert response.status_code == 200, response.json
+            samples.append(elapsed['seconds'])
+            queries.append(counter['count'])
+
+    p50, p99 = percentiles(samples)
+    print(f"POST /api/staff/login with {method}, {rounds} users")
+    print(f"  login  p50 {p50:7.1f} ms  p99 {p99:7.1f} ms  {max(queries)} statements")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--methods', nargs='+', default=list(METHODS))
+    args = parser.parse_args()
+    bench_methods(args.methods, args.rounds)
+    bench_endpoint(Config.PASSWORD_HASH_METHOD, args.rounds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# Concurrent schedule requests against the pooled engine: no connection errors, checkout waits stay bounded
+# python -m benchmarks.bench_pool_load [--threads 16] [--requests 50] [--pool-size 5] [--max-overflow 10]
+# Uses a temporary SQLite file unless BENCH_DATABASE_URI is set (in-memory SQLite has no pool to exercise).
+# Pool settings default to Config. With more threads than size + overflow connections requests queue for
+# a free connection (e.g. --pool-size 2 --max-overflow 2).
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from config import Config, Testconfig
+from app import db
+from app.pool import pool_stats
+from benchmarks.common import create_bench_app, populate_team, populate_schedules
+
+MANAGER_ID = 150000
+URLS = ('/api/schedule/team_schedule_manager/{manager}', '/api/schedule/own/{staff}', '/api/schedule/employeelist/{staff}')
+
+
+def run(app, staff_ids, threads, requests_per_thread):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(index):
+        client = app.test_client()
+        for number in range(requests_per_thread):
+            staff_id = staff_ids[(index * requests_per_thread + number) % len(staff_ids)]
+            url = URLS[number % len(URLS)].format(manager=MANAGER_ID, staff=staff_id)
+            start = time.perf_counter()
+            try:
+                response = client.get(url)
+                failed = response.status_code >= 500
+            except Exception as e:
+                failed = True
+                response = e
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if failed:
+                    errors.append((url, response))
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=50, help='requests per thread')
+    parser.add_argument('--team-size', type=int, default=50)
+    parser.add_argument('--pool-size', type=int, default=Config.DB_POOL_SIZE)
+    parser.add_argument('--max-overflow', type=int, default=Config.DB_MAX_OVERFLOW)
+    parser.add_argument('--pool-timeout', type=int, default=Config.DB_POOL_TIMEOUT)
+    args = parser.parse_args()
+
+    path = None
+    if 'BENCH_DATABASE_URI' not in os.environ:
+        handle, path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        os.environ['BENCH_DATABASE_URI'] = f'sqlite:///{path}'
+    Testconfig.DB_POOL_SIZE = args.pool_size
+    Testconfig.DB_MAX_OVERFLOW = args.max_overflow
+    Testconfig.DB_POOL_TIMEOUT = args.pool_timeout
+
+    try:
+        app = create_bench_app()
+        with app.app_context():
+            staff_ids = populate_team(MANAGER_ID, args.team_size)
+            populate_schedules(staff_ids, 10, ['Approved', 'Pending_Approval', 'Pending_Withdrawal'])
+            db.session.remove()
+
+        seconds, latencies, errors = run(app, staff_ids, args.threads, args.requests)
+
+        latencies.sort()
+        print(f"{args.threads} threads x {args.requests} requests, pool {args.pool_size} + {args.max_overflow} overflow")
+        print(f"{len(latencies)} requests in {seconds:.2f}s ({len(latencies) / seconds:.0f}/s), {len(errors)} errors")
+        print(f"latency p50 {statistics.median(latencies) * 1000:.1f} ms, p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+        for url, error in errors[:5]:
+            print(f"  error {url}: {error}")
+        with app.app_context():
+            stats = pool_stats(db.engine, app.config)
+        print(f"pool {stats['pool']}: {stats.get('checkouts')} checkouts, {stats.get('connects')} connects, "
+              f"{stats.get('timeouts')} timeouts, wait avg {stats['checkout_wait_ms']['avg']} ms / max {stats['checkout_wait_ms']['max']} ms")
+    finally:
+        if path:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
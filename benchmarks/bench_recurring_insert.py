@@ -0,0 +1,86 @@
+# Recurring schedule creation: one ORM object per date against the bulk INSERT of apply_wfh
+# python -m benchmarks.bench_recurring_insert [--rounds 50] [--weeks 26] [--uri sqlite:// --uri mysql+pymysql://...]
+# Each round creates one application with a weekly schedule for --weeks weeks and commits, change feed included.
+# Defaults to in-memory and file SQLite. For MySQL / MariaDB pass their URI (the tables are dropped and recreated),
+# PyMySQL sends the executemany as one multi-row INSERT there.
+import argparse
+import os
+import statistics
+import tempfile
+from datetime import date
+
+from app import db
+from app.models import WFHApplication, WFHSchedule
+from app.application.recurring import build_rule, insert_schedules, occurrences
+from benchmarks.common import count_queries, create_bench_app, populate_team, timer
+
+MANAGER_ID = 150000
+
+
+def orm_per_row(staff_id, dates):
+    application = WFHApplication(staff_id=staff_id, time_slot='AM', staff_apply_reason='bench')
+    db.session.add(application)
+    db.session.flush()
+    for wfh_date in dates:
+        db.session.add(WFHSchedule(application_id=application.application_id, wfh_date=wfh_date, status='Pending_Approval'))
+    db.session.commit()
+
+
+def bulk(staff_id, dates):
+    application = WFHApplication(staff_id=staff_id, time_slot='AM', staff_apply_reason='bench')
+    db.session.add(application)
+    db.session.flush()
+    insert_schedules([{'application_id': application.application_id, 'wfh_date': wfh_date, 'status': 'Pending_Approval',
+                       'manager_withdraw_reason': None} for wfh_date in dates])
+    db.session.commit()
+
+
+def run(uri, rounds, weeks):
+    os.environ['BENCH_DATABASE_URI'] = uri
+    app = create_bench_app()
+    with app.app_context():
+        staff_ids = populate_team(MANAGER_ID, rounds)
+        results = {}
+        for offset, (label, create) in enumerate((('orm per row', orm_per_row), ('bulk insert', bulk))):
+            # a different year per strategy, the rounds never overlap
+            start, end = date(2030 + offset, 1, 1), date(2030 + offset, 12, 31)
+            dates = occurrences(build_rule(start, end), start, end)[:weeks]
+            samples, queries = [], []
+            for staff_id in staff_ids:
+                with count_queries() as counter, timer() as elapsed:
+                    create(staff_id, dates)
+                samples.append(elapsed['seconds'])
+                queries.append(counter['count'])
+            results[label] = (statistics.median(samples) * 1000, max(queries))
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--weeks', type=int, default=26, help='weekly schedules per application (at most 52)')
+    parser.add_argument('--uri', action='append', help='database to run against, repeatable')
+    args = parser.parse_args()
+
+    path = None
+    uris = args.uri
+    if not uris:
+        handle, path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        uris = ['sqlite://', f'sqlite:///{path}']
+    try:
+        for uri in uris:
+            results = run(uri, args.rounds, args.weeks)
+            print(f"{uri.split('@')[-1]}: {args.rounds} applications x {args.weeks} weekly schedules")
+            for label, (median_ms, queries) in results.items():
+                print(f"  {label:12} median {median_ms:7.2f} ms  {queries} statements")
+    finally:
+        if path:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# HRO_overall and HRO_wfh_count counted from the schedules against the nightly snapshot
+# python -m benchmarks.bench_snapshots [--team-size 2000] [--per-staff 20] [--changed 50] [--rounds 5]
+# Times ?format=counts and one page (?limit=50) of both views with SNAPSHOT_ENABLED off and on, then again after
+# --changed schedules were written since the snapshot (their dates are counted from the schedules).
+import argparse
+import statistics
+
+from app import db
+from app.models import WFHApplication, WFHSchedule
+from app.schedule.snapshots import take_snapshot
+from benchmarks.common import count_queries, create_bench_app, populate_team, populate_schedules, timer
+
+MANAGER_ID = 150000
+
+
+def measure(app, client, url, rounds):
+    samples = []
+    for _ in range(rounds):
+        with app.app_context(), count_queries() as queries, timer() as elapsed:
+            response = client.get(url)
+            # HRO_overall streams its default format, the body is written while it is read
+            response.get_data()
+            response.close()
+        assert response.status_code == 200, response.get_data()
+        samples.append(elapsed['seconds'])
+    return statistics.median(samples) * 1000, queries['count']
+
+
+def report(app, client, label, rounds):
+    for name, url in (('HRO_overall counts', '/api/schedule/HRO_overall?format=counts'),
+                      ('HRO_overall page', '/api/schedule/HRO_overall?limit=50'),
+                      ('HRO_wfh_count counts', f'/api/schedule/HRO_wfh_count/{MANAGER_ID}?format=counts'),
+                      ('HRO_wfh_count page', f'/api/schedule/HRO_wfh_count/{MANAGER_ID}?limit=50')):
+        app.config['SNAPSHOT_ENABLED'] = False
+        live_ms, live_queries = measure(app, client, url, rounds)
+        app.config['SNAPSHOT_ENABLED'] = True
+        snapshot_ms, snapshot_queries = measure(app, client, url, rounds)
+        print(f"  {label:10} {name:22} live {live_ms:8.1f} ms ({live_queries} queries)   snapshot {snapshot_ms:7.1f} ms"
+              f" ({snapshot_queries} queries)   {live_ms / snapshot_ms:5.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--team-size', type=int, default=2000)
+    parser.add_argument('--per-staff', type=int, default=20)
+    parser.add_argument('--changed', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    with app.app_context():
+        staff_ids = populate_team(MANAGER_ID, args.team_size)
+        populate_schedules(staff_ids, args.per_staff, ['Approved', 'Pending_Approval', 'Pending_Withdrawal'], step_days=3)
+        with timer() as elapsed:
+            summary = take_snapshot()
+        print(f"snapshot of {args.team_size} staff x {args.per_staff} schedules: {summary['rows']} rows in {elapsed['seconds'] * 1000:.1f} ms")
+        db.session.remove()
+    client = app.test_client()
+    report(app, client, 'fresh', args.rounds)
+
+    with app.app_context():
+        # schedules written after the snapshot, over as many dates as there are
+        for index, staff_id in enumerate(staff_ids[:args.changed]):
+            application = WFHApplication(staff_id=staff_id, time_slot='FULL', staff_apply_reason='bench')
+            db.session.add(application)
+            db.session.flush()
+            schedule = WFHSchedule.query.filter(WFHSchedule.status == 'Approved').offset(index).first()
+            db.session.add(WFHSchedule(application_id=application.application_id, wfh_date=schedule.wfh_date, status='Approved'))
+        db.session.commit()
+        db.session.remove()
+    report(app, client, f'{args.changed} changed', args.rounds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+# Query count and latency of /api/application/wfhrequest/<id> as the pending backlog grows
+# python -m benchmarks.bench_wfhrequest
+from app import db
+from app.models import WFHApplication, WFHSchedule, WFHWithdrawal
+from benchmarks.common import create_bench_app, count_queries, timer, populate_team, populate_schedules
+
+MANAGER_ID = 190000
+TEAM_SIZE = 40
+
+
+def main():
+    app = create_bench_app()
+    client = app.test_client()
+    with app.app_context():
+        staff_ids = populate_team(MANAGER_ID, TEAM_SIZE)
+
+        print(f"{'pending rows':>12} {'queries':>8} {'ms':>10}")
+        for per_staff in (1, 5, 25, 100):
+            WFHWithdrawal.query.delete()
+            WFHSchedule.query.delete()
+            WFHApplication.query.delete()
+            db.session.commit()
+            populate_schedules(staff_ids, per_staff, ['Pending_Approval', 'Approved', 'Pending_Withdrawal'])
+            pending = WFHSchedule.query.filter(WFHSchedule.status.in_(['Pending_Approval', 'Pending_Withdrawal'])).count()
+            db.session.remove()
+
+            with count_queries() as queries, timer() as elapsed:
+                response = client.get(f'/api/application/wfhrequest/{MANAGER_ID}')
+            assert response.status_code == 200
+            print(f"{pending:>12} {queries['count']:>8} {elapsed['seconds'] * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# Shared helpers for the benchmark scripts in this folder
+# Run from the repository root, e.g. python -m benchmarks.bench_wfhrequest
+# BENCH_DATABASE_URI picks the database (defaults to an in-memory SQLite database)
+import os
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from config import Testconfig
+from app import create_app, db
+from app.models import Employee, WFHApplication, WFHSchedule, WFHWithdrawal
+
+
+def create_bench_app():
+    Testconfig.SQLALCHEMY_DATABASE_URI = os.environ.get('BENCH_DATABASE_URI', 'sqlite://')
+    app = create_app(test_config=True)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+@contextmanager
+def count_queries():
+    # counts every statement sent to the database inside the block
+    counter = {'count': 0}
+
+    def before_cursor_execute(*args):
+        counter['count'] += 1
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@contextmanager
+def timer():
+    result = {'seconds': 0.0}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result['seconds'] = time.perf_counter() - start
+
+
+def populate_team(manager_id, team_size, start_id=200000):
+    # one manager reporting to himself with team_size staff below him, returns the staff ids
+    db.session.add(Employee(staff_id=manager_id, staff_fname='Bench', staff_lname='Manager', dept='Bench', position='Manager',
+                            country='Singapore', email='bench.manager@allinone.com.sg', reporting_manager=manager_id, role=3))
+    staff_ids = list(range(start_id, start_id + team_size))
+    db.session.add_all([
+        Employee(staff_id=staff_id, staff_fname='Staff', staff_lname=str(staff_id), dept='Bench', position='Account Manager',
+                 country='Singapore', email=f'staff.{staff_id}@allinone.com.sg', reporting_manager=manager_id, role=2)
+        for staff_id in staff_ids
+    ])
+    db.session.commit()
+    return staff_ids
+
+
+def populate_schedules(staff_ids, per_staff, statuses, start=None, step_days=7, with_withdrawal=True):
+    # per_staff recurring schedules for each staff, cycling through time slots and statuses
+    start = start or date.today()
+    slots = ['AM', 'PM', 'FULL']
+    for index, staff_id in enumerate(staff_ids):
+        application = WFHApplication(staff_id=staff_id, time_slot=slots[index % len(slots)], staff_apply_reason='bench')
+        db.session.add(application)
+        db.session.flush()
+        for week in range(per_staff):
+            status = statuses[(index + week) % len(statuses)]
+            schedule = WFHSchedule(application_id=application.application_id, wfh_date=start + timedelta(days=step_days * week + index % 5),
+                                   status=status)
+            db.session.add(schedule)
+            if with_withdrawal and status == 'Pending_Withdrawal':
+                db.session.flush()
+                db.session.add(WFHWithdrawal(wfh_id=schedule.wfh_id, staff_withdraw_reason='bench withdrawal'))
+    db.session.commit()
@@ -30,9 +30,105 @@ class Config:
 
     TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
     TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+    # Telegram dispatcher (app/monitoring/dispatcher.py): bounded queue, bursts within BATCH_SECONDS sent as one message
+    TELEGRAM_API_URL = os.environ.get('TELEGRAM_API_URL', 'https://api.telegram.org')
+    TELEGRAM_QUEUE_SIZE = int(os.environ.get('TELEGRAM_QUEUE_SIZE', 100))
+    TELEGRAM_BATCH_SECONDS = float(os.environ.get('TELEGRAM_BATCH_SECONDS', 1.0))
+    TELEGRAM_TIMEOUT = float(os.environ.get('TELEGRAM_TIMEOUT', 5.0))  # seconds per Bot API call
+
+    # auto reject commits every N stale rows (0 = whole sweep in one transaction)
+    AUTO_REJECT_CHUNK_SIZE = int(os.environ.get('AUTO_REJECT_CHUNK_SIZE', 1000))
+    # team capacity cache (app/capacity.py) is per process: writes of other workers show after at most this long
+    CAPACITY_CACHE_SECONDS = int(os.environ.get('CAPACITY_CACHE_SECONDS', 30))
+    # most items accepted by one /api/application/apply_batch call
+    APPLY_BATCH_LIMIT = int(os.environ.get('APPLY_BATCH_LIMIT', 1000))
+    # schedules of recurring applications are created this far ahead (app/application/recurring.py), at least the
+    # +3 months of the schedule views
+    RECURRENCE_HORIZON_MONTHS = int(os.environ.get('RECURRENCE_HORIZON_MONTHS', 4))
+    # change feed (app/changes.py): a missing version younger than this may still commit, ?since= tokens wait for it;
+    # the feed is kept this many days (older tokens get 410)
+    CHANGE_FEED_GRACE_SECONDS = int(os.environ.get('CHANGE_FEED_GRACE_SECONDS', 10))
+    CHANGE_FEED_RETENTION_DAYS = int(os.environ.get('CHANGE_FEED_RETENTION_DAYS', 30))
+
+    # Connection pool (app/pool.py): pre-ping on checkout and recycle below MySQL's wait_timeout
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 280))  # seconds
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+
+    # Login (app/staff/credentials.py): werkzeug hash method of login.password, see benchmarks/bench_login.py
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:16384:8:1')
+
+    # Optional read replica for the schedule and staff GET requests (app/replica.py)
+    REPLICA_DATABASE_URI = os.environ.get('REPLICA_DATABASE_URI')
+    # after a write, that client's reads stay on the primary this long (replica lag allowance)
+    REPLICA_READ_YOUR_WRITES_SECONDS = int(os.environ.get('REPLICA_READ_YOUR_WRITES_SECONDS', 10))
+
+    # JSON encoder of the responses (app/json_provider.py): auto (orjson when installed), orjson or stdlib
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')
+    # wire format changes, off to keep Flask's \u escapes and HTTP dates: UTF-8 text and ISO dates
+    JSON_ENSURE_ASCII = os.environ.get('JSON_ENSURE_ASCII', 'true').lower() in ('1', 'true', 'yes')
+    JSON_ISO_DATES = os.environ.get('JSON_ISO_DATES', 'false').lower() in ('1', 'true', 'yes')
+
+    # Response compression (app/compression.py): gzip, or brotli when installed, for bodies of at least
+    # COMPRESSION_MIN_SIZE bytes; compressed bodies of responses with an ETag are kept up to COMPRESSION_CACHE_BYTES
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+    COMPRESSION_CACHE_BYTES = int(os.environ.get('COMPRESSION_CACHE_BYTES', 32 * 2 ** 20))
+
+    # Nightly snapshots of the HR dashboard counts (app/schedule/snapshots.py), taken by the daily job; the
+    # snapshot window is the default -2/+3 months view with this many days of margin on each side
+    SNAPSHOT_ENABLED = os.environ.get('SNAPSHOT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    SNAPSHOT_MARGIN_DAYS = int(os.environ.get('SNAPSHOT_MARGIN_DAYS', 7))
 
 class Testconfig:
     TESTING = True
+    AUTO_REJECT_CHUNK_SIZE = 0
+    APPLY_BATCH_LIMIT = 1000
+    RECURRENCE_HORIZON_MONTHS = 4
+    CHANGE_FEED_GRACE_SECONDS = 10
+    CHANGE_FEED_RETENTION_DAYS = 30
+
+    # Connection pool, small for the local test database
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 2))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 2))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 5))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 280))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+
+    CAPACITY_CACHE_SECONDS = 30
+
+    # Login, a cheap hash keeps the tests fast
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+
+    # Read replica, off unless create_app(replica_uri=...) is given one
+    REPLICA_DATABASE_URI = None
+    REPLICA_READ_YOUR_WRITES_SECONDS = 10
+
+    # JSON encoder, the tests run with whichever one is installed
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')
+    JSON_ENSURE_ASCII = True
+    JSON_ISO_DATES = False
+
+    # Response compression, only for requests sending Accept-Encoding (the test client does not by default)
+    COMPRESSION_ENABLED = True
+    COMPRESSION_MIN_SIZE = 1024
+    COMPRESSION_GZIP_LEVEL = 6
+    COMPRESSION_BROTLI_QUALITY = 4
+    COMPRESSION_CACHE_BYTES = 4 * 2 ** 20
+
+    # HR dashboard snapshots, only read once a test takes one
+    SNAPSHOT_ENABLED = True
+    SNAPSHOT_MARGIN_DAYS = 7
+
+    # Telegram dispatcher, tests point TELEGRAM_API_URL at a local stub
+    TELEGRAM_API_URL = os.environ.get('TELEGRAM_API_URL', 'https://api.telegram.org')
+    TELEGRAM_QUEUE_SIZE = 100
+    TELEGRAM_BATCH_SECONDS = 0.2
+    TELEGRAM_TIMEOUT = 2.0
     # SECRET_KEY = os.environ.get('SECRET_KEY') or 'hard-to-guess-string'
     # Common configurations
     DB_HOST = 'localhost'
@@ -0,0 +1,46 @@
+# One-shot migration of login.password from plaintext to salted werkzeug hashes (app/staff/credentials.py)
+# Rows that already hold a hash are left alone, so running it again is harmless. Rows it misses (e.g. added
+# by an old upload script afterwards) are still rehashed on their first successful login.
+# python db_prep/hash_passwords.py [--dry-run] [--method scrypt:16384:8:1]
+# DATABASE_URI overrides the database from config.Config
+
+import argparse
+import os
+import sys
+
+from sqlalchemy import create_engine, text
+from werkzeug.security import generate_password_hash
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+# same test as app.staff.credentials.is_password_hash, importing the app would pull in Flask and its database setup
+HASH_PREFIXES = ('pbkdf2:', 'scrypt:')
+
+
+def is_password_hash(value):
+    return value.startswith(HASH_PREFIXES) and value.count('$') == 2
+
+
+def hash_passwords(database_uri, method, dry_run=False):
+    engine = create_engine(database_uri)
+    with engine.begin() as connection:
+        rows = connection.execute(text("SELECT username, password FROM login")).all()
+        plaintext = [(username, password) for username, password in rows if not is_password_hash(password)]
+        print(f"{len(rows)} logins, {len(plaintext)} with a plaintext password")
+        if dry_run or not plaintext:
+            return
+        # one transaction, either every row is hashed or none
+        connection.execute(text("UPDATE login SET password = :password WHERE username = :username"), [
+            {"username": username, "password": generate_password_hash(password, method=method)}
+            for username, password in plaintext
+        ])
+        print(f"{len(plaintext)} passwords hashed with {method}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dry-run', action='store_true', help='only count the plaintext passwords')
+    parser.add_argument('--method', default=Config.PASSWORD_HASH_METHOD, help='werkzeug hash method')
+    args = parser.parse_args()
+    hash_passwords(os.environ.get('DATABASE_URI', Config.SQLALCHEMY_DATABASE_URI), args.method, dry_run=args.dry_run)
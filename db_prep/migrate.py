@@ -0,0 +1,56 @@
+# Applies the versioned SQL files in db_prep/migrations to an existing database, in file name order
+# Applied versions are recorded in schema_migrations so running it again only applies new files
+# python db_prep/migrate.py [--list]
+# DATABASE_URI overrides the database from config.Config
+
+import argparse
+import os
+import sys
+
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+
+def migration_files():
+    # (version, path) for every NNN_name.sql file
+    return [(file_name.split('_', 1)[0], os.path.join(MIGRATIONS_DIR, file_name))
+            for file_name in sorted(os.listdir(MIGRATIONS_DIR)) if file_name.endswith('.sql')]
+
+
+def statements(path):
+    # split a migration file into statements, dropping the -- comment lines
+    with open(path) as sql_file:
+        sql = "\n".join(line for line in sql_file.read().splitlines() if not line.strip().startswith('--'))
+    return [statement.strip() for statement in sql.split(';') if statement.strip()]
+
+
+def migrate(database_uri, list_only=False):
+    engine = create_engine(database_uri)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE IF NOT EXISTS schema_migrations (version VARCHAR(32) PRIMARY KEY, applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"))
+        applied = {row[0] for row in connection.execute(text("SELECT version FROM schema_migrations"))}
+
+    for version, path in migration_files():
+        if version in applied:
+            print(f"{version} already applied")
+            continue
+        if list_only:
+            print(f"{version} pending ({os.path.basename(path)})")
+            continue
+        # MySQL commits DDL implicitly, the version row is only written once every statement succeeded
+        with engine.begin() as connection:
+            for statement in statements(path):
+                connection.execute(text(statement))
+            connection.execute(text("INSERT INTO schema_migrations (version) VALUES (:version)"), {"version": version})
+        print(f"{version} applied ({os.path.basename(path)})")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--list', action='store_true', help='only show which migrations are pending')
+    args = parser.parse_args()
+    migrate(os.environ.get('DATABASE_URI', Config.SQLALCHEMY_DATABASE_URI), list_only=args.list)
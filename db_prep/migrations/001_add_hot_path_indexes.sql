@@ -0,0 +1,9 @@
+-- Composite indexes for the schedule / application hot paths (MySQL)
+-- Same names as the db.Index entries in app/models.py, new databases get them from db.create_all() / schema.sql
+-- Apply to an existing database with: python db_prep/migrate.py
+
+CREATE INDEX ix_employee_reporting_manager ON employee (reporting_manager);
+CREATE INDEX ix_wfh_application_staff_slot ON wfh_application (staff_id, time_slot);
+CREATE INDEX ix_wfh_schedule_status_date ON wfh_schedule (status, wfh_date);
+CREATE INDEX ix_wfh_schedule_application_status ON wfh_schedule (application_id, status);
+CREATE INDEX ix_wfh_withdrawal_wfh_id ON wfh_withdrawal (wfh_id);
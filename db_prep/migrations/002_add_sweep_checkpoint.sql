@@ -0,0 +1,10 @@
+-- Checkpoint table of the chunked auto reject sweep (app/application/stale.py)
+-- Apply to an existing database with: python db_prep/migrate.py
+
+CREATE TABLE sweep_checkpoint (
+    name VARCHAR(64) PRIMARY KEY,
+    cutoff DATE NOT NULL,
+    phase VARCHAR(32) NOT NULL, -- applications, withdrawals, done
+    last_id INT NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL
+);
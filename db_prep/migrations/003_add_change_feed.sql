@@ -0,0 +1,17 @@
+-- Change feed of WFH schedules for the ?since= sync of the schedule endpoints (app/changes.py)
+-- Apply to an existing database with: python db_prep/migrate.py
+
+CREATE TABLE change_counter (
+    name VARCHAR(64) PRIMARY KEY,
+    version INT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE wfh_change (
+    change_id INT AUTO_INCREMENT PRIMARY KEY,
+    version INT NOT NULL,
+    staff_id INT NOT NULL,
+    wfh_id INT,
+    wfh_date DATE NOT NULL,
+    changed_at DATETIME NOT NULL,
+    INDEX ix_wfh_change_staff_version (staff_id, version)
+);
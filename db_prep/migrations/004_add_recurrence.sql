@@ -0,0 +1,9 @@
+-- Recurrence rules of WFH applications (app/application/recurring.py)
+-- Existing applications keep recurrence NULL: every one of their dates already has its schedule
+-- Apply to an existing database with: python db_prep/migrate.py
+
+ALTER TABLE wfh_application
+    ADD COLUMN recurrence TEXT NULL,
+    ADD COLUMN materialized_until DATE NULL;
+
+CREATE INDEX ix_wfh_application_materialized_until ON wfh_application (materialized_until);
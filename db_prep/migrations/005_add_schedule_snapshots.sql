@@ -0,0 +1,28 @@
+-- Nightly snapshots of the HR dashboard counts (app/schedule/snapshots.py)
+-- Apply to an existing database with: python db_prep/migrate.py
+
+CREATE INDEX ix_wfh_change_version ON wfh_change (version);
+
+CREATE TABLE schedule_snapshot_run (
+    snapshot_id INT AUTO_INCREMENT PRIMARY KEY,
+    taken_at DATETIME NOT NULL,
+    first_date DATE NOT NULL,
+    last_date DATE NOT NULL,
+    change_version INT NOT NULL,
+    employee_version INT NOT NULL,
+    employee_fingerprint VARCHAR(255) NOT NULL,
+    row_count INT NOT NULL,
+    build_seconds FLOAT NOT NULL
+);
+
+CREATE TABLE schedule_snapshot (
+    snapshot_id INT NOT NULL,
+    scope VARCHAR(16) NOT NULL,
+    group_key VARCHAR(255) NOT NULL,
+    wfh_date DATE NOT NULL,
+    am INT NOT NULL,
+    pm INT NOT NULL,
+    records INT NOT NULL,
+    PRIMARY KEY (snapshot_id, scope, group_key, wfh_date),
+    FOREIGN KEY (snapshot_id) REFERENCES schedule_snapshot_run(snapshot_id) ON DELETE CASCADE
+);
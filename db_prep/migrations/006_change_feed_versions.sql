@@ -0,0 +1,18 @@
+-- Change feed versions taken at commit time instead of from the locked change_counter row (app/changes.py)
+-- Apply to an existing database with: python db_prep/migrate.py
+
+CREATE TABLE change_version (
+    version INT AUTO_INCREMENT PRIMARY KEY,
+    feed VARCHAR(64) NOT NULL, -- wfh_schedule, employee
+    committed_at DATETIME NOT NULL,
+    INDEX ix_change_version_feed (feed, version),
+    INDEX ix_change_version_committed_at (committed_at)
+);
+
+-- new versions continue after the last one handed out, whose token stays valid (older tokens reload once)
+INSERT INTO change_version (version, feed, committed_at)
+SELECT version, name, NOW() FROM change_counter WHERE name = 'wfh_schedule' AND version > 0;
+INSERT INTO change_version (feed, committed_at)
+SELECT name, NOW() FROM change_counter WHERE name = 'employee';
+
+DROP TABLE change_counter;
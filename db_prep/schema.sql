@@ -20,6 +20,7 @@ CREATE TABLE employee (
     email VARCHAR(255),
     reporting_manager INT,
     role INT,
+    INDEX ix_employee_reporting_manager (reporting_manager), -- team lookups
     FOREIGN KEY (reporting_manager) REFERENCES employee(staff_id) -- Self-referencing foreign key
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8;
 
@@ -39,6 +40,10 @@ CREATE TABLE wfh_application (
     time_slot VARCHAR(255), -- AM, PM, FULL
     staff_apply_reason VARCHAR(255),
     manager_reject_reason VARCHAR(255),
+    recurrence TEXT, -- RRULE text of recurring applications
+    materialized_until DATE, -- schedules exist up to this date, later ones come from the rule
+    INDEX ix_wfh_application_staff_slot (staff_id, time_slot), -- per staff schedule joins
+    INDEX ix_wfh_application_materialized_until (materialized_until), -- daily materialization of recurrences
     FOREIGN KEY (staff_id) REFERENCES employee(staff_id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8;
 
@@ -49,6 +54,8 @@ CREATE TABLE wfh_schedule (
     wfh_date DATE,
     status VARCHAR(255), -- Accepted, Rejected, Pending, Withdrawn
     manager_withdraw_reason VARCHAR(255),
+    INDEX ix_wfh_schedule_status_date (status, wfh_date), -- auto reject and approved/pending date ranges
+    INDEX ix_wfh_schedule_application_status (application_id, status), -- schedules of an application by status
     FOREIGN KEY (application_id) REFERENCES WFH_APPLICATION(application_id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8;
 
@@ -57,5 +64,60 @@ CREATE TABLE wfh_withdrawal (
     wfh_id INT,
     staff_withdraw_reason VARCHAR(255),
     manager_reject_withdrawal_reason VARCHAR(255),
+    INDEX ix_wfh_withdrawal_wfh_id (wfh_id), -- latest withdrawal of a schedule
     FOREIGN KEY (wfh_id) REFERENCES WFH_SCHEDULE(wfh_id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+
+-- Progress of chunked sweeps (auto reject), lets a killed run resume
+CREATE TABLE sweep_checkpoint (
+    name VARCHAR(64) PRIMARY KEY,
+    cutoff DATE NOT NULL,
+    phase VARCHAR(32) NOT NULL, -- applications, withdrawals, done
+    last_id INT NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+
+-- Change feed of WFH schedules: one version per feed and writing transaction, taken at its commit; one row per schedule date touched
+CREATE TABLE change_version (
+    version INT AUTO_INCREMENT PRIMARY KEY,
+    feed VARCHAR(64) NOT NULL,
+    committed_at DATETIME NOT NULL,
+    INDEX ix_change_version_feed (feed, version),
+    INDEX ix_change_version_committed_at (committed_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+
+CREATE TABLE wfh_change (
+    change_id INT AUTO_INCREMENT PRIMARY KEY,
+    version INT NOT NULL,
+    staff_id INT NOT NULL,
+    wfh_id INT,
+    wfh_date DATE NOT NULL,
+    changed_at DATETIME NOT NULL,
+    INDEX ix_wfh_change_staff_version (staff_id, version),
+    INDEX ix_wfh_change_version (version)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+
+-- Nightly snapshots of the HR dashboard counts: per day AM/PM WFH staff of each department and manager
+CREATE TABLE schedule_snapshot_run (
+    snapshot_id INT AUTO_INCREMENT PRIMARY KEY,
+    taken_at DATETIME NOT NULL,
+    first_date DATE NOT NULL,
+    last_date DATE NOT NULL,
+    change_version INT NOT NULL,
+    employee_version INT NOT NULL,
+    employee_fingerprint VARCHAR(255) NOT NULL,
+    row_count INT NOT NULL,
+    build_seconds FLOAT NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+
+CREATE TABLE schedule_snapshot (
+    snapshot_id INT NOT NULL,
+    scope VARCHAR(16) NOT NULL, -- dept, manager
+    group_key VARCHAR(255) NOT NULL,
+    wfh_date DATE NOT NULL,
+    am INT NOT NULL,
+    pm INT NOT NULL,
+    records INT NOT NULL,
+    PRIMARY KEY (snapshot_id, scope, group_key, wfh_date),
+    FOREIGN KEY (snapshot_id) REFERENCES schedule_snapshot_run(snapshot_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
@@ -1,5 +1,6 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
 import pandas as pd
 
 app = Flask(__name__)
@@ -75,4 +76,10 @@ with app.app_context():
         db.session.commit()
 
 
+# Step 4: new version of the employee change feed, running apps rebuild their org hierarchy (app/hierarchy.py)
+with app.app_context():
+    db.session.execute(text("INSERT INTO change_version (feed, committed_at) VALUES ('employee', NOW())"))
+    db.session.commit()
+
+
 print("Data inserted successfully!")
\ No newline at end of file
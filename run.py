@@ -1,18 +1,56 @@
-from app import create_app
-from app.application.application import auto_reject
+from app import create_app, db
+from app.application.stale import reject_stale_requests, reject_stale_requests_in_chunks
+from app.application.recurring import materialize_recurrences
+from app.schedule.snapshots import take_snapshot
+from app.changes import prune_changes
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+import logging
 import os
 
 app = create_app()
+# the daily job's summaries are logged at INFO, kept outside debug mode too
+app.logger.setLevel(logging.INFO)
 
 # Setting up the scheduler
 scheduler = BackgroundScheduler()
 scheduler.start()
 
+def auto_reject_job():
+    # the scheduler thread has no app context of its own
+    with app.app_context():
+        try:
+            chunk_size = app.config.get('AUTO_REJECT_CHUNK_SIZE', 0)
+            if chunk_size:
+                summary = reject_stale_requests_in_chunks(chunk_size)
+            else:
+                summary = reject_stale_requests()
+            app.logger.info("auto reject summary: %s", summary)
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("auto reject failed")
+        # schedules of recurring applications up to the horizon, after auto reject stopped the stale ones
+        try:
+            app.logger.info("materialize summary: %s", materialize_recurrences())
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("materialize failed")
+        # counts of the HR dashboards for the next day, after the day's sweeps changed the schedules
+        try:
+            app.logger.info("snapshot summary: %s", take_snapshot())
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("snapshot failed")
+        # change feed older than CHANGE_FEED_RETENTION_DAYS
+        try:
+            app.logger.info("change feed prune summary: %s", prune_changes())
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("change feed prune failed")
+
 # Add a job to run every day at a specific time
 scheduler.add_job(
-    func=lambda: auto_reject(app), 
+    func=auto_reject_job, 
     trigger=CronTrigger(hour=17, minute=43), 
     id='daily_job',
     replace_existing=True
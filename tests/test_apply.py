@@ -3,8 +3,8 @@ from sqlalchemy.exc import SQLAlchemyError, OperationalError
 import unittest
 from unittest.mock import patch
 from app import create_app, db
-from app.models import WFHApplication, WFHSchedule, Employee
-from sqlalchemy import text
+from app.models import WFHApplication, WFHSchedule, Employee, WFHChange
+from sqlalchemy import event, text
 
 
 class TestWFHApply(unittest.TestCase):
@@ -266,6 +266,34 @@ class TestWFHApply(unittest.TestCase):
         # Check that the response indicates a partial conflict (status code 400)
         self.assertEqual(response.status_code, 400)
         self.assertIn(b'Application already exists on some recurring days!', response.data)
-    
+
+    # Test case 8: A six month weekly recurrence inserts its schedules with one statement
+    def test_apply_wfh_recurring_bulk_insert(self):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with self.app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+            try:
+                response = self.client.post('/api/application/apply/140736', json={
+                    "time_slot": "PM",
+                    "apply_reason": "Recurring Work from home",
+                    "start_date": "2025-01-06T00:00:00.000Z",
+                    "end_date": "2025-06-30T00:00:00.000Z"
+                })
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(sum(1 for statement in statements if statement.startswith('INSERT INTO wfh_schedule')), 1)
+            schedules = WFHSchedule.query.join(WFHApplication).filter(WFHApplication.staff_apply_reason == "Recurring Work from home",
+                                                                      WFHApplication.time_slot == "PM").all()
+            self.assertEqual(len(schedules), 26)
+            self.assertTrue(all(schedule.wfh_date.weekday() == 0 for schedule in schedules))
+            # the bulk inserted schedules are in the change feed
+            self.assertEqual(WFHChange.query.filter(WFHChange.wfh_id.in_([schedule.wfh_id for schedule in schedules])).count(), 26)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
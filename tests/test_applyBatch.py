@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+import unittest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import Employee, WFHApplication, WFHChange, WFHSchedule
+
+class TestApplyBatch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.app = create_app(test_config=True)
+        self.client = self.app.test_client()
+        self.monday = datetime.now().date() + timedelta(days=7 - datetime.now().weekday() + 7)
+
+        with self.app.app_context():
+            db.create_all()
+            self.populate_test_data(self)
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def populate_test_data(self):
+        db.session.add(Employee(staff_id=130002, staff_fname='Jack', staff_lname='Sim', dept='CEO', position='MD', country='Singapore',
+                                email='jack.sim@allinone.com.sg', reporting_manager=130002, role=1))
+        db.session.add(Employee(staff_id=140894, staff_fname='Rahim', staff_lname='Khalid', dept='Sales', position='Sales Manager',
+                                country='Singapore', email='Rahim.Khalid@allinone.com.sg', reporting_manager=130002, role=3))
+        db.session.add_all([
+            Employee(staff_id=staff_id, staff_fname='Staff', staff_lname=str(staff_id), dept='Sales', position='Account Manager',
+                     country='Singapore', email=f'staff.{staff_id}@allinone.com.sg', reporting_manager=140894, role=2)
+            for staff_id in range(150000, 150040)
+        ])
+        # 150000 already works from home in the morning of the first monday
+        application = WFHApplication(staff_id=150000, time_slot='AM', staff_apply_reason='existing', manager_reject_reason=None)
+        db.session.add(application)
+        db.session.flush()
+        db.session.add(WFHSchedule(application_id=application.application_id, wfh_date=self.monday, status='Approved', manager_withdraw_reason=None))
+        db.session.commit()
+
+    def item(self, staff_id, time_slot='PM', weeks=0, offset=0):
+        start = self.monday + timedelta(days=offset)
+        return {'staff_id': staff_id, 'time_slot': time_slot, 'apply_reason': 'import',
+                'start_date': start.strftime('%Y-%m-%d'), 'end_date': (start + timedelta(weeks=weeks)).strftime('%Y-%m-%d')}
+
+    def post(self, items):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with self.app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+            try:
+                response = self.client.post('/api/application/apply_batch', json=items)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        return response, statements
+
+    def test_per_item_results(self):
+        response, _ = self.post([
+            self.item(150000, 'PM', weeks=2),        # AM is taken, PM is free
+            self.item(150000, 'FULL', weeks=2),      # clashes with the AM schedule and the item above
+            self.item(150001, 'AM', offset=1),
+            self.item(999999, 'AM'),                 # no such staff
+            {'staff_id': 150002, 'time_slot': 'EVENING', 'start_date': '2024-10-10', 'end_date': '2024-10-10'},
+            self.item(150001, 'AM', offset=1),       # duplicate of the third item
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.json['created'], response.json['rejected']), (2, 4))
+        results = response.json['results']
+        self.assertEqual([result['status'] for result in results], [201, 400, 201, 400, 400, 400])
+        self.assertEqual(len(results[0]['dates']), 3)
+        self.assertEqual(results[1]['error'], 'Application already exists!')
+        self.assertEqual(results[3]['error'], 'No such staff.')
+        self.assertIn('time_slot', results[4]['error'])
+        self.assertEqual(results[5]['error'], 'Application already exists!')
+
+        with self.app.app_context():
+            schedules = WFHSchedule.query.filter(WFHSchedule.application_id == results[0]['application_id']).all()
+            self.assertEqual([schedule.status for schedule in schedules], ['Pending_Approval'] * 3)
+            # the change feed has the bulk inserted schedules
+            self.assertEqual(WFHChange.query.filter(WFHChange.wfh_id.in_([schedule.wfh_id for schedule in schedules])).count(), 3)
+
+    def test_partial_recurring_conflict(self):
+        self.assertEqual(self.post([self.item(150010, 'AM', offset=2)])[0].status_code, 201)
+        response, _ = self.post([self.item(150010, 'FULL', weeks=3, offset=2)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['results'][0]['error'], 'Application already exists on some recurring days!')
+
+    def test_schedules_inserted_in_bulk(self):
+        small, small_statements = self.post([self.item(staff_id, 'AM', weeks=12, offset=3) for staff_id in range(150020, 150022)])
+        large, large_statements = self.post([self.item(staff_id, 'AM', weeks=12, offset=3) for staff_id in range(150022, 150040)])
+        self.assertEqual((small.json['created'], large.json['created']), (2, 18))
+        # one INSERT per extra application (generated ids), the 13 schedules of each add no statement
+        self.assertEqual(len(large_statements) - len(small_statements), 16)
+        self.assertEqual(sum(1 for statement in large_statements if statement.startswith('INSERT INTO wfh_schedule')), 1)
+        self.assertEqual(sum(1 for statement in large_statements if 'FROM wfh_application JOIN wfh_schedule' in statement), 1)
+        with self.app.app_context():
+            self.assertEqual(WFHSchedule.query.join(WFHApplication).filter(WFHApplication.staff_id >= 150020).count(), 20 * 13)
+
+    def test_ceo_approved(self):
+        response, _ = self.post([self.item(130002, 'FULL', offset=4)])
+        self.assertEqual(response.status_code, 201)
+        with self.app.app_context():
+            schedule = WFHSchedule.query.filter_by(application_id=response.json['results'][0]['application_id']).one()
+            self.assertEqual(schedule.status, 'Approved')
+
+    def test_bad_body(self):
+        self.assertEqual(self.client.post('/api/application/apply_batch', json={'items': []}).status_code, 400)
+        self.assertEqual(self.client.post('/api/application/apply_batch', data='not json').status_code, 400)
+        with self.app.app_context():
+            self.app.config['APPLY_BATCH_LIMIT'] = 1
+            try:
+                response = self.client.post('/api/application/apply_batch', json=[self.item(150003), self.item(150004)])
+            finally:
+                self.app.config['APPLY_BATCH_LIMIT'] = 1000
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
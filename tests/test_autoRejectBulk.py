@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+import unittest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import Employee, WFHApplication, WFHSchedule, WFHWithdrawal
+
+class TestAutoRejectBulk(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        # Set up the test client and in-memory database
+        self.app = create_app(test_config=True)
+        self.client = self.app.test_client()
+
+        # Push the application context and initialize the database
+        with self.app.app_context():
+            db.create_all()
+            self.populate_test_data(self)
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def populate_test_data(self):
+        try:
+            employees = [
+                Employee(staff_id=130002, staff_fname='Jack', staff_lname='Sim', dept='CEO', position='MD', country='Singapore', email='jack.sim@allinone.com.sg', reporting_manager=130002, role=1),
+                Employee(staff_id=140001, staff_fname='Derek', staff_lname='Tan', dept='Sales', position='Director', country='Singapore', email='Derek.Tan@allinone.com.sg', reporting_manager=130002, role=1),
+                Employee(staff_id=140002, staff_fname='Susan', staff_lname='Goh', dept='Sales', position='Account Manager', country='Singapore', email='Susan.Goh@allinone.com.sg', reporting_manager=140001, role=2),
+            ]
+            db.session.add_all(employees)
+            db.session.commit()
+
+            applications = [
+                # stale Pending_Approval, its other schedule is recent
+                WFHApplication(staff_id=140002, time_slot='AM', staff_apply_reason='stale', manager_reject_reason=None),
+                # pending but one day short of 8 weeks
+                WFHApplication(staff_id=140002, time_slot='PM', staff_apply_reason='recent', manager_reject_reason=None),
+                # stale Pending_Withdrawal withdrawn twice
+                WFHApplication(staff_id=140002, time_slot='FULL', staff_apply_reason='withdrawn', manager_reject_reason=None),
+            ]
+            db.session.add_all(applications)
+            db.session.commit()
+
+            today = datetime.now().date()
+            stale_date = today - timedelta(weeks=8)
+            schedules = [
+                WFHSchedule(application_id=applications[0].application_id, wfh_date=stale_date - timedelta(days=3), status='Pending_Approval', manager_withdraw_reason=None),
+                WFHSchedule(application_id=applications[0].application_id, wfh_date=today + timedelta(days=4), status='Pending_Approval', manager_withdraw_reason=None),
+                WFHSchedule(application_id=applications[1].application_id, wfh_date=stale_date + timedelta(days=1), status='Pending_Approval', manager_withdraw_reason=None),
+                WFHSchedule(application_id=applications[2].application_id, wfh_date=stale_date, status='Pending_Withdrawal', manager_withdraw_reason=None),
+            ]
+            db.session.add_all(schedules)
+            db.session.commit()
+
+            withdrawals = [
+                WFHWithdrawal(wfh_id=schedules[3].wfh_id, staff_withdraw_reason='first try', manager_reject_withdrawal_reason='not now'),
+                WFHWithdrawal(wfh_id=schedules[3].wfh_id, staff_withdraw_reason='second try', manager_reject_withdrawal_reason=None),
+            ]
+            db.session.add_all(withdrawals)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    def test_auto_reject_summary(self):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with self.app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+            try:
+                response = self.client.get('/api/application/autoReject')
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.json['summary']['rejected_applications'], 1)
+            self.assertEqual(response.json['summary']['rejected_schedules'], 2)
+            self.assertEqual(response.json['summary']['approved_schedules'], 1)
+            self.assertEqual(response.json['summary']['rejected_withdrawals'], 1)
+
+            # one bulk UPDATE per transition, independent of the number of stale rows (the change feed only inserts)
+            updates = [statement for statement in statements if statement.lstrip().upper().startswith('UPDATE')]
+            self.assertEqual(len(updates), 4)
+
+            statuses = {schedule.wfh_id: schedule.status for schedule in WFHSchedule.query.order_by(WFHSchedule.wfh_id).all()}
+            self.assertEqual(list(statuses.values()), ['Rejected', 'Rejected', 'Pending_Approval', 'Approved'])
+            self.assertEqual(WFHApplication.query.get(1).manager_reject_reason, 'rejected by system')
+            self.assertIsNone(WFHApplication.query.get(2).manager_reject_reason)
+
+            # only the latest withdrawal is answered, the earlier manager reason is kept
+            reasons = [withdrawal.manager_reject_withdrawal_reason for withdrawal in WFHWithdrawal.query.order_by(WFHWithdrawal.withdrawal_id).all()]
+            self.assertEqual(reasons, ['not now', 'rejected by system'])
+
+            # running again finds nothing left to do
+            response = self.client.get('/api/application/autoReject')
+            self.assertEqual(response.json['summary']['rejected_schedules'], 0)
+            self.assertEqual(response.json['summary']['approved_schedules'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+import unittest
+from unittest.mock import patch
+from app import create_app, db
+from app.models import Employee, WFHApplication, WFHSchedule, WFHWithdrawal, SweepCheckpoint
+from sqlalchemy.exc import OperationalError
+
+class TestAutoRejectChunked(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        # Set up the test client and in-memory database
+        self.app = create_app(test_config=True)
+        self.client = self.app.test_client()
+
+        # Push the application context and initialize the database
+        with self.app.app_context():
+            db.create_all()
+            self.populate_test_data(self)
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def populate_test_data(self):
+        try:
+            employees = [
+                Employee(staff_id=130002, staff_fname='Jack', staff_lname='Sim', dept='CEO', position='MD', country='Singapore', email='jack.sim@allinone.com.sg', reporting_manager=130002, role=1),
+                Employee(staff_id=140001, staff_fname='Derek', staff_lname='Tan', dept='Sales', position='Director', country='Singapore', email='Derek.Tan@allinone.com.sg', reporting_manager=130002, role=1),
+                Employee(staff_id=140002, staff_fname='Susan', staff_lname='Goh', dept='Sales', position='Account Manager', country='Singapore', email='Susan.Goh@allinone.com.sg', reporting_manager=140001, role=2),
+            ]
+            db.session.add_all(employees)
+            db.session.commit()
+
+            # 5 stale pending applications, 3 stale pending withdrawals, 1 recent pending application
+            applications = [WFHApplication(staff_id=140002, time_slot='AM', staff_apply_reason=f'chunk {i}', manager_reject_reason=None) for i in range(9)]
+            db.session.add_all(applications)
+            db.session.commit()
+
+            stale_date = datetime.now().date() - timedelta(weeks=9)
+            schedules = []
+            for i, application in enumerate(applications):
+                if i < 5:
+                    status, wfh_date = 'Pending_Approval', stale_date
+                elif i < 8:
+                    status, wfh_date = 'Pending_Withdrawal', stale_date
+                else:
+                    status, wfh_date = 'Pending_Approval', datetime.now().date()
+                schedules.append(WFHSchedule(application_id=application.application_id, wfh_date=wfh_date, status=status, manager_withdraw_reason=None))
+            db.session.add_all(schedules)
+            db.session.commit()
+
+            db.session.add_all([WFHWithdrawal(wfh_id=schedule.wfh_id, staff_withdraw_reason='chunk', manager_reject_withdrawal_reason=None)
+                                for schedule in schedules if schedule.status == 'Pending_Withdrawal'])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    def statuses(self):
+        return [schedule.status for schedule in WFHSchedule.query.order_by(WFHSchedule.wfh_id).all()]
+
+    def test_killed_run_resumes_from_checkpoint(self):
+        # the first run dies in the withdrawal phase, the application chunks are already committed
+        with patch('app.application.stale.reject_withdrawals', side_effect=OperationalError("DB Connection Error", None, None)):
+            response = self.client.get('/api/application/autoReject?chunk_size=2')
+        self.assertEqual(response.status_code, 500)
+
+        with self.app.app_context():
+            checkpoint = db.session.get(SweepCheckpoint, 'auto_reject')
+            self.assertEqual(checkpoint.phase, 'withdrawals')
+            self.assertEqual(self.statuses(), ['Rejected'] * 5 + ['Pending_Withdrawal'] * 3 + ['Pending_Approval'])
+
+        response = self.client.get('/api/application/autoReject?chunk_size=2')
+        self.assertEqual(response.status_code, 201)
+        summary = response.json['summary']
+        self.assertTrue(summary['resumed'])
+        self.assertEqual(summary['rejected_applications'], 0)
+        self.assertEqual(summary['approved_schedules'], 3)
+        self.assertEqual(summary['rejected_withdrawals'], 3)
+        # 3 withdrawn schedules in chunks of 2, each chunk reports its id range and timing
+        self.assertEqual([(chunk['phase'], chunk['rows']) for chunk in summary['chunks']], [('withdrawals', 2), ('withdrawals', 1)])
+        self.assertTrue(all('ms' in chunk for chunk in summary['chunks']))
+
+        with self.app.app_context():
+            self.assertEqual(self.statuses(), ['Rejected'] * 5 + ['Approved'] * 3 + ['Pending_Approval'])
+            self.assertEqual(db.session.get(SweepCheckpoint, 'auto_reject').phase, 'done')
+
+        # a finished sweep starts over on the next run
+        response = self.client.get('/api/application/autoReject?chunk_size=2')
+        self.assertFalse(response.json['summary']['resumed'])
+        self.assertEqual(response.json['summary']['chunks'], [])
+
+    def test_invalid_chunk_size(self):
+        response = self.client.get('/api/application/autoReject?chunk_size=-1')
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
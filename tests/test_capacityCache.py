@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta
+import unittest
+from sqlalchemy import text
+from app import create_app, db
+from app.models import Employee, WFHApplication, WFHSchedule
+from app.capacity import get_capacity_cache
+
+class TestCapacityCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        # Set up the test client and in-memory database
+        self.app = create_app(test_config=True)
+        self.client = self.app.test_client()
+        self.wfh_date = (datetime.now() + timedelta(days=7)).date()
+
+        # Push the application context and initialize the database
+        with self.app.app_context():
+            db.create_all()
+            self.populate_test_data(self)
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def populate_test_data(self):
+        try:
+            employees = [
+                Employee(staff_id=130002, staff_fname='Jack', staff_lname='Sim', dept='CEO', position='MD', country='Singapore', email='jack.sim@allinone.com.sg', reporting_manager=130002, role=1),
+                Employee(staff_id=140894, staff_fname='Rahim', staff_lname='Khalid', dept='Sales', position='Sales Manager', country='Singapore', email='Rahim.Khalid@allinone.com.sg', reporting_manager=130002, role=3),
+                Employee(staff_id=140878, staff_fname='James', staff_lname='Tong', dept='Sales', position='Account Manager', country='Singapore', email='James.Tong@allinone.com.sg', reporting_manager=140894, role=2),
+                Employee(staff_id=140002, staff_fname='Susan', staff_lname='Goh', dept='Sales', position='Account Manager', country='Singapore', email='Susan.Goh@allinone.com.sg', reporting_manager=140894, role=2),
+            ]
+            db.session.add_all(employees)
+            db.session.commit()
+
+            applications = [
+                WFHApplication(staff_id=140878, time_slot='AM', staff_apply_reason='approved already', manager_reject_reason=None),
+                WFHApplication(staff_id=140002, time_slot='FULL', staff_apply_reason='waiting for approval', manager_reject_reason=None),
+            ]
+            db.session.add_all(applications)
+            db.session.commit()
+
+            schedules = [
+                WFHSchedule(application_id=applications[0].application_id, wfh_date=self.wfh_date, status='Approved', manager_withdraw_reason=None),
+                WFHSchedule(application_id=applications[1].application_id, wfh_date=self.wfh_date, status='Pending_Approval', manager_withdraw_reason=None),
+            ]
+            db.session.add_all(schedules)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    def day_summary(self):
+        response = self.client.get('/api/schedule/team_schedule_manager/140894')
+        self.assertEqual(response.status_code, 200)
+        for day in response.json:
+            if day['date'] == self.wfh_date.strftime('%Y-%m-%d'):
+                return day['am']['wfh'], day['pm']['wfh']
+
+    def other_worker_schedule(self, staff_id, time_slot, changes=True):
+        # a schedule written by another worker: this process' session hooks never see it
+        application = WFHApplication(staff_id=staff_id, time_slot=time_slot, staff_apply_reason='other worker', manager_reject_reason=None)
+        db.session.add(application)
+        db.session.commit()
+        db.session.execute(text("INSERT INTO wfh_schedule (application_id, wfh_date, status) VALUES (:application_id, :wfh_date, 'Approved')"),
+                           {'application_id': application.application_id, 'wfh_date': self.wfh_date})
+        if changes:
+            # and its change feed rows, as written by the other worker's commit
+            version = db.session.execute(text("INSERT INTO change_version (feed, committed_at) VALUES ('wfh_schedule', :now)"),
+                                         {'now': datetime.now()}).lastrowid
+            db.session.execute(text("INSERT INTO wfh_change (version, staff_id, wfh_date, changed_at) VALUES (:version, :staff_id, :wfh_date, :now)"),
+                               {'version': version, 'staff_id': staff_id, 'wfh_date': self.wfh_date, 'now': datetime.now()})
+        db.session.commit()
+
+    def test_cache_is_patched_by_approval(self):
+        with self.app.app_context():
+            cache = get_capacity_cache()
+
+            self.assertEqual(self.day_summary(), (1, 0))
+            misses = cache.stats()['misses']
+
+            # pending FULL request sees the AM slot already taken by James
+            response = self.client.get('/api/application/wfhrequest/140894')
+            self.assertEqual(response.json[0]['listofschedule'][0]['percentage'], [50, 0])
+
+            application = WFHApplication.query.filter_by(staff_id=140002).first()
+            response = self.client.post('/api/application/approverejectapplication/140894', json={
+                'application_id': application.application_id, 'status': 'Approve', 'staff_id': 140002
+            })
+            self.assertEqual(response.status_code, 201)
+
+            # approval is applied to the cached counters, no rebuild needed for reads without a stamp
+            self.assertEqual(cache.slot_counts(140894, [self.wfh_date])[(self.wfh_date, 'FULL')], 1)
+            stats = cache.stats()
+            self.assertEqual(stats['misses'], misses)
+            self.assertGreaterEqual(stats['hits'], 2)
+
+            # the team view's stamp moved with the approval, its body is rebuilt at the new stamp
+            self.assertEqual(self.day_summary(), (2, 1))
+            self.assertGreater(cache.stats()['stale'], stats['stale'])
+
+    def test_other_process_write_seen_with_new_etag(self):
+        with self.app.app_context():
+            cache = get_capacity_cache()
+            response = self.client.get('/api/schedule/team_schedule_manager/140894')
+            etag = response.headers['ETag']
+            before = self.day_summary()
+
+            self.other_worker_schedule(140878, 'PM')
+
+            # the stamp moved: new ETag, and the body under it already holds the other worker's schedule
+            stale = cache.stats()['stale']
+            response = self.client.get('/api/schedule/team_schedule_manager/140894')
+            self.assertNotEqual(response.headers['ETag'], etag)
+            self.assertEqual(self.day_summary(), (before[0], before[1] + 1))
+            self.assertGreater(cache.stats()['stale'], stale)
+
+    def test_unstamped_read_rebuilt_after_max_age(self):
+        with self.app.app_context():
+            cache = get_capacity_cache()
+            before = cache.slot_counts(140894, [self.wfh_date])[(self.wfh_date, 'AM')]
+
+            self.other_worker_schedule(140002, 'AM', changes=False)
+            self.assertEqual(cache.slot_counts(140894, [self.wfh_date])[(self.wfh_date, 'AM')], before)
+
+            for team in cache._teams.values():
+                team.built_at -= cache.max_age
+            expired = cache.stats()['expired']
+            self.assertEqual(cache.slot_counts(140894, [self.wfh_date])[(self.wfh_date, 'AM')], before + 1)
+            self.assertGreater(cache.stats()['expired'], expired)
+
+    def test_cache_stats_endpoint(self):
+        response = self.client.get('/api/monitoring/capacity_cache')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json), {'hits', 'misses', 'invalidations', 'expired', 'stale', 'teams'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta
+import unittest
+from app import create_app, db
+from app.changes import FEED, change_token, prune_changes
+from app.models import ChangeVersion, Employee, WFHApplication, WFHSchedule, WFHChange
+
+class TestChangeFeed(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        # Set up the test client and in-memory database
+        self.app = create_app(test_config=True)
+        self.client = self.app.test_client()
+        self.today = datetime.now().date()
+
+        # Push the application context and initialize the database
+        with self.app.app_context():
+            db.create_all()
+            self.populate_test_data(self)
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def populate_test_data(self):
+        try:
+            employees = [
+                Employee(staff_id=130002, staff_fname='Jack', staff_lname='Sim', dept='CEO', position='MD', country='Singapore', email='jack.sim@allinone.com.sg', reporting_manager=130002, role=1),
+                Employee(staff_id=140894, staff_fname='Rahim', staff_lname='Khalid', dept='Sales', position='Sales Manager', country='Singapore', email='Rahim.Khalid@allinone.com.sg', reporting_manager=130002, role=3),
+                Employee(staff_id=140002, staff_fname='Susan', staff_lname='Goh', dept='Sales', position='Account Manager', country='Singapore', email='Susan.Goh@allinone.com.sg', reporting_manager=140894, role=2),
+                Employee(staff_id=140003, staff_fname='Janice', staff_lname='Chan', dept='Sales', position='Account Manager', country='Singapore', email='Janice.Chan@allinone.com.sg', reporting_manager=140894, role=2),
+            ]
+            db.session.add_all(employees)
+            db.session.commit()
+
+            applications = [
+                WFHApplication(staff_id=140002, time_slot='AM', staff_apply_reason='feed test', manager_reject_reason=None),
+                # stale request for the auto reject sweep
+                WFHApplication(staff_id=140003, time_slot='PM', staff_apply_reason='stale', manager_reject_reason=None),
+            ]
+            db.session.add_all(applications)
+            db.session.commit()
+
+            schedules = [
+                WFHSchedule(application_id=applications[0].application_id, wfh_date=self.today + timedelta(days=2), status='Pending_Approval', manager_withdraw_reason=None),
+                WFHSchedule(application_id=applications[1].application_id, wfh_date=self.today - timedelta(weeks=9), status='Pending_Approval', manager_withdraw_reason=None),
+            ]
+            db.session.add_all(schedules)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    def token(self, response):
+        return response.headers['X-Change-Token']
+
+    def test_since_returns_changed_dates_only(self):
+        response = self.client.get('/api/schedule/own/140002')
+        self.assertEqual(response.status_code, 200)
+        token = self.token(response)
+
+        # nothing changed since the token
+        response = self.client.get(f'/api/schedule/own/140002?since={token}')
+        self.assertEqual(response.json, {'token': token, 'dates': [], 'schedules': []})
+        response = self.client.get(f'/api/schedule/team_schedule_manager/140894?since={token}')
+        self.assertEqual(response.json, {'token': token, 'days': []})
+
+        # the manager approves the application
+        with self.app.app_context():
+            schedule = WFHSchedule.query.filter_by(application_id=1).first()
+            schedule.status = 'Approved'
+            db.session.commit()
+
+        changed_day = str(self.today + timedelta(days=2))
+        response = self.client.get(f'/api/schedule/own/140002?since={token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(int(response.json['token']), int(token))
+        self.assertEqual(response.json['dates'], [changed_day])
+        self.assertEqual([schedule['class'] for schedule in response.json['schedules']], ['Approved'])
+
+        response = self.client.get(f'/api/schedule/team_schedule_manager/140894?since={token}')
+        self.assertEqual([day['date'] for day in response.json['days']], [changed_day])
+        self.assertEqual(response.json['days'][0]['am']['wfh'], 1)
+
+        response = self.client.get(f'/api/schedule/team_schedule/140003?since={token}')
+        self.assertEqual([day['date'] for day in response.json['days']], [changed_day])
+
+        # another staff's schedules did not change
+        response = self.client.get(f'/api/schedule/own/140003?since={token}')
+        self.assertEqual(response.json['dates'], [])
+
+    def test_bulk_auto_reject_recorded(self):
+        response = self.client.get('/api/schedule/own/140003')
+        token = self.token(response)
+
+        response = self.client.get('/api/application/autoReject')
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.get(f'/api/schedule/own/140003?since={token}')
+        self.assertEqual(response.json['dates'], [str(self.today - timedelta(weeks=9))])
+        # the rejected schedule is gone from the client's calendar
+        self.assertEqual(response.json['schedules'], [])
+
+        with self.app.app_context():
+            versions = {change.version for change in WFHChange.query.filter(WFHChange.version > int(token)).all()}
+            self.assertEqual(len(versions), 1)
+
+    def test_token_waits_for_versions_in_flight(self):
+        with self.app.app_context():
+            token = change_token()
+            # a version taken by a transaction that has not committed yet: the one after it is not announced
+            db.session.add(ChangeVersion(version=token + 2, feed=FEED, committed_at=datetime.now()))
+            db.session.commit()
+            self.assertEqual(change_token(), token)
+
+            # past the grace the missing version was rolled back
+            db.session.query(ChangeVersion).update({ChangeVersion.committed_at: datetime.now() - timedelta(seconds=60)})
+            db.session.commit()
+            self.assertEqual(change_token(), token + 2)
+
+    def test_pruned_token_expired(self):
+        token = self.token(self.client.get('/api/schedule/own/140002'))
+        with self.app.app_context():
+            # two transactions after the token, then a month and a day passes
+            for days in (5, 6):
+                application = WFHApplication(staff_id=140002, time_slot='PM', staff_apply_reason='before the prune')
+                db.session.add(application)
+                db.session.flush()
+                db.session.add(WFHSchedule(application_id=application.application_id, wfh_date=self.today + timedelta(days=days), status='Pending_Approval'))
+                db.session.commit()
+            db.session.query(ChangeVersion).update({ChangeVersion.committed_at: datetime.now() - timedelta(days=31)})
+            db.session.commit()
+
+            # the newest version of that age stays as the floor, the changes after the token are gone
+            summary = prune_changes()
+            self.assertGreater(summary['versions'], 0)
+            self.assertGreater(summary['changes'], 0)
+            self.assertGreater(summary['floor'], int(token))
+            self.assertEqual(WFHChange.query.filter(WFHChange.version <= summary['floor']).count(), 0)
+
+        for url in ('/api/schedule/own/140002', '/api/schedule/team_schedule_manager/140894', '/api/schedule/team_schedule/140003'):
+            with self.subTest(url=url):
+                response = self.client.get(f'{url}?since={token}')
+                self.assertEqual(response.status_code, 410)
+                response = self.client.get(f"{url}?since={self.token(self.client.get(url))}")
+                self.assertEqual(response.status_code, 200)
+
+    def test_invalid_since(self):
+        for url in ('/api/schedule/own/140002', '/api/schedule/team_schedule_manager/140894', '/api/schedule/team_schedule/140003'):
+            with self.subTest(url=url):
+                response = self.client.get(f'{url}?since=abc')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+import json
+import unittest
+from app import create_app, db
+from app.models import Employee, WFHApplication, WFHSchedule
+
+class TestCompactFormat(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.app = create_app(test_config=True)
+        self.client = self.app.test_client()
+        self.monday = datetime.now().date() + timedelta(days=7 - datetime.now().weekday())
+
+        with self.app.app_context():
+            db.create_all()
+            self.populate_test_data(self)
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def populate_test_data(self):
+        try:
+            db.session.add_all([
+                Employee(staff_id=130002, staff_fname='Jack', staff_lname='Sim', dept='CEO', position='MD', country='Singapore', email='jack.sim@allinone.com.sg', reporting_manager=130002, role=1),
+                Employee(staff_id=140894, staff_fname='Rahim', staff_lname='Khalid', dept='Sales', position='Sales Manager', country='Singapore', email='Rahim.Khalid@allinone.com.sg', reporting_manager=130002, role=3),
+            ])
+            db.session.add_all([
+                Employee(staff_id=staff_id, staff_fname='Staff', staff_lname=str(staff_id), dept='Sales', position='Account Manager',
+                         country='Singapore', email=f'staff.{staff_id}@allinone.com.sg', reporting_manager=140894, role=2)
+                for staff_id in range(143001, 143009)
+            ])
+            applications = [
+                WFHApplication(staff_id=143001, time_slot='AM', staff_apply_reason='compact test'),
+                WFHApplication(staff_id=143004, time_slot='FULL', staff_apply_reason='compact test'),
+                WFHApplication(staff_id=143007, time_slot='PM', staff_apply_reason='compact test'),
+            ]
+            db.session.add_all(applications)
+            db.session.flush()
+            db.session.add_all([
+                WFHSchedule(application_id=applications[0].application_id, wfh_date=self.monday, status='Approved'),
+                WFHSchedule(application_id=applications[1].application_id, wfh_date=self.monday, status='Pending_Withdrawal'),
+                WFHSchedule(application_id=applications[1].application_id, wfh_date=self.monday + timedelta(days=1), status='Approved'),
+                WFHSchedule(application_id=applications[2].application_id, wfh_date=self.monday + timedelta(days=1), status='Approved'),
+            ])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    def window(self):
+        return f"start={self.monday}&end={self.monday + timedelta(days=6)}"
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assert_same_days(self, full_days, compact, listed):
+        # the positions name the same employees as the full format lists, with the same counts
+        self.assertEqual([day['date'] for day in compact['days']], [day['date'] for day in full_days])
+        for full_day, compact_day in zip(full_days, compact['days']):
+            for slot in ('am', 'pm'):
+                self.assertEqual(compact_day[slot]['wfh'], full_day[slot]['wfh'])
+                self.assertEqual(compact_day[slot]['office'], full_day[slot]['office'])
+                wfh = [compact['employees'][position]['id'] for position in compact_day[slot]['staff']]
+                self.assertEqual(wfh, [employee['id'] for employee in listed(full_day[slot].get('employees', []))])
+
+    def test_team_schedule_manager(self):
+        url = f'/api/schedule/team_schedule_manager/140894?{self.window()}'
+        full = self.get(url).json
+        compact = self.get(url + '&format=compact').json
+        self.assertEqual(len(compact['employees']), 8)
+        self.assertEqual(compact['employees'][0], {"id": 143001, "name": "Staff 143001", "dept": "Sales", "position": "Account Manager",
+                                                   "email": "staff.143001@allinone.com.sg", "role": 2, "reporting_manager": 140894})
+        self.assert_same_days(full, compact, lambda employees: [employee for employee in employees if employee['status'] == 'WFH'])
+
+    def test_team_schedule(self):
+        url = f'/api/schedule/team_schedule/143002?{self.window()}'
+        full = self.get(url).json
+        compact = self.get(url + '&format=compact').json
+        self.assertNotIn('role', compact['employees'][0])
+        self.assert_same_days(full, compact, lambda employees: [employee for employee in employees if employee['status'] == 'WFH'])
+
+    def test_hro_overall(self):
+        url = f'/api/schedule/HRO_overall?{self.window()}'
+        full = json.loads(self.get(url).get_data())
+        compact = self.get(url + '&format=compact').json
+        self.assertEqual(len(compact['employees']), 10)
+        self.assert_same_days(full, compact, lambda employees: employees)
+        self.assertEqual(compact['days'][0]['am'], {"wfh": 2, "office": 8, "staff": [2, 5]})
+
+    def test_hro_wfh_count(self):
+        url = f'/api/schedule/HRO_wfh_count/140894?{self.window()}'
+        full = self.get(url).json
+        compact = self.get(url + '&format=compact').json
+        self.assert_same_days(full, compact, lambda employees: employees)
+
+    def test_paging(self):
+        # positions refer to the employee table of the page, counts still cover the whole team
+        response = self.get(f'/api/schedule/HRO_overall?{self.window()}&format=compact&limit=4')
+        compact = response.json
+        self.assertEqual([employee['id'] for employee in compact['employees']], [130002, 140894, 143001, 143002])
+        self.assertEqual(response.headers['X-Next-Cursor'], '143002')
+        self.assertEqual(compact['days'][0]['am'], {"wfh": 2, "office": 8, "staff": [2]})
+        self.assertEqual(compact['days'][1]['pm']['staff'], [])
+
+    def test_since(self):
+        url = f'/api/schedule/team_schedule_manager/140894?{self.window()}&format=compact'
+        token = self.get(url).headers['X-Change-Token']
+        changes = self.get(url + f'&since={token}').json
+        self.assertEqual(changes['days'], [])
+        self.assertEqual(len(changes['employees']), 8)
+
+    def test_smaller(self):
+        url = f'/api/schedule/team_schedule_manager/140894?{self.window()}'
+        full = self.get(url).get_data()
+        compact = self.get(url + '&format=compact').get_data()
+        self.assertLess(len(compact) * 5, len(full))
+
+    def test_invalid_format(self):
+        for url in ('/api/schedule/team_schedule_manager/140894?format=xml', '/api/schedule/team_schedule/143002?format=COMPACT',
+                    '/api/schedule/team_schedule/143002?format=counts'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json['error'], "format must be one of full, compact.")
+        # the HR views also have the counts format (app/schedule/snapshots.py)
+        for url in ('/api/schedule/HRO_overall?format=xml', '/api/schedule/HRO_wfh_count/140894?format='):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json['error'], "format must be one of full, compact, counts.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+import gzip
+import unittest
+import zlib
+from app import create_app, db
+from app.compression import CompressionCache, get_compression_cache
+from app.models import Employee, WFHApplication, WFHSchedule
+
+class TestCompression(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.app = create_app(test_config=True)
+        self.client = self.app.test_client()
+        self.today = datetime.now().date()
+
+        with self.app.app_context():
+            db.create_all()
+            self.populate_test_data(self)
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def populate_test_data(self):
+        try:
+            db.session.add(Employee(staff_id=140894, staff_fname='Rahim', staff_lname='Khalid', dept='Sales', position='Sales Manager',
+                                    country='Singapore', email='Rahim.Khalid@allinone.com.sg', reporting_manager=140894, role=3))
+            db.session.add_all([
+                Employee(staff_id=staff_id, staff_fname='Staff', staff_lname=str(staff_id), dept='Sales', position='Account Manager',
+                         country='Singapore', email=f'staff.{staff_id}@allinone.com.sg', reporting_manager=140894, role=2)
+                for staff_id in range(145001, 145011)
+            ])
+            application = WFHApplication(staff_id=145001, time_slot='AM', staff_apply_reason='compression test')
+            db.session.add(application)
+            db.session.flush()
+            db.session.add(WFHSchedule(application_id=application.application_id, wfh_date=self.today + timedelta(days=1), status='Approved'))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    def stats(self):
+        with self.app.app_context():
+            return get_compression_cache().stats()
+
+    def test_gzip(self):
+        url = '/api/schedule/team_schedule_manager/140894'
+        plain = self.client.get(url)
+        compressed = self.client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(compressed.status_code, 200)
+        self.assertEqual(compressed.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed.headers['Vary'])
+        self.assertIn('Accept-Encoding', plain.headers['Vary'])
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertEqual(gzip.decompress(compressed.get_data()), plain.get_data())
+        self.assertEqual(int(compressed.headers['Content-Length']), len(compressed.get_data()))
+        self.assertLess(len(compressed.get_data()) * 10, len(plain.get_data()))
+        # the compressed body has its own ETag
+        self.assertEqual(compressed.get_etag(), (plain.get_etag()[0] + '-gzip', False))
+
+    def test_repeat_hit_from_cache(self):
+        url = '/api/schedule/team_schedule_manager/140894?limit=5'
+        first = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        before = self.stats()
+        second = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        after = self.stats()
+        self.assertEqual(after['hits'] - before['hits'], 1)
+        self.assertEqual(after['misses'], before['misses'])
+        self.assertEqual(second.get_data(), first.get_data())
+
+    def test_not_modified_with_encoded_etag(self):
+        url = '/api/schedule/team_schedule/145002'
+        etag = self.client.get(url, headers={'Accept-Encoding': 'gzip'}).get_etag()[0]
+        self.assertTrue(etag.endswith('-gzip'))
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': f'"{etag}"'})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_etag()[0], etag)
+
+    def test_streamed(self):
+        url = f'/api/schedule/HRO_overall?start={self.today}&end={self.today + timedelta(days=30)}'
+        plain = self.client.get(url).get_data()
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response.headers)
+        self.assertEqual(gzip.decompress(response.get_data()), plain)
+
+    def test_streamed_chunks_flushed(self):
+        # every chunk is sent as soon as it is compressed, the first one decodes to the first day on its own
+        url = f'/api/schedule/HRO_overall?start={self.today}&end={self.today + timedelta(days=30)}'
+        plain = self.client.get(url).get_data()
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        chunks = iter(response.response)
+        first = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(next(chunks))
+        self.assertTrue(first.startswith(b'[{'))
+        self.assertTrue(plain.startswith(first))
+        response.close()
+
+    def test_small_or_not_accepted(self):
+        # below COMPRESSION_MIN_SIZE, an encoding the client refuses, error responses
+        for url, encoding in (('/api/schedule/own/145003', 'gzip'), ('/api/schedule/team_schedule_manager/140894', 'identity'),
+                              ('/api/schedule/team_schedule_manager/140894', 'gzip;q=0'), ('/api/schedule/team_schedule_manager/140894?limit=x', 'gzip')):
+            with self.subTest(url=url, encoding=encoding):
+                response = self.client.get(url, headers={'Accept-Encoding': encoding})
+                self.assertNotIn('Content-Encoding', response.headers)
+                self.assertIsNotNone(response.json)
+
+    def test_cache_budget(self):
+        cache = CompressionCache(max_bytes=10)
+        cache.put(('a', 'gzip'), b'12345')
+        cache.put(('b', 'gzip'), b'12345')
+        self.assertEqual(cache.get(('a', 'gzip')), b'12345')
+        cache.put(('c', 'gzip'), b'123')
+        # b was the least recently used
+        self.assertIsNone(cache.get(('b', 'gzip')))
+        self.assertEqual(cache.stats()['cached_bytes'], 8)
+        cache.put(('d', 'gzip'), b'12345678901')
+        self.assertIsNone(cache.get(('d', 'gzip')))
+
+    def test_disabled(self):
+        from config import Testconfig
+        Testconfig.COMPRESSION_ENABLED = False
+        try:
+            app = create_app(test_config=True)
+        finally:
+            Testconfig.COMPRESSION_ENABLED = True
+        response = app.test_client().get('/api/monitoring/compression', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Vary', response.headers)
+        self.assertEqual(response.json['misses'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+import unittest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import Employee, WFHApplication, WFHSchedule
+
+class TestConditionalGet(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        # Set up the test client and in-memory database
+        self.app = create_app(test_config=True)
+        self.client = self.app.test_client()
+        self.today = datetime.now().date()
+
+        # Push the application context and initialize the database
+        with self.app.app_context():
+            db.create_all()
+            self.populate_test_data(self)
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def populate_test_data(self):
+        try:
+            employees = [
+                Employee(staff_id=130002, staff_fname='Jack', staff_lname='Sim', dept='CEO', position='MD', country='Singapore', email='jack.sim@allinone.com.sg', reporting_manager=130002, role=1),
+                Employee(staff_id=140894, staff_fname='Rahim', staff_lname='Khalid', dept='Sales', position='Sales Manager', country='Singapore', email='Rahim.Khalid@allinone.com.sg', reporting_manager=130002, role=3),
+                Employee(staff_id=140002, staff_fname='Susan', staff_lname='Goh', dept='Sales', position='Account Manager', country='Singapore', email='Susan.Goh@allinone.com.sg', reporting_manager=140894, role=2),
+                Employee(staff_id=140003, staff_fname='Janice', staff_lname='Chan', dept='Sales', position='Account Manager', country='Singapore', email='Janice.Chan@allinone.com.sg', reporting_manager=140894, role=2),
+            ]
+            db.session.add_all(employees)
+            db.session.commit()
+
+            application = WFHApplication(staff_id=140002, time_slot='AM', staff_apply_reason='etag test', manager_reject_reason=None)
+            db.session.add(application)
+            db.session.commit()
+
+            db.session.add(WFHSchedule(application_id=application.application_id, wfh_date=self.today + timedelta(days=1), status='Pending_Approval', manager_withdraw_reason=None))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    urls = ('/api/schedule/own/140002', '/api/schedule/team_schedule_manager/140894', '/api/schedule/team_schedule/140003',
+            '/api/schedule/manageremployeelist/140894', '/api/schedule/employeelist/140003')
+
+    def conditional_get(self, url, etag):
+        # statements run while answering a conditional GET
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with self.app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+            try:
+                response = self.client.get(url, headers={'If-None-Match': f'"{etag}"'})
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        return response, statements
+
+    def test_not_modified_with_one_query(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                etag, weak = response.get_etag()
+                self.assertFalse(weak)
+
+                response, statements = self.conditional_get(url, etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.get_etag()[0], etag)
+                self.assertEqual(response.data, b'')
+                # only the version stamp, no schedule or application rows are read
+                self.assertEqual(len(statements), 1)
+                self.assertNotIn('wfh_schedule', statements[0])
+                self.assertNotIn('wfh_application', statements[0])
+
+    def test_etag_changes_with_team_data(self):
+        etags = {url: self.client.get(url).get_etag()[0] for url in self.urls}
+
+        # a schedule of 140002 is approved: the views showing it (own, manager, peer 140003) change, the employee lists do not
+        with self.app.app_context():
+            WFHSchedule.query.first().status = 'Approved'
+            db.session.commit()
+        for url, changed in zip(self.urls, (True, True, True, False, False)):
+            with self.subTest(url=url):
+                response, _ = self.conditional_get(url, etags[url])
+                self.assertEqual(response.status_code, 200 if changed else 304)
+
+        # an employee is renamed: every view of the team changes
+        etags = {url: self.client.get(url).get_etag()[0] for url in self.urls}
+        with self.app.app_context():
+            db.session.get(Employee, 140002).staff_lname = 'Goh-Tan'
+            db.session.commit()
+        for url in self.urls[1:]:
+            with self.subTest(url=url):
+                response, _ = self.conditional_get(url, etags[url])
+                self.assertEqual(response.status_code, 200)
+
+    def test_query_string_in_etag(self):
+        url = '/api/schedule/team_schedule_manager/140894'
+        etag = self.client.get(url).get_etag()[0]
+        response, _ = self.conditional_get(f'{url}?limit=1', etag)
+        self.assertEqual(response.status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
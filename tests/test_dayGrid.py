@@ -0,0 +1,45 @@
+from datetime import date
+import unittest
+from types import SimpleNamespace
+from app.schedule.grid import DayGrid, AM, PM
+
+class TestDayGrid(unittest.TestCase):
+    def setUp(self):
+        self.team = [SimpleNamespace(staff_id=staff_id) for staff_id in (140878, 140002, 140015)]
+        self.grid = DayGrid(self.team, date(2024, 10, 21), date(2024, 10, 25))
+
+    def test_full_day_marks_both_slots(self):
+        self.grid.add_records([
+            (140878, date(2024, 10, 22), 'FULL'),
+            (140002, date(2024, 10, 22), 'AM'),
+            (140015, date(2024, 10, 23), 'PM'),
+        ])
+        self.assertEqual(self.grid.wfh_counts(AM), [0, 2, 0, 0, 0])
+        self.assertEqual(self.grid.wfh_counts(PM), [0, 1, 1, 0, 0])
+        self.assertEqual(self.grid.wfh_rows(1, AM), [0, 1])
+        self.assertEqual(self.grid.statuses(2, PM), [False, False, True])
+        self.assertEqual(self.grid.has_records.tolist(), [False, True, True, False, False])
+        self.assertEqual(self.grid.dates()[0], '2024-10-21')
+
+    def test_records_outside_window_or_team_are_ignored(self):
+        self.grid.add_records([
+            (140878, date(2024, 10, 20), 'AM'),
+            (140878, date(2024, 10, 26), 'AM'),
+            (999999, date(2024, 10, 22), 'AM'),
+        ])
+        self.assertEqual(self.grid.wfh_counts(AM), [0, 0, 0, 0, 0])
+
+    def test_unexpected_time_slot_only_flags_the_day(self):
+        self.grid.add_records([(140878, date(2024, 10, 24), 'INVALID')])
+        self.assertEqual(self.grid.wfh_counts(AM), [0, 0, 0, 0, 0])
+        self.assertEqual(self.grid.wfh_counts(PM), [0, 0, 0, 0, 0])
+        self.assertTrue(self.grid.has_records[3])
+
+    def test_staff_listed_twice_counts_twice(self):
+        grid = DayGrid(self.team + [self.team[0]], date(2024, 10, 21), date(2024, 10, 21))
+        grid.add_records([(140878, date(2024, 10, 21), 'AM')])
+        self.assertEqual(grid.wfh_counts(AM), [2])
+        self.assertEqual(grid.wfh_rows(0, AM), [0, 3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import threading
+import unittest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError
+from app import create_app, db
+from app.pool import engine_options, instrument_engine, pool_stats
+
+class TestDbPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        # Set up the test client and database
+        self.app = create_app(test_config=True)
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def setUp(self):
+        # file database, pooled like MySQL (in-memory SQLite shares one connection)
+        handle, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        self.config = {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{self.path}', 'DB_POOL_SIZE': 1, 'DB_MAX_OVERFLOW': 1,
+                       'DB_POOL_TIMEOUT': 1, 'DB_POOL_RECYCLE': 280, 'DB_POOL_PRE_PING': True}
+        self.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(self.config)
+        self.engine = create_engine(self.config['SQLALCHEMY_DATABASE_URI'], **self.config['SQLALCHEMY_ENGINE_OPTIONS'])
+        instrument_engine(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.remove(self.path)
+
+    def test_engine_options(self):
+        self.assertEqual(self.config['SQLALCHEMY_ENGINE_OPTIONS'], {
+            'pool_size': 1, 'max_overflow': 1,
+            'pool_timeout': 1, 'pool_recycle': 280, 'pool_pre_ping': True
+        })
+        # in-memory SQLite keeps its own single connection pool
+        self.assertEqual(engine_options(dict(self.config, SQLALCHEMY_DATABASE_URI='sqlite://')), {})
+
+    def test_checkout_metrics(self):
+        first = self.engine.connect()
+        second = self.engine.connect()  # overflow connection
+        stats = pool_stats(self.engine, self.config)
+        self.assertEqual((stats['checked_out'], stats['overflow']), (2, 1))
+
+        # size + overflow reached, the third checkout waits pool_timeout and fails
+        with self.assertRaises(TimeoutError):
+            self.engine.connect()
+        first.close()
+        second.close()
+
+        stats = pool_stats(self.engine, self.config)
+        self.assertEqual(stats['pool'], 'QueuePool')
+        self.assertEqual((stats['checkouts'], stats['checkins'], stats['connects'], stats['timeouts']), (2, 2, 2, 1))
+        self.assertGreaterEqual(stats['checkout_wait_ms']['max'], 900)
+
+        # the events follow the pool dispose() puts in place
+        self.engine.dispose()
+        self.engine.connect().close()
+        stats = pool_stats(self.engine, self.config)
+        self.assertEqual((stats['checkouts'], stats['checkins'], stats['connects']), (3, 3, 3))
+
+    def test_concurrent_checkouts_wait(self):
+        errors = []
+
+        def work():
+            try:
+                with self.engine.connect() as connection:
+                    connection.execute(text('SELECT 1'))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        stats = pool_stats(self.engine, self.config)
+        self.assertEqual(stats['checkouts'], 20)
+        self.assertEqual(stats['checkins'], 20)
+        self.assertEqual(stats['checked_out'], 0)
+
+    def test_monitoring_endpoint(self):
+        response = self.client.get('/api/monitoring/db_pool')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('pool', response.json)
+        self.assertIn('pre_ping', response.json)
+        # the app's engine is instrumented by create_app
+        self.assertIn('checkouts', response.json)
+
+if __name__ == '__main__':
+    unittest.main()
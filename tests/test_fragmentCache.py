@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+import json
+import unittest
+from sqlalchemy import update
+from app import create_app, db
+from app.models import Employee, WFHApplication, WFHSchedule
+from app.schedule.fragments import MANAGER_FIELDS, Fragment, fragment_json, get_fragment_cache, write_json
+
+class TestFragmentCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.app = create_app(test_config=True)
+        self.client = self.app.test_client()
+        self.monday = datetime.now().date() + timedelta(days=7 - datetime.now().weekday())
+
+        with self.app.app_context():
+            db.create_all()
+            self.populate_test_data(self)
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def populate_test_data(self):
+        db.session.add(Employee(staff_id=140894, staff_fname='Rahim', staff_lname='Khalid', dept='Sales', position='Sales Manager',
+                                country='Singapore', email='Rahim.Khalid@allinone.com.sg', reporting_manager=140894, role=3))
+        db.session.add_all([
+            Employee(staff_id=staff_id, staff_fname='Staff', staff_lname=str(staff_id), dept='Sales', position='Account Manager',
+                     country='Singapore', email=f'staff.{staff_id}@allinone.com.sg', reporting_manager=140894, role=2)
+            for staff_id in range(142001, 142006)
+        ])
+        application = WFHApplication(staff_id=142001, time_slot='AM', staff_apply_reason='fragments')
+        db.session.add(application)
+        db.session.flush()
+        db.session.add(WFHSchedule(application_id=application.application_id, wfh_date=self.monday, status='Approved'))
+        db.session.commit()
+
+    def team_schedule(self):
+        response = self.client.get(f'/api/schedule/team_schedule_manager/140894?start={self.monday}&end={self.monday + timedelta(days=1)}')
+        self.assertEqual(response.status_code, 200)
+        return response.json
+
+    def names(self, days):
+        return {employee['id']: employee['name'] for day in days for slot in ('am', 'pm') for employee in day[slot]['employees']}
+
+    def entry(self, day, slot, staff_id):
+        return next(employee for employee in day[slot]['employees'] if employee['id'] == staff_id)
+
+    def test_entries(self):
+        days = self.team_schedule()
+        self.assertEqual(self.entry(days[0], 'am', 142001), {"id": 142001, "name": "Staff 142001", "dept": "Sales", "position": "Account Manager",
+                                                         "email": "staff.142001@allinone.com.sg", "status": "WFH", "role": 2, "reporting_manager": 140894})
+        self.assertEqual(self.entry(days[0], 'pm', 142001)['status'], 'In-Office')
+        self.assertEqual(self.entry(days[1], 'am', 142001)['status'], 'In-Office')
+
+    def test_cached_between_requests(self):
+        self.team_schedule()
+        with self.app.app_context():
+            before = get_fragment_cache().stats()
+        self.team_schedule()
+        with self.app.app_context():
+            after = get_fragment_cache().stats()
+        # the manager reports to himself and is part of his team
+        self.assertEqual(after['hits'] - before['hits'], 6)
+        self.assertEqual(after['misses'], before['misses'])
+
+    def test_employee_write_invalidates(self):
+        self.team_schedule()
+        with self.app.app_context():
+            employee = db.session.get(Employee, 142002)
+            employee.staff_lname = 'Renamed'
+            db.session.commit()
+            invalidations = get_fragment_cache().stats()['invalidations']
+        self.assertGreaterEqual(invalidations, 1)
+        self.assertEqual(self.names(self.team_schedule())[142002], 'Staff Renamed')
+
+    def test_change_outside_hooks(self):
+        # a bulk UPDATE skips the session hooks, the entry no longer matches the row and is encoded again
+        self.team_schedule()
+        with self.app.app_context():
+            db.session.execute(update(Employee).where(Employee.staff_id == 142003).values(staff_fname='Bulk'))
+            db.session.commit()
+        self.assertEqual(self.names(self.team_schedule())[142003], 'Bulk 142003')
+
+    def test_same_bytes_as_jsonify(self):
+        with self.app.app_context():
+            employee = db.session.get(Employee, 142004)
+            wfh, office = get_fragment_cache().employees([employee], MANAGER_FIELDS)[0]
+            shared = [office, wfh]
+            value = {"token": "7", "days": [{"date": "2024-10-07", "am": {"wfh": 1, "employees": shared}, "pm": {"employees": shared}},
+                                            {"date": "2024-10-08", "note": "café \"x\"", "none": None, "ratio": 0.5}]}
+            plain = json.loads(write_json(value, self.app.json))
+            with self.app.test_request_context():
+                self.assertEqual(fragment_json(value).get_data(), self.app.json.response(plain).get_data())
+            self.assertEqual(write_json(Fragment('{"a":1}'), self.app.json), '{"a":1}')
+
+if __name__ == '__main__':
+    unittest.main()
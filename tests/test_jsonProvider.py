@@ -0,0 +1,117 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+import unittest
+from app import create_app, db
+from app.json_provider import FastJSONProvider, orjson
+from app.models import Employee, WFHApplication, WFHSchedule
+from app.schedule.fragments import get_fragment_cache
+
+class TestJSONProvider(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.app = create_app(test_config=True)
+        self.client = self.app.test_client()
+        self.monday = datetime.now().date() + timedelta(days=7 - datetime.now().weekday())
+
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(Employee(staff_id=140894, staff_fname='Rahim', staff_lname='Khalid', dept='Sales', position='Sales Manager',
+                                    country='Singapore', email='Rahim.Khalid@allinone.com.sg', reporting_manager=140894, role=3))
+            db.session.add(Employee(staff_id=144001, staff_fname='Zoë', staff_lname='Tan', dept='Sales', position='Account Manager',
+                                    country='Singapore', email='zoe.tan@allinone.com.sg', reporting_manager=140894, role=2))
+            application = WFHApplication(staff_id=144001, time_slot='FULL', staff_apply_reason='provider')
+            db.session.add(application)
+            db.session.flush()
+            db.session.add(WFHSchedule(application_id=application.application_id, wfh_date=self.monday, status='Approved'))
+            db.session.commit()
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def providers(self, ensure_ascii=True, iso_dates=False):
+        # the stdlib encoder always, orjson where it is installed
+        result = []
+        for use_orjson in ((False, True) if orjson is not None else (False,)):
+            provider = FastJSONProvider(self.app)
+            provider.use_orjson = use_orjson
+            provider.ensure_ascii = ensure_ascii
+            provider.iso_dates = iso_dates
+            result.append(provider)
+        return result
+
+    def test_installed(self):
+        self.assertIsInstance(self.app.json, FastJSONProvider)
+        self.assertEqual(self.app.json.use_orjson, orjson is not None and self.app.config['JSON_PROVIDER'] != 'stdlib')
+
+    def test_dates(self):
+        # HTTP dates like Flask's provider by default, ISO with JSON_ISO_DATES
+        value = {"date": date(2024, 10, 7), "at": datetime(2024, 10, 7, 9, 30), "dates": [date(2024, 10, 8)]}
+        for provider in self.providers():
+            self.assertEqual(provider.dumps(value), '{"at":"Mon, 07 Oct 2024 09:30:00 GMT","date":"Mon, 07 Oct 2024 00:00:00 GMT","dates":["Tue, 08 Oct 2024 00:00:00 GMT"]}')
+        value["slot"] = time(13, 0)
+        for provider in self.providers(iso_dates=True):
+            self.assertEqual(provider.dumps(value), '{"at":"2024-10-07T09:30:00","date":"2024-10-07","dates":["2024-10-08"],"slot":"13:00:00"}')
+
+    def test_same_text(self):
+        value = {"b": [1, 2.5, None, True], "a": {"name": "Zoë \"Z\" 😀", "3": Decimal("1.50")}, "c": {7: "int key"}}
+        texts = {provider.dumps(value) for provider in self.providers()}
+        self.assertEqual(texts, {'{"a":{"3":"1.50","name":"Zo\\u00eb \\"Z\\" \\ud83d\\ude00"},"b":[1,2.5,null,true],"c":{"7":"int key"}}'})
+        texts = {provider.dumps(value) for provider in self.providers(ensure_ascii=False)}
+        self.assertEqual(texts, {'{"a":{"3":"1.50","name":"Zoë \\"Z\\" 😀"},"b":[1,2.5,null,true],"c":{"7":"int key"}}'})
+        indented = {provider.dumps({"a": [1, {}], "b": []}, indent=2) for provider in self.providers()}
+        self.assertEqual(indented, {'{\n  "a": [\n    1,\n    {}\n  ],\n  "b": []\n}'})
+
+    def test_stdlib_fallback(self):
+        # values and arguments orjson cannot handle go to the stdlib encoder
+        for provider in self.providers():
+            self.assertEqual(provider.dumps({"big": 2 ** 70}), '{"big":1180591620717411303424}')
+            self.assertEqual(provider.dumps([1, 2], indent=4), '[\n    1,\n    2\n]')
+            self.assertEqual(provider.dumps("é", ensure_ascii=True), '"\\u00e9"')
+            with self.assertRaises(TypeError):
+                provider.dumps({"set": {1}})
+
+    def test_loads(self):
+        for provider in self.providers():
+            self.assertEqual(provider.loads(b'{"a":[1,"\xc3\xa9"]}'), {"a": [1, "é"]})
+
+    def test_responses(self):
+        # the endpoints write the same bytes with either encoder
+        urls = ['/api/schedule/team_schedule_manager/140894?start={0}&end={0}'.format(self.monday), '/api/schedule/own/144001',
+                '/api/schedule/HRO_overall?start={0}&end={0}'.format(self.monday)]
+        bodies = {}
+        installed = self.app.json
+        try:
+            for provider in self.providers():
+                self.app.json = provider
+                with self.app.app_context():
+                    get_fragment_cache().invalidate()
+                bodies[provider.use_orjson] = [self.client.get(url).get_data() for url in urls]
+        finally:
+            self.app.json = installed
+        self.assertEqual(len(set(map(tuple, bodies.values()))), 1)
+        self.assertIn(b'"name":"Zo\\u00eb Tan"', bodies[False][0])
+
+    def test_debug_indent(self):
+        with self.app.test_request_context():
+            self.app.debug = True
+            try:
+                data = self.app.json.response({"a": date(2024, 10, 7)}).get_data()
+            finally:
+                self.app.debug = False
+        self.assertEqual(data, b'{\n  "a": "Mon, 07 Oct 2024 00:00:00 GMT"\n}\n')
+
+    def test_unknown_provider(self):
+        from config import Testconfig
+        Testconfig.JSON_PROVIDER = 'simdjson'
+        try:
+            with self.assertRaises(ValueError):
+                create_app(test_config=True)
+        finally:
+            Testconfig.JSON_PROVIDER = 'auto'
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import Employee, Login
+from app.staff.credentials import hash_password, is_password_hash
+
+class TestLoginCredentials(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.app = create_app(test_config=True)
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            self.populate_test_data(self)
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def populate_test_data(self):
+        db.session.add_all([
+            Employee(staff_id=140736, staff_fname='William', staff_lname='Fu', dept='Sales', position='', country='Singapore',
+                     email='Williamfu@gamil.com', reporting_manager=None, role=2),
+            Employee(staff_id=140737, staff_fname='Mary', staff_lname='Tan', dept='Sales', position='', country='Singapore',
+                     email='Marytan@gamil.com', reporting_manager=None, role=2),
+        ])
+        db.session.add_all([
+            # plaintext row, as left by the old upload scripts
+            Login(username='plainstaff', password='plainstaff', staff_id=140736),
+            Login(username='hashedstaff', password=hash_password('hashedstaff', method='pbkdf2:sha256:1000'), staff_id=140737),
+        ])
+        db.session.commit()
+
+    def login(self, username, password):
+        return self.client.post('/api/staff/login', json={'username': username, 'password': password})
+
+    def count_statements(self, username, password):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with self.app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+            try:
+                response = self.login(username, password)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        return response, statements
+
+    def stored_password(self, username):
+        with self.app.app_context():
+            return db.session.get(Login, username).password
+
+    def test_plaintext_password_upgraded(self):
+        response = self.login('plainstaff', 'plainstaff')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['data'], {'staff_id': 140736, 'role': 2})
+
+        stored = self.stored_password('plainstaff')
+        self.assertTrue(is_password_hash(stored))
+        self.assertNotIn('plainstaff', stored)
+        # the hash works on the next login and is not rehashed again
+        self.assertEqual(self.login('plainstaff', 'plainstaff').status_code, 200)
+        self.assertEqual(self.stored_password('plainstaff'), stored)
+
+    def test_login_sends_one_statement(self):
+        response, statements = self.count_statements('hashedstaff', 'hashedstaff')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['data'], {'staff_id': 140737, 'role': 2})
+        self.assertEqual(len(statements), 1)
+
+        response, statements = self.count_statements('hashedstaff', 'wrong')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(statements), 1)
+
+    def test_password_change(self):
+        self.assertEqual(self.login('hashedstaff', 'hashedstaff').status_code, 200)
+        with self.app.app_context():
+            db.session.get(Login, 'hashedstaff').password = hash_password('changed')
+            db.session.commit()
+
+        self.assertEqual(self.login('hashedstaff', 'hashedstaff').status_code, 400)
+        self.assertEqual(self.login('hashedstaff', 'changed').status_code, 200)
+
+        with self.app.app_context():
+            db.session.get(Login, 'hashedstaff').password = hash_password('hashedstaff', method='pbkdf2:sha256:1000')
+            db.session.commit()
+
+    def test_role_change(self):
+        self.assertEqual(self.login('hashedstaff', 'hashedstaff').json['data']['role'], 2)
+        with self.app.app_context():
+            db.session.get(Employee, 140737).role = 3
+            db.session.commit()
+        self.assertEqual(self.login('hashedstaff', 'hashedstaff').json['data']['role'], 3)
+
+        with self.app.app_context():
+            db.session.get(Employee, 140737).role = 2
+            db.session.commit()
+
+    def test_unknown_user_rejected(self):
+        response = self.login('nobody', 'nobody')
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
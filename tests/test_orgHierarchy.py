@@ -0,0 +1,95 @@
+from datetime import datetime
+import unittest
+from sqlalchemy import text
+from app import create_app, db
+from app.models import Employee
+from app.hierarchy import get_org_hierarchy
+
+class TestOrgHierarchy(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        # Set up the test client and in-memory database
+        self.app = create_app(test_config=True)
+        self.client = self.app.test_client()
+
+        # Push the application context and initialize the database
+        with self.app.app_context():
+            db.create_all()
+            self.populate_test_data(self)
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def populate_test_data(self):
+        try:
+            employees = [
+                # CEO reports to himself
+                Employee(staff_id=130002, staff_fname='Jack', staff_lname='Sim', dept='CEO', position='MD', country='Singapore', email='jack.sim@allinone.com.sg', reporting_manager=130002, role=1),
+                Employee(staff_id=140001, staff_fname='Derek', staff_lname='Tan', dept='Sales', position='Director', country='Singapore', email='Derek.Tan@allinone.com.sg', reporting_manager=130002, role=1),
+                Employee(staff_id=140894, staff_fname='Rahim', staff_lname='Khalid', dept='Sales', position='Sales Manager', country='Singapore', email='Rahim.Khalid@allinone.com.sg', reporting_manager=140001, role=3),
+                Employee(staff_id=140878, staff_fname='James', staff_lname='Tong', dept='Sales', position='Account Manager', country='Singapore', email='James.Tong@allinone.com.sg', reporting_manager=140894, role=2),
+                Employee(staff_id=140002, staff_fname='Susan', staff_lname='Goh', dept='Sales', position='Account Manager', country='Singapore', email='Susan.Goh@allinone.com.sg', reporting_manager=140001, role=2),
+                # role 2 with someone reporting to them, not expanded
+                Employee(staff_id=140003, staff_fname='Janice', staff_lname='Chan', dept='Sales', position='Account Manager', country='Singapore', email='Janice.Chan@allinone.com.sg', reporting_manager=140002, role=2),
+            ]
+            db.session.add_all(employees)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    def report_ids(self, manager_id):
+        with self.app.app_context():
+            return [member.staff_id for member in get_org_hierarchy().reports(manager_id)]
+
+    def test_reports_depth_first_with_stop_conditions(self):
+        # CEO is not inside his own team, Janice is below a role 2 staff so she is not reached
+        self.assertEqual(self.report_ids(130002), [140001, 140002, 140894, 140878])
+        self.assertEqual(self.report_ids(140894), [140878])
+        self.assertEqual(self.report_ids(140878), [])
+
+    def test_hro_count_uses_hierarchy(self):
+        response = self.client.get('/api/schedule/HRO_wfh_count/140001')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json[0]['am'], {'wfh': 0, 'office': 3})
+
+    def test_rebuilt_after_reporting_manager_change(self):
+        with self.app.app_context():
+            janice = db.session.get(Employee, 140003)
+            janice.reporting_manager = 140894
+            db.session.commit()
+        self.assertEqual(self.report_ids(140894), [140003, 140878])
+
+        # changes written outside the ORM (e.g. db_prep/upload.py) are picked up through the fingerprint
+        with self.app.app_context():
+            db.session.execute(text("UPDATE employee SET reporting_manager = 140002 WHERE staff_id = 140003"))
+            db.session.commit()
+        self.assertEqual(self.report_ids(140894), [140878])
+        self.assertEqual(self.report_ids(140002), [140003])
+
+    def test_rebuilt_after_member_details_change(self):
+        # names, dept and email are served from the hierarchy too, edits from another process are picked up
+        # through the employee feed version they commit with
+        with self.app.app_context():
+            get_org_hierarchy()
+            builds = self.app.extensions['org_hierarchy'].builds
+            db.session.execute(text("UPDATE employee SET staff_fname = 'Jenice', dept = 'Finance' WHERE staff_id = 140003"))
+            db.session.execute(text("INSERT INTO change_version (feed, committed_at) VALUES ('employee', :now)"), {'now': datetime.now()})
+            db.session.commit()
+        try:
+            with self.app.app_context():
+                member = get_org_hierarchy().member(140003)
+                self.assertEqual((member.staff_fname, member.dept), ('Jenice', 'Finance'))
+                # the fingerprint is read once per app context
+                get_org_hierarchy()
+                self.assertEqual(self.app.extensions['org_hierarchy'].builds, builds + 1)
+        finally:
+            with self.app.app_context():
+                db.session.execute(text("UPDATE employee SET staff_fname = 'Janice', dept = 'Sales' WHERE staff_id = 140003"))
+                db.session.commit()
+
+if __name__ == '__main__':
+    unittest.main()
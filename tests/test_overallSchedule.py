@@ -293,6 +293,21 @@ class TestOverallSchedule(unittest.TestCase):
         if actual_data == expected_data:
             print("OVS Test 1 Passed")
 
+    def test_overall_schedule_streamed_as_jsonify(self):
+        # the day objects are streamed, the body must be byte for byte what jsonify writes (compact and debug indented)
+        for debug in (False, True):
+            with self.subTest(debug=debug):
+                self.app.debug = debug
+                response = self.client.get("/api/schedule/HRO_overall")
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.is_streamed)
+                self.assertEqual(response.mimetype, 'application/json')
+                # read the stream before pushing another context
+                body = response.get_data()
+                with self.app.app_context():
+                    self.assertEqual(body, self.app.json.response(response.json).get_data())
+        self.app.debug = False
+
     def test_HR_overall_invalid_time_slot(self):
         print("OVS Test 2")
         with self.app.app_context():
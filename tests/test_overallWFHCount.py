@@ -194,6 +194,8 @@ class TestOverallWFHCount(unittest.TestCase):
             print("VOS Test 1 Passed")
 
     def test_HR_WFHCount_invalid_time_slot(self):
+        # last day of the window (the records are read for the window only)
+        last_day = (self.expected_end_date - timedelta(days=1)).strftime("%Y-%m-%d")
         with self.app.app_context():
             # Insert the invalid time slot application specific to this test case
             invalid_application = WFHApplication(
@@ -205,7 +207,7 @@ class TestOverallWFHCount(unittest.TestCase):
 
             invalid_schedule = WFHSchedule(
                 application_id=invalid_application.application_id, 
-                wfh_date=self.expected_end_date_formatted, 
+                wfh_date=last_day, 
                 status="Approved", 
                 manager_withdraw_reason=None
             )
@@ -227,7 +229,7 @@ class TestOverallWFHCount(unittest.TestCase):
             output = captured_output.getvalue()
 
             # Verify the print message for the invalid time slot
-            expected_message = f"Unexpected time slot 'INVALID' for staff_id: 150518 on {self.expected_end_date_formatted}\n"
+            expected_message = f"Unexpected time slot 'INVALID' for staff_id: 150518 on {last_day}\n"
             self.assertIn(expected_message, output)  # Assert that the expected message is in the captured output
 
     # Assertion in the loop below
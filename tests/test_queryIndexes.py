@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+import re
+import unittest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import Employee, WFHApplication, WFHSchedule, WFHWithdrawal
+
+class TestQueryIndexes(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        # Set up the test client and in-memory database
+        self.app = create_app(test_config=True)
+        self.client = self.app.test_client()
+
+        # Push the application context and initialize the database
+        with self.app.app_context():
+            db.create_all()
+            self.populate_test_data(self)
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def populate_test_data(self):
+        try:
+            employees = [
+                Employee(staff_id=130002, staff_fname='Jack', staff_lname='Sim', dept='CEO', position='MD', country='Singapore', email='jack.sim@allinone.com.sg', reporting_manager=130002, role=1),
+                Employee(staff_id=140001, staff_fname='Derek', staff_lname='Tan', dept='Sales', position='Director', country='Singapore', email='Derek.Tan@allinone.com.sg', reporting_manager=130002, role=1),
+                Employee(staff_id=140894, staff_fname='Rahim', staff_lname='Khalid', dept='Sales', position='Sales Manager', country='Singapore', email='Rahim.Khalid@allinone.com.sg', reporting_manager=140001, role=3),
+                Employee(staff_id=140878, staff_fname='James', staff_lname='Tong', dept='Sales', position='Account Manager', country='Singapore', email='James.Tong@allinone.com.sg', reporting_manager=140894, role=2),
+                Employee(staff_id=140002, staff_fname='Susan', staff_lname='Goh', dept='Sales', position='Account Manager', country='Singapore', email='Susan.Goh@allinone.com.sg', reporting_manager=140894, role=2),
+            ]
+            db.session.add_all(employees)
+            db.session.commit()
+
+            applications = [
+                WFHApplication(staff_id=140878, time_slot='AM', staff_apply_reason='index test', manager_reject_reason=None),
+                WFHApplication(staff_id=140002, time_slot='FULL', staff_apply_reason='index test', manager_reject_reason=None),
+            ]
+            db.session.add_all(applications)
+            db.session.commit()
+
+            wfh_date = (datetime.now() + timedelta(days=3)).date()
+            schedules = [
+                WFHSchedule(application_id=applications[0].application_id, wfh_date=wfh_date, status='Approved', manager_withdraw_reason=None),
+                WFHSchedule(application_id=applications[0].application_id, wfh_date=wfh_date + timedelta(days=7), status='Pending_Withdrawal', manager_withdraw_reason=None),
+                WFHSchedule(application_id=applications[1].application_id, wfh_date=wfh_date, status='Pending_Approval', manager_withdraw_reason=None),
+            ]
+            db.session.add_all(schedules)
+            db.session.commit()
+
+            db.session.add(WFHWithdrawal(wfh_id=schedules[1].wfh_id, staff_withdraw_reason='index test', manager_reject_withdrawal_reason=None))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    def indexes_used(self, url):
+        # runs the endpoint, then EXPLAINs every SELECT / UPDATE it sent and returns the index names the plans refer to
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith(('SELECT', 'UPDATE')):
+                statements.append((statement, parameters))
+
+        with self.app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+            try:
+                response = self.client.get(url)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+            self.assertIn(response.status_code, (200, 201))
+
+            indexes = set()
+            with db.engine.connect() as connection:
+                for statement, parameters in statements:
+                    if connection.dialect.name == 'sqlite':
+                        for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters):
+                            indexes.update(re.findall(r'USING (?:COVERING )?INDEX (\w+)', row[-1]))
+                    else:
+                        # MySQL: small test tables may still be scanned, the index must at least be a candidate
+                        for row in connection.exec_driver_sql('EXPLAIN ' + statement, parameters).mappings():
+                            for column in ('possible_keys', 'key'):
+                                if row[column]:
+                                    indexes.update(row[column].split(','))
+        return indexes
+
+    # the team scoped joins may be driven from either side depending on table statistics
+    SCHEDULE_JOIN_INDEXES = {'ix_wfh_application_staff_slot', 'ix_wfh_schedule_application_status', 'ix_wfh_schedule_status_date'}
+
+    def test_auto_reject_uses_status_date_index(self):
+        self.assertIn('ix_wfh_schedule_status_date', self.indexes_used('/api/application/autoReject'))
+
+    def test_wfh_request_uses_team_and_withdrawal_indexes(self):
+        indexes = self.indexes_used('/api/application/wfhrequest/140894')
+        self.assertIn('ix_employee_reporting_manager', indexes)
+        self.assertIn('ix_wfh_withdrawal_wfh_id', indexes)
+
+    def test_team_schedule_uses_application_indexes(self):
+        indexes = self.indexes_used('/api/schedule/team_schedule/140878')
+        self.assertIn('ix_employee_reporting_manager', indexes)
+        self.assertTrue(self.SCHEDULE_JOIN_INDEXES & indexes)
+
+    def test_hro_count_uses_application_indexes(self):
+        indexes = self.indexes_used('/api/schedule/HRO_wfh_count/140001')
+        self.assertTrue(self.SCHEDULE_JOIN_INDEXES & indexes)
+
+if __name__ == '__main__':
+    unittest.main()
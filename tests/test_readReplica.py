@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+import os
+import tempfile
+import unittest
+from config import Testconfig
+from app import create_app, db
+from app.models import Employee, WFHApplication, WFHSchedule
+from app.replica import PRIMARY_COOKIE, get_replica_engine
+
+class TestReadReplica(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        # Two local SQLite files as primary and replica, the replica is not kept in sync (a lagging replica)
+        self.paths = []
+        for _ in range(2):
+            handle, path = tempfile.mkstemp(suffix='.db')
+            os.close(handle)
+            self.paths.append(path)
+        original_uri = Testconfig.SQLALCHEMY_DATABASE_URI
+        Testconfig.SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.paths[0]}'
+        try:
+            self.app = create_app(test_config=True, replica_uri=f'sqlite:///{self.paths[1]}')
+        finally:
+            Testconfig.SQLALCHEMY_DATABASE_URI = original_uri
+        self.today = datetime.now().date()
+
+        with self.app.app_context():
+            db.create_all()
+            db.metadata.create_all(get_replica_engine())
+            self.populate_test_data(self)
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.metadata.drop_all(get_replica_engine())
+            db.engine.dispose()
+            get_replica_engine().dispose()
+        for path in self.paths:
+            os.remove(path)
+
+    def populate_test_data(self):
+        employees = [
+            dict(staff_id=130002, staff_fname='Jack', staff_lname='Sim', dept='CEO', position='MD', country='Singapore', email='jack.sim@allinone.com.sg', reporting_manager=130002, role=1),
+            dict(staff_id=140894, staff_fname='Rahim', staff_lname='Khalid', dept='Sales', position='Sales Manager', country='Singapore', email='Rahim.Khalid@allinone.com.sg', reporting_manager=130002, role=3),
+            dict(staff_id=140002, staff_fname='Susan', staff_lname='Goh', dept='Sales', position='Account Manager', country='Singapore', email='Susan.Goh@allinone.com.sg', reporting_manager=140894, role=2),
+            dict(staff_id=140003, staff_fname='Janice', staff_lname='Chan', dept='Sales', position='Account Manager', country='Singapore', email='Janice.Chan@allinone.com.sg', reporting_manager=140894, role=2),
+        ]
+        # both databases have the employees, only the primary has the schedules
+        with get_replica_engine().begin() as connection:
+            connection.execute(Employee.__table__.insert(), employees)
+        db.session.add_all([Employee(**employee) for employee in employees])
+        application = WFHApplication(staff_id=140002, time_slot='AM', staff_apply_reason='primary only', manager_reject_reason=None)
+        db.session.add(application)
+        db.session.flush()
+        db.session.add(WFHSchedule(application_id=application.application_id, wfh_date=self.today + timedelta(days=1), status='Approved', manager_withdraw_reason=None))
+        pending = WFHApplication(staff_id=140003, time_slot='FULL', staff_apply_reason='pending on primary', manager_reject_reason=None)
+        db.session.add(pending)
+        db.session.flush()
+        db.session.add(WFHSchedule(application_id=pending.application_id, wfh_date=self.today + timedelta(days=2), status='Pending_Approval', manager_withdraw_reason=None))
+        db.session.commit()
+
+    def test_schedule_reads_from_replica(self):
+        client = self.app.test_client()
+        response = client.get('/api/schedule/own/140002')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [])
+
+        # the application blueprint reads the primary
+        response = client.get('/api/application/wfhrequest/140894')
+        self.assertEqual(response.status_code, 200)
+        with self.app.app_context():
+            pending = WFHSchedule.query.filter_by(status='Pending_Approval').count()
+        self.assertGreater(pending, 0)
+        self.assertEqual(sum(len(group['listofschedule']) for group in response.json), pending)
+
+    def test_capacity_cache_built_from_primary(self):
+        # the cache outlives the request, a replica request must not fill it with lagging data
+        response = self.app.test_client().get(f'/api/schedule/team_schedule_manager/140894?start={self.today}&end={self.today + timedelta(days=1)}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json[1]['am']['wfh'], 1)
+
+    def test_read_your_writes(self):
+        writer = self.app.test_client()
+        start = (self.today + timedelta(days=3)).strftime('%Y-%m-%dT00:00:00.000Z')
+        response = writer.post('/api/application/apply/140002', json={
+            "time_slot": "PM", "apply_reason": "read your writes", "start_date": start, "end_date": start
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNotNone(writer.get_cookie(PRIMARY_COOKIE))
+
+        # the writer sees its application, another client still reads the replica
+        self.assertEqual([entry['class'] for entry in writer.get('/api/schedule/own/140002').json], ['Approved', 'Pending_Approval'])
+        self.assertEqual(self.app.test_client().get('/api/schedule/own/140002').json, [])
+
+        # once the window has passed the writer is back on the replica
+        writer.set_cookie(PRIMARY_COOKIE, '0')
+        self.assertEqual(writer.get('/api/schedule/own/140002').json, [])
+
+if __name__ == '__main__':
+    unittest.main()
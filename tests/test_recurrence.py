@@ -0,0 +1,174 @@
+from datetime import date, datetime, timedelta
+import unittest
+from dateutil.relativedelta import relativedelta
+from app import create_app, db
+from app.models import Employee, WFHApplication, WFHChange, WFHSchedule
+from app.application.recurring import build_rule, materialize_recurrences, occurrences
+
+class TestRecurrence(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.app = create_app(test_config=True)
+        self.client = self.app.test_client()
+        self.today = datetime.now().date()
+        self.horizon = self.today + relativedelta(months=4)
+        # first monday at least a week away
+        self.monday = self.today + timedelta(days=7 + (7 - self.today.weekday()) % 7)
+
+        with self.app.app_context():
+            db.create_all()
+            self.populate_test_data(self)
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def populate_test_data(self):
+        db.session.add(Employee(staff_id=140894, staff_fname='Rahim', staff_lname='Khalid', dept='Sales', position='Sales Manager',
+                                country='Singapore', email='Rahim.Khalid@allinone.com.sg', reporting_manager=140894, role=3))
+        db.session.add_all([
+            Employee(staff_id=staff_id, staff_fname='Staff', staff_lname=str(staff_id), dept='Sales', position='Account Manager',
+                     country='Singapore', email=f'staff.{staff_id}@allinone.com.sg', reporting_manager=140894, role=2)
+            for staff_id in range(140001, 140007)
+        ])
+        db.session.commit()
+
+    def apply(self, staff_id, start, end=None, time_slot='AM', recurrence=None):
+        body = {"time_slot": time_slot, "apply_reason": "recurring", "start_date": start.strftime('%Y-%m-%dT00:00:00.000Z'),
+                "end_date": end.strftime('%Y-%m-%dT00:00:00.000Z') if end else None}
+        if recurrence is not None:
+            body["recurrence"] = recurrence
+        return self.client.post(f'/api/application/apply/{staff_id}', json=body)
+
+    def application(self, staff_id):
+        return WFHApplication.query.filter_by(staff_id=staff_id).order_by(WFHApplication.application_id.desc()).first()
+
+    def test_rule_expansion(self):
+        rule = build_rule(date(2024, 10, 7), date(2024, 12, 31), interval=2, weekdays=['MO', 'WE'], exclude=[date(2024, 10, 21)])
+        self.assertEqual(occurrences(rule, date(2024, 10, 1), date(2024, 11, 10)),
+                         [date(2024, 10, 7), date(2024, 10, 9), date(2024, 10, 23), date(2024, 11, 4), date(2024, 11, 6)])
+        self.assertEqual(occurrences(rule, date(2025, 1, 1), date(2025, 12, 31)), [])
+
+    def test_open_ended_materialized_up_to_horizon(self):
+        response = self.apply(140001, self.monday, recurrence={"weekdays": ["MO", "TH"]})
+        self.assertEqual(response.status_code, 201)
+
+        with self.app.app_context():
+            application = self.application(140001)
+            self.assertEqual(application.materialized_until, self.horizon)
+            dates = [schedule.wfh_date for schedule in WFHSchedule.query.filter_by(application_id=application.application_id)]
+            self.assertEqual(dates, occurrences(application.recurrence, self.monday, self.horizon))
+            self.assertTrue(all(wfh_date <= self.horizon for wfh_date in dates))
+            application_id = application.application_id
+
+        # a year ahead is expanded from the rule
+        end = self.monday + timedelta(days=363)
+        response = self.client.get(f'/api/application/recurrence/{application_id}?start={self.monday}&end={end}')
+        self.assertEqual(response.status_code, 200)
+        occurrence_list = response.json['occurrences']
+        self.assertEqual(len(occurrence_list), 104)
+        projected = [occurrence for occurrence in occurrence_list if occurrence['projected']]
+        self.assertEqual(len(projected), 104 - len(dates))
+        self.assertTrue(all(occurrence['status'] == 'Pending_Approval' and occurrence['wfh_id'] is None for occurrence in projected))
+
+    def test_conflict_with_unmaterialized_date(self):
+        self.assertEqual(self.apply(140002, self.monday, recurrence={"interval": 2}).status_code, 201)
+        # the same weekday six months on has no schedule yet, it is still taken
+        later = self.monday + timedelta(weeks=26)
+        response = self.apply(140002, later, later, time_slot='FULL')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(b'Application already exists!', response.data)
+        # the off week is free
+        self.assertEqual(self.apply(140002, later + timedelta(weeks=1), later + timedelta(weeks=1), time_slot='FULL').status_code, 201)
+
+    def test_materialize_extends_with_approved_status(self):
+        self.assertEqual(self.apply(140003, self.monday, recurrence={"weekdays": ["TU"]}, time_slot='PM').status_code, 201)
+        with self.app.app_context():
+            application = self.application(140003)
+            application_id = application.application_id
+            # the manager approves what exists so far
+            WFHSchedule.query.filter_by(application_id=application_id).update({WFHSchedule.status: 'Approved'})
+            db.session.commit()
+
+            # a one-off application on a date the rule reaches later, it wins over the occurrence
+            blocked = occurrences(application.recurrence, self.horizon + timedelta(days=1), self.horizon + timedelta(days=14))[0]
+            one_off = WFHApplication(staff_id=140003, time_slot='FULL', staff_apply_reason='one off')
+            db.session.add(one_off)
+            db.session.flush()
+            db.session.add(WFHSchedule(application_id=one_off.application_id, wfh_date=blocked, status='Pending_Approval'))
+            db.session.commit()
+
+            until = self.horizon + timedelta(weeks=6)
+            before = WFHSchedule.query.filter_by(application_id=application_id).count()
+            summary = materialize_recurrences(until)
+            self.assertGreaterEqual(summary['skipped'], 1)
+
+            new_rows = WFHSchedule.query.filter(WFHSchedule.application_id == application_id, WFHSchedule.wfh_date > self.horizon).all()
+            self.assertEqual(len(new_rows), len(occurrences(application.recurrence, self.horizon + timedelta(days=1), until)) - 1)
+            self.assertNotIn(blocked, [row.wfh_date for row in new_rows])
+            self.assertTrue(all(row.status == 'Approved' for row in new_rows))
+            self.assertEqual(WFHSchedule.query.filter_by(application_id=application_id).count(), before + len(new_rows))
+            self.assertEqual(db.session.get(WFHApplication, application_id).materialized_until, until)
+            # new schedules are in the change feed
+            self.assertEqual(WFHChange.query.filter(WFHChange.wfh_id.in_([row.wfh_id for row in new_rows])).count(), len(new_rows))
+
+            # running it again creates nothing
+            self.assertEqual(materialize_recurrences(until)['schedules'], 0)
+
+    def test_bounded_rule_fully_materialized(self):
+        end = self.monday + timedelta(weeks=3)
+        self.assertEqual(self.apply(140004, self.monday, end, recurrence={"weekdays": ["MO", "FR"], "exclude": [str(self.monday)]}).status_code, 201)
+        with self.app.app_context():
+            application = self.application(140004)
+            self.assertIsNone(application.materialized_until)
+            self.assertEqual(WFHSchedule.query.filter_by(application_id=application.application_id).count(), 6)
+
+    def test_rejected_application_not_extended(self):
+        self.assertEqual(self.apply(140005, self.monday, recurrence={}).status_code, 201)
+        with self.app.app_context():
+            application = self.application(140005)
+            application.manager_reject_reason = 'no'
+            db.session.commit()
+            materialize_recurrences(self.horizon + timedelta(weeks=4))
+            self.assertEqual(WFHSchedule.query.filter(WFHSchedule.application_id == application.application_id,
+                                                      WFHSchedule.wfh_date > self.horizon).count(), 0)
+
+    def test_withdrawn_application_not_extended(self):
+        # the staff withdrew every schedule before the manager approved any: nothing is materialized as Approved
+        self.assertEqual(self.apply(140006, self.monday, recurrence={"weekdays": ["WE"]}).status_code, 201)
+        with self.app.app_context():
+            application = self.application(140006)
+            application_id = application.application_id
+            WFHSchedule.query.filter_by(application_id=application_id).update({WFHSchedule.status: 'Withdrawn'})
+            db.session.commit()
+
+            summary = materialize_recurrences(self.horizon + timedelta(weeks=4))
+            self.assertGreaterEqual(summary['closed'], 1)
+            self.assertEqual(WFHSchedule.query.filter(WFHSchedule.application_id == application_id,
+                                                      WFHSchedule.status != 'Withdrawn').count(), 0)
+            self.assertIsNone(db.session.get(WFHApplication, application_id).materialized_until)
+
+        response = self.client.get(f'/api/application/recurrence/{application_id}?start={self.monday}&end={self.monday + timedelta(days=363)}')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any(occurrence['projected'] for occurrence in response.json['occurrences']))
+
+    def test_invalid_recurrence(self):
+        self.assertEqual(self.apply(140001, self.monday, recurrence={"weekdays": ["XX"]}).status_code, 400)
+        self.assertEqual(self.apply(140001, self.monday, recurrence={"interval": 0}).status_code, 400)
+        # a plain request still needs its end date
+        self.assertEqual(self.apply(140001, self.monday).status_code, 400)
+        self.assertEqual(self.client.get('/api/application/recurrence/999999').status_code, 404)
+
+    def test_occurrence_window_capped(self):
+        self.assertEqual(self.apply(140006, self.monday + timedelta(days=7), recurrence={"weekdays": ["MO"]}).status_code, 201)
+        with self.app.app_context():
+            application_id = self.application(140006).application_id
+        for query in ('start=0001-01-01&end=9999-12-31', f'start={self.monday}&end={self.monday - timedelta(days=1)}', 'start=x'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/api/application/recurrence/{application_id}?{query}').status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+from datetime import datetime, timedelta
+import json
+import random
+import unittest
+from app import create_app, db
+from app.models import Employee, ScheduleSnapshot, SnapshotRun, WFHApplication, WFHSchedule
+from app.schedule.snapshots import get_snapshot_stats
+
+STATUSES = ('Approved', 'Approved', 'Pending_Withdrawal', 'Pending', 'Withdrawn', 'Rejected')
+SLOTS = ('AM', 'PM', 'FULL')
+
+class TestScheduleSnapshots(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.app = create_app(test_config=True)
+        self.client = self.app.test_client()
+        self.monday = datetime.now().date() + timedelta(days=7 - datetime.now().weekday())
+
+        with self.app.app_context():
+            db.create_all()
+            self.populate_test_data(self)
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def populate_test_data(self):
+        # two departments under two managers reporting to the CEO, one team lead (role 3) in Sales with
+        # reports of their own, random schedules of every status with overlapping half-days
+        rng = random.Random(25)
+        try:
+            employees = [
+                Employee(staff_id=130002, staff_fname='Jack', staff_lname='Sim', dept='CEO', position='MD', country='Singapore', email='jack.sim@allinone.com.sg', reporting_manager=130002, role=1),
+                Employee(staff_id=140894, staff_fname='Rahim', staff_lname='Khalid', dept='Sales', position='Sales Manager', country='Singapore', email='Rahim.Khalid@allinone.com.sg', reporting_manager=130002, role=3),
+                Employee(staff_id=150008, staff_fname='Eric', staff_lname='Loh', dept='Solutioning', position='Director', country='Singapore', email='eric.loh@allinone.com.sg', reporting_manager=130002, role=3),
+                Employee(staff_id=140001, staff_fname='Derek', staff_lname='Tan', dept='Sales', position='Team Lead', country='Singapore', email='derek.tan@allinone.com.sg', reporting_manager=140894, role=3),
+            ]
+            for staff_id in range(143001, 143013):
+                manager = 140894 if staff_id < 143007 else 140001
+                employees.append(Employee(staff_id=staff_id, staff_fname='Staff', staff_lname=str(staff_id), dept='Sales', position='Account Manager',
+                                          country='Singapore', email=f'staff.{staff_id}@allinone.com.sg', reporting_manager=manager, role=2))
+            for staff_id in range(151001, 151007):
+                employees.append(Employee(staff_id=staff_id, staff_fname='Staff', staff_lname=str(staff_id), dept='Solutioning', position='Developer',
+                                          country='Singapore', email=f'staff.{staff_id}@allinone.com.sg', reporting_manager=150008, role=2))
+            db.session.add_all(employees)
+            db.session.flush()
+
+            for employee in employees:
+                for _ in range(rng.randint(1, 4)):
+                    application = WFHApplication(staff_id=employee.staff_id, time_slot=rng.choice(SLOTS), staff_apply_reason='snapshot test')
+                    db.session.add(application)
+                    db.session.flush()
+                    for day in rng.sample(range(-10, 21), rng.randint(1, 6)):
+                        db.session.add(WFHSchedule(application_id=application.application_id, wfh_date=self.monday + timedelta(days=day), status=rng.choice(STATUSES)))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    def setUp(self):
+        self.app.config['SNAPSHOT_ENABLED'] = True
+        self.refresh()
+
+    def refresh(self):
+        response = self.client.post('/api/schedule/snapshot/refresh')
+        self.assertEqual(response.status_code, 201)
+        return response.json['summary']
+
+    def window(self, first=-14, last=27):
+        return f"start={self.monday + timedelta(days=first)}&end={self.monday + timedelta(days=last)}"
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.get_data())
+
+    def live(self, url):
+        self.app.config['SNAPSHOT_ENABLED'] = False
+        try:
+            return self.get(url)
+        finally:
+            self.app.config['SNAPSHOT_ENABLED'] = True
+
+    def urls(self, window=None):
+        window = window or self.window()
+        for view in ('HRO_overall', 'HRO_wfh_count/130002', 'HRO_wfh_count/140894', 'HRO_wfh_count/150008'):
+            for params in ('format=counts', 'limit=3', 'format=compact&limit=4'):
+                yield f'/api/schedule/{view}?{window}&{params}'
+
+    def assert_same_as_live(self, window=None):
+        for url in self.urls(window):
+            with self.subTest(url=url):
+                self.assertEqual(self.get(url), self.live(url))
+
+    def stats(self):
+        with self.app.app_context():
+            return get_snapshot_stats().stats()
+
+    def test_same_as_live(self):
+        reads = self.stats()['reads']
+        self.assert_same_as_live()
+        self.assertEqual(self.stats()['reads'], reads + 12)
+
+    def test_counts_format(self):
+        url = f'/api/schedule/HRO_overall?{self.window()}'
+        full = self.live(url)
+        counts = self.get(url + '&format=counts')
+        self.assertEqual(len(counts), 42)
+        self.assertEqual([day['date'] for day in counts], [day['date'] for day in full])
+        for full_day, counts_day in zip(full, counts):
+            for slot in ('am', 'pm'):
+                self.assertEqual(counts_day[slot], {'wfh': full_day[slot]['wfh'], 'office': full_day[slot]['office']})
+
+    def test_changes_since_snapshot(self):
+        # schedules written after the snapshot are counted from the schedules on their dates
+        with self.app.app_context():
+            application = WFHApplication(staff_id=143008, time_slot='FULL', staff_apply_reason='after the snapshot')
+            db.session.add(application)
+            db.session.flush()
+            db.session.add_all([WFHSchedule(application_id=application.application_id, wfh_date=self.monday + timedelta(days=day), status='Approved')
+                                for day in (0, 1, 2)])
+            schedule = WFHSchedule.query.filter(WFHSchedule.status == 'Approved', WFHSchedule.wfh_date > self.monday + timedelta(days=3)).first()
+            schedule.status = 'Withdrawn'
+            db.session.commit()
+
+        overlaid = self.stats()['overlaid_dates']
+        self.assert_same_as_live()
+        self.assertGreater(self.stats()['overlaid_dates'], overlaid)
+        status = self.get('/api/monitoring/snapshot')
+        self.assertGreaterEqual(status['snapshot']['changed_dates_since'], 4)
+        self.assertEqual(status['snapshot']['schedule_versions_since'], 1)
+
+        # a new snapshot has them
+        self.refresh()
+        self.assertEqual(self.get('/api/monitoring/snapshot')['snapshot']['changed_dates_since'], 0)
+        self.assert_same_as_live()
+
+    def test_employee_change_falls_back(self):
+        with self.app.app_context():
+            staff = db.session.get(Employee, 151006)
+            staff.reporting_manager = 140894
+            staff.dept = 'Sales'
+            db.session.commit()
+        try:
+            fallbacks = self.stats()['fallbacks'].get('employees', 0)
+            self.assert_same_as_live()
+            self.assertEqual(self.stats()['fallbacks']['employees'], fallbacks + 12)
+            self.assertTrue(self.get('/api/monitoring/snapshot')['snapshot']['employees_changed'])
+        finally:
+            with self.app.app_context():
+                staff = db.session.get(Employee, 151006)
+                staff.reporting_manager = 150008
+                staff.dept = 'Solutioning'
+                db.session.commit()
+
+    def test_window_not_covered_falls_back(self):
+        window = self.window(-200, 10)
+        fallbacks = self.stats()['fallbacks'].get('window', 0)
+        self.assert_same_as_live(window)
+        self.assertEqual(self.stats()['fallbacks']['window'], fallbacks + 12)
+
+    def test_missing_snapshot_falls_back(self):
+        with self.app.app_context():
+            db.session.query(ScheduleSnapshot).delete()
+            db.session.query(SnapshotRun).delete()
+            db.session.commit()
+        fallbacks = self.stats()['fallbacks'].get('missing', 0)
+        self.assert_same_as_live()
+        self.assertEqual(self.stats()['fallbacks']['missing'], fallbacks + 12)
+        self.assertIsNone(self.get('/api/monitoring/snapshot')['snapshot'])
+
+    def test_refresh_replaces_snapshot(self):
+        first = self.refresh()
+        second = self.refresh()
+        self.assertGreater(second['snapshot_id'], first['snapshot_id'])
+        self.assertEqual(second['rows'], first['rows'])
+        with self.app.app_context():
+            self.assertEqual(SnapshotRun.query.count(), 1)
+            self.assertEqual(ScheduleSnapshot.query.filter(ScheduleSnapshot.snapshot_id != second['snapshot_id']).count(), 0)
+
+        status = self.get('/api/monitoring/snapshot')
+        self.assertEqual(status['snapshot']['snapshot_id'], second['snapshot_id'])
+        self.assertEqual(status['snapshot']['rows'], second['rows'])
+        self.assertLess(status['snapshot']['age_seconds'], 60)
+        self.assertFalse(status['snapshot']['employees_changed'])
+        self.assertGreaterEqual(status['refreshes'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+import unittest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import Employee, WFHApplication, WFHSchedule
+
+class TestScheduleWindow(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        # Set up the test client and in-memory database
+        self.app = create_app(test_config=True)
+        self.client = self.app.test_client()
+        self.today = datetime.now().date()
+
+        # Push the application context and initialize the database
+        with self.app.app_context():
+            db.create_all()
+            self.populate_test_data(self)
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def populate_test_data(self):
+        try:
+            employees = [
+                Employee(staff_id=130002, staff_fname='Jack', staff_lname='Sim', dept='CEO', position='MD', country='Singapore', email='jack.sim@allinone.com.sg', reporting_manager=130002, role=1),
+                Employee(staff_id=140001, staff_fname='Derek', staff_lname='Tan', dept='Sales', position='Director', country='Singapore', email='Derek.Tan@allinone.com.sg', reporting_manager=130002, role=1),
+                Employee(staff_id=140894, staff_fname='Rahim', staff_lname='Khalid', dept='Sales', position='Sales Manager', country='Singapore', email='Rahim.Khalid@allinone.com.sg', reporting_manager=140001, role=3),
+                Employee(staff_id=140002, staff_fname='Susan', staff_lname='Goh', dept='Sales', position='Account Manager', country='Singapore', email='Susan.Goh@allinone.com.sg', reporting_manager=140894, role=2),
+                Employee(staff_id=140003, staff_fname='Janice', staff_lname='Chan', dept='Sales', position='Account Manager', country='Singapore', email='Janice.Chan@allinone.com.sg', reporting_manager=140894, role=2),
+                Employee(staff_id=140878, staff_fname='James', staff_lname='Tong', dept='Sales', position='Account Manager', country='Singapore', email='James.Tong@allinone.com.sg', reporting_manager=140894, role=2),
+            ]
+            db.session.add_all(employees)
+            db.session.commit()
+
+            applications = [
+                WFHApplication(staff_id=140878, time_slot='AM', staff_apply_reason='window test', manager_reject_reason=None),
+                WFHApplication(staff_id=140003, time_slot='FULL', staff_apply_reason='window test', manager_reject_reason=None),
+            ]
+            db.session.add_all(applications)
+            db.session.commit()
+
+            schedules = [
+                WFHSchedule(application_id=applications[0].application_id, wfh_date=self.today + timedelta(days=1), status='Approved', manager_withdraw_reason=None),
+                # long before the default window
+                WFHSchedule(application_id=applications[1].application_id, wfh_date=self.today - timedelta(days=200), status='Approved', manager_withdraw_reason=None),
+            ]
+            db.session.add_all(schedules)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    def week(self, first_day):
+        return f"start={first_day}&end={first_day + timedelta(days=6)}"
+
+    def test_week_view(self):
+        for url in ('/api/schedule/team_schedule_manager/140894', '/api/schedule/team_schedule/140002',
+                    '/api/schedule/HRO_overall', '/api/schedule/HRO_wfh_count/140001'):
+            with self.subTest(url=url):
+                response = self.client.get(f"{url}?{self.week(self.today)}")
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual([day['date'] for day in response.json], [str(self.today + timedelta(days=offset)) for offset in range(7)])
+                self.assertEqual(response.json[1]['am']['wfh'], 1)
+
+    def test_date_bound_in_sql(self):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if 'wfh_schedule' in statement:
+                statements.append(statement)
+
+        with self.app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+            try:
+                self.client.get(f"/api/schedule/team_schedule/140002?{self.week(self.today)}")
+                self.client.get(f"/api/schedule/HRO_wfh_count/140001?{self.week(self.today)}")
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+        self.assertEqual(len(statements), 2)
+        for statement in statements:
+            self.assertIn('wfh_schedule.wfh_date >=', statement)
+            self.assertIn('wfh_schedule.wfh_date <=', statement)
+
+    def test_range_outside_capacity_window(self):
+        # the manager view falls back to a bounded query when the range leaves the cached window
+        first_day = self.today - timedelta(days=202)
+        response = self.client.get(f"/api/schedule/team_schedule_manager/140894?{self.week(first_day)}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json[2]['pm']['wfh'], 1)
+        self.assertEqual(response.json[2]['pm']['office'], 2)
+
+    def test_employee_cursor_paging(self):
+        url = f"/api/schedule/team_schedule_manager/140894?{self.week(self.today)}&limit=2"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([employee['id'] for employee in response.json[1]['am']['employees']], [140002, 140003])
+        # counts still cover the whole team
+        self.assertEqual(response.json[1]['am']['office'], 2)
+        self.assertEqual(response.headers['X-Next-Cursor'], '140003')
+
+        response = self.client.get(f"{url}&cursor=140003")
+        self.assertEqual([employee['id'] for employee in response.json[1]['am']['employees']], [140878])
+        self.assertEqual(response.json[1]['am']['employees'][0]['status'], 'WFH')
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+        # HRO lists only staff working from home, the page limits which of them are listed
+        response = self.client.get(f"/api/schedule/HRO_wfh_count/140001?{self.week(self.today)}&limit=1")
+        self.assertEqual(response.json[1]['am'], {'wfh': 1, 'office': 3, 'employees': []})
+        self.assertEqual(response.headers['X-Next-Cursor'], '140894')
+
+    def test_invalid_parameters(self):
+        for query in ('start=2024-13-01', f'start={self.today}&end={self.today - timedelta(days=1)}',
+                      f'start={self.today}&end={self.today + timedelta(days=400)}', 'limit=0', 'cursor=999999'):
+            with self.subTest(query=query):
+                response = self.client.get(f"/api/schedule/team_schedule/140002?{query}")
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json)
+
+if __name__ == '__main__':
+    unittest.main()
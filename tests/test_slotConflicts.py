@@ -0,0 +1,132 @@
+from datetime import date, timedelta
+import random
+import unittest
+from sqlalchemy import or_
+from app import create_app, db
+from app.models import Employee, WFHApplication, WFHSchedule
+from app.application.conflicts import SlotIndex, load_slot_indexes
+from app.application.queries import ACTIVE_STATUSES
+
+STATUSES = ('Approved', 'Pending_Approval', 'Pending_Withdrawal', 'Withdrawn', 'Rejected')
+SLOTS = ('AM', 'PM', 'FULL')
+STAFF_IDS = range(160001, 160007)
+FIRST_DAY = date(2025, 3, 3)
+
+class TestSlotIndex(unittest.TestCase):
+
+    def test_overlap(self):
+        index = SlotIndex()
+        index.add(FIRST_DAY, 'AM', 'am')
+        index.add(FIRST_DAY + timedelta(days=1), 'FULL', 'full')
+        self.assertEqual(index.overlapping(FIRST_DAY, 'AM'), ['am'])
+        self.assertEqual(index.overlapping(FIRST_DAY, 'FULL'), ['am'])
+        self.assertEqual(index.overlapping(FIRST_DAY, 'PM'), [])
+        self.assertEqual(index.overlapping(FIRST_DAY + timedelta(days=1), 'PM'), ['full'])
+        # neighbouring days never touch
+        self.assertFalse(index.conflicts(FIRST_DAY - timedelta(days=1), 'FULL'))
+        self.assertFalse(index.conflicts(FIRST_DAY + timedelta(days=2), 'AM'))
+        self.assertEqual(index.conflicting_dates('PM', [FIRST_DAY, FIRST_DAY + timedelta(days=1)]), [FIRST_DAY + timedelta(days=1)])
+
+    def test_covering(self):
+        index = SlotIndex()
+        index.add(FIRST_DAY, 'PM', 'pm')
+        index.add(FIRST_DAY + timedelta(days=1), 'FULL', 'full')
+        self.assertEqual(index.covering(FIRST_DAY, 'PM'), ['pm'])
+        # an afternoon does not cover the whole day
+        self.assertEqual(index.covering(FIRST_DAY, 'FULL'), [])
+        self.assertEqual(index.covering(FIRST_DAY + timedelta(days=1), 'AM'), ['full'])
+        self.assertEqual(index.covering(FIRST_DAY + timedelta(days=1), 'FULL'), ['full'])
+        self.assertEqual(len(index), 2)
+
+    def test_unknown_slot(self):
+        with self.assertRaises(KeyError):
+            SlotIndex().add(FIRST_DAY, 'EVENING')
+
+
+class TestSlotConflictsAgainstSQL(unittest.TestCase):
+    '''Random schedules, the SlotIndex answers compared with the SQL filters the apply and withdraw routes used.'''
+
+    @classmethod
+    def setUpClass(self):
+        self.app = create_app(test_config=True)
+        self.random = random.Random(20250303)
+
+        with self.app.app_context():
+            db.create_all()
+            self.populate_test_data(self)
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def populate_test_data(self):
+        db.session.add_all([
+            Employee(staff_id=staff_id, staff_fname='Staff', staff_lname=str(staff_id), dept='Sales', position='Account Manager',
+                     country='Singapore', email=f'staff.{staff_id}@allinone.com.sg', reporting_manager=160001, role=2)
+            for staff_id in STAFF_IDS
+        ])
+        for _ in range(300):
+            application = WFHApplication(staff_id=self.random.choice(STAFF_IDS), time_slot=self.random.choice(SLOTS),
+                                         staff_apply_reason='random')
+            db.session.add(application)
+            db.session.flush()
+            for day in self.random.sample(range(60), self.random.randint(1, 3)):
+                db.session.add(WFHSchedule(application_id=application.application_id, wfh_date=FIRST_DAY + timedelta(days=day),
+                                           status=self.random.choice(STATUSES)))
+        db.session.commit()
+
+    def sql_conflicting_dates(self, staff_id, time_slot, dates):
+        # the apply_wfh check: AM / PM against the same slot or FULL, FULL against any slot
+        query = db.session.query(WFHSchedule.wfh_date).join(WFHApplication).filter(
+            WFHApplication.staff_id == staff_id,
+            WFHSchedule.wfh_date.in_(dates),
+            WFHSchedule.status.in_(ACTIVE_STATUSES))
+        if time_slot != 'FULL':
+            query = query.filter(or_(WFHApplication.time_slot == time_slot, WFHApplication.time_slot == 'FULL'))
+        return sorted({row[0] for row in query})
+
+    def sql_approved_covering(self, staff_id, time_slot, wfh_date):
+        # the manager_withdrawal_wfh lookup
+        return sorted(schedule.wfh_id for schedule in db.session.query(WFHSchedule).join(WFHApplication).filter(
+            WFHApplication.staff_id == staff_id,
+            or_(WFHApplication.time_slot == time_slot, WFHApplication.time_slot == 'FULL'),
+            WFHSchedule.wfh_date == wfh_date,
+            WFHSchedule.status == 'Approved'))
+
+    def test_conflicting_dates_match_sql(self):
+        with self.app.app_context():
+            for case in range(200):
+                staff_id = self.random.choice(STAFF_IDS)
+                time_slot = self.random.choice(SLOTS)
+                first = FIRST_DAY + timedelta(days=self.random.randint(-5, 60))
+                dates = sorted({first + timedelta(days=self.random.randint(0, 30)) for _ in range(self.random.randint(1, 10))})
+                with self.subTest(case=case, staff_id=staff_id, time_slot=time_slot):
+                    index = load_slot_indexes([staff_id], dates[0], dates[-1])[staff_id]
+                    self.assertEqual(index.conflicting_dates(time_slot, dates), self.sql_conflicting_dates(staff_id, time_slot, dates))
+
+    def test_one_load_for_many_staff(self):
+        with self.app.app_context():
+            last = FIRST_DAY + timedelta(days=59)
+            indexes = load_slot_indexes(STAFF_IDS, FIRST_DAY, last)
+            dates = [FIRST_DAY + timedelta(days=day) for day in range(60)]
+            for staff_id in STAFF_IDS:
+                for time_slot in SLOTS:
+                    with self.subTest(staff_id=staff_id, time_slot=time_slot):
+                        self.assertEqual(indexes[staff_id].conflicting_dates(time_slot, dates),
+                                         self.sql_conflicting_dates(staff_id, time_slot, dates))
+
+    def test_covering_matches_sql(self):
+        with self.app.app_context():
+            for case in range(200):
+                staff_id = self.random.choice(STAFF_IDS)
+                time_slot = self.random.choice(SLOTS)
+                wfh_date = FIRST_DAY + timedelta(days=self.random.randint(0, 59))
+                with self.subTest(case=case, staff_id=staff_id, time_slot=time_slot, wfh_date=wfh_date):
+                    index = load_slot_indexes([staff_id], wfh_date, wfh_date, statuses=('Approved',), with_schedules=True)[staff_id]
+                    self.assertEqual(sorted(schedule.wfh_id for schedule in index.covering(wfh_date, time_slot)),
+                                     self.sql_approved_covering(staff_id, time_slot, wfh_date))
+
+if __name__ == '__main__':
+    unittest.main()
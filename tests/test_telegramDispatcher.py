@@ -0,0 +1,125 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+import threading
+import time
+import unittest
+from app import create_app
+from app.monitoring.dispatcher import TelegramDispatcher, init_telegram_dispatcher
+
+class TelegramStub(BaseHTTPRequestHandler):
+    # local stand-in for the Bot API: records every sendMessage call, answers after server.delay seconds
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode())
+        self.server.calls.append({'path': self.path, 'text': body['text'][0], 'chat_id': body['chat_id'][0], 'client': self.client_address})
+        time.sleep(self.server.delay)
+        payload = b'{"ok": true}'
+        self.send_response(self.server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+class TestTelegramDispatcher(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), TelegramStub)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.api_url = f'http://127.0.0.1:{self.server.server_port}'
+
+    @classmethod
+    def tearDownClass(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def setUp(self):
+        self.server.calls = []
+        self.server.delay = 0
+        self.server.status = 200
+
+    def dispatcher(self, **kwargs):
+        options = dict(api_url=self.api_url, max_queue=10, batch_seconds=0.1, timeout=2)
+        options.update(kwargs)
+        dispatcher = TelegramDispatcher('TOKEN', '42', **options)
+        self.addCleanup(dispatcher.close)
+        return dispatcher
+
+    def test_endpoint_returns_before_telegram_answers(self):
+        app = create_app(test_config=True)
+        app.config['TELEGRAM_API_URL'] = self.api_url
+        init_telegram_dispatcher(app, 'TOKEN', '42')
+        self.server.delay = 1
+
+        start = time.perf_counter()
+        response = app.test_client().get('/api/monitoring/telenoti/jack')
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(response.status_code, 200)
+
+        with app.app_context():
+            dispatcher = app.extensions['telegram_dispatcher']
+            self.assertTrue(dispatcher.flush(timeout=5))
+        self.assertEqual(len(self.server.calls), 1)
+        self.assertEqual(self.server.calls[0]['path'], '/botTOKEN/sendMessage')
+        self.assertIn('jack just logged in', self.server.calls[0]['text'])
+
+        response = app.test_client().get('/api/monitoring/telegram')
+        self.assertEqual(response.json['sent_messages'], 1)
+
+    def test_burst_sent_as_one_message(self):
+        dispatcher = self.dispatcher()
+        for number in range(5):
+            self.assertTrue(dispatcher.enqueue(f'login {number}'))
+        self.assertTrue(dispatcher.flush(timeout=5))
+
+        self.assertEqual([call['text'] for call in self.server.calls], ["\n".join(f'login {number}' for number in range(5))])
+        self.assertEqual((dispatcher.stats()['sent_batches'], dispatcher.stats()['sent_messages']), (1, 5))
+
+    def test_connection_reused(self):
+        dispatcher = self.dispatcher(batch_seconds=0)
+        for number in range(3):
+            dispatcher.enqueue(f'login {number}')
+            self.assertTrue(dispatcher.flush(timeout=5))
+        self.assertEqual(len(self.server.calls), 3)
+        # one keep-alive connection from the pooled session
+        self.assertEqual(len({call['client'] for call in self.server.calls}), 1)
+
+    def test_full_queue_drops(self):
+        self.server.delay = 0.5
+        dispatcher = self.dispatcher(max_queue=2, batch_seconds=0)
+        dispatcher.enqueue('first')
+        time.sleep(0.1)  # the worker is posting the first message
+        results = [dispatcher.enqueue(f'burst {number}') for number in range(4)]
+        self.assertEqual(results, [True, True, False, False])
+        self.assertEqual(dispatcher.stats()['dropped'], 2)
+        self.assertTrue(dispatcher.flush(timeout=5))
+
+    def test_failure_counted_without_token(self):
+        self.server.status = 500
+        dispatcher = self.dispatcher()
+        dispatcher.enqueue('login')
+        self.assertTrue(dispatcher.flush(timeout=5))
+        stats = dispatcher.stats()
+        self.assertEqual((stats['failed_batches'], stats['sent_batches']), (1, 0))
+        self.assertEqual(stats['last_error'], 'HTTPError 500')
+
+    def test_worker_survives_unexpected_error(self):
+        dispatcher = self.dispatcher(batch_seconds=0)
+        post = dispatcher._session.post
+        dispatcher._session.post = lambda *args, **kwargs: (_ for _ in ()).throw(ValueError('bad payload'))
+        dispatcher.enqueue('first')
+        self.assertTrue(dispatcher.flush(timeout=5))
+        self.assertEqual(dispatcher.stats()['last_error'], 'ValueError')
+
+        dispatcher._session.post = post
+        dispatcher.enqueue('second')
+        self.assertTrue(dispatcher.flush(timeout=5))
+        self.assertEqual([call['text'] for call in self.server.calls], ['second'])
+        self.assertEqual((dispatcher.stats()['failed_batches'], dispatcher.stats()['sent_batches']), (1, 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+from datetime import date, timedelta
+import unittest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import Employee, WFHApplication, WFHSchedule, WFHWithdrawal
+
+class TestWFHRequestQueryCount(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        # Set up the test client and in-memory database
+        self.app = create_app(test_config=True)
+        self.client = self.app.test_client()
+
+        # Push the application context and initialize the database
+        with self.app.app_context():
+            db.create_all()
+            self.populate_test_data(self)
+
+    @classmethod
+    def tearDownClass(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def populate_test_data(self):
+        try:
+            employees = [
+                Employee(staff_id=130002, staff_fname='Jack', staff_lname='Sim', dept='CEO', position='MD', country='Singapore', email='jack.sim@allinone.com.sg', reporting_manager=130002, role=1),
+                Employee(staff_id=140894, staff_fname='Rahim', staff_lname='Khalid', dept='Sales', position='Sales Manager', country='Singapore', email='Rahim.Khalid@allinone.com.sg', reporting_manager=130002, role=3),
+                Employee(staff_id=140878, staff_fname='James', staff_lname='Tong', dept='Sales', position='Account Manager', country='Singapore', email='James.Tong@allinone.com.sg', reporting_manager=140894, role=2),
+                Employee(staff_id=140002, staff_fname='Susan', staff_lname='Goh', dept='Sales', position='Account Manager', country='Singapore', email='Susan.Goh@allinone.com.sg', reporting_manager=140894, role=2),
+            ]
+            db.session.add_all(employees)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    def add_backlog(self, weeks):
+        # one recurring pending application per staff plus one pending withdrawal per staff
+        with self.app.app_context():
+            for staff_id, time_slot in ((140878, 'AM'), (140002, 'FULL')):
+                application = WFHApplication(staff_id=staff_id, time_slot=time_slot, staff_apply_reason='recurring backlog', manager_reject_reason=None)
+                db.session.add(application)
+                db.session.flush()
+                for week in range(weeks):
+                    db.session.add(WFHSchedule(application_id=application.application_id, wfh_date=date(2024, 10, 1) + timedelta(weeks=week), status='Pending_Approval', manager_withdraw_reason=None))
+
+                withdrawal_schedule = WFHSchedule(application_id=application.application_id, wfh_date=date(2024, 9, 1) + timedelta(weeks=weeks), status='Pending_Withdrawal', manager_withdraw_reason=None)
+                db.session.add(withdrawal_schedule)
+                db.session.flush()
+                db.session.add(WFHWithdrawal(wfh_id=withdrawal_schedule.wfh_id, staff_withdraw_reason='first reason', manager_reject_withdrawal_reason=None))
+                db.session.add(WFHWithdrawal(wfh_id=withdrawal_schedule.wfh_id, staff_withdraw_reason='latest reason', manager_reject_withdrawal_reason=None))
+            db.session.commit()
+
+    def count_request_queries(self):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with self.app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+            try:
+                response = self.client.get('api/application/wfhrequest/140894')
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+        self.assertEqual(response.status_code, 200)
+        return len(statements), response.json
+
+    def test_query_count_constant_as_backlog_grows(self):
+        self.add_backlog(2)
+        small_count, small_result = self.count_request_queries()
+
+        self.add_backlog(20)
+        large_count, large_result = self.count_request_queries()
+
+        self.assertGreater(sum(len(entry['listofschedule']) for entry in large_result), sum(len(entry['listofschedule']) for entry in small_result))
+        self.assertEqual(small_count, large_count)
+        self.assertLessEqual(large_count, 3)
+
+        # the latest withdrawal reason is used for pending withdrawals
+        withdrawals = [schedule for entry in large_result for schedule in entry['listofschedule'] if schedule['class'] == 'Pending_Withdrawal']
+        self.assertTrue(withdrawals)
+        for schedule in withdrawals:
+            self.assertEqual(schedule['description'], 'latest reason')
+
+if __name__ == '__main__':
+    unittest.main()